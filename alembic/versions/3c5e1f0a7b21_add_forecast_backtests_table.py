@@ -0,0 +1,50 @@
+"""Add forecast_backtests table
+
+Revision ID: 3c5e1f0a7b21
+Revises: 9941750a2837
+Create Date: 2026-02-10 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e1f0a7b21'
+down_revision: Union[str, Sequence[str], None] = '9941750a2837'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db roda create_all antes das migrações: a tabela pode já existir
+    if sa.inspect(op.get_bind()).has_table('forecast_backtests'):
+        return
+
+    op.create_table(
+        'forecast_backtests',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('data_execucao', sa.DateTime(), nullable=True),
+        sa.Column('grao', sa.String(length=20), nullable=False),
+        sa.Column('chave_serie', sa.String(length=200), nullable=False),
+        sa.Column('metodo', sa.String(length=20), nullable=False),
+        sa.Column('horizonte', sa.Integer(), nullable=True),
+        sa.Column('n_origens', sa.Integer(), nullable=True),
+        sa.Column('mape', sa.Float(), nullable=True),
+        sa.Column('wape', sa.Float(), nullable=True),
+        sa.Column('vies', sa.Float(), nullable=True),
+        sa.Column('n_pontos', sa.Integer(), nullable=True),
+        sa.Column('tempo_metodo_s', sa.Float(), nullable=True),
+        sa.Column('melhor', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_backtest_grao_serie', 'forecast_backtests', ['grao', 'chave_serie'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_backtest_grao_serie', table_name='forecast_backtests')
+    op.drop_table('forecast_backtests')
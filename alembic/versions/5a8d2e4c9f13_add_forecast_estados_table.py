@@ -0,0 +1,45 @@
+"""Add forecast_estados table
+
+Revision ID: 5a8d2e4c9f13
+Revises: 3c5e1f0a7b21
+Create Date: 2026-02-12 14:27:05.603918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a8d2e4c9f13'
+down_revision: Union[str, Sequence[str], None] = '3c5e1f0a7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db roda create_all antes das migrações: a tabela pode já existir
+    if sa.inspect(op.get_bind()).has_table('forecast_estados'):
+        return
+
+    op.create_table(
+        'forecast_estados',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('cenario_id', sa.Integer(), nullable=False),
+        sa.Column('metodo', sa.String(length=20), nullable=False),
+        sa.Column('agregacao', sa.String(length=20), nullable=True),
+        sa.Column('ultimo_mes', sa.String(length=7), nullable=True),
+        sa.Column('n_series', sa.Integer(), nullable=True),
+        sa.Column('estado', sa.LargeBinary(), nullable=False),
+        sa.Column('data_atualizacao', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_forecast_estados_cenario_id'), 'forecast_estados', ['cenario_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_forecast_estados_cenario_id'), table_name='forecast_estados')
+    op.drop_table('forecast_estados')
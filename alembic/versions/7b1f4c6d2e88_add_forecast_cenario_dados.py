@@ -0,0 +1,50 @@
+"""Add forecast_cenario_dados table and scenario storage format
+
+Revision ID: 7b1f4c6d2e88
+Revises: 5a8d2e4c9f13
+Create Date: 2026-02-13 10:41:52.274113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1f4c6d2e88'
+down_revision: Union[str, Sequence[str], None] = '5a8d2e4c9f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db roda create_all antes das migrações: tabela/colunas podem já existir
+    inspector = sa.inspect(op.get_bind())
+
+    colunas = {c['name'] for c in inspector.get_columns('forecast_cenarios')}
+    with op.batch_alter_table('forecast_cenarios', schema=None) as batch_op:
+        if 'formato' not in colunas:
+            batch_op.add_column(sa.Column('formato', sa.String(length=10), nullable=True, server_default='linhas'))
+        if 'n_linhas' not in colunas:
+            batch_op.add_column(sa.Column('n_linhas', sa.Integer(), nullable=True))
+
+    if not inspector.has_table('forecast_cenario_dados'):
+        op.create_table(
+            'forecast_cenario_dados',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('cenario_id', sa.Integer(), nullable=False),
+            sa.Column('dados', sa.LargeBinary(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_forecast_cenario_dados_cenario_id'), 'forecast_cenario_dados', ['cenario_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_forecast_cenario_dados_cenario_id'), table_name='forecast_cenario_dados')
+    op.drop_table('forecast_cenario_dados')
+    with op.batch_alter_table('forecast_cenarios', schema=None) as batch_op:
+        batch_op.drop_column('n_linhas')
+        batch_op.drop_column('formato')
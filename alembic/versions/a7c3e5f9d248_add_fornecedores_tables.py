@@ -0,0 +1,61 @@
+"""Add fornecedores and fornecedores_alias tables
+
+Revision ID: a7c3e5f9d248
+Revises: f3b8d2a6c915
+Create Date: 2026-02-20 11:05:39.184620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e5f9d248'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d2a6c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db roda create_all antes das migrações: as tabelas podem já existir.
+    # Sem backfill: o primeiro upload do Razão (atualizar_fornecedores) cadastra as grafias.
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('fornecedores'):
+        op.create_table(
+            'fornecedores',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('nome_canonico', sa.String(length=200), nullable=False),
+            sa.Column('chave', sa.String(length=200), nullable=False),
+            sa.Column('data_criacao', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_fornecedores_chave'), 'fornecedores', ['chave'], unique=False)
+
+    if not inspector.has_table('fornecedores_alias'):
+        op.create_table(
+            'fornecedores_alias',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('nome', sa.String(length=200), nullable=False),
+            sa.Column('chave', sa.String(length=200), nullable=False),
+            sa.Column('fornecedor_id', sa.Integer(), nullable=False),
+            sa.Column('similaridade', sa.Float(), nullable=True),
+            sa.Column('data_criacao', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_fornecedores_alias_nome'), 'fornecedores_alias', ['nome'], unique=True)
+        op.create_index(op.f('ix_fornecedores_alias_chave'), 'fornecedores_alias', ['chave'], unique=False)
+        op.create_index(op.f('ix_fornecedores_alias_fornecedor_id'), 'fornecedores_alias', ['fornecedor_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_fornecedores_alias_fornecedor_id'), table_name='fornecedores_alias')
+    op.drop_index(op.f('ix_fornecedores_alias_chave'), table_name='fornecedores_alias')
+    op.drop_index(op.f('ix_fornecedores_alias_nome'), table_name='fornecedores_alias')
+    op.drop_table('fornecedores_alias')
+    op.drop_index(op.f('ix_fornecedores_chave'), table_name='fornecedores')
+    op.drop_table('fornecedores')
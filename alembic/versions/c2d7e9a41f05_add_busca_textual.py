@@ -0,0 +1,30 @@
+"""Add full-text search indexes on razao_realizados and lancamentos_realizados
+
+Revision ID: c2d7e9a41f05
+Revises: 7b1f4c6d2e88
+Create Date: 2026-02-16 09:12:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from database.busca_textual import criar_indices_textuais, remover_indices_textuais
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d7e9a41f05'
+down_revision: Union[str, Sequence[str], None] = '7b1f4c6d2e88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite: FTS5 + triggers; Postgres: índice GIN de tsvector (idempotente)
+    criar_indices_textuais(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    remover_indices_textuais(op.get_bind())
@@ -0,0 +1,39 @@
+"""Add razao_realizado_id to provisoes (reconciliation with the Razao)
+
+Revision ID: d5f3b8c2a614
+Revises: c2d7e9a41f05
+Create Date: 2026-02-17 14:26:08.903517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f3b8c2a614'
+down_revision: Union[str, Sequence[str], None] = 'c2d7e9a41f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db roda create_all antes das migrações: a coluna pode já existir
+    inspector = sa.inspect(op.get_bind())
+    colunas = {c['name'] for c in inspector.get_columns('provisoes')}
+    indices = {i['name'] for i in inspector.get_indexes('provisoes')}
+
+    with op.batch_alter_table('provisoes', schema=None) as batch_op:
+        if 'razao_realizado_id' not in colunas:
+            batch_op.add_column(sa.Column('razao_realizado_id', sa.Integer(), nullable=True))
+        if op.f('ix_provisoes_razao_realizado_id') not in indices:
+            batch_op.create_index(op.f('ix_provisoes_razao_realizado_id'), ['razao_realizado_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('provisoes', schema=None) as batch_op:
+        batch_op.drop_index(op.f('ix_provisoes_razao_realizado_id'))
+        batch_op.drop_column('razao_realizado_id')
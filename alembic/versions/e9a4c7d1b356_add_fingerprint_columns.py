@@ -0,0 +1,60 @@
+"""Add fingerprint columns to lancamentos_realizados and razao_realizados
+
+Revision ID: e9a4c7d1b356
+Revises: d5f3b8c2a614
+Create Date: 2026-02-18 10:41:52.276031
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import pandas as pd
+import sqlalchemy as sa
+
+from database.fingerprint import CAMPOS_FINGERPRINT, TAMANHO_FINGERPRINT, TAMANHO_LOTE, calcular_fingerprints
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9a4c7d1b356'
+down_revision: Union[str, Sequence[str], None] = 'd5f3b8c2a614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABELAS = ['lancamentos_realizados', 'razao_realizados']
+
+
+def _preencher(conn, tabela: str) -> None:
+    """Calcula o fingerprint das linhas existentes (ordem de id = ordem de carga)."""
+    colunas = ", ".join(['id'] + CAMPOS_FINGERPRINT[tabela])
+    df = pd.read_sql(sa.text(f"SELECT {colunas} FROM {tabela} ORDER BY id"), conn)
+    if df.empty:
+        return
+    df['fingerprint'] = calcular_fingerprints(df, tabela)
+    atualizacao = sa.text(f"UPDATE {tabela} SET fingerprint = :fingerprint WHERE id = :id")
+    registros = df[['id', 'fingerprint']].to_dict(orient='records')
+    for i in range(0, len(registros), TAMANHO_LOTE):
+        conn.execute(atualizacao, registros[i:i + TAMANHO_LOTE])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    for tabela in TABELAS:
+        # init_db roda create_all antes das migrações: a coluna pode já existir
+        colunas = {c['name'] for c in inspector.get_columns(tabela)}
+        indices = {i['name'] for i in inspector.get_indexes(tabela)}
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            if 'fingerprint' not in colunas:
+                batch_op.add_column(sa.Column('fingerprint', sa.String(TAMANHO_FINGERPRINT), nullable=True))
+            if op.f(f'ix_{tabela}_fingerprint') not in indices:
+                batch_op.create_index(op.f(f'ix_{tabela}_fingerprint'), ['fingerprint'], unique=False)
+        _preencher(conn, tabela)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for tabela in TABELAS:
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            batch_op.drop_index(op.f(f'ix_{tabela}_fingerprint'))
+            batch_op.drop_column('fingerprint')
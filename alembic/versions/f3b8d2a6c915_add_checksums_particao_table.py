@@ -0,0 +1,46 @@
+"""Add checksums_particao table
+
+Revision ID: f3b8d2a6c915
+Revises: e9a4c7d1b356
+Create Date: 2026-02-19 08:53:14.620487
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2a6c915'
+down_revision: Union[str, Sequence[str], None] = 'e9a4c7d1b356'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # init_db roda create_all antes das migrações: a tabela pode já existir
+    if sa.inspect(op.get_bind()).has_table('checksums_particao'):
+        return
+
+    # Sem backfill: mês sem checksum é tratado como alterado na próxima carga
+    op.create_table(
+        'checksums_particao',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('tabela', sa.String(length=50), nullable=False),
+        sa.Column('ano', sa.Integer(), nullable=False),
+        sa.Column('mes', sa.String(length=3), nullable=False),
+        sa.Column('checksum', sa.String(length=32), nullable=False),
+        sa.Column('linhas', sa.Integer(), nullable=False),
+        sa.Column('valor_total', sa.Float(), nullable=True),
+        sa.Column('data_atualizacao', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_checksum_particao', 'checksums_particao', ['tabela', 'ano', 'mes'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_checksum_particao', table_name='checksums_particao')
+    op.drop_table('checksums_particao')
@@ -15,6 +15,8 @@ from .referencias_manager import (
     carregar_orcamento_v1_2026,
     carregar_centros_gasto,
     carregar_contas_contabeis,
+    carregar_de_para_contas,
+    mapear_contas_pl,
     
     # Hierarquia
     get_codigo_pai,
@@ -27,6 +29,11 @@ from .referencias_manager import (
     # Validação
     validar_centro_gasto,
     validar_conta_contabil,
+    normalizar_codigos_centro,
+    normalizar_codigos_conta,
+    enriquecer_centros_lote,
+    validar_contas_lote,
+    validar_lote,
     
     # Busca
     buscar_centros_gasto,
@@ -50,6 +57,8 @@ __all__ = [
     'carregar_orcamento_v1_2026',
     'carregar_centros_gasto',
     'carregar_contas_contabeis',
+    'carregar_de_para_contas',
+    'mapear_contas_pl',
     'get_codigo_pai',
     'get_classe',
     'get_nome_classe',
@@ -58,6 +67,11 @@ __all__ = [
     'get_ativos_unicos',
     'validar_centro_gasto',
     'validar_conta_contabil',
+    'normalizar_codigos_centro',
+    'normalizar_codigos_conta',
+    'enriquecer_centros_lote',
+    'validar_contas_lote',
+    'validar_lote',
     'buscar_centros_gasto',
     'buscar_contas_contabeis',
     'get_orcamento_por_centro',
@@ -26,11 +26,13 @@ from data.referencias_manager import (
     carregar_contas_contabeis,
     COLUNAS_MESES_ORC_2026,
     MESES_ORDEM,
+    MESES_NUM_MAP,
     ATIVOS_SEM_HIERARQUIA
 )
 
 from database.crud import (
     listar_lancamentos,
+    obter_totais_por_folha,
     obter_estatisticas_gerais
 )
 
@@ -242,6 +244,30 @@ def get_realizado_por_conta(mes: str = None, ano: int = 2026) -> pd.DataFrame:
     return df_agrupado
 
 
+@st.cache_data(ttl=900)
+def get_historico_folhas(anos: Tuple[int, ...] = (2025, 2026)) -> pd.DataFrame:
+    """
+    Histórico realizado no grão centro × conta × mês (base do forecast granular).
+    
+    Args:
+        anos: Anos a incluir
+    
+    Returns:
+        DataFrame com: data_ref, centro_gasto_codigo, conta_contabil_codigo, valor
+    """
+    df = obter_totais_por_folha(list(anos))
+    
+    if df.empty:
+        return pd.DataFrame(columns=['data_ref', 'centro_gasto_codigo', 'conta_contabil_codigo', 'valor'])
+    
+    df['data_ref'] = pd.to_datetime(dict(
+        year=df['ano'], month=df['mes'].map(MESES_NUM_MAP), day=1
+    ), errors='coerce')
+    df = df.rename(columns={'total_valor': 'valor'})
+    
+    return df.dropna(subset=['data_ref'])[['data_ref', 'centro_gasto_codigo', 'conta_contabil_codigo', 'valor']]
+
+
 # =============================================================================
 # FUNÇÕES DE COMPARAÇÃO
 # =============================================================================
@@ -0,0 +1,254 @@
+"""
+data/dimensoes.py
+=================
+Codificação das colunas de dimensão como pandas Categorical.
+
+O `pl_df` em formato longo repete os mesmos códigos de centro, descrições
+de conta, meses e tipos de valor em cada linha, e é mantido por usuário em
+`st.session_state`. Este módulo mantém um registro de categorias ÚNICO por
+processo (append-only) para cada dimensão, de modo que:
+
+- frames diferentes compartilham o mesmo dicionário de categorias
+  (concat/merge continuam categóricos e operam sobre códigos inteiros);
+- novos valores apenas acrescentam categorias no fim, sem renumerar
+  os códigos já emitidos.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from data.referencias_manager import MESES_ORDEM
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Coluna -> dimensão (colunas sinônimas compartilham o mesmo dicionário)
+COLUNAS_DIMENSAO: Dict[str, str] = {
+    'codigo_centro_gasto': 'centro_gasto',
+    'centro_gasto_codigo': 'centro_gasto',
+    'centro_gasto_nome': 'centro_gasto_nome',
+    'conta_contabil': 'conta_contabil',
+    'conta_contabil_codigo': 'conta_contabil_codigo',
+    'mes': 'mes',
+    'tipo_valor': 'tipo_valor',
+    'ativo': 'ativo',
+    'base': 'base',
+    'regional': 'regional',
+}
+
+# Dimensões de domínio fechado e ordenado (não crescem)
+DIMENSOES_FIXAS: Dict[str, List[str]] = {
+    'mes': MESES_ORDEM,
+}
+
+# Valores conhecidos de antemão (ordem estável entre execuções)
+VALORES_INICIAIS: Dict[str, List[str]] = {
+    'tipo_valor': ['Realizado', 'Budget V1', 'Budget V3', 'LY - Actual'],
+}
+
+_CATEGORIAS: Dict[str, pd.Index] = {}
+_LOCK = threading.Lock()
+
+
+# =============================================================================
+# REGISTRO DE CATEGORIAS
+# =============================================================================
+
+def get_categorias(dimensao: str) -> pd.Index:
+    """
+    Retorna as categorias atuais de uma dimensão.
+
+    Args:
+        dimensao: Nome da dimensão (ex: 'centro_gasto', 'mes')
+
+    Returns:
+        pd.Index com as categorias na ordem de registro
+    """
+    with _LOCK:
+        return _get_categorias_sem_lock(dimensao)
+
+
+def _get_categorias_sem_lock(dimensao: str) -> pd.Index:
+    if dimensao in DIMENSOES_FIXAS:
+        return pd.Index(DIMENSOES_FIXAS[dimensao], dtype=object)
+    if dimensao not in _CATEGORIAS:
+        _CATEGORIAS[dimensao] = pd.Index(VALORES_INICIAIS.get(dimensao, []), dtype=object)
+    return _CATEGORIAS[dimensao]
+
+
+def registrar_valores(dimensao: str, valores: Iterable) -> pd.Index:
+    """
+    Acrescenta novos valores ao dicionário de uma dimensão (append-only).
+
+    Args:
+        dimensao: Nome da dimensão
+        valores: Valores observados (nulos são ignorados)
+
+    Returns:
+        pd.Index com as categorias atualizadas
+    """
+    if dimensao in DIMENSOES_FIXAS:
+        return get_categorias(dimensao)
+
+    distintos = pd.Index(pd.unique(pd.Series(list(valores), dtype=object).dropna()), dtype=object)
+    with _LOCK:
+        atuais = _get_categorias_sem_lock(dimensao)
+        novos = distintos.difference(atuais, sort=False)
+        if len(novos):
+            _CATEGORIAS[dimensao] = atuais.append(novos)
+        return _CATEGORIAS[dimensao]
+
+
+# =============================================================================
+# CODIFICAÇÃO
+# =============================================================================
+
+def _como_texto(serie: pd.Series) -> pd.Series:
+    """Converte valores não nulos para str (mantém os nulos)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(object)
+    return serie.where(serie.isna(), serie.astype(str))
+
+
+def codificar_coluna(serie: pd.Series, dimensao: str) -> pd.Series:
+    """
+    Converte uma coluna para Categorical com as categorias do processo.
+
+    Args:
+        serie: Coluna de entrada (object/str ou já categórica)
+        dimensao: Nome da dimensão
+
+    Returns:
+        Series categórica (mesmo índice)
+    """
+    ordenada = dimensao in DIMENSOES_FIXAS
+
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Já categórica: só registra as categorias que faltam e realinha
+        categorias = registrar_valores(dimensao, [str(c) for c in serie.cat.categories])
+        if list(serie.cat.categories) == list(categorias[:len(serie.cat.categories)]):
+            return serie.cat.set_categories(categorias, ordered=ordenada)
+
+    texto = _como_texto(serie)
+    categorias = registrar_valores(dimensao, texto.unique())
+    return pd.Series(
+        pd.Categorical(texto, categories=categorias, ordered=ordenada),
+        index=serie.index,
+        name=serie.name
+    )
+
+
+def codificar_dimensoes(df: pd.DataFrame, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Codifica as colunas de dimensão de um DataFrame.
+
+    Args:
+        df: DataFrame de entrada (alterado e retornado)
+        colunas: Colunas a codificar (padrão: todas de COLUNAS_DIMENSAO presentes)
+
+    Returns:
+        O mesmo DataFrame com as colunas de dimensão categóricas
+    """
+    if df is None or df.empty:
+        return df
+
+    if colunas is None:
+        colunas = [c for c in COLUNAS_DIMENSAO if c in df.columns]
+
+    for col in colunas:
+        if col in df.columns:
+            df[col] = codificar_coluna(df[col], COLUNAS_DIMENSAO.get(col, col))
+    return df
+
+
+def alinhar_categorias(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Estende as colunas categóricas para o dicionário atual do processo.
+
+    Frames codificados antes de novas categorias serem registradas (ex: um
+    resultado em cache) passam a ter exatamente as mesmas categorias que os
+    frames novos, o que mantém o concat categórico.
+
+    Args:
+        df: DataFrame codificado
+
+    Returns:
+        O mesmo DataFrame com categorias alinhadas
+    """
+    if df is None or df.empty:
+        return df
+    for col, dimensao in COLUNAS_DIMENSAO.items():
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = codificar_coluna(df[col], dimensao)
+    return df
+
+
+def concatenar_dimensoes(dfs: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    pd.concat preservando as colunas de dimensão como Categorical.
+
+    Args:
+        dfs: Lista de DataFrames (codificados ou não)
+
+    Returns:
+        DataFrame concatenado e codificado
+    """
+    dfs = [codificar_dimensoes(df.copy()) for df in dfs if df is not None and not df.empty]
+    if not dfs:
+        return pd.DataFrame()
+    dfs = [alinhar_categorias(df) for df in dfs]
+    return pd.concat(dfs, ignore_index=True)
+
+
+def decodificar_dimensoes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte colunas categóricas de volta para object.
+
+    Usado nas saídas pequenas (agregados) que são ordenadas ou preenchidas
+    por código legado que espera strings.
+
+    Args:
+        df: DataFrame (alterado e retornado)
+
+    Returns:
+        O mesmo DataFrame sem colunas categóricas de dimensão
+    """
+    if df is None or df.empty:
+        return df
+    for col in COLUNAS_DIMENSAO:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+    return df
+
+
+def preencher_nulos(serie: pd.Series, valor: str) -> pd.Series:
+    """
+    fillna seguro para colunas categóricas (registra o valor como categoria).
+
+    Args:
+        serie: Coluna (categórica ou não)
+        valor: Valor de preenchimento
+
+    Returns:
+        Series com nulos preenchidos
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        dimensao = COLUNAS_DIMENSAO.get(serie.name, serie.name)
+        if dimensao in DIMENSOES_FIXAS:
+            return serie.astype(object).fillna(valor)
+        registrar_valores(dimensao, [valor])
+        serie = codificar_coluna(serie, dimensao)
+    return serie.fillna(valor)
+
+
+def uso_memoria_mb(df: pd.DataFrame) -> float:
+    """Memória ocupada pelo DataFrame (MB, incluindo strings)."""
+    if df is None or df.empty:
+        return 0.0
+    return round(df.memory_usage(deep=True).sum() / 1024 ** 2, 2)
@@ -0,0 +1,344 @@
+"""
+data/pl_tensor.py
+=================
+Representação densa do P&L para pivots, DRE e KPIs.
+
+O `pl_df` em formato longo (uma linha por centro × conta × mês × tipo × ano)
+é convertido uma única vez para um array NumPy com shape
+[linha, mes, tipo_valor, ano], onde "linha" é a combinação
+centro de gasto × conta contábil. Filtros viram máscaras sobre o eixo de
+linhas e pivots/somas viram reduções de eixo, sem `query()` nem
+`pivot_table` sobre milhões de linhas.
+
+A conversão de volta para formato longo (`to_long`) é feita sob demanda.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data.referencias_manager import MESES_ORDEM, MESES_NUM_MAP
+from data.dimensoes import codificar_dimensoes
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Chave de uma linha do tensor (atributos descritivos vêm junto)
+CHAVE_LINHA = ['codigo_centro_gasto', 'conta_contabil']
+
+# Atributos opcionais de linha preservados quando presentes no pl_df
+ATRIBUTOS_LINHA = ['centro_gasto_nome', 'conta_contabil_codigo']
+
+# Eixos do tensor além das linhas
+EIXOS = ['mes', 'tipo_valor', 'ano']
+
+
+# =============================================================================
+# CLASSE PRINCIPAL
+# =============================================================================
+
+class PLTensor:
+    """
+    P&L armazenado como array [linha, mes, tipo_valor, ano].
+
+    Atributos:
+        linhas: DataFrame com os atributos de cada linha (índice 0..L-1)
+        meses: Rótulos do eixo de meses (MESES_ORDEM)
+        tipos: Rótulos do eixo de tipo de valor
+        anos: Rótulos do eixo de anos (ordenados)
+        valores: ndarray float64 com os valores
+        presente: ndarray bool indicando células existentes no pl_df
+    """
+
+    def __init__(self, linhas: pd.DataFrame, tipos: List[str], anos: List[int],
+                 valores: np.ndarray, presente: np.ndarray):
+        self.linhas = linhas.reset_index(drop=True)
+        self.meses = list(MESES_ORDEM)
+        self.tipos = list(tipos)
+        self.anos = list(anos)
+        self.valores = valores
+        self.presente = presente
+
+    # -------------------------------------------------------------------------
+    # CONSTRUÇÃO
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def from_long(cls, df: pd.DataFrame) -> 'PLTensor':
+        """
+        Constrói o tensor a partir do pl_df em formato longo.
+
+        Registros repetidos na mesma célula seguem a regra "último vence",
+        equivalente a drop_duplicates(keep='last') na chave
+        centro × conta × mês × tipo × ano.
+
+        Args:
+            df: DataFrame com codigo_centro_gasto, conta_contabil, mes,
+                tipo_valor, ano e valor
+
+        Returns:
+            PLTensor
+        """
+        if df is None or df.empty:
+            return cls(pd.DataFrame(columns=CHAVE_LINHA), [], [],
+                       np.zeros((0, 12, 0, 0)), np.zeros((0, 12, 0, 0), dtype=bool))
+
+        mes_idx = pd.Categorical(df['mes'].astype(object), categories=MESES_ORDEM).codes
+        validos = mes_idx >= 0
+        if not validos.all():
+            df = df[validos]
+            mes_idx = mes_idx[validos]
+
+        grupos = df.groupby(CHAVE_LINHA, observed=True, sort=False, dropna=False)
+        linha_idx = grupos.ngroup().to_numpy()
+
+        atributos = [c for c in ATRIBUTOS_LINHA if c in df.columns]
+        linhas = grupos[atributos].first().reset_index() if atributos else grupos.size().reset_index()[CHAVE_LINHA]
+        for col in linhas.columns:
+            if isinstance(linhas[col].dtype, pd.CategoricalDtype):
+                linhas[col] = linhas[col].astype(object)
+
+        tipo_idx, tipos = pd.factorize(df['tipo_valor'].astype(object), sort=False)
+        ano_idx, anos = pd.factorize(df['ano'], sort=True)
+
+        shape = (len(linhas), len(MESES_ORDEM), len(tipos), len(anos))
+        valores = np.zeros(shape, dtype=np.float64)
+        presente = np.zeros(shape, dtype=bool)
+
+        celula = np.ravel_multi_index((linha_idx, mes_idx, tipo_idx, ano_idx), shape)
+        numeros = pd.to_numeric(df['valor'], errors='coerce').fillna(0).to_numpy()
+        # Células repetidas: mantém só a última ocorrência (a ordem da atribuição
+        # com índices repetidos não é garantida pelo NumPy)
+        _, primeira_invertida = np.unique(celula[::-1], return_index=True)
+        manter = len(celula) - 1 - primeira_invertida
+        valores.flat[celula[manter]] = numeros[manter]
+        presente.flat[celula[manter]] = True
+
+        return cls(linhas, list(tipos), [int(a) for a in anos], valores, presente)
+
+    # -------------------------------------------------------------------------
+    # SELEÇÃO
+    # -------------------------------------------------------------------------
+
+    def mascara_linhas(self, **filtros) -> np.ndarray:
+        """
+        Máscara booleana sobre o eixo de linhas.
+
+        Args:
+            **filtros: coluna=valor ou coluna=[valores] (atributos de linha)
+
+        Returns:
+            ndarray bool de tamanho L
+        """
+        mascara = np.ones(len(self.linhas), dtype=bool)
+        for coluna, valor in filtros.items():
+            serie = self.linhas[coluna]
+            if isinstance(valor, (list, tuple, set, np.ndarray, pd.Index)):
+                mascara &= serie.isin(list(valor)).to_numpy()
+            else:
+                mascara &= (serie == valor).to_numpy()
+        return mascara
+
+    def _indices(self, rotulos: List, selecao: Optional[Sequence]) -> np.ndarray:
+        if selecao is None:
+            return np.arange(len(rotulos))
+        if isinstance(selecao, (str, int, np.integer)):
+            selecao = [selecao]
+        posicoes = {r: i for i, r in enumerate(rotulos)}
+        return np.array([posicoes[s] for s in selecao if s in posicoes], dtype=int)
+
+    def _recortar(self, tipos=None, anos=None, meses=None, linhas=None, absoluto: bool = False):
+        """Recorta valores/presença para os filtros informados."""
+        idx_linhas = np.arange(len(self.linhas)) if linhas is None else np.flatnonzero(linhas)
+        idx = np.ix_(
+            idx_linhas,
+            self._indices(self.meses, meses),
+            self._indices(self.tipos, tipos),
+            self._indices(self.anos, anos),
+        )
+        valores = self.valores[idx]
+        if absoluto:
+            valores = np.abs(valores)
+        return idx, valores, self.presente[idx]
+
+    # -------------------------------------------------------------------------
+    # REDUÇÕES
+    # -------------------------------------------------------------------------
+
+    def total(self, tipos=None, anos=None, meses=None, linhas=None) -> float:
+        """
+        Soma dos valores para a seleção.
+
+        Args:
+            tipos: Tipo(s) de valor (None = todos)
+            anos: Ano(s) (None = todos)
+            meses: Mês(es) (None = todos)
+            linhas: Máscara de linhas (None = todas)
+
+        Returns:
+            float com o total
+        """
+        _, valores, _ = self._recortar(tipos, anos, meses, linhas)
+        return float(valores.sum())
+
+    def ultimo_mes_com_valor(self, tipos='Realizado', anos=None, linhas=None) -> Optional[str]:
+        """
+        Último mês com algum valor diferente de zero (ex: último mês realizado).
+
+        Args:
+            tipos: Tipo(s) de valor considerados
+            anos: Ano(s) considerados (None = todos)
+            linhas: Máscara de linhas (None = todas)
+
+        Returns:
+            Sigla do mês (JAN..DEZ) ou None
+        """
+        (_, idx_meses, _, _), valores, _ = self._recortar(tipos, anos, None, linhas)
+        com_valor = (valores != 0).any(axis=(0, 2, 3))
+        if not com_valor.any():
+            return None
+        return self.meses[int(idx_meses.ravel()[np.flatnonzero(com_valor)[-1]])]
+
+    def agregar(self, por: List[str], tipos=None, anos=None, meses=None,
+                linhas=None, absoluto: bool = False) -> pd.DataFrame:
+        """
+        Agregação (soma) por atributos de linha e/ou eixos do tensor.
+
+        Os eixos fora de `por` são reduzidos antes do agrupamento das linhas,
+        de modo que o trabalho é proporcional ao número de linhas do tensor,
+        não ao tamanho do pl_df.
+
+        Args:
+            por: Colunas de agrupamento (atributos de linha, 'mes',
+                 'tipo_valor', 'ano')
+            tipos, anos, meses, linhas: Filtros (ver `total`)
+            absoluto: Soma de valores absolutos por célula
+
+        Returns:
+            DataFrame com as colunas de `por` + valor. Grupos sem nenhuma
+            célula presente no pl_df são omitidos (como em um groupby).
+        """
+        (idx_l, idx_m, idx_t, idx_a), valores, presente = self._recortar(tipos, anos, meses, linhas, absoluto)
+        contagem = presente.astype(np.int64)
+
+        # 1. Reduzir eixos que não estão em `por`
+        eixos_reduzir = tuple(i + 1 for i, eixo in enumerate(EIXOS) if eixo not in por)
+        if eixos_reduzir:
+            valores = valores.sum(axis=eixos_reduzir)
+            contagem = contagem.sum(axis=eixos_reduzir)
+
+        # 2. Agrupar linhas pelos atributos pedidos
+        atributos = [p for p in por if p not in EIXOS]
+        if atributos:
+            chaves = self.linhas.iloc[idx_l.ravel()][atributos].reset_index(drop=True)
+            codigos = chaves.groupby(atributos, sort=False, dropna=False).ngroup().to_numpy()
+            n_grupos = int(codigos.max()) + 1 if len(codigos) else 0
+            # Primeira ocorrência de cada grupo, na mesma ordem do ngroup
+            grupos = chaves.groupby(atributos, sort=False, dropna=False).head(1).reset_index(drop=True)
+            soma = np.zeros((n_grupos,) + valores.shape[1:])
+            n = np.zeros((n_grupos,) + valores.shape[1:], dtype=np.int64)
+            np.add.at(soma, codigos, valores)
+            np.add.at(n, codigos, contagem)
+        else:
+            grupos = pd.DataFrame(index=[0])
+            soma = valores.sum(axis=0, keepdims=True)
+            n = contagem.sum(axis=0, keepdims=True)
+
+        # 3. Expandir para formato longo (tamanho = grupos × eixos mantidos)
+        eixos_mantidos = [eixo for eixo in EIXOS if eixo in por]
+        rotulos = {
+            'mes': np.array(self.meses, dtype=object)[idx_m.ravel()],
+            'tipo_valor': np.array(self.tipos, dtype=object)[idx_t.ravel()],
+            'ano': np.array(self.anos)[idx_a.ravel()],
+        }
+        posicoes = np.indices(soma.shape).reshape(soma.ndim, -1)
+        resultado = grupos.iloc[posicoes[0]].reset_index(drop=True) if atributos else pd.DataFrame(index=range(posicoes.shape[1]))
+        for i, eixo in enumerate(eixos_mantidos):
+            resultado[eixo] = rotulos[eixo][posicoes[i + 1]]
+        resultado['valor'] = soma.ravel()
+
+        resultado = resultado[n.ravel() > 0].reset_index(drop=True)
+        return resultado[por + ['valor']]
+
+    def pivot_mensal(self, index: Union[str, List[str]], tipos=None, anos=None,
+                     meses=None, linhas=None, todos_meses: bool = False) -> pd.DataFrame:
+        """
+        Pivot com os meses nas colunas (substitui pivot_table(columns='mes')).
+
+        Args:
+            index: Coluna(s) de linha do pivot
+            tipos, anos, meses, linhas: Filtros (ver `total`)
+            todos_meses: Se True, exibe os 12 meses; senão só meses com dados
+
+        Returns:
+            DataFrame indexado por `index` com colunas JAN..DEZ
+        """
+        index = [index] if isinstance(index, str) else list(index)
+        df = self.agregar(index + ['mes'], tipos=tipos, anos=anos, meses=meses, linhas=linhas)
+        if df.empty:
+            return pd.DataFrame(columns=MESES_ORDEM if todos_meses else [])
+
+        pivot = df.pivot_table(values='valor', index=index, columns='mes', aggfunc='sum', sort=False)
+        colunas = MESES_ORDEM if todos_meses else [m for m in MESES_ORDEM if m in pivot.columns]
+        return pivot.reindex(columns=colunas).fillna(0)
+
+    # -------------------------------------------------------------------------
+    # CONVERSÃO
+    # -------------------------------------------------------------------------
+
+    def to_long(self) -> pd.DataFrame:
+        """
+        Converte de volta para o formato longo do pl_df (apenas células presentes).
+
+        Returns:
+            DataFrame com atributos de linha, mes, tipo_valor, ano, valor,
+            mes_num e data
+        """
+        l, m, t, a = np.nonzero(self.presente)
+        df = self.linhas.iloc[l].reset_index(drop=True)
+        df['mes'] = np.array(self.meses, dtype=object)[m]
+        df['tipo_valor'] = np.array(self.tipos, dtype=object)[t]
+        df['valor'] = self.valores[l, m, t, a]
+        df['ano'] = np.array(self.anos)[a]
+        df['mes_num'] = df['mes'].map(MESES_NUM_MAP)
+        df['data'] = pd.to_datetime(dict(year=df['ano'], month=df['mes_num'], day=1))
+        return codificar_dimensoes(df)
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays de valores e presença."""
+        return int(self.valores.nbytes + self.presente.nbytes)
+
+
+# =============================================================================
+# INTEGRAÇÃO COM A SESSÃO
+# =============================================================================
+
+def get_pl_tensor(df: pd.DataFrame, chave: str = 'pl_tensor') -> PLTensor:
+    """
+    Retorna o tensor do pl_df, reconstruindo apenas quando o pl_df muda.
+
+    O tensor fica em st.session_state junto com uma referência ao DataFrame
+    de origem; qualquer novo upload substitui o objeto `pl_df` e invalida
+    o tensor automaticamente.
+
+    Args:
+        df: pl_df da sessão
+        chave: Chave no session_state
+
+    Returns:
+        PLTensor
+    """
+    armazenado = st.session_state.get(chave)
+    if armazenado is not None and armazenado[0] is df:
+        return armazenado[1]
+
+    tensor = PLTensor.from_long(df)
+    st.session_state[chave] = (df, tensor)
+    return tensor
@@ -25,6 +25,12 @@ from pathlib import Path
 # Diretório base das referências
 REFERENCIAS_DIR = Path(__file__).parent / "referencias"
 
+# De-para das linhas do P&L (descrições em inglês) para contas contábeis
+DE_PARA_CONTAS_PATH = Path(__file__).parent.parent / "de_para_contas.csv"
+
+# Marcador do de-para para linhas de cálculo (receita, margem, etc.)
+CODIGO_LINHA_CALCULO = 'IGNORE'
+
 # Mapeamento de classes de ativos (9º dígito do código)
 MAPA_CLASSES = {
     '0': 'Instalação Principal',
@@ -194,6 +200,114 @@ def carregar_contas_contabeis() -> pd.DataFrame:
         return pd.DataFrame()
 
 
+@st.cache_data(show_spinner="Carregando de-para de contas...")
+def carregar_de_para_contas() -> pd.DataFrame:
+    """
+    Carrega o de-para descrição do P&L -> conta contábil (de_para_contas.csv).
+    
+    O arquivo é ISO-8859-1 e a descrição de destino pode conter vírgulas sem
+    aspas, por isso cada linha é separada apenas nas duas primeiras vírgulas.
+    
+    Returns:
+        DataFrame com: descricao_origem, chave, conta_contabil_codigo,
+        conta_contabil_descricao, is_linha_calculo
+    """
+    colunas = ['descricao_origem', 'chave', 'conta_contabil_codigo',
+               'conta_contabil_descricao', 'is_linha_calculo']
+    
+    if not DE_PARA_CONTAS_PATH.exists():
+        print(f"⚠️ De-para de contas não encontrado: {DE_PARA_CONTAS_PATH}")
+        return pd.DataFrame(columns=colunas)
+    
+    try:
+        with open(DE_PARA_CONTAS_PATH, encoding='latin-1') as f:
+            linhas = [l.rstrip('\r\n') for l in f if l.strip()]
+        
+        registros = [l.split(',', 2) for l in linhas[1:]]
+        registros = [r + [''] * (3 - len(r)) for r in registros]
+        
+        df = pd.DataFrame(registros, columns=['descricao_origem', 'conta_contabil_codigo', 'conta_contabil_descricao'])
+        df = df.apply(lambda col: col.str.strip())
+        df['chave'] = _chave_descricao(df['descricao_origem'])
+        df['is_linha_calculo'] = df['conta_contabil_codigo'].str.upper() == CODIGO_LINHA_CALCULO
+        
+        # Uma descrição -> um código (a primeira ocorrência prevalece)
+        df = df.drop_duplicates('chave', keep='first').reset_index(drop=True)
+        return df[colunas]
+        
+    except Exception as e:
+        print(f"Erro ao carregar de-para de contas: {e}")
+        return pd.DataFrame(columns=colunas)
+
+
+def _chave_descricao(descricoes: pd.Series) -> pd.Series:
+    """Chave de junção para descrições: minúsculas e espaços colapsados."""
+    return (
+        descricoes.astype(str)
+        .str.strip()
+        .str.casefold()
+        .str.replace(r'\s+', ' ', regex=True)
+    )
+
+
+def mapear_contas_pl(df: pd.DataFrame,
+                     coluna: str = 'conta_contabil',
+                     df_de_para: pd.DataFrame = None) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Adiciona `conta_contabil_codigo` a um DataFrame de P&L via de-para.
+    
+    A junção é feita sobre as descrições distintas (factorize) e depois
+    expandida para todas as linhas, sem comparação de strings por linha.
+    Valores que já são códigos numéricos (lançamentos 2026) são mantidos.
+    
+    Args:
+        df: DataFrame de P&L (não é alterado)
+        coluna: Coluna com a descrição da conta
+        df_de_para: De-para de contas (opcional)
+    
+    Returns:
+        Tuple (DataFrame com conta_contabil_codigo e is_linha_calculo,
+               lista de descrições sem mapeamento)
+    """
+    if df_de_para is None:
+        df_de_para = carregar_de_para_contas()
+    
+    resultado = df.copy()
+    if resultado.empty or coluna not in resultado.columns:
+        resultado['conta_contabil_codigo'] = pd.Series(dtype=object)
+        resultado['is_linha_calculo'] = pd.Series(dtype=bool)
+        return resultado, []
+    
+    codigos_linha, distintos = pd.factorize(resultado[coluna].astype(str), sort=False)
+    distintos = pd.Series(distintos)
+    
+    dimensao = df_de_para.set_index('chave')
+    posicoes = dimensao.index.get_indexer(_chave_descricao(distintos))
+    encontrado = posicoes >= 0
+    
+    codigo_distinto = pd.Series(None, index=distintos.index, dtype=object)
+    calculo_distinto = pd.Series(False, index=distintos.index)
+    if encontrado.any():
+        codigo_distinto[encontrado] = dimensao['conta_contabil_codigo'].values[posicoes[encontrado]]
+        calculo_distinto[encontrado] = dimensao['is_linha_calculo'].values[posicoes[encontrado]]
+    
+    # Linhas de cálculo não têm conta contábil
+    codigo_distinto[calculo_distinto] = None
+    
+    # Valores que já são códigos numéricos passam direto
+    ja_codigo = distintos.str.fullmatch(r'[1-9]\d*') & ~encontrado
+    codigo_distinto[ja_codigo] = distintos[ja_codigo]
+    
+    sem_mapeamento = sorted(
+        d for d in distintos[~encontrado & ~ja_codigo]
+        if d.strip() not in ('', '0', 'nan')
+    )
+    
+    resultado['conta_contabil_codigo'] = codigo_distinto.values[codigos_linha]
+    resultado['is_linha_calculo'] = calculo_distinto.values[codigos_linha].astype(bool)
+    return resultado, sem_mapeamento
+
+
 # =============================================================================
 # FUNÇÕES DE HIERARQUIA DE CENTROS DE CUSTO
 # =============================================================================
@@ -375,14 +489,12 @@ def validar_centro_gasto(codigo: str, df_centros: pd.DataFrame = None) -> Tuple[
     Returns:
         Tuple (é_válido: bool, mensagem: str)
     """
-    if df_centros is None:
-        df_centros = carregar_centros_gasto()
+    resultado = enriquecer_centros_lote(
+        pd.DataFrame({'centro_gasto_codigo': [codigo]}), df_centros=df_centros
+    ).iloc[0]
     
-    codigo_padronizado = str(codigo).zfill(11)
-    
-    if codigo_padronizado in df_centros['codigo'].values:
-        centro = df_centros[df_centros['codigo'] == codigo_padronizado].iloc[0]
-        return True, f"✅ {centro['descricao']} ({centro['ativo']})"
+    if resultado['centro_valido']:
+        return True, f"✅ {resultado['descricao']} ({resultado['ativo']})"
     else:
         return False, f"❌ Centro de gasto '{codigo}' não encontrado na base de referência"
 
@@ -398,16 +510,220 @@ def validar_conta_contabil(codigo: str, df_contas: pd.DataFrame = None) -> Tuple
     Returns:
         Tuple (é_válido: bool, mensagem: str)
     """
+    resultado = validar_contas_lote(
+        pd.DataFrame({'conta_contabil_codigo': [codigo]}), df_contas=df_contas
+    ).iloc[0]
+    
+    if resultado['conta_valida']:
+        return True, f"✅ {resultado['conta_contabil_descricao']}"
+    else:
+        return False, f"❌ Conta contábil '{codigo}' não encontrada na base de referência"
+
+
+# =============================================================================
+# VALIDAÇÃO E ENRIQUECIMENTO EM LOTE
+# =============================================================================
+
+# Colunas da base de centros copiadas para as linhas importadas
+COLUNAS_ENRIQUECIMENTO_CENTRO = [
+    'descricao', 'ativo', 'regional', 'base',
+    'codigo_pai', 'classe', 'classe_nome'
+]
+
+
+def _normalizar_texto_codigo(codigos: pd.Series) -> pd.Series:
+    """Converte para string, remove espaços e o sufixo '.0' de números do Excel."""
+    texto = codigos.astype('string').str.strip()
+    texto = texto.str.replace(r'\.0$', '', regex=True)
+    return texto.fillna('').replace({'nan': '', 'None': '', '<NA>': ''})
+
+
+def normalizar_codigos_centro(codigos: pd.Series) -> pd.Series:
+    """
+    Padroniza códigos de centro de gasto em uma única passada vetorizada.
+    
+    Remove o sufixo '.0' (código lido como float do Excel), espaços e
+    completa com zeros à esquerda até 11 dígitos. Valores vazios viram ''.
+    
+    Args:
+        codigos: Series com códigos em qualquer formato (int, float, str)
+    
+    Returns:
+        Series de strings padronizadas (mesmo índice da entrada)
+    """
+    texto = _normalizar_texto_codigo(codigos)
+    return texto.where(texto == '', texto.str.zfill(11)).astype(object)
+
+
+def normalizar_codigos_conta(codigos: pd.Series) -> pd.Series:
+    """
+    Padroniza códigos de conta contábil (string, sem '.0' e sem espaços).
+    
+    Args:
+        codigos: Series com códigos em qualquer formato
+    
+    Returns:
+        Series de strings padronizadas (mesmo índice da entrada)
+    """
+    return _normalizar_texto_codigo(codigos).astype(object)
+
+
+def enriquecer_centros_lote(df: pd.DataFrame,
+                            coluna: str = 'centro_gasto_codigo',
+                            df_centros: pd.DataFrame = None,
+                            colunas: List[str] = None) -> pd.DataFrame:
+    """
+    Normaliza, valida e enriquece um lote de linhas pelo centro de gasto.
+    
+    O lookup é feito por junção com o índice da base de referência (hash),
+    em vez de uma busca por máscara para cada linha importada.
+    
+    Args:
+        df: DataFrame de entrada (não é alterado)
+        coluna: Nome da coluna com o código do centro
+        df_centros: DataFrame de centros (opcional)
+        colunas: Colunas da referência a copiar (padrão: COLUNAS_ENRIQUECIMENTO_CENTRO)
+    
+    Returns:
+        Cópia do DataFrame com:
+        - `coluna` normalizada (11 dígitos)
+        - colunas de referência preenchidas (valor da referência prevalece
+          quando o centro existe e o campo está preenchido na base;
+          caso contrário mantém o valor de entrada)
+        - centro_valido (bool) e erro_centro (str, vazio se válido)
+    """
+    if df_centros is None:
+        df_centros = carregar_centros_gasto()
+    if colunas is None:
+        colunas = COLUNAS_ENRIQUECIMENTO_CENTRO
+    
+    resultado = df.copy()
+    if coluna not in resultado.columns:
+        resultado[coluna] = ''
+    resultado[coluna] = normalizar_codigos_centro(resultado[coluna])
+    codigos = resultado[coluna]
+    
+    if df_centros.empty or 'codigo' not in df_centros.columns:
+        resultado['centro_valido'] = False
+        resultado['erro_centro'] = 'Base de centros de gasto indisponível'
+        return resultado
+    
+    colunas = [c for c in colunas if c in df_centros.columns]
+    indice = df_centros.drop_duplicates('codigo').set_index('codigo')[colunas]
+    encontrados = indice.reindex(codigos.values)
+    encontrados.index = resultado.index
+    
+    valido = pd.Series(codigos.isin(indice.index).values, index=resultado.index)
+    
+    for col in colunas:
+        if col in resultado.columns:
+            resultado[col] = encontrados[col].where(valido & encontrados[col].notna(), resultado[col])
+        else:
+            resultado[col] = encontrados[col]
+    
+    erro = pd.Series('', index=resultado.index, dtype=object)
+    erro[~valido] = "Centro de gasto '" + codigos[~valido] + "' não encontrado na base de referência"
+    erro[codigos == ''] = 'Centro de gasto não informado'
+    
+    resultado['centro_valido'] = valido
+    resultado['erro_centro'] = erro
+    return resultado
+
+
+def validar_contas_lote(df: pd.DataFrame,
+                        coluna: str = 'conta_contabil_codigo',
+                        df_contas: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Normaliza e valida um lote de linhas pela conta contábil.
+    
+    Args:
+        df: DataFrame de entrada (não é alterado)
+        coluna: Nome da coluna com o código da conta
+        df_contas: DataFrame de contas (opcional)
+    
+    Returns:
+        Cópia do DataFrame com `coluna` normalizada, conta_contabil_descricao
+        (preenchida quando a conta existe), conta_valida e erro_conta
+    """
     if df_contas is None:
         df_contas = carregar_contas_contabeis()
     
-    codigo_str = str(codigo)
+    resultado = df.copy()
+    if coluna not in resultado.columns:
+        resultado[coluna] = ''
+    resultado[coluna] = normalizar_codigos_conta(resultado[coluna])
+    codigos = resultado[coluna]
     
-    if codigo_str in df_contas['codigo'].values:
-        conta = df_contas[df_contas['codigo'] == codigo_str].iloc[0]
-        return True, f"✅ {conta['descricao']}"
+    if df_contas.empty or 'codigo' not in df_contas.columns:
+        resultado['conta_valida'] = False
+        resultado['erro_conta'] = 'Base de contas contábeis indisponível'
+        return resultado
+    
+    indice = df_contas.drop_duplicates('codigo').set_index('codigo')['descricao']
+    descricoes = pd.Series(indice.reindex(codigos.values).values, index=resultado.index)
+    valido = pd.Series(codigos.isin(indice.index).values, index=resultado.index)
+    
+    if 'conta_contabil_descricao' in resultado.columns:
+        resultado['conta_contabil_descricao'] = descricoes.where(valido, resultado['conta_contabil_descricao'])
     else:
-        return False, f"❌ Conta contábil '{codigo}' não encontrada na base de referência"
+        resultado['conta_contabil_descricao'] = descricoes
+    
+    erro = pd.Series('', index=resultado.index, dtype=object)
+    erro[~valido] = "Conta contábil '" + codigos[~valido] + "' não encontrada na base de referência"
+    erro[codigos == ''] = 'Conta contábil não informada'
+    
+    resultado['conta_valida'] = valido
+    resultado['erro_conta'] = erro
+    return resultado
+
+
+def validar_lote(df: pd.DataFrame,
+                 coluna_centro: Optional[str] = 'centro_gasto_codigo',
+                 coluna_conta: Optional[str] = None,
+                 df_centros: pd.DataFrame = None,
+                 df_contas: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Ponto único de validação para os caminhos de importação.
+    
+    Aplica `enriquecer_centros_lote` e/ou `validar_contas_lote` e consolida
+    o resultado em um vetor de validade por linha.
+    
+    Args:
+        df: DataFrame importado
+        coluna_centro: Coluna do centro de gasto (None para não validar)
+        coluna_conta: Coluna da conta contábil (None para não validar)
+        df_centros: DataFrame de centros (opcional)
+        df_contas: DataFrame de contas (opcional)
+    
+    Returns:
+        DataFrame enriquecido com as colunas `valido` (bool) e `erros` (str)
+    """
+    resultado = df
+    flags = []
+    mensagens = []
+    
+    if coluna_centro:
+        resultado = enriquecer_centros_lote(resultado, coluna_centro, df_centros)
+        flags.append(resultado['centro_valido'])
+        mensagens.append(resultado['erro_centro'])
+    if coluna_conta:
+        resultado = validar_contas_lote(resultado, coluna_conta, df_contas)
+        flags.append(resultado['conta_valida'])
+        mensagens.append(resultado['erro_conta'])
+    
+    if resultado is df:
+        resultado = df.copy()
+    
+    valido = pd.Series(True, index=resultado.index)
+    for flag in flags:
+        valido &= flag
+    erros = pd.Series('', index=resultado.index, dtype=object)
+    for msg in mensagens:
+        erros = erros.where(msg == '', erros.where(erros == '', erros + '; ') + msg)
+    
+    resultado['valido'] = valido
+    resultado['erros'] = erros
+    return resultado
 
 
 # =============================================================================
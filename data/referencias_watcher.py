@@ -0,0 +1,234 @@
+"""
+data/referencias_watcher.py
+===========================
+Monitoramento das bases de referência com invalidação seletiva de cache.
+
+Quando um arquivo de `data/referencias` é substituído (ex: novo
+`orcamento_v1_2026.xlsx`), apenas o cache do carregador correspondente e
+dos resultados do comparador que dependem dele são limpos. Os demais
+caches da aplicação permanecem aquecidos.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import streamlit as st
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from data.referencias_manager import REFERENCIAS_DIR, DE_PARA_CONTAS_PATH
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Intervalo (s) para agrupar eventos de um mesmo salvamento (Excel gera vários)
+JANELA_DEBOUNCE_S = 1.5
+
+# Arquivo de referência -> funções cacheadas afetadas ("modulo:funcao").
+# A ordem importa: carregadores primeiro, depois os consumidores derivados.
+DEPENDENCIAS_REFERENCIAS: Dict[str, List[str]] = {
+    'orcamento_v1_2026.xlsx': [
+        'data.referencias_manager:carregar_orcamento_v1_2026',
+        'data.comparador:get_orcamento_agregado_por_mes',
+        'data.comparador:get_orcamento_por_centro',
+        'data.comparador:get_orcamento_por_conta',
+    ],
+    'centro_gasto.xlsx': [
+        'data.referencias_manager:carregar_centros_gasto',
+    ],
+    'conta_contabil.xlsx': [
+        'data.referencias_manager:carregar_contas_contabeis',
+    ],
+    'de_para_contas.csv': [
+        'data.referencias_manager:carregar_de_para_contas',
+        'utils_financeiro.etl:processar_upload_completo',
+    ],
+}
+
+# Diretórios monitorados (outros podem ser adicionados via registrar_dependencia)
+_DIRETORIOS_MONITORADOS: List[Path] = [REFERENCIAS_DIR, DE_PARA_CONTAS_PATH.parent]
+
+# Histórico das últimas invalidações (arquivo -> data/hora)
+_ULTIMAS_INVALIDACOES: Dict[str, datetime] = {}
+_LOCK = threading.Lock()
+
+# Observador em execução e seu handler (diretórios registrados depois do início)
+_OBSERVADOR: Optional[Observer] = None
+_HANDLER: Optional[FileSystemEventHandler] = None
+
+
+# =============================================================================
+# REGISTRO DE DEPENDÊNCIAS
+# =============================================================================
+
+def registrar_dependencia(arquivo: str, alvo: str, diretorio: Path = None) -> None:
+    """
+    Registra uma função cacheada como dependente de um arquivo de referência.
+
+    Args:
+        arquivo: Nome do arquivo (ex: 'centro_gasto.xlsx')
+        alvo: Função no formato 'modulo:funcao' (precisa expor .clear())
+        diretorio: Diretório do arquivo, se não estiver em data/referencias
+            (com o monitor já iniciado, passa a ser observado na hora)
+    """
+    with _LOCK:
+        alvos = DEPENDENCIAS_REFERENCIAS.setdefault(arquivo, [])
+        if alvo not in alvos:
+            alvos.append(alvo)
+        if diretorio is not None and Path(diretorio) not in _DIRETORIOS_MONITORADOS:
+            _DIRETORIOS_MONITORADOS.append(Path(diretorio))
+            if _OBSERVADOR is not None:
+                _observar(_OBSERVADOR, _HANDLER, Path(diretorio))
+
+
+def _resolver_alvo(alvo: str):
+    """
+    Resolve 'modulo:funcao' sem importar módulos ainda não carregados.
+
+    Se o módulo nunca foi importado neste processo, seu cache está vazio e
+    não há nada a invalidar.
+    """
+    nome_modulo, nome_funcao = alvo.split(':', 1)
+    modulo = sys.modules.get(nome_modulo)
+    if modulo is None:
+        return None
+    return getattr(modulo, nome_funcao, None)
+
+
+# =============================================================================
+# INVALIDAÇÃO
+# =============================================================================
+
+def invalidar_referencia(arquivo: str) -> List[str]:
+    """
+    Limpa o cache das funções que dependem de um arquivo de referência.
+
+    Args:
+        arquivo: Nome do arquivo alterado
+
+    Returns:
+        Lista de alvos efetivamente invalidados
+    """
+    with _LOCK:
+        alvos = list(DEPENDENCIAS_REFERENCIAS.get(arquivo, []))
+
+    invalidados = []
+    for alvo in alvos:
+        funcao = _resolver_alvo(alvo)
+        if funcao is None or not hasattr(funcao, 'clear'):
+            continue
+        try:
+            funcao.clear()
+            invalidados.append(alvo)
+        except Exception as e:
+            print(f"Erro ao invalidar cache de {alvo}: {e}")
+
+    with _LOCK:
+        _ULTIMAS_INVALIDACOES[arquivo] = datetime.now()
+
+    if invalidados:
+        print(f"🔄 Referência alterada ({arquivo}): {len(invalidados)} cache(s) invalidado(s)")
+    return invalidados
+
+
+class _HandlerReferencias(FileSystemEventHandler):
+    """Agrupa eventos por arquivo e dispara a invalidação após o debounce."""
+
+    def __init__(self):
+        super().__init__()
+        self._timers: Dict[str, threading.Timer] = {}
+        self._timers_lock = threading.Lock()
+
+    def _agendar(self, caminho: str):
+        nome = Path(caminho).name
+        # Arquivos temporários/lock do Excel (~$arquivo.xlsx) são ignorados
+        if nome.startswith('~$') or nome not in DEPENDENCIAS_REFERENCIAS:
+            return
+
+        with self._timers_lock:
+            timer = self._timers.pop(nome, None)
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(JANELA_DEBOUNCE_S, invalidar_referencia, args=(nome,))
+            timer.daemon = True
+            self._timers[nome] = timer
+            timer.start()
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._agendar(event.src_path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._agendar(event.src_path)
+
+    def on_moved(self, event):
+        # Salvamento atômico (escreve temp e renomeia) chega como "moved"
+        if not event.is_directory:
+            self._agendar(event.dest_path)
+
+
+# =============================================================================
+# CICLO DE VIDA DO MONITOR
+# =============================================================================
+
+def _observar(observer: Observer, handler: FileSystemEventHandler, diretorio: Path) -> None:
+    """Agenda um diretório no observador (diretórios inexistentes são ignorados)."""
+    if not diretorio.exists():
+        print(f"⚠️ Diretório de referência inexistente, não monitorado: {diretorio}")
+        return
+    try:
+        observer.schedule(handler, str(diretorio), recursive=False)
+    except Exception as e:
+        print(f"⚠️ Não foi possível monitorar {diretorio}: {e}")
+
+
+@st.cache_resource
+def iniciar_monitor_referencias() -> Optional[Observer]:
+    """
+    Inicia (uma única vez por processo) o observador das bases de referência.
+
+    Returns:
+        Observer do watchdog em execução, ou None se não foi possível iniciar
+    """
+    global _OBSERVADOR, _HANDLER
+    try:
+        handler = _HandlerReferencias()
+        observer = Observer()
+        with _LOCK:
+            for diretorio in _DIRETORIOS_MONITORADOS:
+                if diretorio.exists():
+                    observer.schedule(handler, str(diretorio), recursive=False)
+            observer.daemon = True
+            observer.start()
+            # Registros posteriores agendam o diretório neste observador
+            _OBSERVADOR, _HANDLER = observer, handler
+        return observer
+    except Exception as e:
+        print(f"⚠️ Monitor de referências indisponível: {e}")
+        return None
+
+
+def get_status_monitor() -> Dict:
+    """
+    Retorna o status do monitor de referências.
+
+    Returns:
+        Dict com: ativo, arquivos_monitorados, ultimas_invalidacoes
+    """
+    observer = iniciar_monitor_referencias()
+    with _LOCK:
+        ultimas = {k: v.isoformat() for k, v in _ULTIMAS_INVALIDACOES.items()}
+        arquivos = sorted(DEPENDENCIAS_REFERENCIAS.keys())
+    return {
+        'ativo': bool(observer is not None and observer.is_alive()),
+        'arquivos_monitorados': arquivos,
+        'ultimas_invalidacoes': ultimas
+    }
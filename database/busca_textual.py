@@ -0,0 +1,237 @@
+"""
+database/busca_textual.py
+=========================
+Busca textual (full-text) no Razão de Gastos e nos lançamentos realizados.
+
+Índices mantidos pelo próprio banco, sincronizados em insert/update/delete:
+
+- SQLite: tabelas virtuais FTS5 de conteúdo externo (razao_fts,
+  lancamentos_fts) + triggers na tabela de origem. Tokenizador unicode61
+  sem acentos ("manutencao" encontra "Manutenção").
+- Postgres: índice GIN sobre to_tsvector('portuguese', ...) das colunas;
+  como é índice de expressão, não há coluna nem trigger a manter.
+
+Colunas indexadas:
+- razao_realizados: descricao, fornecedor, numero_registro
+- lancamentos_realizados: descricao, fornecedor, observacoes
+
+Os termos digitados viram busca por prefixo com E lógico ("valv manut"
+encontra "Manutenção de válvulas"). Resultados vêm ordenados por relevância
+(bm25 / ts_rank) e paginados.
+
+A criação dos índices é idempotente: roda na migração do Alembic e, como
+garantia, na primeira busca (bancos locais criados só por create_all).
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import re
+import threading
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .models import get_engine
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+
+# tabela de origem -> (tabela FTS / índice GIN, colunas indexadas, colunas exibidas)
+TABELAS_BUSCA: Dict[str, Dict] = {
+    'razao_realizados': {
+        'fts': 'razao_fts',
+        'colunas': ['descricao', 'fornecedor', 'numero_registro'],
+        'exibir': ['id', 'ano', 'mes', 'centro_gasto_codigo', 'conta_contabil_codigo',
+                   'fornecedor', 'descricao', 'numero_registro', 'valor', 'data_lancamento'],
+    },
+    'lancamentos_realizados': {
+        'fts': 'lancamentos_fts',
+        'colunas': ['descricao', 'fornecedor', 'observacoes'],
+        'exibir': ['id', 'ano', 'mes', 'centro_gasto_codigo', 'conta_contabil_codigo',
+                   'fornecedor', 'descricao', 'observacoes', 'valor', 'data_lancamento'],
+    },
+}
+
+POR_PAGINA_PADRAO = 50
+
+# Contagem de resultados para a paginação limitada (termos muito comuns)
+LIMITE_CONTAGEM = 10_000
+
+_RE_TERMO = re.compile(r"\w+", re.UNICODE)
+
+_garantidos = set()
+_lock = threading.Lock()
+
+
+# =============================================================================
+# CRIAÇÃO DOS ÍNDICES
+# =============================================================================
+
+def _indice_gin(tabela: str) -> str:
+    return f"idx_{tabela}_busca"
+
+
+def _expressao_tsvector(colunas: List[str]) -> str:
+    partes = " || ' ' || ".join(f"coalesce({c}, '')" for c in colunas)
+    return f"to_tsvector('portuguese', {partes})"
+
+
+def _ddl_sqlite(tabela: str, fts: str, colunas: List[str]) -> List[str]:
+    lista = ", ".join(colunas)
+    novos = ", ".join(f"new.{c}" for c in colunas)
+    antigos = ", ".join(f"old.{c}" for c in colunas)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({lista}, content='{tabela}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabela} BEGIN "
+        f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {novos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabela} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabela} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); "
+        f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {novos}); END",
+    ]
+
+
+def criar_indices_textuais(conn: Connection) -> None:
+    """
+    Cria os índices de busca das tabelas em TABELAS_BUSCA (idempotente).
+
+    No SQLite, a tabela FTS recém-criada é preenchida com as linhas já
+    existentes ('rebuild'); depois os triggers a mantêm.
+
+    Args:
+        conn: Conexão (ex: op.get_bind() na migração)
+    """
+    dialeto = conn.dialect.name
+    for tabela, cfg in TABELAS_BUSCA.items():
+        if dialeto == 'sqlite':
+            existia = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {'n': cfg['fts']}
+            ).first() is not None
+            for ddl in _ddl_sqlite(tabela, cfg['fts'], cfg['colunas']):
+                conn.execute(text(ddl))
+            if not existia:
+                conn.execute(text(f"INSERT INTO {cfg['fts']}({cfg['fts']}) VALUES ('rebuild')"))
+        elif dialeto == 'postgresql':
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {_indice_gin(tabela)} ON {tabela} "
+                f"USING GIN ({_expressao_tsvector(cfg['colunas'])})"
+            ))
+
+
+def remover_indices_textuais(conn: Connection) -> None:
+    """Remove os índices criados por criar_indices_textuais."""
+    dialeto = conn.dialect.name
+    for tabela, cfg in TABELAS_BUSCA.items():
+        if dialeto == 'sqlite':
+            for sufixo in ('ai', 'ad', 'au'):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {cfg['fts']}_{sufixo}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {cfg['fts']}"))
+        elif dialeto == 'postgresql':
+            conn.execute(text(f"DROP INDEX IF EXISTS {_indice_gin(tabela)}"))
+
+
+def garantir_indices_textuais(engine: Engine = None) -> None:
+    """Cria os índices uma vez por processo/banco (bancos locais sem migração)."""
+    engine = engine or get_engine()
+    chave = str(engine.url)
+    with _lock:
+        if chave in _garantidos:
+            return
+        with engine.begin() as conn:
+            criar_indices_textuais(conn)
+        _garantidos.add(chave)
+
+
+# =============================================================================
+# BUSCA
+# =============================================================================
+
+def termos_busca(consulta: str) -> List[str]:
+    """Palavras da consulta (pontuação e operadores descartados)."""
+    return _RE_TERMO.findall(consulta or "")
+
+
+def _consulta_fts5(termos: List[str]) -> str:
+    # Cada termo entre aspas (literal) com prefixo; espaço = E lógico no FTS5
+    return " ".join('"' + t.replace('"', '') + '"*' for t in termos)
+
+
+def _consulta_tsquery(termos: List[str]) -> str:
+    return " & ".join(f"{t}:*" for t in termos)
+
+
+def buscar(tabela: str, consulta: str, ano: int = None, pagina: int = 1,
+           por_pagina: int = POR_PAGINA_PADRAO, engine: Engine = None) -> Tuple[pd.DataFrame, int]:
+    """
+    Busca textual paginada em uma tabela de TABELAS_BUSCA.
+
+    Args:
+        tabela: 'razao_realizados' ou 'lancamentos_realizados'
+        consulta: Texto digitado (ex: "nf 12345", "localiza aluguel")
+        ano: Restringe ao ano
+        pagina: Página (1 = mais relevantes)
+        por_pagina: Resultados por página
+        engine: Engine (padrão: get_engine())
+
+    Returns:
+        (DataFrame com as colunas de exibição + relevancia, total de resultados
+        limitado a LIMITE_CONTAGEM)
+    """
+    cfg = TABELAS_BUSCA[tabela]
+    termos = termos_busca(consulta)
+    if not termos:
+        return pd.DataFrame(columns=cfg['exibir'] + ['relevancia']), 0
+
+    engine = engine or get_engine()
+    garantir_indices_textuais(engine)
+
+    colunas = ", ".join(f"t.{c}" for c in cfg['exibir'])
+    params = {'limite': por_pagina, 'offset': (max(pagina, 1) - 1) * por_pagina}
+    filtro_ano = ""
+    if ano is not None:
+        filtro_ano = " AND t.ano = :ano"
+        params['ano'] = ano
+
+    if engine.dialect.name == 'sqlite':
+        fts = cfg['fts']
+        params['q'] = _consulta_fts5(termos)
+        # CROSS JOIN fixa a ordem: primeiro o MATCH no índice, depois a tabela pelo rowid
+        # (sem isso o planejador pode varrer a tabela pelo ano e consultar o FTS linha a linha)
+        origem = f"FROM {fts} CROSS JOIN {tabela} t ON t.id = {fts}.rowid WHERE {fts} MATCH :q{filtro_ano}"
+        # bm25: menor = mais relevante
+        sql_pagina = (f"SELECT {colunas}, -bm25({fts}) AS relevancia {origem} "
+                      f"ORDER BY bm25({fts}) LIMIT :limite OFFSET :offset")
+    else:
+        params['q'] = _consulta_tsquery(termos)
+        # Mesma expressão do índice GIN (o alias t. não impede o uso do índice)
+        vetor = _expressao_tsvector([f"t.{c}" for c in cfg['colunas']])
+        origem = (f"FROM {tabela} t, to_tsquery('portuguese', :q) q "
+                  f"WHERE {vetor} @@ q{filtro_ano}")
+        sql_pagina = (f"SELECT {colunas}, ts_rank({vetor}, q) AS relevancia {origem} "
+                      f"ORDER BY relevancia DESC LIMIT :limite OFFSET :offset")
+
+    with engine.connect() as conn:
+        total = conn.execute(
+            text(f"SELECT COUNT(*) FROM (SELECT 1 {origem} LIMIT {LIMITE_CONTAGEM}) c"), params
+        ).scalar() or 0
+        linhas = conn.execute(text(sql_pagina), params).fetchall()
+
+    return pd.DataFrame(linhas, columns=cfg['exibir'] + ['relevancia']), int(total)
+
+
+def buscar_razao(consulta: str, ano: int = None, pagina: int = 1,
+                 por_pagina: int = POR_PAGINA_PADRAO) -> Tuple[pd.DataFrame, int]:
+    """Busca no Razão de Gastos (descrição, fornecedor, número de registro)."""
+    return buscar('razao_realizados', consulta, ano, pagina, por_pagina)
+
+
+def buscar_lancamentos(consulta: str, ano: int = None, pagina: int = 1,
+                       por_pagina: int = POR_PAGINA_PADRAO) -> Tuple[pd.DataFrame, int]:
+    """Busca nos lançamentos realizados (descrição, fornecedor, observações)."""
+    return buscar('lancamentos_realizados', consulta, ano, pagina, por_pagina)
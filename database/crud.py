@@ -18,6 +18,7 @@ import pandas as pd
 from sqlalchemy import func, and_, or_
 from sqlalchemy.orm import Session
 
+from .fingerprint import TAMANHO_LOTE, calcular_fingerprints
 from .models import LancamentoRealizado, get_session, init_db
 
 # Garantir que o banco está inicializado
@@ -78,6 +79,9 @@ def criar_lancamentos_lote(lista_dados: List[dict], session: Session = None) ->
     """
     Cria múltiplos lançamentos em lote.
     
+    Lançamentos já gravados (mesmo fingerprint) são ignorados e citados em
+    mensagens_erro, sem contar como erro: reenviar o mesmo lote não duplica.
+    
     Args:
         lista_dados: Lista de dicionários com dados de lançamentos
         session: Sessão do banco
@@ -95,9 +99,22 @@ def criar_lancamentos_lote(lista_dados: List[dict], session: Session = None) ->
     mensagens_erro = []
     
     try:
+        fingerprints = calcular_fingerprints(pd.DataFrame(lista_dados), LancamentoRealizado.__tablename__)
+        # Consulta em fatias: um parâmetro por fingerprint (limite de variáveis do SQLite)
+        unicos = list(set(fingerprints))
+        ja_gravados = set()
+        for inicio in range(0, len(unicos), TAMANHO_LOTE):
+            ja_gravados.update(fp for (fp,) in session.query(LancamentoRealizado.fingerprint).filter(
+                LancamentoRealizado.fingerprint.in_(unicos[inicio:inicio + TAMANHO_LOTE])
+            ))
+        
         for i, dados in enumerate(lista_dados):
+            if fingerprints.iloc[i] in ja_gravados:
+                mensagens_erro.append(f"Linha {i+1}: lançamento já registrado (ignorado)")
+                continue
             try:
                 lancamento = LancamentoRealizado.from_dict(dados)
+                lancamento.fingerprint = fingerprints.iloc[i]
                 lancamento.data_lancamento = datetime.now()
                 session.add(lancamento)
                 criados += 1
@@ -569,6 +586,48 @@ def obter_totais_por_ativo(ano: int = 2026, mes: str = None, session: Session =
             session.close()
 
 
+def obter_totais_por_folha(anos: List[int], session: Session = None) -> pd.DataFrame:
+    """
+    Obtém totais por centro de custo × conta contábil × mês (grão folha).
+    
+    Args:
+        anos: Anos dos lançamentos
+        session: Sessão do banco
+    
+    Returns:
+        DataFrame com: ano, mes, centro_gasto_codigo, conta_contabil_codigo, total_valor
+    """
+    close_session = False
+    if session is None:
+        session = get_session()
+        close_session = True
+    
+    try:
+        query = session.query(
+            LancamentoRealizado.ano,
+            func.upper(LancamentoRealizado.mes),
+            LancamentoRealizado.centro_gasto_codigo,
+            LancamentoRealizado.conta_contabil_codigo,
+            func.sum(LancamentoRealizado.valor).label('total_valor')
+        ).filter(
+            LancamentoRealizado.ano.in_(list(anos))
+        ).group_by(
+            LancamentoRealizado.ano,
+            func.upper(LancamentoRealizado.mes),
+            LancamentoRealizado.centro_gasto_codigo,
+            LancamentoRealizado.conta_contabil_codigo
+        )
+        
+        return pd.DataFrame(
+            query.all(),
+            columns=['ano', 'mes', 'centro_gasto_codigo', 'conta_contabil_codigo', 'total_valor']
+        )
+        
+    finally:
+        if close_session:
+            session.close()
+
+
 # =============================================================================
 # ESTATÍSTICAS
 # =============================================================================
@@ -0,0 +1,196 @@
+"""
+database/fingerprint.py
+=======================
+Impressão digital (fingerprint) canônica das linhas de lancamentos_realizados
+e razao_realizados, para deduplicar na escrita em vez de na leitura.
+
+fingerprint = blake2b (128 bits, hex) da chave de negócio + valor, com os
+campos normalizados como no ETL:
+- centro com 11 dígitos, conta sem sufixo '.0'
+- textos sem espaços nas pontas e em minúsculas; None / NaN / 'nan' = vazio
+- valor com 2 casas decimais, data só com o dia
+
+Linhas idênticas dentro da mesma carga (ex: duas parcelas iguais no Razão)
+são legítimas: a 2ª, 3ª... recebem o número da ocorrência no hash ("#1",
+"#2"), de modo que recarregar o mesmo arquivo gera os mesmos fingerprints.
+
+`sincronizar_por_fingerprint` aplica uma carga a um escopo (ex: um ano do
+Razão): insere só as linhas novas, remove as que saíram do arquivo e mantém
+as demais (com o mesmo id). Recarregar um mês sem mudanças não altera nada.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import hashlib
+from typing import Dict, List
+
+import pandas as pd
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+
+# Campos que identificam a linha (a ordem faz parte do hash: não alterar)
+CAMPOS_FINGERPRINT: Dict[str, List[str]] = {
+    'lancamentos_realizados': ['ano', 'mes', 'centro_gasto_codigo', 'conta_contabil_codigo',
+                               'fornecedor', 'descricao', 'valor'],
+    'razao_realizados': ['ano', 'mes', 'centro_gasto_codigo', 'conta_contabil_codigo',
+                         'fornecedor', 'descricao', 'numero_registro', 'data_lancamento', 'valor'],
+}
+
+TAMANHO_FINGERPRINT = 32  # hex de 16 bytes
+
+TAMANHO_LOTE = 5000
+
+_SEPARADOR = '\x1f'
+_TEXTOS_VAZIOS = {'nan', 'none', 'nat', '<na>'}
+
+
+# =============================================================================
+# CÁLCULO
+# =============================================================================
+
+def _vazio(valor) -> bool:
+    return valor is None or valor != valor  # NaN / NaT
+
+
+def _normalizar_campo(campo: str, valor) -> str:
+    if campo == 'valor':
+        try:
+            numero = 0.0 if _vazio(valor) else float(valor)
+        except (TypeError, ValueError):
+            numero = 0.0
+        return f"{round(numero, 2) + 0.0:.2f}"  # + 0.0: -0.00 vira 0.00
+    if campo == 'ano':
+        try:
+            return str(int(float(valor)))
+        except (TypeError, ValueError):
+            return '0'
+    if campo == 'data_lancamento':
+        if _vazio(valor):
+            return ''
+        if hasattr(valor, 'strftime'):
+            return valor.strftime('%Y-%m-%d')
+        return str(valor)[:10]
+
+    texto = '' if _vazio(valor) else str(valor).strip().lower()
+    if texto in _TEXTOS_VAZIOS:
+        return ''
+    if campo in ('centro_gasto_codigo', 'conta_contabil_codigo') and texto.endswith('.0'):
+        texto = texto[:-2]
+    if campo == 'centro_gasto_codigo' and len(texto) == 10:
+        texto = '0' + texto
+    return texto
+
+
+def _hash(chave: str) -> str:
+    return hashlib.blake2b(chave.encode('utf-8'), digest_size=TAMANHO_FINGERPRINT // 2).hexdigest()
+
+
+def fingerprint_registro(tabela: str, registro: Dict, ocorrencia: int = 0) -> str:
+    """
+    Fingerprint de uma linha.
+
+    Args:
+        tabela: 'lancamentos_realizados' ou 'razao_realizados'
+        registro: Campos da linha (ausentes = vazio)
+        ocorrencia: 0 para a 1ª linha com essa chave na carga, 1 para a 2ª...
+
+    Returns:
+        Hex de TAMANHO_FINGERPRINT caracteres
+    """
+    chave = _SEPARADOR.join(_normalizar_campo(c, registro.get(c)) for c in CAMPOS_FINGERPRINT[tabela])
+    if ocorrencia:
+        chave += f"#{ocorrencia}"
+    return _hash(chave)
+
+
+def calcular_fingerprints(df: pd.DataFrame, tabela: str) -> pd.Series:
+    """
+    Fingerprints de uma carga inteira, numerando as linhas repetidas.
+
+    Args:
+        df: Linhas com os campos de CAMPOS_FINGERPRINT[tabela] (ausentes = vazio)
+        tabela: 'lancamentos_realizados' ou 'razao_realizados'
+
+    Returns:
+        Série de fingerprints alinhada ao índice de df
+    """
+    colunas = []
+    for campo in CAMPOS_FINGERPRINT[tabela]:
+        if campo not in df.columns:
+            colunas.append([_normalizar_campo(campo, None)] * len(df))
+            continue
+        # Normaliza cada valor distinto uma vez (mês, centro, conta se repetem muito)
+        cache = {}
+        normalizados = []
+        for valor in df[campo].tolist():
+            try:
+                normalizado = cache[valor]
+            except KeyError:
+                normalizado = cache[valor] = _normalizar_campo(campo, valor)
+            except TypeError:  # não-hashável
+                normalizado = _normalizar_campo(campo, valor)
+            normalizados.append(normalizado)
+        colunas.append(normalizados)
+
+    fingerprints = []
+    vistas: Dict[str, int] = {}
+    for valores in zip(*colunas):
+        chave = _SEPARADOR.join(valores)
+        # Repetições legítimas na mesma carga: 2ª ocorrência = "#1", 3ª = "#2"...
+        ocorrencia = vistas.get(chave, 0)
+        vistas[chave] = ocorrencia + 1
+        fingerprints.append(_hash(f"{chave}#{ocorrencia}" if ocorrencia else chave))
+    return pd.Series(fingerprints, index=df.index, dtype=object)
+
+
+# =============================================================================
+# ESCRITA
+# =============================================================================
+
+def sincronizar_por_fingerprint(session, modelo, df: pd.DataFrame, escopo) -> Dict[str, int]:
+    """
+    Aplica uma carga a um escopo da tabela pelo fingerprint (sem commit).
+
+    Linhas do escopo cujo fingerprint não está na carga são removidas; linhas
+    da carga ainda não gravadas são inseridas; as demais ficam como estão.
+
+    Args:
+        session: Sessão do banco (o chamador faz commit/rollback)
+        modelo: LancamentoRealizado ou RazaoRealizado
+        df: Carga com as colunas do modelo, sem id (fingerprint calculado se ausente)
+        escopo: Filtro SQLAlchemy do que a carga substitui (ex: modelo.ano == 2026)
+
+    Returns:
+        Dict com inseridos, removidos e mantidos
+    """
+    df = df.reset_index(drop=True)
+    if 'fingerprint' not in df.columns:
+        df['fingerprint'] = calcular_fingerprints(df, modelo.__tablename__)
+
+    novos_fp = set(df['fingerprint'])
+    existentes = set()
+    obsoletos = []
+    for fp, i in session.query(modelo.fingerprint, modelo.id).filter(escopo).order_by(modelo.id):
+        # Saem: linhas fora da carga, duplicatas já gravadas e linhas sem fingerprint
+        if fp is None or fp in existentes or fp not in novos_fp:
+            obsoletos.append(i)
+        else:
+            existentes.add(fp)
+
+    for i in range(0, len(obsoletos), TAMANHO_LOTE):
+        session.query(modelo).filter(modelo.id.in_(obsoletos[i:i + TAMANHO_LOTE])) \
+            .delete(synchronize_session=False)
+
+    inserir = df[~df['fingerprint'].isin(existentes)]
+    registros = inserir.astype(object).where(inserir.notna(), None).to_dict(orient='records')
+    for i in range(0, len(registros), TAMANHO_LOTE):
+        session.bulk_insert_mappings(modelo, registros[i:i + TAMANHO_LOTE])
+
+    return {
+        'inseridos': len(registros),
+        'removidos': len(obsoletos),
+        'mantidos': len(df) - len(registros),
+    }
@@ -18,11 +18,14 @@ from typing import Optional
 
 from sqlalchemy import (
     create_engine, Column, Integer, String, Float, 
-    Boolean, DateTime, Text, Index
+    Boolean, DateTime, Text, Index, LargeBinary
 )
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from .fingerprint import TAMANHO_FINGERPRINT, fingerprint_registro
+
 # =============================================================================
 # CONFIGURAÇÃO DO BANCO
 # =============================================================================
@@ -190,6 +193,9 @@ class LancamentoRealizado(Base):
     usuario = Column(String(100))
     observacoes = Column(Text)
     
+    # Chave de negócio + valor (deduplicação na carga, ver database/fingerprint.py)
+    fingerprint = Column(String(TAMANHO_FINGERPRINT), index=True)
+    
     # Índices compostos para consultas frequentes
     __table_args__ = (
         Index('idx_periodo_centro', 'ano', 'mes', 'centro_gasto_codigo'),
@@ -276,6 +282,9 @@ class RazaoRealizado(Base):
     data_lancamento = Column(DateTime)
     numero_registro = Column(String(50))
 
+    # Chave de negócio + valor (deduplicação na carga, ver database/fingerprint.py)
+    fingerprint = Column(String(TAMANHO_FINGERPRINT), index=True)
+
     # Metadados de carga
     data_carga = Column(DateTime, default=datetime.now)
 
@@ -293,6 +302,52 @@ class RazaoRealizado(Base):
         }
 
 
+class ChecksumParticao(Base):
+    """
+    Checksum de cada partição (ano, mês) de uma tabela carregada em lote
+    (database/particoes.py). Mês com o mesmo checksum na recarga é pulado.
+    """
+    __tablename__ = 'checksums_particao'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tabela = Column(String(50), nullable=False)  # ex: 'razao_realizados'
+    ano = Column(Integer, nullable=False)
+    mes = Column(String(3), nullable=False)
+    checksum = Column(String(TAMANHO_FINGERPRINT), nullable=False)  # hash dos fingerprints do mês
+    linhas = Column(Integer, nullable=False)
+    valor_total = Column(Float)
+    data_atualizacao = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        Index('idx_checksum_particao', 'tabela', 'ano', 'mes', unique=True),
+    )
+
+
+def _calcular_fingerprint(mapper, target):
+    campos = {c.key: getattr(target, c.key) for c in mapper.column_attrs}
+    target.fingerprint = fingerprint_registro(mapper.local_table.name, campos)
+
+
+@event.listens_for(LancamentoRealizado, 'before_insert')
+@event.listens_for(RazaoRealizado, 'before_insert')
+def _fingerprint_insercao(mapper, connection, target):
+    """Inserções avulsas pelo ORM (cargas em lote já trazem o fingerprint)."""
+    if target.fingerprint is None:
+        _calcular_fingerprint(mapper, target)
+
+
+@event.listens_for(LancamentoRealizado, 'before_update')
+@event.listens_for(RazaoRealizado, 'before_update')
+def _fingerprint_edicao(mapper, connection, target):
+    """Edição muda a chave de negócio ou o valor: recalcula."""
+    _calcular_fingerprint(mapper, target)
+    # Os checksums do ano deixam de valer (a próxima carga compara linha a linha)
+    checksums = ChecksumParticao.__table__
+    connection.execute(checksums.delete().where(
+        (checksums.c.tabela == mapper.local_table.name) & (checksums.c.ano == target.ano)
+    ))
+
+
 # =============================================================================
 # NOVOS MODELOS (FASES 5-7)
 # =============================================================================
@@ -311,6 +366,8 @@ class ForecastCenario(Base):
     data_criacao = Column(DateTime, default=datetime.now)
     usuario_criador = Column(String(100))
     ano_referencia = Column(Integer, default=2026)
+    formato = Column(String(10), default='linhas')  # linhas (forecast_entries) ou npz (forecast_cenario_dados)
+    n_linhas = Column(Integer)
     
     def to_dict(self):
         return {
@@ -319,9 +376,22 @@ class ForecastCenario(Base):
             'descricao': self.descricao,
             'tipo': self.tipo,
             'data_criacao': self.data_criacao.isoformat(),
-            'usuario_criador': self.usuario_criador
+            'usuario_criador': self.usuario_criador,
+            'formato': self.formato,
+            'n_linhas': self.n_linhas
         }
 
+class ForecastCenarioDados(Base):
+    """
+    Entradas de um cenário em formato colunar (NPZ comprimido, um blob por cenário).
+    Ver services/forecast_armazenamento.py.
+    """
+    __tablename__ = 'forecast_cenario_dados'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cenario_id = Column(Integer, nullable=False, unique=True, index=True)
+    dados = Column(LargeBinary, nullable=False)
+
 class ForecastEntry(Base):
     """
     Entradas individuais de previsão vinculadas a um cenário.
@@ -340,6 +410,47 @@ class ForecastEntry(Base):
         Index('idx_forecast_cenario_mes', 'cenario_id', 'mes'),
     )
 
+class ForecastBacktest(Base):
+    """
+    Resultado do backtest de origem móvel por série e método.
+    Guarda só a execução mais recente de cada grão (conta, centro, folha).
+    """
+    __tablename__ = 'forecast_backtests'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data_execucao = Column(DateTime, default=datetime.now)
+    grao = Column(String(20), nullable=False)  # conta, centro, folha
+    chave_serie = Column(String(200), nullable=False)  # ex: '41010001' ou 'centro|conta'
+    metodo = Column(String(20), nullable=False)
+    horizonte = Column(Integer)
+    n_origens = Column(Integer)
+    mape = Column(Float)
+    wape = Column(Float)
+    vies = Column(Float)
+    n_pontos = Column(Integer)
+    tempo_metodo_s = Column(Float)  # Ajuste+previsão do método (todas as séries)
+    melhor = Column(Boolean, default=False)  # Método escolhido para a série
+    
+    __table_args__ = (
+        Index('idx_backtest_grao_serie', 'grao', 'chave_serie'),
+    )
+
+class ForecastEstado(Base):
+    """
+    Estado incremental de um cenário automático (services/forecast_incremental.py).
+    Permite incorporar um mês fechado sem reajustar todas as séries.
+    """
+    __tablename__ = 'forecast_estados'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cenario_id = Column(Integer, nullable=False, unique=True, index=True)
+    metodo = Column(String(20), nullable=False)  # linear, sma, ema, seasonal, hybrid, auto
+    agregacao = Column(String(20), default='conta')  # conta ou total
+    ultimo_mes = Column(String(7))  # 'AAAA-MM' do último mês incorporado
+    n_series = Column(Integer)
+    estado = Column(LargeBinary, nullable=False)  # NPZ (EstadoForecast.to_bytes)
+    data_atualizacao = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
 class Provisao(Base):
     """
     Gestão de provisões e passivos (Fase 6 - Feature B).
@@ -371,6 +482,7 @@ class Provisao(Base):
     
     # Vínculo com lançamento real (quando a provisão se concretiza)
     lancamento_realizado_id = Column(Integer, nullable=True) # FK lógica
+    razao_realizado_id = Column(Integer, nullable=True, index=True) # FK lógica (conciliação com o Razão)
     
     data_criacao = Column(DateTime, default=datetime.now)
     data_atualizacao = Column(DateTime, onupdate=datetime.now)
@@ -391,6 +503,7 @@ class Provisao(Base):
             'numero_contrato': self.numero_contrato,
             'cadastrado_sistema': self.cadastrado_sistema,
             'numero_registro': self.numero_registro,
+            'razao_realizado_id': self.razao_realizado_id,
             'regional': self.regional,
             'base': self.base
         }
@@ -461,6 +574,36 @@ class JustificativaOBZ(Base):
             'data_atualizacao': self.data_atualizacao.isoformat() if self.data_atualizacao else None
         }
 
+# =============================================================================
+# DIMENSÃO DE FORNECEDORES (services/fornecedores_service.py)
+# =============================================================================
+
+class Fornecedor(Base):
+    """
+    Fornecedor canônico: agrupa as grafias de um mesmo fornecedor
+    ("ENGIE SERVICOS LTDA", "Engie Serviços Ltda.").
+    """
+    __tablename__ = 'fornecedores'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nome_canonico = Column(String(200), nullable=False)  # Grafia mais frequente na criação
+    chave = Column(String(200), nullable=False, index=True)  # Nome normalizado do canônico
+    data_criacao = Column(DateTime, default=datetime.now)
+
+
+class FornecedorAlias(Base):
+    """
+    Grafia de fornecedor como chega no Razão -> fornecedor canônico.
+    """
+    __tablename__ = 'fornecedores_alias'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nome = Column(String(200), nullable=False, unique=True, index=True)  # Texto original
+    chave = Column(String(200), nullable=False, index=True)  # Sem acentos, pontuação e sufixo societário
+    fornecedor_id = Column(Integer, nullable=False, index=True)  # FK lógica
+    similaridade = Column(Float)  # Com a grafia que ligou ao grupo (1.0 = mesma chave)
+    data_criacao = Column(DateTime, default=datetime.now)
+
 # =============================================================================
 # MODELO DE AUTENTICAÇÃO (Fase Segurança)
 # =============================================================================
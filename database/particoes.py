@@ -0,0 +1,132 @@
+"""
+database/particoes.py
+=====================
+Carga incremental por partição (ano, mês) com checksums.
+
+Cada mês gravado tem um checksum em checksums_particao: o hash dos
+fingerprints (database/fingerprint.py) das suas linhas, em ordem. Na recarga
+do ano, o checksum de cada mês do arquivo é comparado com o gravado:
+
+- mês igual (checksum e quantidade de linhas no banco): nada é lido nem escrito
+- mês diferente ou novo: sincronizado por fingerprint (só as linhas que
+  mudaram são trocadas)
+- mês gravado que sumiu do arquivo: linhas removidas
+
+Tudo na sessão do chamador, em uma transação. No fechamento mensal (arquivo
+com o ano inteiro, só o último mês mudou) ~1/12 das linhas é tocado.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import hashlib
+from typing import Dict, Tuple
+
+import pandas as pd
+from sqlalchemy import func
+
+from .fingerprint import TAMANHO_FINGERPRINT, calcular_fingerprints, sincronizar_por_fingerprint
+from .models import ChecksumParticao
+
+# =============================================================================
+# CHECKSUMS
+# =============================================================================
+
+def checksum_fingerprints(fingerprints) -> str:
+    """Hash da lista ordenada de fingerprints (independe da ordem das linhas)."""
+    digest = hashlib.blake2b(digest_size=TAMANHO_FINGERPRINT // 2)
+    for fp in sorted(fingerprints):
+        digest.update(fp.encode('ascii'))
+    return digest.hexdigest()
+
+
+def calcular_checksums(df: pd.DataFrame) -> Dict[str, Tuple[str, int, float]]:
+    """
+    Checksum por mês de uma carga já com a coluna fingerprint.
+
+    Returns:
+        {mes: (checksum, linhas, valor_total)}
+    """
+    return {
+        mes: (checksum_fingerprints(grupo['fingerprint']), len(grupo), float(grupo['valor'].sum()))
+        for mes, grupo in df.groupby('mes', sort=False)
+    }
+
+
+def checksums_gravados(session, modelo, ano: int) -> Dict[str, Tuple[str, int]]:
+    """
+    Checksums gravados do ano, só para meses cuja contagem de linhas no banco
+    ainda confere (edições fora da carga invalidam o mês).
+
+    Returns:
+        {mes: (checksum, linhas)}
+    """
+    tabela = modelo.__tablename__
+    contagem = dict(session.query(modelo.mes, func.count(modelo.id))
+                    .filter(modelo.ano == ano).group_by(modelo.mes).all())
+    gravados = session.query(ChecksumParticao.mes, ChecksumParticao.checksum, ChecksumParticao.linhas) \
+        .filter(ChecksumParticao.tabela == tabela, ChecksumParticao.ano == ano).all()
+    return {mes: (checksum, linhas) for mes, checksum, linhas in gravados if contagem.get(mes) == linhas}
+
+
+# =============================================================================
+# CARGA
+# =============================================================================
+
+def sincronizar_por_particao(session, modelo, df: pd.DataFrame, ano: int) -> Dict:
+    """
+    Aplica a carga de um ano, reescrevendo só os meses alterados (sem commit).
+
+    Args:
+        session: Sessão do banco (o chamador faz commit/rollback)
+        modelo: Modelo com ano, mes, valor e fingerprint (ex: RazaoRealizado)
+        df: Carga do ano com as colunas do modelo (sem id)
+        ano: Ano da carga (partições de outros anos não são tocadas)
+
+    Returns:
+        Dict com meses_alterados, meses_inalterados, meses_removidos,
+        inseridos, removidos e mantidos
+    """
+    tabela = modelo.__tablename__
+    df = df.reset_index(drop=True)
+    df['fingerprint'] = calcular_fingerprints(df, tabela)
+
+    entrada = calcular_checksums(df)
+    gravados = checksums_gravados(session, modelo, ano)
+    meses_banco = {m for (m,) in session.query(modelo.mes).filter(modelo.ano == ano).distinct()}
+    meses_banco |= {m for (m,) in session.query(ChecksumParticao.mes)
+                    .filter(ChecksumParticao.tabela == tabela, ChecksumParticao.ano == ano)}
+
+    resultado = {'meses_alterados': [], 'meses_inalterados': [], 'meses_removidos': [],
+                 'inseridos': 0, 'removidos': 0, 'mantidos': 0}
+
+    for mes, (checksum, linhas, valor_total) in entrada.items():
+        if gravados.get(mes) == (checksum, linhas):
+            resultado['meses_inalterados'].append(mes)
+            resultado['mantidos'] += linhas
+            continue
+
+        parcial = sincronizar_por_fingerprint(
+            session, modelo, df[df['mes'] == mes], (modelo.ano == ano) & (modelo.mes == mes)
+        )
+        for chave in ('inseridos', 'removidos', 'mantidos'):
+            resultado[chave] += parcial[chave]
+        resultado['meses_alterados'].append(mes)
+
+        registro = session.query(ChecksumParticao).filter_by(tabela=tabela, ano=ano, mes=mes).first()
+        if registro is None:
+            registro = ChecksumParticao(tabela=tabela, ano=ano, mes=mes)
+            session.add(registro)
+        registro.checksum = checksum
+        registro.linhas = linhas
+        registro.valor_total = valor_total
+
+    # Meses gravados que não vieram no arquivo: a carga espelha o arquivo
+    for mes in sorted(meses_banco - set(entrada)):
+        resultado['removidos'] += session.query(modelo).filter(modelo.ano == ano, modelo.mes == mes) \
+            .delete(synchronize_session=False)
+        session.query(ChecksumParticao).filter_by(tabela=tabela, ano=ano, mes=mes) \
+            .delete(synchronize_session=False)
+        resultado['meses_removidos'].append(mes)
+
+    return resultado
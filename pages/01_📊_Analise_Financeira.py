@@ -6,6 +6,8 @@ Foco: P&L e Razão de Gastos.
 Estrutura: Executivo | Analítico | Estratégico
 """
 
+import time
+
 import pandas as pd
 import streamlit as st
 import plotly.express as px
@@ -13,16 +15,19 @@ import plotly.graph_objects as go
 
 from utils_financeiro import (
     gerar_analise_ia,
-    get_ai_chat_response,
+    stream_ai_chat_response,
     plot_robust_forecast,
     MESES_ORDEM
 )
+from data.pl_tensor import get_pl_tensor
+from services.contexto_financeiro import contexto_para_prompt, get_snapshot
 from utils_ui import (
     setup_page,
     exibir_kpi_card,
     formatar_valor_brl,
     CORES,
-    require_auth
+    require_auth,
+    exibir_busca_textual
 )
 
 # =============================================================================
@@ -56,30 +61,18 @@ if pl_df is None:
 # PROCESSAMENTO INICIAL
 # =============================================================================
 
-# DEDUPLICAÇÃO: Garantir que não há registros duplicados no DataFrame
-# Isso pode acontecer se dados do banco forem mesclados incorretamente com upload
-if 'codigo_centro_gasto' in pl_df.columns and 'mes' in pl_df.columns and 'tipo_valor' in pl_df.columns:
-    colunas_chave = ['codigo_centro_gasto', 'conta_contabil', 'mes', 'tipo_valor', 'ano']
-    colunas_existentes = [c for c in colunas_chave if c in pl_df.columns]
-    if colunas_existentes:
-        pl_df = pl_df.drop_duplicates(subset=colunas_existentes, keep='last')
+# TENSOR DO P&L: [linha (centro × conta), mes, tipo_valor, ano]
+# Construído 1x por pl_df (fica na sessão). Registros repetidos na mesma
+# célula seguem "último vence", o que substitui o drop_duplicates por rerun.
+pl_tensor = get_pl_tensor(pl_df)
 
-# Separar custos e financeiro
+# Separar custos e financeiro (máscaras sobre o eixo de linhas)
 # NOTA: codigo_centro_gasto é STRING após processamento do ETL
-df_custos = pl_df[pl_df['codigo_centro_gasto'] != '0'].copy()
-df_financeiro = pl_df[pl_df['codigo_centro_gasto'] == '0'].copy()
+mask_financeiro = pl_tensor.mascara_linhas(codigo_centro_gasto='0')
+mask_custos = ~mask_financeiro
 
 # Calcular último mês realizado
-ultimo_mes_realizado = None
-if not df_custos.empty:
-    dados_realizados = df_custos.query("tipo_valor == 'Realizado' and valor != 0")
-    if not dados_realizados.empty:
-        dados_realizados['mes_num'] = pd.Categorical(
-            dados_realizados['mes'],
-            categories=MESES_ORDEM,
-            ordered=True
-        ).codes
-        ultimo_mes_realizado = dados_realizados.loc[dados_realizados['mes_num'].idxmax(), 'mes']
+ultimo_mes_realizado = pl_tensor.ultimo_mes_com_valor('Realizado', linhas=mask_custos)
 
 numero_meses_passados = MESES_ORDEM.index(ultimo_mes_realizado) + 1 if ultimo_mes_realizado else 0
 
@@ -94,15 +87,17 @@ with st.expander("🔍 Filtros Globais", expanded=False):
     
     with col0_filter:
         # Filtro de Ano - essencial para evitar soma de múltiplos anos
-        anos_disponiveis = sorted(df_custos['ano'].unique().tolist(), reverse=True) if 'ano' in df_custos.columns else [2025]
+        anos_disponiveis = sorted(pl_tensor.agregar(['ano'], linhas=mask_custos)['ano'].tolist(), reverse=True) or [2025]
         ano_selecionado = st.selectbox("📅 Ano", anos_disponiveis, index=0)
     
     with col1_filter:
-        lista_centros_custo = ['Visão Geral (Consolidado)'] + sorted(df_custos['centro_gasto_nome'].dropna().unique().tolist())
+        linhas_custos = pl_tensor.linhas[mask_custos]
+        nomes_centros = linhas_custos['centro_gasto_nome'] if 'centro_gasto_nome' in linhas_custos.columns else pd.Series(dtype=object)
+        lista_centros_custo = ['Visão Geral (Consolidado)'] + sorted(nomes_centros.dropna().unique().tolist())
         centro_custo_selecionado = st.selectbox("Centro de Custo", lista_centros_custo)
     
     with col2_filter:
-        lista_contas_contabeis = ['Visão Geral (Consolidado)'] + sorted(df_custos['conta_contabil'].unique().tolist())
+        lista_contas_contabeis = ['Visão Geral (Consolidado)'] + sorted(linhas_custos['conta_contabil'].unique().tolist())
         conta_contabil_selecionada = st.selectbox("Conta Contábil", lista_contas_contabeis)
     
     with col3_filter:
@@ -110,36 +105,38 @@ with st.expander("🔍 Filtros Globais", expanded=False):
         periodo_selecionado = st.selectbox("Período", opcoes_periodo)
 
 # FILTRAGEM
-df_custos_filtrado = df_custos.copy()
+# Centro/Conta filtram o eixo de linhas; Ano e Período são índices do tensor
 razao_filtrado = razao_df.copy() if razao_df is not None else pd.DataFrame()
 
 # Filtro de Ano (PRIMEIRO - evita soma de múltiplos anos)
-if 'ano' in df_custos_filtrado.columns:
-    df_custos_filtrado = df_custos_filtrado[df_custos_filtrado['ano'] == ano_selecionado]
-    if not razao_filtrado.empty and 'ano' in razao_filtrado.columns:
-        razao_filtrado = razao_filtrado[razao_filtrado['ano'] == ano_selecionado]
+if not razao_filtrado.empty and 'ano' in razao_filtrado.columns:
+    razao_filtrado = razao_filtrado[razao_filtrado['ano'] == ano_selecionado]
 
 # Filtro Centro de Custo
+mask_centro = mask_custos.copy()
 if centro_custo_selecionado != 'Visão Geral (Consolidado)':
-    df_custos_filtrado = df_custos_filtrado[df_custos_filtrado['centro_gasto_nome'] == centro_custo_selecionado]
+    mask_centro &= pl_tensor.mascara_linhas(centro_gasto_nome=centro_custo_selecionado)
     if not razao_filtrado.empty and 'centro_gasto_nome' in razao_filtrado.columns:
         razao_filtrado = razao_filtrado[razao_filtrado['centro_gasto_nome'] == centro_custo_selecionado]
 
 # Filtro Conta Contábil
+mask_filtrado = mask_centro.copy()
 if conta_contabil_selecionada != 'Visão Geral (Consolidado)':
-    df_custos_filtrado = df_custos_filtrado[df_custos_filtrado['conta_contabil'] == conta_contabil_selecionada]
+    mask_filtrado &= pl_tensor.mascara_linhas(conta_contabil=conta_contabil_selecionada)
 
 # Filtro Período
 if periodo_selecionado == 'YTD (Acumulado do Ano)':
     meses_a_analisar = MESES_ORDEM[:numero_meses_passados]
-    df_custos_filtrado = df_custos_filtrado[df_custos_filtrado['mes'].isin(meses_a_analisar)]
     if not razao_filtrado.empty and 'mes' in razao_filtrado.columns:
         razao_filtrado = razao_filtrado[razao_filtrado['mes'].isin(meses_a_analisar)]
 else:
-    df_custos_filtrado = df_custos_filtrado[df_custos_filtrado['mes'] == periodo_selecionado]
+    meses_a_analisar = [periodo_selecionado]
     if not razao_filtrado.empty and 'mes' in razao_filtrado.columns:
         razao_filtrado = razao_filtrado[razao_filtrado['mes'] == periodo_selecionado]
 
+# Seleção aplicada a todas as reduções das abas
+filtro_tensor = dict(anos=[ano_selecionado], meses=meses_a_analisar, linhas=mask_filtrado)
+
 # =============================================================================
 # ESTRUTURA DE ABAS PRINCIPAIS
 # =============================================================================
@@ -155,8 +152,8 @@ with tab_executivo:
     st.markdown("### Visão Executiva")
     
     # 1. KPIs Principais
-    total_realizado = df_custos_filtrado.query("tipo_valor == 'Realizado'")['valor'].sum()
-    total_budget = df_custos_filtrado.query("tipo_valor == 'Budget V3'")['valor'].sum()
+    total_realizado = pl_tensor.total(tipos='Realizado', **filtro_tensor)
+    total_budget = pl_tensor.total(tipos='Budget V3', **filtro_tensor)
     variacao_abs = total_realizado - total_budget
     # Variação %: (Realizado - Budget) / |Budget| para manter sinal correto
     variacao_perc = (variacao_abs / abs(total_budget) * 100) if total_budget != 0 else 0
@@ -213,14 +210,8 @@ with tab_executivo:
     
     # 2. Gráfico de Tendência (Smoothed)
     st.subheader("Tendência de Gastos (YTD - Absoluto)")
-    df_trend = df_custos.copy() 
-    
-    if centro_custo_selecionado != 'Visão Geral (Consolidado)':
-        df_trend = df_trend[df_trend['centro_gasto_nome'] == centro_custo_selecionado]
-        
-    df_trend_group = df_trend.groupby(['mes', 'tipo_valor'])['valor'].sum().reset_index()
     # Filtrar apenas meses realizados e ordenados ou budget
-    df_trend_group = df_trend_group[df_trend_group['tipo_valor'].isin(['Realizado', 'Budget V3'])]
+    df_trend_group = pl_tensor.agregar(['mes', 'tipo_valor'], tipos=['Realizado', 'Budget V3'], linhas=mask_centro)
     df_trend_group['mes'] = pd.Categorical(df_trend_group['mes'], categories=MESES_ORDEM, ordered=True)
     df_trend_group = df_trend_group.sort_values('mes')
     
@@ -247,9 +238,7 @@ with tab_analitico:
         st.subheader("Detalhamento de Despesas")
         
         # Tabela 1: Resumo Mensal
-        summary_pivot = df_custos_filtrado.pivot_table(
-            values='valor', index='tipo_valor', columns='mes', aggfunc='sum', fill_value=0
-        ).reindex(columns=MESES_ORDEM).dropna(axis=1, how='all').fillna(0)
+        summary_pivot = pl_tensor.pivot_mensal('tipo_valor', **filtro_tensor)
         
         if not summary_pivot.empty:
             summary_pivot['Total'] = summary_pivot.sum(axis=1)
@@ -258,23 +247,26 @@ with tab_analitico:
             st.info("Nenhum dado disponível.")
             
         st.markdown("#### Performance por Conta Contábil")
-        tipos_disponiveis = df_custos_filtrado['tipo_valor'].unique().tolist()
+        tipos_disponiveis = pl_tensor.agregar(['tipo_valor'], **filtro_tensor)['tipo_valor'].tolist()
         tipos_selecionados = st.multiselect("Tipos de Valor:", tipos_disponiveis, default=tipos_disponiveis)
         
         if tipos_selecionados:
-            df_detalhada = df_custos_filtrado[df_custos_filtrado['tipo_valor'].isin(tipos_selecionados)].copy()
-            df_detalhada['mes'] = pd.Categorical(df_detalhada['mes'], categories=MESES_ORDEM, ordered=True)
-            df_pivot = df_detalhada.pivot_table(index=['conta_contabil', 'tipo_valor'], columns='mes', values='valor', aggfunc='sum').fillna(0)
+            df_pivot = pl_tensor.pivot_mensal(['conta_contabil', 'tipo_valor'], tipos=tipos_selecionados, **filtro_tensor)
             st.dataframe(df_pivot.style.format("R$ {:,.2f}"), use_container_width=True)
 
     with sub_tabs_analise[1]: # Fornecedores
         st.subheader("Análise por Fornecedor (Razão)")
         if not razao_filtrado.empty:
-            # Trabalhando com absolutos para ranking de fornecedores (quem gastou mais)
+            from services.fornecedores_service import canonicalizar
+            
+            # Trabalhando com absolutos para ranking de fornecedores (quem gastou mais);
+            # grafias do mesmo fornecedor ("Engie Serviços Ltda.", "ENGIE SERVICOS LTDA") somam juntas
             df_forn_calc = razao_filtrado.copy()
             df_forn_calc['valor_abs'] = df_forn_calc['valor'].abs()
+            df_forn_calc['fornecedor_canonico'] = canonicalizar(df_forn_calc['fornecedor'])
             
-            df_fornecedores = df_forn_calc.groupby('fornecedor')['valor_abs'].sum().reset_index()
+            df_fornecedores = df_forn_calc.groupby('fornecedor_canonico')['valor_abs'].sum().reset_index() \
+                .rename(columns={'fornecedor_canonico': 'fornecedor'})
             if not df_fornecedores.empty:
                 top_fornecedores = df_fornecedores.nlargest(10, 'valor_abs')
                 fig_fornec = px.bar(
@@ -287,31 +279,48 @@ with tab_analitico:
                 st.plotly_chart(fig_fornec, use_container_width=True)
                 
                 st.markdown("#### Detalhes dos Lançamentos")
-                fornecedor_sel = st.selectbox("Filtrar Fornecedor:", ['Todos'] + sorted(razao_filtrado['fornecedor'].dropna().unique().tolist()))
-                df_f = razao_filtrado if fornecedor_sel == 'Todos' else razao_filtrado[razao_filtrado['fornecedor'] == fornecedor_sel]
+                fornecedor_sel = st.selectbox("Filtrar Fornecedor:", ['Todos'] + sorted(df_forn_calc['fornecedor_canonico'].dropna().astype(str).unique().tolist()))
+                df_f = razao_filtrado if fornecedor_sel == 'Todos' else razao_filtrado[df_forn_calc['fornecedor_canonico'] == fornecedor_sel]
                 cols_exibir = [c for c in ['data', 'mes', 'fornecedor', 'valor', 'historico', 'centro_gasto_nome'] if c in df_f.columns]
                 st.dataframe(df_f[cols_exibir], use_container_width=True)
             else:
                 st.info("Nenhum lançamento relevante.")
         else:
              st.warning("⚠️ Dados de Razão não disponíveis para este filtro.")
+        
+        # Busca textual (índice do banco): notas, fornecedores e números de registro
+        st.markdown("#### 🔍 Buscar no Razão")
+        exibir_busca_textual('razao_realizados', key='busca_fts_razao', ano=ano_selecionado)
+        
+        # Busca por similaridade no texto do Razão (fornecedor + descrição), sobre todo o banco
+        st.markdown("#### 🔎 Buscar lançamentos parecidos")
+        termo_busca = st.text_input("Descreva o gasto:", placeholder="Ex: manutenção de válvulas, aluguel de veículos",
+                                    key="busca_razao")
+        if termo_busca:
+            from services.indice_razao import get_indice_razao  # sklearn só quando houver busca
+            indice = get_indice_razao()
+            inicio_busca = time.perf_counter()
+            df_similares = indice.buscar(termo_busca, k=20, ano=ano_selecionado)
+            st.caption(f"{len(df_similares)} resultados em {(time.perf_counter() - inicio_busca) * 1000:.0f} ms "
+                       f"({len(indice)} lançamentos indexados)")
+            if not df_similares.empty:
+                st.dataframe(
+                    df_similares[['score', 'mes', 'centro_gasto_codigo', 'fornecedor', 'descricao', 'valor']],
+                    use_container_width=True, hide_index=True
+                )
     
     with sub_tabs_analise[2]: # Visualizações (Treemap)
         st.subheader("Mapa de Custos (Treemap)")
         # Treemap com valores absolutos para visualização de área
-        df_treemap = df_custos_filtrado.query("tipo_valor == 'Realizado'")
+        df_treemap = pl_tensor.agregar(
+            ['centro_gasto_nome', 'conta_contabil'], tipos='Realizado', absoluto=True, **filtro_tensor
+        ).rename(columns={'valor': 'valor_abs'})
         if not df_treemap.empty:
-            df_treemap = df_treemap.copy()
-            df_treemap['valor_abs'] = df_treemap['valor'].abs()
             df_treemap = df_treemap[df_treemap['valor_abs'] > 0] # Filtrar zeros
             # Filtrar valores nulos para evitar erro no treemap
             df_treemap = df_treemap.dropna(subset=['centro_gasto_nome', 'conta_contabil'])
             df_treemap = df_treemap[df_treemap['centro_gasto_nome'].notna() & (df_treemap['centro_gasto_nome'] != '')]
             
-            # Agregar valores duplicados para evitar erro de hierarquia no treemap
-            if not df_treemap.empty:
-                df_treemap = df_treemap.groupby(['centro_gasto_nome', 'conta_contabil'], as_index=False)['valor_abs'].sum()
-            
             if not df_treemap.empty:
                 fig_tm = px.treemap(
                     df_treemap, path=[px.Constant("Total"), 'centro_gasto_nome', 'conta_contabil'],
@@ -340,12 +349,26 @@ with tab_estrategico:
             user_q = st.text_area("Pergunte à IA:", placeholder="Onde posso reduzir custos?", height=150)
             if st.button("Enviar Pergunta"):
                 if user_q:
-                    resumo = df_custos_filtrado.groupby(['tipo_valor', 'mes'])['valor'].sum().reset_index()
+                    # Snapshot compartilhado do ano selecionado: montado uma vez por versão dos dados
+                    resumo = contexto_para_prompt(int(ano_selecionado))
+                    # Recorte dos filtros da página (meses e centros selecionados)
+                    resumo_filtrado = pl_tensor.agregar(['tipo_valor', 'mes'], **filtro_tensor)
+                    if not resumo_filtrado.empty:
+                        resumo += "\n\nP&L com os filtros da página:\n" + resumo_filtrado.to_string(index=False)
+                    # Só os lançamentos do Razão relevantes para a pergunta (top-k do índice local)
+                    from services.indice_razao import contexto_razao
+                    razao_relevante = contexto_razao(user_q, ano=int(ano_selecionado))
+                    if razao_relevante:
+                        resumo += "\n\n" + razao_relevante
                     msgs = [{"role": "system", "content": "Analista financeiro sênior. Responda curto e direto."}, 
-                            {"role": "user", "content": f"Dados:\n{resumo.to_string()}\n\nPergunta: {user_q}"}]
-                    with st.spinner("Analisando..."):
-                        resp = get_ai_chat_response(msgs, api_key, ai_provider)
-                    st.markdown(f"**Resposta:**\n{resp}")
+                            {"role": "user", "content": f"Dados:\n{resumo}\n\nPergunta: {user_q}"}]
+                    # Streaming: o texto aparece à medida que o modelo gera
+                    st.markdown("**Resposta:**")
+                    st.write_stream(stream_ai_chat_response(msgs, api_key, ai_provider))
+                    try:
+                        st.caption(f"Contexto enviado: {get_snapshot(int(ano_selecionado)).compactacao.descricao()}")
+                    except Exception:
+                        pass  # Contexto indisponível: o erro já foi para o prompt
         else:
             st.warning("IA Desabilitada: Configure a Chave de API na Sidebar.")
             
@@ -355,7 +378,11 @@ with tab_estrategico:
         if not pl_df.empty and 'data' in pl_df.columns:
             try:
                 # Filtrar para ter apenas realizado consolidado para previsão
-                df_forecast = df_custos.query("tipo_valor == 'Realizado'").groupby('data')['valor'].sum().reset_index()
+                df_forecast = pl_tensor.agregar(['ano', 'mes'], tipos='Realizado', linhas=mask_custos)
+                df_forecast['data'] = pd.to_datetime(dict(
+                    year=df_forecast['ano'], month=df_forecast['mes'].map({m: i + 1 for i, m in enumerate(MESES_ORDEM)}), day=1
+                ))
+                df_forecast = df_forecast.sort_values('data')[['data', 'valor']].reset_index(drop=True)
                 
                 # Usar plot_robust_forecast
                 fig_forecast = plot_robust_forecast(df_forecast, 'data', 'valor', periods=3)
@@ -373,10 +400,10 @@ with tab_estrategico:
 # =============================================================================
 with tab_dre:
     st.markdown("### Demonstrativo de Resultados (DRE)")
-    if not df_financeiro.empty:
+    if mask_financeiro.any():
         ordem_dre = ["Gross Sales - Basic Services", "Gross Sales - Eventual Services", "Sales tax - Basic", "Sales tax - Eventual", "Net Revenue", "Cost of Sales", "Gross profit", "Gross margin (%)"]
-        df_financeiro['conta_contabil'] = pd.Categorical(df_financeiro['conta_contabil'], categories=ordem_dre, ordered=True)
-        pivot_dre = df_financeiro.query("tipo_valor == 'Realizado'").pivot_table(values='valor', index='conta_contabil', columns='mes', aggfunc='sum').reindex(columns=MESES_ORDEM).fillna(0)
+        pivot_dre = pl_tensor.pivot_mensal('conta_contabil', tipos='Realizado', linhas=mask_financeiro, todos_meses=True)
+        pivot_dre = pivot_dre.reindex([c for c in ordem_dre if c in pivot_dre.index])
         
         # Formatação Condicional
         def formatar_dre(val, row_name):
@@ -386,7 +413,7 @@ with tab_dre:
             
         # Aplicar formatação pandas Styler linha a linha é complexo, 
         # vamos formatar o dataframe como string para exibição
-        df_display = pivot_dre.copy()
+        df_display = pivot_dre.astype(object)
         for idx in df_display.index:
             for col in df_display.columns:
                 val = df_display.loc[idx, col]
@@ -8,10 +8,11 @@ from data.referencias_manager import (
     carregar_contas_contabeis,
     get_hierarquia_centro,
     get_ativos_unicos,
+    enriquecer_centros_lote,
     MAPA_CLASSES,
     MESES_ORDEM
 )
-from utils_ui import setup_page, formatar_valor_brl, require_auth
+from utils_ui import setup_page, formatar_valor_brl, require_auth, exibir_busca_textual
 
 # =============================================================================
 # CONFIGURAÇÃO
@@ -72,7 +73,7 @@ def exibir_hierarquia_card(hierarquia):
 # TABS
 # =============================================================================
 
-tab_novo, tab_import, tab_lista = st.tabs(["➕ Nova Provisão", "📥 Importação em Lote", "📋 Compromissos Ativos"])
+tab_novo, tab_import, tab_lista, tab_conc, tab_busca = st.tabs(["➕ Nova Provisão", "📥 Importação em Lote", "📋 Compromissos Ativos", "🤝 Conciliação", "🔍 Busca"])
 
 # =============================================================================
 # TAB: NOVA PROVISÃO
@@ -270,38 +271,31 @@ with tab_import:
             st.dataframe(df_import.head(), use_container_width=True)
             
             if st.button("🚀 Processar Importação", type="primary"):
-                # Converter para lista de dicts
-                lista_dados = df_import.to_dict(orient='records')
-
                 # --- ENRIQUECIMENTO AUTOMÁTICO (Regional, Base, Usuário, Valor) ---
                 current_user = st.session_state.get('username', 'Importação em Lote')
 
-                if not df_centros.empty and 'regional' in df_centros.columns:
-                    for item in lista_dados:
-                        try:
-                            # 1. Atribuição de Usuário
-                            item['usuario'] = current_user
-
-                            # 2. Forçar Valor Negativo (Gasto)
-                            val_raw = float(item.get('valor_estimado', 0))
-                            item['valor_estimado'] = -abs(val_raw)
-
-                            # 3. Normalizar código (pode vir como int do Excel)
-                            cod_raw = str(item.get('centro_gasto_codigo', '')).strip()
-                            if cod_raw.endswith('.0'): 
-                                cod_raw = cod_raw[:-2]
-                            cod_std = cod_raw.zfill(11)
-                            
-                            # Atualizar código normalizado no item também, é boa prática
-                            item['centro_gasto_codigo'] = cod_std
-
-                            # 4. Buscar na referência (Regional/Base)
-                            match = df_centros[df_centros['codigo'] == cod_std]
-                            if not match.empty:
-                                item['regional'] = match.iloc[0]['regional']
-                                item['base'] = match.iloc[0]['base']
-                        except Exception:
-                            continue # Se falhar o lookup, segue sem preencher ou com dados parciais
+                # 1. Normalizar código, buscar Regional/Base e validar (lote único)
+                df_import = enriquecer_centros_lote(
+                    df_import, 'centro_gasto_codigo', df_centros, colunas=['regional', 'base']
+                )
+
+                # 2. Atribuição de Usuário
+                df_import['usuario'] = current_user
+
+                # 3. Forçar Valor Negativo (Gasto)
+                if 'valor_estimado' in df_import.columns:
+                    df_import['valor_estimado'] = -pd.to_numeric(
+                        df_import['valor_estimado'], errors='coerce'
+                    ).fillna(0).abs()
+
+                invalidos = df_import[~df_import['centro_valido']]
+                if not invalidos.empty:
+                    st.warning(f"⚠️ {len(invalidos)} linha(s) com centro de gasto fora da base de referência (Regional/Base não preenchidas).")
+                    with st.expander("Ver Linhas sem Referência"):
+                        st.dataframe(invalidos[['centro_gasto_codigo', 'erro_centro']], use_container_width=True)
+
+                # Converter para lista de dicts
+                lista_dados = df_import.drop(columns=['centro_valido', 'erro_centro']).to_dict(orient='records')
                 
                 # Barra de progresso (fake visual, pois processamento é rápido em lote)
                 progress_text = "Importando registros..."
@@ -595,3 +589,92 @@ with tab_lista:
     else:
         st.info("📭 Nenhum registro encontrado para os filtros selecionados.")
 
+# =============================================================================
+# TAB: CONCILIAÇÃO COM O RAZÃO
+# =============================================================================
+with tab_conc:
+    st.markdown('<div class="section-header"><span class="section-title">Conciliação Automática com o Razão</span></div>', unsafe_allow_html=True)
+    st.caption("Sugere, para cada provisão pendente, o lançamento do Razão correspondente "
+               "(mesmo centro, conta e mês; valor, nº de registro/contrato e fornecedor parecidos).")
+
+    col_c_ano, col_c_mes, col_c_btn = st.columns([1, 1, 2])
+    with col_c_ano:
+        ano_conc = st.selectbox("Ano do Razão", [2026, 2025, 2024], key="conc_ano")
+    with col_c_mes:
+        mes_conc = st.selectbox("Mês", ["Todos"] + MESES_ORDEM, key="conc_mes")
+    with col_c_btn:
+        st.write("")
+        if st.button("🔎 Sugerir Conciliações", type="primary", use_container_width=True):
+            # Import tardio: scipy/sklearn só quando a conciliação é usada
+            from services.conciliacao_service import ConciliacaoService
+            with st.spinner("Conciliando..."):
+                sugestoes, stats = ConciliacaoService().sugerir(ano_conc, None if mes_conc == "Todos" else mes_conc)
+            st.session_state.conc_sugestoes = sugestoes
+            st.session_state.conc_stats = stats
+
+    if 'conc_sugestoes' in st.session_state:
+        from services.conciliacao_service import SCORE_CONFIANTE
+
+        sugestoes = st.session_state.conc_sugestoes
+        stats = st.session_state.conc_stats
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Provisões Pendentes", stats['provisoes'])
+        m2.metric("Lançamentos Livres", f"{stats['lancamentos']:,}".replace(',', '.'))
+        m3.metric("Sugestões", stats['sugestoes'])
+        m4.metric("Tempo", f"{stats['tempo_s']:.2f} s")
+
+        if sugestoes.empty:
+            st.info("📭 Nenhuma correspondência encontrada para o período.")
+        else:
+            df_editor = sugestoes.copy()
+            df_editor.insert(0, 'confirmar', df_editor['score'] >= SCORE_CONFIANTE)
+            editado = st.data_editor(
+                df_editor,
+                column_config={
+                    'confirmar': st.column_config.CheckboxColumn("Confirmar"),
+                    'score': st.column_config.ProgressColumn("Score", min_value=0.0, max_value=1.0, format="%.2f"),
+                    'valor_provisao': st.column_config.NumberColumn("Valor Provisão", format="R$ %.2f"),
+                    'valor_razao': st.column_config.NumberColumn("Valor Razão", format="R$ %.2f"),
+                },
+                disabled=[c for c in df_editor.columns if c != 'confirmar'],
+                hide_index=True,
+                use_container_width=True,
+                key="conc_editor"
+            )
+            st.caption(f"Pré-marcadas: score ≥ {SCORE_CONFIANTE:.2f}.")
+
+            selecionadas = editado[editado['confirmar']]
+            if st.button(f"✅ Confirmar {len(selecionadas)} Selecionada(s)", disabled=selecionadas.empty):
+                from services.conciliacao_service import ConciliacaoService
+                pares = list(zip(selecionadas['provisao_id'].astype(int), selecionadas['razao_id'].astype(int)))
+                confirmadas, erros = ConciliacaoService().confirmar(pares)
+                if erros:
+                    st.warning(f"⚠️ {len(erros)} item(ns) não confirmados.")
+                    with st.expander("Ver Detalhes dos Erros"):
+                        for erro in erros:
+                            st.write(erro)
+                if confirmadas:
+                    del st.session_state.conc_sugestoes
+                    if erros:
+                        st.success(f"✅ {confirmadas} provisões conciliadas com o Razão.")
+                    else:
+                        st.session_state.sucesso_prov = f"✅ {confirmadas} provisões conciliadas com o Razão."
+                        st.rerun()
+
+# =============================================================================
+# TAB: BUSCA
+# =============================================================================
+with tab_busca:
+    st.markdown('<div class="section-header"><span class="section-title">Busca em Lançamentos e Razão</span></div>', unsafe_allow_html=True)
+    
+    col_origem, col_ano = st.columns([3, 1])
+    with col_origem:
+        origem_busca = st.radio("Onde buscar", ["Razão de Gastos", "Lançamentos Realizados"], horizontal=True)
+    with col_ano:
+        ano_busca = st.selectbox("Ano", ["Todos", 2026, 2025, 2024], key="busca_ano")
+    
+    exibir_busca_textual(
+        'razao_realizados' if origem_busca == "Razão de Gastos" else 'lancamentos_realizados',
+        key='busca_lancamentos',
+        ano=None if ano_busca == "Todos" else ano_busca
+    )
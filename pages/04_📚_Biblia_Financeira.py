@@ -9,6 +9,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from utils_ui import setup_page, exibir_kpi_card, formatar_valor_brl, CORES, require_auth
+from data.dimensoes import concatenar_dimensoes
 from data.referencias_manager import (
     carregar_orcamento_v1_2026,
     carregar_centros_gasto,
@@ -41,8 +42,9 @@ st.markdown("""
 # CARREGAMENTO DE DADOS
 # =============================================================================
 
-@st.cache_data
 def load_static_data():
+    # Os carregadores já são cacheados individualmente; um cache extra aqui
+    # esconderia a invalidação feita pelo monitor de referências.
     df_orc = carregar_orcamento_v1_2026()
     df_centros = carregar_centros_gasto()
     df_contas = carregar_contas_contabeis()
@@ -89,7 +91,7 @@ if pl_df_session is not None and not pl_df_session.empty:
         anos_sessao = pl_df_session['ano'].unique()
         df_db_filtered = pl_df_db[~pl_df_db['ano'].isin(anos_sessao)]
         
-        pl_df_final = pd.concat([df_db_filtered, pl_df_session], ignore_index=True)
+        pl_df_final = concatenar_dimensoes([df_db_filtered, pl_df_session])
     else:
         pl_df_final = pl_df_session
 else:
@@ -10,10 +10,16 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from services.forecast_service import ForecastService
-from services.ai_board import AIBoard
+from services.backtest_forecast import BacktestService
+from services.simulacao_orcamento import SimulacaoOrcamentoService, N_CAMINHOS_PADRAO
+from services.ai_board import AIBoard, EVENTO_TRECHO, EVENTO_FIM, EVENTO_RESULTADO, CHAIRMAN
 from services.provisioning_service import ProvisioningService
-from data.comparador import get_comparativo_mensal, get_realizado_agregado_por_mes
+from data.comparador import get_comparativo_mensal, get_realizado_agregado_por_mes, get_historico_folhas
+from services.forecast_hierarquico import (
+    NIVEIS_HIERARQUIA, RECONCILIACOES, anexar_hierarquia, totais_por_nivel
+)
 
+from utils_financeiro import MESES_ORDEM
 from utils_ui import setup_page, require_auth
 
 # Configuração da Página
@@ -55,7 +61,9 @@ else:
 
 # Serviços
 forecast_service = ForecastService()
+backtest_service = BacktestService()
 prov_service = ProvisioningService()
+simulacao_service = SimulacaoOrcamentoService()
 ai_board = AIBoard(st.session_state['api_key'], st.session_state.get('ai_provider', 'Gemini (Google)'))
 
 tabs = st.tabs(["🤖 AI Board Advisor", "📈 Previsão de Fechamento (Forecast)"])
@@ -79,20 +87,50 @@ with tabs[0]:
         
         btn_consultar = st.button("Convocar Reunião do Board", type="primary")
         
-        if btn_consultar and user_query:
-            with st.spinner("🤖 O Board está deliberando... (Consultando CFO, Controller e Auditor)"):
-                try:
-                    resultado = ai_board.realizar_reuniao_board(user_query)
-                    st.session_state['board_result'] = resultado
-                except Exception as e:
-                    st.error(f"Erro na reunião: {e}")
-
     with col_board:
-        if 'board_result' in st.session_state:
+        if btn_consultar and user_query:
+            # Reunião em streaming: cada persona escreve na sua coluna à medida que responde
+            st.caption("🤖 O Board está deliberando... (CFO, Controller e Auditor em paralelo)")
+            area_chairman = st.empty()
+            col_cfo, col_ctrl = st.columns(2)
+            with col_cfo:
+                with st.expander("💼 CFO (Estratégia)", expanded=True):
+                    area_cfo = st.empty()
+            with col_ctrl:
+                with st.expander("⚙️ CONTROLLER (Operação)", expanded=True):
+                    area_ctrl = st.empty()
+                with st.expander("🔍 AUDITOR (Risco)", expanded=True):
+                    area_auditor = st.empty()
+            areas = {'CFO': area_cfo, 'Controller': area_ctrl, 'Auditor': area_auditor, CHAIRMAN: area_chairman}
+            
+            textos = {}
+            try:
+                for evento, persona, dado in ai_board.transmitir_reuniao(user_query):
+                    if evento == EVENTO_TRECHO and persona in areas:
+                        textos[persona] = textos.get(persona, '') + dado
+                        titulo = "🏛️ **CHAIRMAN (SÍNTESE)**\n\n" if persona == CHAIRMAN else ""
+                        areas[persona].markdown(titulo + textos[persona])
+                    elif evento == EVENTO_FIM and persona in areas and dado['status'] != 'ok':
+                        areas[persona].warning(f"Sem resposta: {dado.get('erro')}")
+                    elif evento == EVENTO_RESULTADO:
+                        st.session_state['board_result'] = dado
+            except Exception as e:
+                st.error(f"Erro na reunião: {e}")
+            else:
+                st.rerun()  # Redesenha com o layout final (status, tempos, Analyst)
+        
+        elif 'board_result' in st.session_state:
             res = st.session_state['board_result']
             opinioes = res.get('opinioes', {})
             sintese = res.get('sintese', '')
             
+            # Resultado parcial: personas que estouraram o tempo ou falharam
+            ausentes = [p for p, s in res.get('status', {}).items() if s.get('status') != 'ok']
+            if ausentes:
+                st.warning(f"⚠️ Reunião com resultado parcial: sem resposta de {', '.join(ausentes)}.")
+            if 'tempo_total_s' in res:
+                st.caption(f"⏱️ Reunião concluída em {res['tempo_total_s']:.1f}s ({res.get('modo', '')})")
+            
             # Síntese do Chairman
             st.markdown(f"""
             <div class="board-card chairman">
@@ -130,59 +168,118 @@ with tabs[1]:
     
     with col_config:
         st.subheader("⚙️ Gerar Cenário")
-        metodo = st.selectbox("Método de Projeção", ["hybrid", "linear", "sma"], 
+        metodo = st.selectbox("Método de Projeção", ["hybrid", "linear", "sma", "ema", "seasonal", "auto"], 
                             format_func=lambda x: {
+                                "auto": "Automático (Melhor no Backtest)",
                                 "hybrid": "Híbrido (Tendência + Sazonalidade)",
                                 "linear": "Regressão Linear",
-                                "sma": "Média Móvel Simples"
+                                "sma": "Média Móvel Simples",
+                                "ema": "Média Móvel Exponencial",
+                                "seasonal": "Sazonal (Último Ciclo)"
                             }[x])
         
-        if st.button("Gerar Novo Forecast"):
-            with st.spinner("Processando histórico e projetando..."):
+        # Acurácia histórica dos métodos (backtest de origem móvel 2024/2025)
+        with st.expander("🎯 Acurácia dos Métodos (Backtest)", expanded=False):
+            grao_bt = st.radio("Grão", ["conta", "folha"], horizontal=True,
+                               format_func=lambda x: {"conta": "Conta", "folha": "Centro × Conta"}[x])
+            df_bt = backtest_service.get_resumo(grao_bt)
+            if df_bt.empty:
+                st.caption("Nenhum backtest executado ainda.")
+            else:
+                st.dataframe(
+                    df_bt.drop(columns=['data_execucao']).style.format({
+                        'mape': '{:.1f}%', 'wape': '{:.1f}%', 'vies': '{:+.1f}%', 'tempo_s': '{:.3f}s'
+                    }),
+                    use_container_width=True, hide_index=True
+                )
+                st.caption(f"Última execução: {pd.to_datetime(df_bt['data_execucao'].max()):%d/%m/%Y %H:%M}")
+            
+            if st.button("Executar Backtest"):
+                with st.spinner("Avaliando todos os métodos em origens móveis..."):
+                    df_bt_hist = get_historico_folhas((2024, 2025))
+                    if df_bt_hist.empty:
+                        st.error("Sem histórico 2024/2025 no banco para o backtest.")
+                    else:
+                        backtest_service.executar_e_salvar(df_bt_hist, grao=grao_bt)
+                        st.rerun()
+        
+        # Cache de previsões do processo (compartilhado entre sessões)
+        with st.expander("⚡ Cache de Previsões", expanded=False):
+            stats_cache = forecast_service.cache.estatisticas()
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Acertos", f"{stats_cache['hits_memoria'] + stats_cache['hits_disco']:,}")
+            c2.metric("Faltas", f"{stats_cache['misses']:,}")
+            c3.metric("Taxa", f"{stats_cache['taxa_acerto']:.0%}")
+            st.caption(
+                f"{stats_cache['itens_memoria']:,}/{stats_cache['max_itens']:,} séries em memória"
+                f" | disco: {stats_cache['disco'] or 'desativado'}"
+            )
+            if st.button("Limpar cache"):
+                forecast_service.cache.limpar()
+                st.rerun()
+        
+        granularidade = st.radio("Granularidade", ["Consolidado", "Centro × Conta"], horizontal=True)
+        
+        decomposicao_completa = False
+        if granularidade == "Consolidado" and metodo in ("hybrid", "seasonal"):
+            decomposicao_completa = st.checkbox(
+                "Decomposição sazonal completa (statsmodels)",
+                help="Usa o seasonal_decompose por série, distribuído entre os núcleos do servidor."
+            )
+        
+        if granularidade == "Centro × Conta":
+            reconciliacao = st.selectbox(
+                "Reconciliação", RECONCILIACOES,
+                format_func=lambda x: {
+                    "bottom_up": "Bottom-up (soma das folhas)",
+                    "top_down": "Top-down (participação histórica)"
+                }[x]
+            )
+            nivel_top_down = st.selectbox(
+                "Nível previsto (top-down)", NIVEIS_HIERARQUIA, index=NIVEIS_HIERARQUIA.index('ativo'),
+                disabled=reconciliacao != 'top_down'
+            )
+        
+        gerar = st.button("Gerar Novo Forecast")
+        
+        if gerar and granularidade == "Centro × Conta":
+            with st.spinner("Projetando cada centro × conta e reconciliando a hierarquia..."):
                 try:
-                    # Carregar dados REAIS do banco
-                    df_realizado = get_comparativo_mensal(2026)
+                    df_folhas = get_historico_folhas((2025, 2026))
                     
-                    if df_realizado.empty:
+                    if df_folhas.empty:
                         st.error("Sem dados realizados para projeção.")
                     else:
-                        # Adaptar dataframe para o serviço
-                        # O serviço espera: ['data_ref', 'valor', 'conta_contabil_codigo', 'centro_gasto_codigo']
-                        # O get_comparativo_mensal retorna ['mes', 'orcado', 'realizado', ...] agrupado por mes
-                        # Preciso dos dados detalhados.
-                        
-                        # Vou usar uma query direta aqui para simplificar ou um novo metodo no comparador
-                        # Por enquanto, vou usar o DF agregado e "explodir" ou melhor:
-                        # Usar get_realizado_agregado_por_mes que retorna logs brutos?
-                        # Não, preciso de granularidade de conta.
-                        
-                        # Mock temporário: Usar os dados realizados existentes
-                        # Vou criar um adapter rápido
-                        data_adapter = df_realizado.copy()
-                        MESES_MAP_FIX = {m: i+1 for i, m in enumerate(['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ'])}
-                        data_adapter['month_num_temp'] = data_adapter['mes'].map(MESES_MAP_FIX)
-                        data_adapter['data_ref'] = data_adapter.apply(lambda x: pd.Timestamp(year=2026, month=x['month_num_temp'], day=1), axis=1)
-                        data_adapter['valor'] = data_adapter['realizado']
-                        # Falta conta contabil... O forecast service precisa de conta.
-                        # Vou pedir para o usuário: "Forecast Global" por enquanto (Soma tudo)
+                        nome_cenario = f"Granular {metodo} ({reconciliacao}) - {pd.Timestamp.now().strftime('%H:%M')}"
+                        id_cenario = forecast_service.criar_cenario_granular(
+                            df_folhas, nome=nome_cenario, metodo=metodo, ano=2026,
+                            reconciliacao=reconciliacao, nivel_top_down=nivel_top_down
+                        )
+                        st.success(f"Cenário {id_cenario} criado!")
+                        st.rerun()
                         
-                        # TODO: Implementar forecast detalhado na V2
-                        st.info("⚠️ Nesta versão, o Forecast é calculado sobre o Total Consolidado.")
+                except Exception as e:
+                    st.error(f"Erro ao gerar: {str(e)}")
+        
+        elif gerar:
+            with st.spinner("Processando histórico e projetando..."):
+                try:
+                    # Carregar dados REAIS do banco: só meses fechados (sem os meses zerados do comparativo)
+                    df_hist = get_historico_folhas((2025, 2026))
+                    
+                    if df_hist.empty:
+                        st.error("Sem dados realizados para projeção.")
+                    else:
+                        # Forecast detalhado: granularidade "Centro × Conta"
+                        st.info("⚠️ No modo Consolidado, o Forecast é calculado sobre o Total. Use 'Centro × Conta' para o forecast detalhado.")
                         
                         nome_cenario = f"Manual {metodo} - {pd.Timestamp.now().strftime('%H:%M')}"
                         
-                        # Simplificação: Passa um DF "fake" que representa o total como uma única conta
-                        df_total = data_adapter.groupby('mes').agg({'realizado': 'sum'}).reset_index()
-                        df_total['conta_contabil_codigo'] = 'TOTAL'
-                        df_total['centro_gasto_codigo'] = 'CONSOLIDADO'
-                        df_total['valor'] = df_total['realizado']
-                        
-                        # Ajustando data
-                        meses_map = {m: i+1 for i, m in enumerate(['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ'])}
-                        df_total['month_num'] = df_total['mes'].map(meses_map)
-                        df_total['data_ref'] = df_total.apply(lambda x: pd.Timestamp(year=2026, month=x['month_num'], day=1), axis=1)
-                        
-                        id_cenario = forecast_service.criar_cenario_automatico(df_total, nome=nome_cenario, metodo=metodo)
+                        # Todas as contas somadas numa série 'TOTAL' (mesma base do incremental e do refit)
+                        id_cenario = forecast_service.criar_cenario_automatico(
+                            df_hist, nome=nome_cenario, metodo=metodo,
+                            decomposicao_completa=decomposicao_completa, agregacao='total'
+                        )
                         st.success(f"Cenário {id_cenario} criado!")
                         st.rerun()
                         
@@ -197,6 +294,61 @@ with tabs[1]:
             if cenario_sel:
                 df_forecast = forecast_service.get_dados_cenario(cenario_sel['id'])
                 
+                # Mês fechado: incorporar ao estado do cenário sem reajustar o histórico
+                estado_cenario = forecast_service.get_estado(cenario_sel['id'])
+                if estado_cenario:
+                    with st.expander("🔄 Atualização Incremental", expanded=False):
+                        st.caption(
+                            f"Último mês incorporado: {estado_cenario['ultimo_mes']} | "
+                            f"{estado_cenario['n_series']} séries | método {estado_cenario['metodo']}"
+                        )
+                        df_hist_inc = get_historico_folhas((2025, 2026))
+                        ultimo = pd.Period(estado_cenario['ultimo_mes'], freq='M').to_timestamp()
+                        meses_novos = sorted(d for d in df_hist_inc['data_ref'].unique() if d > ultimo)
+                        
+                        col_inc, col_refit, col_check = st.columns(3)
+                        with col_inc:
+                            mes_novo = st.selectbox("Mês fechado", meses_novos, format_func=lambda d: f"{d:%m/%Y}",
+                                                    disabled=not meses_novos)
+                            if st.button("Incorporar mês", disabled=not meses_novos):
+                                try:
+                                    r = forecast_service.atualizar_cenario_incremental(
+                                        cenario_sel['id'], df_hist_inc[df_hist_inc['data_ref'] == mes_novo], mes_novo
+                                    )
+                                    st.success(f"{r['ultimo_mes']} incorporado ({r['series_no_mes']} séries com valor).")
+                                    st.rerun()
+                                except Exception as e:
+                                    st.error(f"Erro ao incorporar: {str(e)}")
+                        with col_refit:
+                            if st.button("Refit completo"):
+                                with st.spinner("Reajustando todas as séries..."):
+                                    forecast_service.refit_cenario(cenario_sel['id'], df_hist_inc)
+                                    st.rerun()
+                        with col_check:
+                            if st.button("Verificar consistência"):
+                                r = forecast_service.verificar_consistencia_cenario(cenario_sel['id'], df_hist_inc)
+                                msg = f"Diferença máx. vs refit: {r['diferenca_max']:,.6f} ({r['diferenca_relativa_max']:.2e})"
+                                (st.success if r['consistente'] else st.warning)(msg)
+                
+                # Diferença entre cenários (entradas em blob colunar: comparação vetorizada)
+                outros = [c for c in cenarios if c['id'] != cenario_sel['id']]
+                if outros:
+                    with st.expander("⚖️ Comparar com outro Cenário", expanded=False):
+                        cenario_base = st.selectbox("Cenário base", outros, format_func=lambda x: f"{x['nome']} ({x['data_criacao']})")
+                        grao_cmp = st.radio("Agrupar por", ["mes", "conta_contabil_codigo", "centro_gasto_codigo"], horizontal=True,
+                                            format_func=lambda x: {"mes": "Mês", "conta_contabil_codigo": "Conta",
+                                                                   "centro_gasto_codigo": "Centro"}[x])
+                        df_cmp = forecast_service.comparar_cenarios(cenario_base['id'], cenario_sel['id'], chaves=[grao_cmp])
+                        if grao_cmp == "mes":
+                            df_cmp = df_cmp.set_index('mes').reindex([m for m in MESES_ORDEM if m in set(df_cmp['mes'])]).reset_index()
+                        else:
+                            df_cmp = df_cmp.reindex(df_cmp['diferenca'].abs().sort_values(ascending=False).index)
+                        st.dataframe(
+                            df_cmp.style.format({'valor_a': '{:,.2f}', 'valor_b': '{:,.2f}',
+                                                 'diferenca': '{:+,.2f}', 'variacao_pct': '{:+.1f}%'}),
+                            use_container_width=True, hide_index=True
+                        )
+                
                 if df_forecast.empty:
                     st.warning("⚠️ O cenário selecionado não possui dados gerados (provavelmente por falta de histórico suficiente).")
                 else:
@@ -231,7 +383,12 @@ with tabs[1]:
                          meses_pt = {1:'JAN', 2:'FEV', 3:'MAR', 4:'ABR', 5:'MAI', 6:'JUN', 7:'JUL', 8:'AGO', 9:'SET', 10:'OUT', 11:'NOV', 12:'DEZ'}
                          df_forecast['mes'] = pd.to_datetime(df_forecast['data_ref']).dt.month.map(meses_pt)
 
-                    fig.add_trace(go.Bar(name='Forecast (Tendência)', x=df_forecast['mes'], y=df_forecast['valor_previsto'], marker_color='#A78BFA'))
+                    # Cenários granulares têm uma linha por centro × conta: somar por mês
+                    df_forecast_mes = (
+                        df_forecast.groupby('mes', as_index=False)['valor_previsto'].sum()
+                        .set_index('mes').reindex(MESES_ORDEM).dropna().reset_index()
+                    )
+                    fig.add_trace(go.Bar(name='Forecast (Tendência)', x=df_forecast_mes['mes'], y=df_forecast_mes['valor_previsto'], marker_color='#A78BFA'))
                     
                     # Budget (Linha)
                     fig.add_trace(go.Scatter(name='Budget Plan', x=df_real['mes'], y=df_real['orcado'], mode='lines', line=dict(color='#4F8BF9', width=3)))
@@ -239,8 +396,80 @@ with tabs[1]:
                     fig.update_layout(barmode='overlay') # Sobrepor barras para melhor comparação
                     st.plotly_chart(fig, use_container_width=True)
                     
+                    # Totais por nível da hierarquia (cenários granulares)
+                    if df_forecast['centro_custo'].nunique() > 1:
+                        with st.expander("🏗️ Totais por Nível da Hierarquia", expanded=False):
+                            nivel = st.selectbox("Nível", NIVEIS_HIERARQUIA, index=NIVEIS_HIERARQUIA.index('ativo'))
+                            df_niveis = anexar_hierarquia(
+                                df_forecast.rename(columns={'centro_custo': 'centro_gasto_codigo'})
+                            ).rename(columns={'mes': 'data'})
+                            pivot_nivel = totais_por_nivel(df_niveis, nivel, valor='valor_previsto')
+                            pivot_nivel = pivot_nivel.reindex(columns=[m for m in MESES_ORDEM if m in pivot_nivel.columns])
+                            pivot_nivel['TOTAL'] = pivot_nivel.sum(axis=1)
+                            st.dataframe(pivot_nivel.style.format("{:,.2f}"), use_container_width=True)
+                    
                     # Tabela de Dados
                     st.dataframe(df_forecast)
                 
         else:
             st.info("Nenhum cenário de forecast gerado ainda.")
+
+    # -------------------------------------------------------------------------
+    # Simulação de Monte Carlo do fechamento (execução x orçamento ajustado)
+    # -------------------------------------------------------------------------
+    st.divider()
+    st.subheader("🎲 Probabilidade de Estouro no Fechamento (Monte Carlo)")
+    st.caption(
+        "Previsão dos meses restantes + resíduos históricos reamostrados (bootstrap) por centro × conta, "
+        "somados às provisões pendentes e comparados ao orçamento ajustado pelos remanejamentos aprovados."
+    )
+    
+    col_sim_cfg, col_sim_res = st.columns([1, 3])
+    with col_sim_cfg:
+        n_caminhos = st.select_slider("Caminhos", [1_000, 5_000, 10_000, 20_000], value=N_CAMINHOS_PADRAO)
+        metodo_sim = st.selectbox("Método (meses restantes)", ["hybrid", "linear", "sma", "ema", "seasonal"], key="metodo_sim")
+        if st.button("Simular Fechamento"):
+            with st.spinner("Simulando caminhos..."):
+                try:
+                    st.session_state['simulacao_fechamento'] = simulacao_service.simular(
+                        ano=2026, metodo=metodo_sim, n_caminhos=n_caminhos
+                    )
+                except Exception as e:
+                    st.error(f"Erro na simulação: {str(e)}")
+    
+    with col_sim_res:
+        sim = st.session_state.get('simulacao_fechamento')
+        if sim:
+            total = sim['total']
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Prob. de Estouro (Total)", f"{total['prob_estouro']:.0%}")
+            c2.metric("Execução P50", f"R$ {total['p50']:,.0f}")
+            c3.metric("Intervalo P5–P95", f"R$ {total['p05']:,.0f} a {total['p95']:,.0f}")
+            c4.metric("Orçamento Ajustado", f"R$ {total['orcado_ajustado']:,.0f}")
+            
+            fig_sim = px.histogram(x=sim['caminhos_total'], nbins=60, labels={'x': 'Execução no ano'})
+            fig_sim.add_vline(x=total['orcado_ajustado'], line_dash='dash', line_color='#EF4444',
+                              annotation_text='Orçamento ajustado')
+            fig_sim.update_layout(showlegend=False, yaxis_title='Caminhos')
+            st.plotly_chart(fig_sim, use_container_width=True)
+            
+            formato_sim = {c: 'R$ {:,.0f}' for c in ['orcado_ajustado', 'realizado', 'previsao_restante',
+                                                     'provisionado', 'p05', 'p50', 'p95']}
+            formato_sim['prob_estouro'] = '{:.0%}'
+            tab_base_sim, tab_centro_sim = st.tabs(["Por Base", "Por Centro"])
+            with tab_base_sim:
+                st.dataframe(
+                    sim['bases'][['base', 'qtd_centros'] + list(formato_sim)].style.format(formato_sim),
+                    use_container_width=True, hide_index=True
+                )
+            with tab_centro_sim:
+                st.dataframe(
+                    sim['centros'][['centro_gasto_codigo', 'base'] + list(formato_sim)].style.format(formato_sim),
+                    use_container_width=True, hide_index=True
+                )
+            st.caption(
+                f"{len(sim['caminhos_total']):,} caminhos × {sim['n_series']:,} séries, "
+                f"{sim['meses_restantes']} meses restantes, {sim['tempo_s']:.2f}s"
+            )
+        else:
+            st.info("Clique em 'Simular Fechamento' para gerar a distribuição.")
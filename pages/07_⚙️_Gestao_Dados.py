@@ -131,7 +131,7 @@ def run_schema_repair():
 
 st.markdown("### ⚙️ Gestão de Banco de Dados")
 
-tab_dados, tab_schema, tab_import = st.tabs(["📝 Editar Dados", "🔧 Estrutura (Schema)", "📥 Importação Histórica"])
+tab_dados, tab_schema, tab_import, tab_cache_ia = st.tabs(["📝 Editar Dados", "🔧 Estrutura (Schema)", "📥 Importação Histórica", "🧠 Cache de IA"])
 
 # -----------------------------------------------------------------------------
 # ABA 1: DADOS (CRUD)
@@ -303,6 +303,33 @@ with tab_import:
         5. **Substitui** registros existentes desses anos no banco.
         """)
 
+# -----------------------------------------------------------------------------
+# ABA 4: CACHE DE RESPOSTAS DE IA
+# -----------------------------------------------------------------------------
+with tab_cache_ia:
+    st.markdown("### 🧠 Cache de Respostas de IA")
+    st.caption("Perguntas repetidas sobre os mesmos dados são respondidas pelo cache, sem nova chamada ao provedor.")
+    
+    from services.llm_cache import get_cache_llm
+    cache_llm = get_cache_llm()
+    stats_llm = cache_llm.estatisticas()
+    
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Taxa de Acerto (processo)", f"{stats_llm['taxa_acerto']:.0%}")
+    c2.metric("Acertos / Faltas", f"{stats_llm['hits']} / {stats_llm['misses']}")
+    c3.metric("Respostas Gravadas", f"{stats_llm['itens']:,}")
+    c4.metric("Ocupação", f"{stats_llm['bytes'] / 1024:,.0f} KB",
+              help=f"Limite: {stats_llm['max_bytes'] / 1024 / 1024:,.0f} MB")
+    st.caption(
+        f"TTL: {stats_llm['ttl_s'] / 3600:,.1f}h • Reusos gravados (todas as sessões): {stats_llm['acessos_gravados']:,} • "
+        f"Expiradas: {stats_llm['expirados']} • Despejadas por tamanho: {stats_llm['evictions']} • Arquivo: `{stats_llm['arquivo']}`"
+    )
+    
+    if st.button("🗑️ Limpar Cache de IA"):
+        cache_llm.limpar()
+        st.toast("Cache de IA limpo!", icon="🧹")
+        st.rerun()
+
 # =============================================================================
 # RODAPÉ
 # =============================================================================
@@ -0,0 +1,83 @@
+"""
+scripts/benchmark_ai_board.py
+=============================
+Overhead de orquestração do AI Board (sem rede).
+
+Usa o ProvedorLocal com latência fixa por chamada e compara a reunião
+sequencial com a paralela. O overhead é o tempo medido menos a latência
+ideal do modo (sequencial: N personas + Chairman; paralelo: 1 + Chairman).
+Em streaming, mede também o tempo até o primeiro trecho (latência percebida).
+
+Uso:
+    python scripts/benchmark_ai_board.py
+    python scripts/benchmark_ai_board.py --latencia 0.5 --reunioes 10
+"""
+
+import sys
+import os
+import time
+import argparse
+import statistics
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.ai_board import AIBoard, MODO_PARALELO, MODO_SEQUENCIAL, PERSONAS_BOARD, EVENTO_TRECHO
+from services.ai_provedores import ProvedorLocal
+
+
+def medir(modo: str, latencia: float, reunioes: int) -> list:
+    """Tempos (s) de `reunioes` reuniões no modo informado."""
+    board = AIBoard("", "Gemini 3 Pro", provedor=ProvedorLocal(latencia_s=latencia), modo=modo)
+    # Contexto fixo: mede só a orquestração, não o banco
+    board._get_contexto_financeiro = lambda: "Resumo YTD: benchmark"
+    tempos = []
+    for _ in range(reunioes):
+        inicio = time.perf_counter()
+        board.realizar_reuniao_board("Benchmark de orquestração")
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def medir_streaming(latencia: float, reunioes: int) -> tuple:
+    """(tempos até o primeiro trecho, tempos totais) das reuniões em streaming."""
+    board = AIBoard("", "Gemini 3 Pro", provedor=ProvedorLocal(latencia_s=latencia, intervalo_trecho_s=0.005))
+    board._get_contexto_financeiro = lambda: "Resumo YTD: benchmark"
+    ttfts, totais = [], []
+    for _ in range(reunioes):
+        inicio = time.perf_counter()
+        ttft = None
+        for evento, _persona, _dado in board.transmitir_reuniao("Benchmark de orquestração"):
+            if evento == EVENTO_TRECHO and ttft is None:
+                ttft = time.perf_counter() - inicio
+        ttfts.append(ttft)
+        totais.append(time.perf_counter() - inicio)
+    return ttfts, totais
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead de orquestração do AI Board")
+    parser.add_argument('--latencia', type=float, default=0.2, help="Latência simulada por chamada (s)")
+    parser.add_argument('--reunioes', type=int, default=5)
+    args = parser.parse_args()
+
+    n = len(PERSONAS_BOARD)
+    ideal = {MODO_SEQUENCIAL: (n + 1) * args.latencia, MODO_PARALELO: 2 * args.latencia}
+
+    print("--- BENCHMARK AI BOARD (provedor local) ---")
+    print(f"Personas: {n} | latência por chamada: {args.latencia * 1e3:.0f} ms | reuniões: {args.reunioes}")
+    medianas = {}
+    for modo in (MODO_SEQUENCIAL, MODO_PARALELO):
+        tempos = medir(modo, args.latencia, args.reunioes)
+        medianas[modo] = statistics.median(tempos)
+        overhead = (medianas[modo] - ideal[modo]) * 1e3
+        print(f"{modo:<11} mediana {medianas[modo] * 1e3:8.1f} ms | ideal {ideal[modo] * 1e3:6.0f} ms | overhead {overhead:6.2f} ms")
+
+    print(f"Aceleração: {medianas[MODO_SEQUENCIAL] / medianas[MODO_PARALELO]:.2f}x")
+
+    ttfts, totais = medir_streaming(args.latencia, args.reunioes)
+    print(f"streaming   1º trecho {statistics.median(ttfts) * 1e3:8.1f} ms | total {statistics.median(totais) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+scripts/benchmark_forecast.py
+=============================
+Benchmark + backtest dos métodos de forecast.
+
+Roda o backtest de origem móvel (services/backtest_forecast.py) sobre o
+histórico 2024/2025 do banco ou sobre séries sintéticas, imprime acurácia
+(MAPE/WAPE/viés) e tempo por método, e compara a vazão do motor em lote com
+o SimpleForecaster série a série.
+
+Uso:
+    python scripts/benchmark_forecast.py                       # banco, grão conta
+    python scripts/benchmark_forecast.py --grao folha --salvar # grava o resultado
+    python scripts/benchmark_forecast.py --sintetico 20000     # 20k séries sintéticas
+"""
+
+import sys
+import os
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.backtest_forecast import (
+    BacktestService, executar_backtest, GRAOS, HORIZONTE_PADRAO, N_ORIGENS_PADRAO
+)
+from services.forecast_engine import BatchForecaster, METODOS_LOTE, montar_matriz_series
+
+
+def gerar_sintetico(n_series: int, n_meses: int = 24, seed: int = 42) -> pd.DataFrame:
+    """Histórico sintético por conta: tendência + sazonalidade + ruído + meses faltantes."""
+    rng = np.random.default_rng(seed)
+    datas = pd.date_range('2024-01-01', periods=n_meses, freq='MS')
+    t = np.arange(n_meses)
+    nivel = -rng.uniform(1_000, 50_000, (n_series, 1))
+    tendencia = rng.normal(0, 0.01, (n_series, 1)) * nivel * t
+    sazonal = rng.uniform(0, 0.2, (n_series, 1)) * nivel * np.sin(2 * np.pi * t / 12)
+    valores = nivel + tendencia + sazonal + rng.normal(0, 0.05, (n_series, n_meses)) * nivel
+    valores[rng.random(valores.shape) < 0.1] = np.nan
+
+    serie, coluna = np.nonzero(~np.isnan(valores))
+    return pd.DataFrame({
+        'data_ref': datas[coluna],
+        'conta_contabil_codigo': np.char.add('S', serie.astype(str)),
+        'centro_gasto_codigo': '00000000000',
+        'valor': valores[serie, coluna],
+    })
+
+
+def carregar_banco() -> pd.DataFrame:
+    """Histórico 2024/2025 no grão folha (lancamentos_realizados)."""
+    from data.comparador import get_historico_folhas
+    return get_historico_folhas((2024, 2025))
+
+
+def comparar_simple_forecaster(df: pd.DataFrame, metodo: str, n_amostra: int) -> None:
+    """Vazão: SimpleForecaster série a série x BatchForecaster (mesmas séries)."""
+    from utils_financeiro import SimpleForecaster
+
+    matriz, chaves, calendario = montar_matriz_series(df, ['conta_contabil_codigo'])
+    n_amostra = min(n_amostra, len(chaves))
+    if n_amostra == 0:
+        return
+
+    inicio = time.perf_counter()
+    for i in range(n_amostra):
+        valido = ~np.isnan(matriz[i])
+        if valido.sum() < 3:
+            continue
+        sf = SimpleForecaster()
+        sf.fit(pd.DataFrame({'data': calendario[valido], 'valor': matriz[i, valido]}), 'data', 'valor', method=metodo)
+        sf.predict(periods=12)
+    tempo_simple = (time.perf_counter() - inicio) / n_amostra
+
+    inicio = time.perf_counter()
+    BatchForecaster().fit(matriz, calendario, method=metodo).predict(12)
+    tempo_lote = (time.perf_counter() - inicio) / len(chaves)
+
+    print(f"\n--- {metodo}: SimpleForecaster x BatchForecaster ---")
+    print(f"SimpleForecaster: {tempo_simple * 1e3:.3f} ms/série (amostra de {n_amostra})")
+    print(f"BatchForecaster:  {tempo_lote * 1e3:.4f} ms/série ({len(chaves)} séries)")
+    if tempo_lote > 0:
+        print(f"Aceleração:       {tempo_simple / tempo_lote:,.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest e benchmark dos métodos de forecast")
+    parser.add_argument('--grao', choices=list(GRAOS), default='conta')
+    parser.add_argument('--sintetico', type=int, default=0, help="N séries sintéticas em vez do banco")
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE_PADRAO)
+    parser.add_argument('--origens', type=int, default=N_ORIGENS_PADRAO)
+    parser.add_argument('--amostra-simple', type=int, default=200, help="Séries para cronometrar o SimpleForecaster")
+    parser.add_argument('--salvar', action='store_true', help="Grava o resultado (forecast_backtests)")
+    args = parser.parse_args()
+
+    print("--- BENCHMARK DE FORECAST ---")
+    df = gerar_sintetico(args.sintetico) if args.sintetico else carregar_banco()
+    if df.empty:
+        print("Sem histórico. Use --sintetico N para séries sintéticas.")
+        return
+
+    print(f"Fonte: {'sintética' if args.sintetico else 'banco (2024/2025)'} | linhas: {len(df):,} | grão: {args.grao}")
+
+    if args.salvar:
+        detalhe, resumo = BacktestService().executar_e_salvar(df, args.grao, METODOS_LOTE, args.horizonte, args.origens)
+    else:
+        detalhe, resumo = executar_backtest(df, args.grao, METODOS_LOTE, args.horizonte, args.origens)
+
+    print(f"\nSéries avaliadas: {detalhe['chave_serie'].nunique():,}")
+    print(resumo.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+    vencedores = detalhe[detalhe['melhor']]['metodo'].value_counts()
+    print("\nMelhor método por série:")
+    print(vencedores.to_string())
+
+    if args.grao == 'conta':
+        for metodo in ['linear', 'ema']:
+            comparar_simple_forecaster(df, metodo, args.amostra_simple)
+
+    if args.salvar:
+        print("\n✅ Resultado gravado em forecast_backtests")
+
+
+if __name__ == "__main__":
+    main()
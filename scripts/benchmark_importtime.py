@@ -0,0 +1,188 @@
+"""
+scripts/benchmark_importtime.py
+===============================
+Benchmark do tempo de import a frio de cada página.
+
+Para cada página (Home.py + pages/*.py), extrai os imports de nível de módulo
+(via AST, sem executar a página), roda-os em um interpretador novo com
+`python -X importtime` e transforma a saída em um relatório:
+
+- tempo total de import da página (descontada a partida do interpretador)
+- pacotes que mais pesam (tempo próprio somado por pacote raiz)
+- comparação com o orçamento de tempo da página (ORCAMENTO_MS)
+
+Sai com código 1 se alguma página estourar o orçamento.
+
+Uso:
+    python scripts/benchmark_importtime.py                    # todas as páginas
+    python scripts/benchmark_importtime.py --pagina Home.py   # uma página
+    python scripts/benchmark_importtime.py --top 15 --repeticoes 5
+"""
+
+import sys
+import os
+import ast
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Set
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Orçamento de import a frio por página (ms). Páginas ausentes usam o padrão.
+ORCAMENTO_PADRAO_MS = 2500
+ORCAMENTO_MS: Dict[str, float] = {
+    'Home.py': 1800,
+    '01_📊_Analise_Financeira.py': 2000,
+    '04_📚_Biblia_Financeira.py': 2000,
+    '06_🔮_Previsao_IA.py': 2500,
+}
+
+
+# =============================================================================
+# COLETA
+# =============================================================================
+
+def listar_paginas() -> List[Path]:
+    """Home.py + pages/*.py, na ordem do menu."""
+    return [RAIZ / 'Home.py'] + sorted((RAIZ / 'pages').glob('*.py'))
+
+
+def imports_da_pagina(caminho: Path) -> str:
+    """
+    Código com os imports de nível de módulo da página.
+
+    Inclui imports dentro de try/if no topo (mas não dentro de funções), para
+    medir exatamente o que a página carrega ao abrir.
+    """
+    arvore = ast.parse(caminho.read_text(encoding='utf-8'))
+    linhas = []
+
+    def visitar(corpo):
+        for no in corpo:
+            if isinstance(no, (ast.Import, ast.ImportFrom)):
+                linhas.append(ast.unparse(no))
+            elif isinstance(no, ast.Try):
+                visitar(no.body)
+            elif isinstance(no, ast.If):
+                visitar(no.body)
+                visitar(no.orelse)
+
+    visitar(arvore.body)
+    # Cada import isolado: uma falha não esconde o custo dos demais
+    return '\n'.join(f"try:\n    {linha}\nexcept Exception:\n    pass" for linha in linhas)
+
+
+def parse_importtime(saida: str) -> List[dict]:
+    """
+    Converte as linhas 'import time: self | cumulative | name' em registros.
+
+    Returns:
+        Lista de dicts com modulo, nivel, self_ms e cumulativo_ms
+    """
+    registros = []
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:'):
+            continue
+        partes = linha[len('import time:'):].split('|')
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # Cabeçalho
+        nome = partes[2].rstrip()
+        registros.append({
+            'modulo': nome.strip(),
+            'nivel': (len(nome) - len(nome.lstrip())) // 2,
+            'self_ms': int(partes[0]) / 1000,
+            'cumulativo_ms': int(partes[1]) / 1000,
+        })
+    return registros
+
+
+def _rodar_importtime(codigo: str) -> List[dict]:
+    env = dict(os.environ, PYTHONPATH=str(RAIZ), PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=RAIZ, env=env, capture_output=True, text=True
+    )
+    return parse_importtime(proc.stderr)
+
+
+def modulos_da_partida() -> Set[str]:
+    """Módulos que o interpretador importa antes do código (site, encodings...)."""
+    return {r['modulo'] for r in _rodar_importtime('pass')}
+
+
+def medir_pagina(caminho: Path, partida: Set[str], repeticoes: int = 3) -> dict:
+    """
+    Mede o import a frio de uma página (mediana das repetições).
+
+    Returns:
+        Dict com total_ms, n_modulos e por_pacote (pacote raiz -> ms próprios)
+    """
+    codigo = imports_da_pagina(caminho)
+    totais, execucoes = [], []
+    for _ in range(repeticoes):
+        registros = [r for r in _rodar_importtime(codigo) if r['modulo'] not in partida]
+        totais.append(sum(r['cumulativo_ms'] for r in registros if r['nivel'] == 0))
+        execucoes.append(registros)
+
+    # Detalhamento da execução mediana
+    mediana = statistics.median(totais)
+    registros = execucoes[min(range(repeticoes), key=lambda i: abs(totais[i] - mediana))]
+    por_pacote = defaultdict(float)
+    for r in registros:
+        por_pacote[r['modulo'].split('.')[0]] += r['self_ms']
+
+    return {
+        'pagina': caminho.name,
+        'total_ms': mediana,
+        'n_modulos': len(registros),
+        'por_pacote': dict(sorted(por_pacote.items(), key=lambda kv: -kv[1])),
+    }
+
+
+# =============================================================================
+# RELATÓRIO
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import a frio por página")
+    parser.add_argument('--pagina', action='append', help="Nome do arquivo da página (repetível)")
+    parser.add_argument('--top', type=int, default=8, help="Pacotes mais pesados por página")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    paginas = listar_paginas()
+    if args.pagina:
+        paginas = [p for p in paginas if p.name in args.pagina]
+        if not paginas:
+            print(f"Página não encontrada: {args.pagina}")
+            sys.exit(2)
+
+    print("--- BENCHMARK DE IMPORT (python -X importtime) ---")
+    partida = modulos_da_partida()
+    estouros = []
+
+    for caminho in paginas:
+        resultado = medir_pagina(caminho, partida, args.repeticoes)
+        orcamento = ORCAMENTO_MS.get(caminho.name, ORCAMENTO_PADRAO_MS)
+        ok = resultado['total_ms'] <= orcamento
+        if not ok:
+            estouros.append(caminho.name)
+
+        status = "✅" if ok else "❌ ESTOURO"
+        print(f"\n{caminho.name}: {resultado['total_ms']:,.0f} ms "
+              f"(orçamento {orcamento:,.0f} ms) | {resultado['n_modulos']} módulos {status}")
+        for pacote, ms in list(resultado['por_pacote'].items())[:args.top]:
+            print(f"    {pacote:<28} {ms:>8,.1f} ms")
+
+    print()
+    if estouros:
+        print(f"❌ {len(estouros)} página(s) acima do orçamento: {', '.join(estouros)}")
+        sys.exit(1)
+    print("✅ Todas as páginas dentro do orçamento")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,50 +3,86 @@ services/ai_board.py
 ====================
 Arquitetura Multi-Agente para Consultoria Financeira (Feature A - IA Board).
 Implementa o padrão 'Board of Directors' onde diferentes personas analisam os dados.
+
+As personas são consultadas em paralelo (thread pool, as chamadas são de I/O),
+cada uma com seu timeout. Persona que estoura o tempo é cancelada e persona que
+falha não derruba a reunião: o Chairman sintetiza as opiniões disponíveis.
 """
 
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
 import pandas as pd
-from typing import Dict, List
-import json
-from data.comparador import get_comparativo_mensal
-from utils_financeiro import gerar_analise_ia, get_ai_chat_response
+from services.contexto_financeiro import contexto_para_prompt
+from services.ai_provedores import ProvedorIA, get_provedor
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+PERSONAS_BOARD = ["CFO", "Controller", "Auditor"]
+
+MODO_PARALELO = 'paralelo'
+MODO_SEQUENCIAL = 'sequencial'
+
+TIMEOUT_PERSONA_S = 90.0
+
+ANO_CONTEXTO = 2026
+
+# Status por persona
+STATUS_OK = 'ok'
+STATUS_TIMEOUT = 'timeout'
+STATUS_ERRO = 'erro'
+
+# Eventos do streaming (transmitir_reuniao)
+EVENTO_TRECHO = 'trecho'
+EVENTO_FIM = 'fim'
+EVENTO_RESULTADO = 'resultado'
+CHAIRMAN = 'Chairman'
+
+SEM_RESPOSTAS = "⚠️ Nenhum membro do board respondeu. Tente novamente em instantes."
+
 
 class AIBoard:
-    def __init__(self, api_key: str, provider: str = "Gemini (Google)"):
+    def __init__(self, api_key: str, provider: str = "Gemini (Google)",
+                 provedor: Optional[ProvedorIA] = None, modo: str = MODO_PARALELO,
+                 timeout_persona_s: Union[float, Dict[str, float]] = TIMEOUT_PERSONA_S):
+        """
+        Args:
+            api_key: Chave de API do provedor
+            provider: Modelo selecionado na interface
+            provedor: Provedor de LLM (padrão: get_provedor, Gemini ou stub local)
+            modo: 'paralelo' ou 'sequencial'
+            timeout_persona_s: Timeout em segundos (único ou por persona)
+        """
         self.api_key = api_key
         self.provider = provider
+        self.provedor = provedor or get_provedor(api_key)
+        self.modo = modo
+        self.timeout_persona_s = timeout_persona_s
+
+    def _timeout_de(self, persona: str) -> float:
+        if isinstance(self.timeout_persona_s, dict):
+            return self.timeout_persona_s.get(persona, TIMEOUT_PERSONA_S)
+        return self.timeout_persona_s
         
     def _get_contexto_financeiro(self) -> str:
-        """Coleta resumo dos dados financeiros atuais."""
-        try:
-            df = get_comparativo_mensal(2026)
-            if df.empty:
-                return "Dados financeiros não disponíveis."
-                
-            # Preparar resumo (com fallback seguro se tabulate falhar)
-            grouped = df.groupby('mes')[['orcado', 'realizado']].sum()
-            try:
-                resumo = grouped.to_markdown()
-            except Exception:
-                # Fallback para string simples se tabulate não estiver instalado
-                resumo = grouped.to_string()
-                
-            total_realizado = df['realizado'].sum()
-            total_orcado = df['orcado'].sum()
-            total_delta = total_realizado - total_orcado
-            
-            resumo_texto = f"Resumo YTD:\n{resumo}\n\nDesvio Total Acumulado: R$ {total_delta:,.2f}"
-            
-            # Smart Diagnostics: Detecta falta de carga de dados
-            if total_realizado == 0 and total_orcado > 0:
-                resumo_texto += "\n\n[SISTEMA NOTICE]: O Total Realizado é exatamente 0.00. Isso indica ALTA PROBABILIDADE de que os dados financeiros deste mês ainda NÃO foram carregados no sistema (Upload Pendente). NÃO assuma que a execução foi zero por incompetência ou falha de gestão. Informe ao usuário que os dados de realizado parecem estar pendentes de carga."
-                
-            return resumo_texto
-        except Exception as e:
-            return f"Erro ao ler dados: {str(e)}"
+        """Resumo dos dados financeiros atuais (snapshot compartilhado, ver contexto_financeiro)."""
+        return contexto_para_prompt(ANO_CONTEXTO)
 
-    def _consultar_especialista(self, persona: str, prompt_base: str, user_query: str) -> str:
+    def _consultar_especialista(self, persona: str, prompt_base: str, user_query: str,
+                                contexto: str = None, cancelar: threading.Event = None) -> str:
         """Consulta um agente especialista específico."""
+        messages, provider_for_call = self._mensagens_persona(persona, user_query, contexto)
+        return self.provedor.responder(messages, provider_for_call, cancelar)
+
+    def _mensagens_persona(self, persona: str, user_query: str, contexto: str = None):
+        """Mensagens e modelo da consulta de uma persona."""
+        if contexto is None:
+            contexto = self._get_contexto_financeiro()
         
         system_prompts = {
             "CFO": """Você é o CFO Estratégico. Seu foco é macroeconomia, estratégia de alocação de capital e criação de valor a longo prazo.
@@ -72,7 +108,7 @@ class AIBoard:
         {system_prompts.get(persona, "")}
         
         [DADOS FINANCEIROS ATUAIS]
-        {self._get_contexto_financeiro()}
+        {contexto}
         
         [PERGUNTA DO USUÁRIO]
         {user_query}
@@ -80,8 +116,6 @@ class AIBoard:
         Responda como sua persona.
         """
         
-        # Simula uma chamada isolada para essa persona
-        # Em produção, isso poderia ser chamadas paralelas
         messages = [{"role": "user", "content": full_prompt}]
         
         # Estrategia Hibrida de Modelos (Gemini 3 Pro vs Flash)
@@ -91,41 +125,234 @@ class AIBoard:
         if persona in ["Controller", "Analyst"] and "Gemini" in self.provider:
             provider_for_call = self.provider + " Flash"
             
-        return get_ai_chat_response(messages, self.api_key, provider_for_call)
+        return messages, provider_for_call
+
+    def _executar_persona(self, persona: str, user_query: str, contexto: str,
+                          cancelar: threading.Event = None) -> Dict:
+        """Consulta uma persona e devolve texto, status e tempo (sem propagar erros)."""
+        inicio = time.perf_counter()
+        try:
+            texto = self._consultar_especialista(persona, "", user_query, contexto, cancelar)
+            return {'status': STATUS_OK, 'texto': texto, 'tempo_s': time.perf_counter() - inicio}
+        except Exception as e:
+            return {'status': STATUS_ERRO, 'texto': None, 'erro': str(e),
+                    'tempo_s': time.perf_counter() - inicio}
 
-    def realizar_reuniao_board(self, user_query: str) -> Dict[str, str]:
+    def _consultar_paralelo(self, personas: List[str], user_query: str, contexto: str) -> Dict[str, Dict]:
+        """
+        Consulta as personas simultaneamente.
+
+        Cada persona tem prazo próprio contado do início da reunião; ao
+        estourar, seu evento de cancelamento é setado e o resultado descartado.
+        """
+        inicio = time.perf_counter()
+        eventos = {p: threading.Event() for p in personas}
+        executor = ThreadPoolExecutor(max_workers=len(personas), thread_name_prefix='ai_board')
+        futuros = {
+            p: executor.submit(self._executar_persona, p, user_query, contexto, eventos[p])
+            for p in personas
+        }
+
+        resultados = {}
+        try:
+            # Prazo mais curto primeiro: cada espera usa só o tempo restante
+            for p in sorted(personas, key=self._timeout_de):
+                restante = max(0.0, inicio + self._timeout_de(p) - time.perf_counter())
+                try:
+                    resultados[p] = futuros[p].result(timeout=restante)
+                except FuturesTimeout:
+                    eventos[p].set()
+                    futuros[p].cancel()
+                    resultados[p] = {'status': STATUS_TIMEOUT, 'texto': None,
+                                     'erro': f"Sem resposta em {self._timeout_de(p):.0f}s",
+                                     'tempo_s': time.perf_counter() - inicio}
+        finally:
+            # Não espera threads presas em chamadas que já estouraram o prazo
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return {p: resultados[p] for p in personas}
+
+    def realizar_reuniao_board(self, user_query: str, personas: List[str] = None) -> Dict:
         """
         Realiza uma consulta 'Round Table' com todos os membros do board.
         Retorna as opiniões individuais e uma síntese.
+
+        Returns:
+            Dict com opinioes (persona -> texto), sintese, status (persona ->
+            status/tempo_s/erro), tempo_total_s e modo
         """
-        # 1. Coleta opiniões (sequencial para MVP, idealmente paralelo)
+        inicio = time.perf_counter()
+        personas = personas or PERSONAS_BOARD
+
+        # 1. Contexto coletado uma vez e compartilhado por todas as personas
+        contexto = self._get_contexto_financeiro()
+
+        # 2. Coleta opiniões
+        if self.modo == MODO_SEQUENCIAL:
+            resultados = {p: self._executar_persona(p, user_query, contexto) for p in personas}
+        else:
+            resultados = self._consultar_paralelo(personas, user_query, contexto)
+
+        opinioes = self._opinioes(resultados)
+
+        # 3. Orquestrador Sintetiza (apenas com as opiniões obtidas)
+        messages = self._mensagens_sintese(user_query, personas, resultados, opinioes)
+        if messages is None:
+            sintese = SEM_RESPOSTAS
+        else:
+            try:
+                sintese = self.provedor.responder(messages, self.provider)
+            except Exception as e:
+                sintese = f"Erro ao gerar a síntese do Chairman: {e}"
+
+        return {
+            "opinioes": opinioes,
+            "sintese": sintese,
+            "status": {p: {k: v for k, v in r.items() if k != 'texto'} for p, r in resultados.items()},
+            "tempo_total_s": time.perf_counter() - inicio,
+            "modo": self.modo,
+        }
+
+    # -------------------------------------------------------------------------
+    # SÍNTESE
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _opinioes(resultados: Dict[str, Dict]) -> Dict[str, str]:
+        """Texto exibido por persona (resposta ou motivo da ausência)."""
         opinioes = {}
-        
-        # Decide quais agentes chamar baseado na query (pode ser otimizado)
-        # Para MVP, chama todos ou os principais
-        personas = ["CFO", "Controller", "Auditor"]
-        
-        for p in personas:
-            opinioes[p] = self._consultar_especialista(p, "", user_query)
-            
-        # 2. Orquestrador Sintetiza
+        for p, r in resultados.items():
+            if r['status'] == STATUS_OK:
+                opinioes[p] = r['texto']
+            elif r['status'] == STATUS_TIMEOUT:
+                opinioes[p] = f"⏱️ Sem resposta a tempo ({r.get('erro')})."
+            else:
+                opinioes[p] = f"⚠️ Indisponível nesta reunião: {r.get('erro')}"
+        return opinioes
+
+    @staticmethod
+    def _mensagens_sintese(user_query: str, personas: List[str], resultados: Dict[str, Dict],
+                           opinioes: Dict[str, str]) -> Optional[List[Dict]]:
+        """Prompt do Chairman com as opiniões válidas (None se nenhuma persona respondeu)."""
+        validas = [p for p in personas if resultados[p]['status'] == STATUS_OK]
+        if not validas:
+            return None
+
+        blocos = "\n        ".join(
+            f"[OPINIÃO {p.upper()}] "
+            + (opinioes[p] if p in validas else "(indisponível nesta reunião)")
+            for p in personas
+        )
         sintese_prompt = f"""
         Você é o Presidente do Conselho (Chairman).
         Analise as opiniões dos seus diretores abaixo e forneça uma resposta conclusiva e integrada para o usuário.
         
         [PERGUNTA] {user_query}
         
-        [OPINIÃO CFO] {opinioes.get('CFO')}
-        [OPINIÃO CONTROLLER] {opinioes.get('Controller')}
-        [OPINIÃO AUDITOR] {opinioes.get('Auditor')}
+        {blocos}
         
         Gere uma resposta final coesa em Markdown.
         """
-        
-        messages = [{"role": "user", "content": sintese_prompt}]
-        sintese = get_ai_chat_response(messages, self.api_key, self.provider)
-        
-        return {
+        return [{"role": "user", "content": sintese_prompt}]
+
+    # -------------------------------------------------------------------------
+    # STREAMING
+    # -------------------------------------------------------------------------
+
+    def transmitir_reuniao(self, user_query: str, personas: List[str] = None) -> Iterator[Tuple[str, str, object]]:
+        """
+        Reunião em streaming: as personas respondem em paralelo e cada trecho
+        é repassado assim que chega (a página escreve cada um na sua coluna).
+
+        Timeouts e falhas seguem realizar_reuniao_board; persona que estoura
+        o prazo é cancelada e o texto parcial é descartado da síntese.
+
+        Yields:
+            (EVENTO_TRECHO, persona, texto) - trecho de uma persona ou do Chairman
+            (EVENTO_FIM, persona, status) - persona concluída / falhou / estourou
+            (EVENTO_RESULTADO, None, resultado) - no fim, mesmo dict de realizar_reuniao_board
+                                                  (status com ttft_s por persona)
+        """
+        inicio = time.perf_counter()
+        personas = personas or PERSONAS_BOARD
+        contexto = self._get_contexto_financeiro()
+
+        fila: queue.Queue = queue.Queue()
+        eventos = {p: threading.Event() for p in personas}
+
+        def trabalhar(persona: str) -> None:
+            try:
+                messages, provider_for_call = self._mensagens_persona(persona, user_query, contexto)
+                for trecho in self.provedor.responder_stream(messages, provider_for_call, eventos[persona]):
+                    if eventos[persona].is_set():
+                        return
+                    fila.put((EVENTO_TRECHO, persona, trecho))
+                fila.put((EVENTO_FIM, persona, {'status': STATUS_OK}))
+            except Exception as e:
+                fila.put((EVENTO_FIM, persona, {'status': STATUS_ERRO, 'erro': str(e)}))
+
+        executor = ThreadPoolExecutor(max_workers=len(personas), thread_name_prefix='ai_board')
+        for p in personas:
+            executor.submit(trabalhar, p)
+
+        textos = {p: [] for p in personas}
+        primeiro_trecho = {}
+        resultados = {}
+        try:
+            while len(resultados) < len(personas):
+                pendentes = [p for p in personas if p not in resultados]
+                prazo = min(inicio + self._timeout_de(p) for p in pendentes)
+                try:
+                    tipo, p, dado = fila.get(timeout=max(0.0, prazo - time.perf_counter()))
+                except queue.Empty:
+                    agora = time.perf_counter()
+                    for p in pendentes:
+                        if agora >= inicio + self._timeout_de(p):
+                            eventos[p].set()
+                            resultados[p] = {'status': STATUS_TIMEOUT, 'texto': None,
+                                             'erro': f"Sem resposta em {self._timeout_de(p):.0f}s",
+                                             'tempo_s': agora - inicio, 'ttft_s': primeiro_trecho.get(p)}
+                            yield EVENTO_FIM, p, resultados[p]
+                    continue
+
+                if p in resultados:
+                    continue  # Evento atrasado de persona que já estourou o prazo
+                agora = time.perf_counter()
+                if tipo == EVENTO_TRECHO:
+                    primeiro_trecho.setdefault(p, agora - inicio)
+                    textos[p].append(dado)
+                    yield EVENTO_TRECHO, p, dado
+                else:
+                    dado.update(texto="".join(textos[p]) if dado['status'] == STATUS_OK else None,
+                                tempo_s=agora - inicio, ttft_s=primeiro_trecho.get(p))
+                    resultados[p] = dado
+                    yield EVENTO_FIM, p, dado
+        finally:
+            # Reunião encerrada (ou abandonada pelo consumidor): cancela o que restou
+            for evento in eventos.values():
+                evento.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        opinioes = self._opinioes(resultados)
+        messages = self._mensagens_sintese(user_query, personas, resultados, opinioes)
+        partes = []
+        if messages is None:
+            partes.append(SEM_RESPOSTAS)
+            yield EVENTO_TRECHO, CHAIRMAN, SEM_RESPOSTAS
+        else:
+            try:
+                for trecho in self.provedor.responder_stream(messages, self.provider):
+                    partes.append(trecho)
+                    yield EVENTO_TRECHO, CHAIRMAN, trecho
+            except Exception as e:
+                erro = f"Erro ao gerar a síntese do Chairman: {e}"
+                partes.append(erro)
+                yield EVENTO_TRECHO, CHAIRMAN, erro
+
+        yield EVENTO_RESULTADO, None, {
             "opinioes": opinioes,
-            "sintese": sintese
+            "sintese": "".join(partes),
+            "status": {p: {k: v for k, v in resultados[p].items() if k != 'texto'} for p in personas},
+            "tempo_total_s": time.perf_counter() - inicio,
+            "modo": MODO_PARALELO,
         }
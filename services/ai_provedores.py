@@ -0,0 +1,187 @@
+"""
+services/ai_provedores.py
+=========================
+Provedores de LLM plugáveis para o AI Board e demais consultas de IA.
+
+- ProvedorGemini: chamada real (utils_financeiro.get_ai_chat_response)
+- ProvedorLocal: stub determinístico, sem rede, com latência configurável;
+  permite testar e medir o overhead de orquestração do Board
+
+Todo provedor expõe `responder(messages, provider, cancelar=None)` e a
+variante em streaming `responder_stream(...)` (gera os trechos à medida que
+chegam); falhas viram exceção (ErroProvedorIA) para que o chamador trate
+resultados parciais.
+
+O provedor local é selecionado com AI_PROVEDOR=local no ambiente.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Set
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+PROVEDOR_LOCAL = 'local'
+
+# Prefixo das mensagens de erro devolvidas por get_ai_chat_response
+PREFIXO_ERRO_GEMINI = 'Erro ao consultar Gemini AI'
+
+
+class ErroProvedorIA(Exception):
+    """Falha na chamada ao provedor de IA."""
+
+
+class ConsultaCancelada(ErroProvedorIA):
+    """A consulta foi cancelada antes de terminar."""
+
+
+# =============================================================================
+# PROVEDORES
+# =============================================================================
+
+class ProvedorIA(ABC):
+    """Interface dos provedores de LLM (subclasses implementam responder)."""
+
+    nome = 'base'
+
+    @abstractmethod
+    def responder(self, messages: List[Dict], provider: str,
+                  cancelar: Optional[threading.Event] = None) -> str:
+        """
+        Envia as mensagens ao modelo.
+
+        Args:
+            messages: Lista no formato [{"role": "user", "content": "..."}]
+            provider: Nome do modelo/provedor selecionado na interface
+            cancelar: Evento que, se setado, pede a interrupção da consulta
+
+        Returns:
+            Texto da resposta
+
+        Raises:
+            ErroProvedorIA: Falha ou cancelamento da consulta
+        """
+
+    def responder_stream(self, messages: List[Dict], provider: str,
+                         cancelar: Optional[threading.Event] = None) -> Iterator[str]:
+        """
+        Trechos da resposta à medida que o modelo os envia.
+
+        Padrão para provedores sem streaming: a resposta inteira em um trecho.
+        """
+        yield self.responder(messages, provider, cancelar)
+
+
+class ProvedorGemini(ProvedorIA):
+    """Google Gemini via utils_financeiro.get_ai_chat_response."""
+
+    nome = 'gemini'
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def responder(self, messages: List[Dict], provider: str,
+                  cancelar: Optional[threading.Event] = None) -> str:
+        from utils_financeiro import get_ai_chat_response
+
+        # A chamada HTTP não é interrompível: o cancelamento só evita iniciá-la
+        if cancelar is not None and cancelar.is_set():
+            raise ConsultaCancelada("Consulta cancelada antes do envio")
+
+        resposta = get_ai_chat_response(messages, self.api_key, provider)
+        if resposta.startswith(PREFIXO_ERRO_GEMINI):
+            raise ErroProvedorIA(resposta)
+        return resposta
+
+    def responder_stream(self, messages: List[Dict], provider: str,
+                         cancelar: Optional[threading.Event] = None) -> Iterator[str]:
+        from utils_financeiro import stream_ai_chat_response
+
+        if cancelar is not None and cancelar.is_set():
+            raise ConsultaCancelada("Consulta cancelada antes do envio")
+
+        for trecho in stream_ai_chat_response(messages, self.api_key, provider):
+            # O erro chega como último trecho (sozinho ou após texto parcial)
+            if trecho.lstrip().startswith(PREFIXO_ERRO_GEMINI):
+                raise ErroProvedorIA(trecho.strip())
+            if cancelar is not None and cancelar.is_set():
+                raise ConsultaCancelada("Consulta cancelada durante o streaming")
+            yield trecho
+
+
+class ProvedorLocal(ProvedorIA):
+    """
+    Stub local: resposta determinística após `latencia_s` segundos.
+
+    No streaming, `latencia_s` é o tempo até o primeiro trecho e cada trecho
+    seguinte (PALAVRAS_POR_TRECHO palavras) leva `intervalo_trecho_s`.
+
+    Args:
+        latencia_s: Latência simulada por chamada
+        latencia_por_persona: Latência específica por persona (ex: {'AUDITOR': 2.0})
+        falhar: Marcadores de persona (ex: 'AUDITOR') cujas consultas falham
+        intervalo_trecho_s: Intervalo entre trechos no streaming
+    """
+
+    nome = PROVEDOR_LOCAL
+    PALAVRAS_POR_TRECHO = 3
+
+    def __init__(self, latencia_s: float = 0.0, latencia_por_persona: Dict[str, float] = None,
+                 falhar: Set[str] = None, intervalo_trecho_s: float = 0.0):
+        self.latencia_s = latencia_s
+        self.latencia_por_persona = {k.upper(): v for k, v in (latencia_por_persona or {}).items()}
+        self.falhar = {p.upper() for p in (falhar or set())}
+        self.intervalo_trecho_s = intervalo_trecho_s
+        self.chamadas = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _persona(prompt: str) -> str:
+        marcador = '[PERSONA: '
+        if marcador not in prompt:
+            return 'CHAIRMAN'
+        return prompt.split(marcador, 1)[1].split(']', 1)[0].strip().upper()
+
+    def responder(self, messages: List[Dict], provider: str,
+                  cancelar: Optional[threading.Event] = None) -> str:
+        return "".join(self._gerar(messages, provider, cancelar, intervalo_s=0.0))
+
+    def responder_stream(self, messages: List[Dict], provider: str,
+                         cancelar: Optional[threading.Event] = None) -> Iterator[str]:
+        return self._gerar(messages, provider, cancelar, self.intervalo_trecho_s)
+
+    def _gerar(self, messages: List[Dict], provider: str, cancelar: Optional[threading.Event],
+               intervalo_s: float) -> Iterator[str]:
+        with self._lock:
+            self.chamadas += 1
+
+        prompt = "\n".join(msg["content"] for msg in messages if msg["role"] == "user")
+        persona = self._persona(prompt)
+        latencia = self.latencia_por_persona.get(persona, self.latencia_s)
+
+        # Espera interrompível: o cancelamento encerra a consulta de fato
+        evento = cancelar or threading.Event()
+        if latencia > 0 and evento.wait(latencia):
+            raise ConsultaCancelada(f"Consulta de {persona} cancelada")
+        if persona in self.falhar:
+            raise ErroProvedorIA(f"Falha simulada para {persona}")
+
+        palavras = f"[{persona}] Resposta local ({provider}, {len(prompt)} caracteres de prompt).".split(' ')
+        for i in range(0, len(palavras), self.PALAVRAS_POR_TRECHO):
+            if i and intervalo_s > 0 and evento.wait(intervalo_s):
+                raise ConsultaCancelada(f"Consulta de {persona} cancelada")
+            trecho = ' '.join(palavras[i:i + self.PALAVRAS_POR_TRECHO])
+            yield trecho if i == 0 else ' ' + trecho
+
+
+def get_provedor(api_key: str) -> ProvedorIA:
+    """Provedor padrão: local se AI_PROVEDOR=local, senão Gemini."""
+    if os.getenv("AI_PROVEDOR", "").strip().lower() == PROVEDOR_LOCAL:
+        return ProvedorLocal()
+    return ProvedorGemini(api_key)
@@ -0,0 +1,323 @@
+"""
+services/backtest_forecast.py
+=============================
+Backtesting com origem móvel (rolling origin) dos métodos de forecast.
+
+Para cada origem o (fim do treino), todas as séries são ajustadas de uma vez
+com o BatchForecaster sobre as colunas [:o] da matriz séries × meses e
+comparadas com o realizado das colunas [o:o+h]. Os erros são acumulados por
+série e método:
+
+- MAPE  = média(|prev - real| / |real|) × 100   (só meses com real != 0)
+- WAPE  = Σ|prev - real| / Σ|real| × 100
+- Viés  = Σ(prev - real) / Σ|real| × 100        (negativo = previu mais custo,
+                                                  já que custos são negativos)
+
+O tempo de ajuste+previsão de cada método (todas as séries, todas as origens)
+é medido junto, então o mesmo código serve de benchmark do motor.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from database.models import ForecastBacktest, get_session
+from services.forecast_engine import BatchForecaster, METODOS_LOTE, MIN_OBS_METODO, montar_matriz_series
+from services.forecast_hierarquico import _preencher_vida_da_serie
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+HORIZONTE_PADRAO = 3
+N_ORIGENS_PADRAO = 6
+
+# Grãos suportados -> colunas que identificam a série
+GRAOS = {
+    'conta': ['conta_contabil_codigo'],
+    'centro': ['centro_gasto_codigo'],
+    'folha': ['centro_gasto_codigo', 'conta_contabil_codigo'],
+}
+
+# Separador da chave textual de séries com mais de uma coluna
+SEPARADOR_CHAVE = '|'
+
+# Método usado quando a série não tem backtest
+METODO_PADRAO = 'hybrid'
+
+
+# =============================================================================
+# BACKTEST
+# =============================================================================
+
+def origens_backtest(n_meses: int, n_origens: int = N_ORIGENS_PADRAO,
+                     min_treino: int = MIN_OBS_METODO) -> List[int]:
+    """Colunas de corte (fim do treino) das origens do backtest."""
+    return list(range(max(min_treino, n_meses - n_origens), n_meses))
+
+
+def backtest_matriz(matriz: np.ndarray,
+                    metodos: Sequence[str] = METODOS_LOTE,
+                    horizonte: int = HORIZONTE_PADRAO,
+                    n_origens: int = N_ORIGENS_PADRAO,
+                    min_treino: int = MIN_OBS_METODO) -> Tuple[Dict[str, Dict[str, np.ndarray]], Dict[str, float]]:
+    """
+    Backtest de origem móvel vetorizado sobre todas as séries.
+
+    As origens são os `n_origens` últimos cortes que ainda deixam `horizonte`
+    meses (ou o que restar) de realizado depois do treino.
+
+    Args:
+        matriz: Array [S, T] (NaN = sem dado)
+        metodos: Métodos do BatchForecaster a avaliar
+        horizonte: Meses previstos a cada origem
+        n_origens: Quantidade de origens
+        min_treino: Mínimo de pontos no treino para a série ser avaliada na origem
+
+    Returns:
+        Tuple (métricas por método: dict com arrays [S] de mape, wape, vies, n_pontos;
+               tempo de ajuste+previsão por método em segundos)
+    """
+    matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+    S, T = matriz.shape
+    origens = origens_backtest(T, n_origens, min_treino)
+
+    metricas = {}
+    tempos = {}
+
+    for metodo in metodos:
+        soma_abs = np.zeros(S)
+        soma_real = np.zeros(S)
+        soma_err = np.zeros(S)
+        soma_pct = np.zeros(S)
+        n_pct = np.zeros(S)
+        n_pontos = np.zeros(S, dtype=int)
+        tempo = 0.0
+
+        for o in origens:
+            treino = matriz[:, :o]
+            real = matriz[:, o:o + horizonte]
+            h = real.shape[1]
+            avaliada = (~np.isnan(treino)).sum(axis=1) >= min_treino
+            if not avaliada.any():
+                continue
+
+            inicio = time.perf_counter()
+            previsao, _, _ = BatchForecaster().fit(treino[avaliada], method=metodo).predict(h)
+            tempo += time.perf_counter() - inicio
+
+            real = real[avaliada]
+            valido = ~np.isnan(real)
+            erro = np.where(valido, previsao - real, 0.0)
+            real_abs = np.where(valido, np.abs(real), 0.0)
+
+            linhas = np.flatnonzero(avaliada)
+            soma_abs[linhas] += np.abs(erro).sum(axis=1)
+            soma_real[linhas] += real_abs.sum(axis=1)
+            soma_err[linhas] += erro.sum(axis=1)
+            com_real = valido & (real_abs > 0)
+            soma_pct[linhas] += np.divide(np.abs(erro), real_abs, out=np.zeros_like(erro), where=com_real).sum(axis=1)
+            n_pct[linhas] += com_real.sum(axis=1)
+            n_pontos[linhas] += valido.sum(axis=1)
+
+        metricas[metodo] = {
+            'mape': np.divide(soma_pct, n_pct, out=np.full(S, np.nan), where=n_pct > 0) * 100,
+            'wape': np.divide(soma_abs, soma_real, out=np.full(S, np.nan), where=soma_real > 0) * 100,
+            'vies': np.divide(soma_err, soma_real, out=np.full(S, np.nan), where=soma_real > 0) * 100,
+            'n_pontos': n_pontos,
+        }
+        tempos[metodo] = tempo
+
+    return metricas, tempos
+
+
+def _chave_texto(chaves: pd.DataFrame) -> pd.Series:
+    """Chave textual da série (colunas unidas por SEPARADOR_CHAVE)."""
+    texto = chaves.astype(str)
+    return texto.iloc[:, 0] if texto.shape[1] == 1 else texto.agg(SEPARADOR_CHAVE.join, axis=1)
+
+
+def executar_backtest(df_historico: pd.DataFrame,
+                      grao: str = 'conta',
+                      metodos: Sequence[str] = METODOS_LOTE,
+                      horizonte: int = HORIZONTE_PADRAO,
+                      n_origens: int = N_ORIGENS_PADRAO) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Backtest de todos os métodos para as séries de um grão.
+
+    Args:
+        df_historico: DataFrame com data_ref, valor e as colunas do grão
+        grao: 'conta', 'centro' ou 'folha'
+        metodos: Métodos a avaliar
+        horizonte: Meses previstos por origem
+        n_origens: Quantidade de origens
+
+    Returns:
+        Tuple (detalhe por série × método: chave_serie, metodo, mape, wape, vies,
+               n_pontos, melhor;
+               resumo por método: metodo, mape, wape, vies (medianas), n_series,
+               tempo_s, series_por_s (ajustes série × origem por segundo))
+    """
+    if grao not in GRAOS:
+        raise ValueError(f"Grão inválido: {grao}. Use um de {list(GRAOS)}")
+
+    colunas = GRAOS[grao]
+    df = df_historico.dropna(subset=['data_ref'] + colunas)
+    matriz, chaves, _ = montar_matriz_series(df, colunas)
+    if grao == 'folha':
+        # Mesmo tratamento do forecast granular: mês sem lançamento = 0
+        matriz = _preencher_vida_da_serie(matriz)
+    if chaves.empty:
+        vazio = pd.DataFrame(columns=['chave_serie', 'metodo', 'mape', 'wape', 'vies', 'n_pontos', 'melhor'])
+        return vazio, pd.DataFrame(columns=['metodo', 'mape', 'wape', 'vies', 'n_series', 'tempo_s', 'series_por_s'])
+
+    metricas, tempos = backtest_matriz(matriz, metodos, horizonte, n_origens)
+    chave = _chave_texto(chaves).to_numpy()
+
+    detalhe = pd.concat([
+        pd.DataFrame({
+            'chave_serie': chave,
+            'metodo': metodo,
+            'mape': m['mape'],
+            'wape': m['wape'],
+            'vies': m['vies'],
+            'n_pontos': m['n_pontos'],
+        })
+        for metodo, m in metricas.items()
+    ], ignore_index=True)
+    detalhe = detalhe[detalhe['n_pontos'] > 0].reset_index(drop=True)
+    detalhe['melhor'] = marcar_melhor_metodo(detalhe, ordem=list(metodos))
+
+    n_series = detalhe.groupby('metodo')['chave_serie'].nunique()
+    resumo = detalhe.groupby('metodo').agg(
+        mape=('mape', 'median'), wape=('wape', 'median'), vies=('vies', 'median')
+    ).reindex(list(metodos))
+    resumo['n_series'] = n_series.reindex(resumo.index).fillna(0).astype(int)
+    resumo['tempo_s'] = pd.Series(tempos).reindex(resumo.index)
+    # Vazão: ajustes série × origem por segundo
+    n_ajustes = len(chaves) * len(origens_backtest(matriz.shape[1], n_origens))
+    tempo = resumo['tempo_s'].to_numpy(dtype=float)
+    resumo['series_por_s'] = np.divide(n_ajustes, tempo, out=np.full(len(resumo), np.nan), where=tempo > 0)
+    return detalhe, resumo.reset_index()
+
+
+def marcar_melhor_metodo(detalhe: pd.DataFrame, ordem: List[str] = None) -> pd.Series:
+    """
+    Marca, para cada série, o método de menor WAPE (empate: ordem de `ordem`).
+
+    Returns:
+        Series booleana alinhada a `detalhe`
+    """
+    if detalhe.empty:
+        return pd.Series(False, index=detalhe.index)
+    ordem = ordem or METODOS_LOTE
+    prioridade = detalhe['metodo'].map({m: i for i, m in enumerate(ordem)})
+    ranking = detalhe.assign(_wape=detalhe['wape'].fillna(np.inf), _prioridade=prioridade)
+    escolhido = ranking.sort_values(['chave_serie', '_wape', '_prioridade']).drop_duplicates('chave_serie').index
+    melhor = pd.Series(False, index=detalhe.index)
+    melhor[escolhido] = True
+    return melhor
+
+
+# =============================================================================
+# PERSISTÊNCIA
+# =============================================================================
+
+class BacktestService:
+    """Executa, grava e consulta backtests de forecast."""
+
+    def executar_e_salvar(self,
+                          df_historico: pd.DataFrame,
+                          grao: str = 'conta',
+                          metodos: Sequence[str] = METODOS_LOTE,
+                          horizonte: int = HORIZONTE_PADRAO,
+                          n_origens: int = N_ORIGENS_PADRAO) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Executa o backtest e substitui os resultados gravados do grão.
+
+        Returns:
+            Tuple (detalhe, resumo) como em executar_backtest
+        """
+        detalhe, resumo = executar_backtest(df_historico, grao, metodos, horizonte, n_origens)
+        tempos = resumo.set_index('metodo')['tempo_s'].to_dict() if not resumo.empty else {}
+
+        session = get_session()
+        try:
+            session.query(ForecastBacktest).filter_by(grao=grao).delete(synchronize_session=False)
+            agora = datetime.now()
+            registros = [
+                {
+                    'data_execucao': agora,
+                    'grao': grao,
+                    'chave_serie': chave,
+                    'metodo': metodo,
+                    'horizonte': horizonte,
+                    'n_origens': n_origens,
+                    'mape': None if pd.isna(mape) else float(mape),
+                    'wape': None if pd.isna(wape) else float(wape),
+                    'vies': None if pd.isna(vies) else float(vies),
+                    'n_pontos': int(n),
+                    'tempo_metodo_s': float(tempos.get(metodo) or 0.0),
+                    'melhor': bool(melhor)
+                }
+                for chave, metodo, mape, wape, vies, n, melhor in zip(
+                    detalhe['chave_serie'], detalhe['metodo'], detalhe['mape'], detalhe['wape'],
+                    detalhe['vies'], detalhe['n_pontos'], detalhe['melhor']
+                )
+            ]
+            if registros:
+                session.execute(ForecastBacktest.__table__.insert(), registros)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"Erro ao salvar backtest: {e}")
+            raise
+        finally:
+            session.close()
+
+        return detalhe, resumo
+
+    def get_resumo(self, grao: str = 'conta') -> pd.DataFrame:
+        """Resumo por método do último backtest gravado do grão."""
+        session = get_session()
+        try:
+            linhas = session.query(
+                ForecastBacktest.metodo, ForecastBacktest.mape, ForecastBacktest.wape,
+                ForecastBacktest.vies, ForecastBacktest.melhor, ForecastBacktest.tempo_metodo_s,
+                ForecastBacktest.data_execucao
+            ).filter_by(grao=grao).all()
+        finally:
+            session.close()
+
+        if not linhas:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(linhas, columns=['metodo', 'mape', 'wape', 'vies', 'melhor', 'tempo_s', 'data_execucao'])
+        resumo = df.groupby('metodo').agg(
+            mape=('mape', 'median'), wape=('wape', 'median'), vies=('vies', 'median'),
+            series_vencidas=('melhor', 'sum'), tempo_s=('tempo_s', 'max'),
+            data_execucao=('data_execucao', 'max')
+        )
+        return resumo.sort_values('wape').reset_index()
+
+    def get_metodos_padrao(self, grao: str = 'conta') -> Dict[str, str]:
+        """
+        Melhor método por série no último backtest do grão.
+
+        Returns:
+            Dict chave_serie -> método (séries sem backtest não aparecem)
+        """
+        session = get_session()
+        try:
+            linhas = session.query(ForecastBacktest.chave_serie, ForecastBacktest.metodo).filter_by(
+                grao=grao, melhor=True
+            ).all()
+            return {chave: metodo for chave, metodo in linhas}
+        finally:
+            session.close()
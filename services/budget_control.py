@@ -111,6 +111,32 @@ class BudgetControlService:
         finally:
             session.close()
 
+    def get_ajustes_por_centro(self, mes: str = None) -> dict:
+        """
+        Impacto líquido dos remanejamentos aprovados para todos os centros.
+        
+        Args:
+            mes: Mês específico ou None para o ano todo
+        
+        Returns:
+            Dict {centro: valor} (Positivo = Aumento de Budget, Negativo = Redução)
+        """
+        session = get_session()
+        try:
+            query = session.query(
+                Remanejamento.centro_origem_codigo, Remanejamento.centro_destino_codigo, Remanejamento.valor
+            ).filter(Remanejamento.status == 'APROVADO')
+            if mes:
+                query = query.filter(Remanejamento.mes == mes)
+            
+            ajustes = {}
+            for origem, destino, valor in query.all():
+                ajustes[destino] = ajustes.get(destino, 0.0) + valor
+                ajustes[origem] = ajustes.get(origem, 0.0) - valor
+            return ajustes
+        finally:
+            session.close()
+
     # =========================================================================
     # FEATURE E: JUSTIFICATIVA OBZ
     # =========================================================================
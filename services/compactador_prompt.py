@@ -0,0 +1,312 @@
+"""
+services/compactador_prompt.py
+==============================
+Compactação de dados financeiros para prompts de IA com orçamento de tokens.
+
+Em vez de despejar tabelas inteiras (df.describe(), groupby completo) no
+prompt, os dados são resumidos em níveis de prioridade e incluídos até o
+orçamento de tokens acabar:
+
+1. Totais (sempre primeiro)
+2. Subtotais por dimensão (ativo, mês, ...)
+3. Maiores desvios (top-k por valor absoluto)
+4. Detalhe linha a linha, do maior para o menor valor absoluto
+
+O prompt fica limitado a um tamanho fixo qualquer que seja o volume de dados
+(anos, centros), e o resultado informa quantas linhas ficaram de fora.
+
+Tokens são estimados localmente (sem tokenizer do provedor): palavras em
+blocos de ~4 caracteres, números em grupos de até 3 dígitos, pontuação
+contada à parte. A estimativa é conservadora para texto em português.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import math
+import re
+from typing import List, Optional
+
+import pandas as pd
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+ORCAMENTO_PADRAO_TOKENS = 1500
+TOP_K_PADRAO = 10
+
+# Dimensões categóricas com mais valores distintos que isso não viram subtotal
+MAX_GRUPOS_SUBTOTAL = 25
+
+# Colunas numéricas que são dimensão (subtotal), não valor a somar
+COLUNAS_DIMENSAO = ('ano', 'mes', 'mes_num', 'trimestre')
+
+_PADRAO_TOKEN = re.compile(r"\d{1,3}|[^\W\d_]+|[^\w\s]")
+
+_ESCALAS = [(1e9, 'bi'), (1e6, 'mi'), (1e3, 'mil')]
+
+
+# =============================================================================
+# TOKENS E NÚMEROS
+# =============================================================================
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Estimativa local da quantidade de tokens de um texto.
+
+    Args:
+        texto: Texto do prompt
+
+    Returns:
+        Número estimado de tokens
+    """
+    total = 0
+    for parte in _PADRAO_TOKEN.findall(texto):
+        total += math.ceil(len(parte) / 4) if parte[0].isalpha() else 1
+    return total
+
+
+def numero_compacto(valor, percentual: bool = False) -> str:
+    """
+    Número curto para o prompt: -1,2 mi / 350 mil / 12,5%.
+
+    Args:
+        valor: Valor numérico (None/NaN vira "-")
+        percentual: Formata como percentual
+
+    Returns:
+        Texto compacto com vírgula decimal
+    """
+    if valor is None or pd.isna(valor):
+        return "-"
+    valor = float(valor)
+    if percentual:
+        return f"{valor:.1f}".replace('.', ',') + "%"
+
+    for escala, sufixo in _ESCALAS:
+        if abs(valor) >= escala:
+            texto = f"{valor / escala:.1f}".replace('.', ',')
+            return f"{texto.removesuffix(',0')} {sufixo}"
+    if float(valor).is_integer():
+        return f"{valor:.0f}"
+    return f"{valor:.2f}".replace('.', ',')
+
+
+def linhas_tabela(df: pd.DataFrame, colunas: List[str] = None) -> List[str]:
+    """
+    Linhas compactas "a | b | c" de um DataFrame (a primeira é o cabeçalho).
+
+    Colunas numéricas saem com numero_compacto (exceto dimensões como ano e
+    mes); colunas terminadas em _pct como percentual.
+    """
+    colunas = colunas or list(df.columns)
+    numericas = set(df[colunas].select_dtypes('number').columns) - set(COLUNAS_DIMENSAO)
+    linhas = [" | ".join(colunas)]
+    for registro in df[colunas].itertuples(index=False):
+        celulas = []
+        for col, valor in zip(colunas, registro):
+            if col in numericas:
+                celulas.append(numero_compacto(valor, percentual=col.endswith('_pct')))
+            else:
+                celulas.append(str(valor))
+        linhas.append(" | ".join(celulas))
+    return linhas
+
+
+# =============================================================================
+# COMPACTAÇÃO
+# =============================================================================
+
+class Secao:
+    """
+    Bloco do prompt com um título e linhas em ordem de prioridade.
+
+    Atributos:
+        titulo: Linha de título (entra junto com a primeira linha)
+        linhas: Conteúdo, da linha mais importante para a menos importante
+        cabecalho: Linha fixa após o título (ex: nomes das colunas)
+        total_linhas: Linhas que a seção representa (>= len(linhas) quando só
+                      as primeiras foram formatadas)
+    """
+
+    def __init__(self, titulo: str, linhas: List[str], cabecalho: Optional[str] = None,
+                 total_linhas: int = None):
+        self.titulo = titulo
+        self.linhas = linhas
+        self.cabecalho = cabecalho
+        self.total_linhas = max(total_linhas or 0, len(linhas))
+
+
+class ResultadoCompactacao:
+    """
+    Texto compactado e o que ficou de fora.
+
+    Atributos:
+        texto: Prompt pronto (com aviso de truncamento, se houve)
+        tokens: Tokens estimados do texto
+        orcamento: Orçamento de tokens usado
+        linhas_incluidas / linhas_totais: Linhas de dados no texto / disponíveis
+        secoes_omitidas: Títulos das seções que não couberam
+    """
+
+    def __init__(self, texto: str, orcamento: int, linhas_incluidas: int, linhas_totais: int,
+                 secoes_omitidas: List[str]):
+        self.texto = texto
+        self.tokens = estimar_tokens(texto)
+        self.orcamento = orcamento
+        self.linhas_incluidas = linhas_incluidas
+        self.linhas_totais = linhas_totais
+        self.secoes_omitidas = secoes_omitidas
+
+    @property
+    def linhas_omitidas(self) -> int:
+        return self.linhas_totais - self.linhas_incluidas
+
+    @property
+    def truncado(self) -> bool:
+        return self.linhas_omitidas > 0
+
+    def descricao(self) -> str:
+        """Resumo curto para exibição (ex: caption na página)."""
+        texto = f"~{self.tokens} tokens de {self.orcamento}"
+        if self.truncado:
+            pct = 100 * self.linhas_omitidas / self.linhas_totais
+            texto += f" | {self.linhas_omitidas} de {self.linhas_totais} linhas omitidas ({pct:.0f}%)"
+        return texto
+
+
+def _aviso_truncamento(omitidas: int, totais: int) -> str:
+    return (f"[... {omitidas} de {totais} linhas de detalhe omitidas pelo limite de contexto; "
+            f"os totais acima incluem todos os dados]")
+
+
+def compactar(secoes: List[Secao], orcamento_tokens: int = ORCAMENTO_PADRAO_TOKENS,
+              cabecalho: str = "", rodape: str = "") -> ResultadoCompactacao:
+    """
+    Monta o texto incluindo seções e linhas em ordem até o orçamento acabar.
+
+    Cabeçalho e rodapé entram sempre. A primeira linha que não cabe encerra a
+    montagem: o restante (inclusive seções seguintes) é omitido e um aviso
+    com a contagem entra no lugar.
+
+    Args:
+        secoes: Seções em ordem de prioridade
+        orcamento_tokens: Máximo de tokens estimados do texto
+        cabecalho: Texto fixo inicial
+        rodape: Texto fixo final (avisos obrigatórios)
+
+    Returns:
+        ResultadoCompactacao
+    """
+    linhas_totais = sum(s.total_linhas for s in secoes)
+    # Reserva para o aviso de truncamento (pior caso de dígitos)
+    reserva = estimar_tokens(_aviso_truncamento(linhas_totais, linhas_totais))
+    disponivel = orcamento_tokens - estimar_tokens(cabecalho) - estimar_tokens(rodape) - reserva
+
+    blocos = []
+    incluidas = 0
+    secoes_omitidas = []
+    esgotado = False
+    for secao in secoes:
+        if esgotado or not secao.linhas:
+            if secao.linhas:
+                secoes_omitidas.append(secao.titulo)
+            continue
+
+        fixas = [secao.titulo] + ([secao.cabecalho] if secao.cabecalho else [])
+        custo_fixo = sum(estimar_tokens(l) + 1 for l in fixas)
+        bloco = []
+        for linha in secao.linhas:
+            custo = estimar_tokens(linha) + 1  # +1: quebra de linha
+            if custo + (0 if bloco else custo_fixo) > disponivel:
+                esgotado = True
+                break
+            if not bloco:
+                disponivel -= custo_fixo
+            disponivel -= custo
+            bloco.append(linha)
+
+        if bloco:
+            blocos.append("\n".join(fixas + bloco))
+            incluidas += len(bloco)
+        else:
+            secoes_omitidas.append(secao.titulo)
+
+    partes = [cabecalho] if cabecalho else []
+    partes += blocos
+    if incluidas < linhas_totais:
+        partes.append(_aviso_truncamento(linhas_totais - incluidas, linhas_totais))
+    if rodape:
+        partes.append(rodape)
+
+    return ResultadoCompactacao("\n\n".join(partes), orcamento_tokens, incluidas, linhas_totais,
+                                secoes_omitidas)
+
+
+def compactar_dataframe(df: pd.DataFrame, orcamento_tokens: int = ORCAMENTO_PADRAO_TOKENS,
+                        coluna_ranking: str = None, dimensoes: List[str] = None,
+                        top_k: int = TOP_K_PADRAO, titulo: str = "Dados") -> ResultadoCompactacao:
+    """
+    Resumo hierárquico de um DataFrame qualquer dentro do orçamento de tokens.
+
+    Níveis: totais das colunas numéricas -> subtotais por dimensão -> top-k
+    pelo valor absoluto de `coluna_ranking` -> demais linhas em ordem
+    decrescente de valor absoluto.
+
+    Args:
+        df: Dados (ex: P&L filtrado)
+        orcamento_tokens: Máximo de tokens estimados
+        coluna_ranking: Coluna que ordena desvios/detalhe (padrão: 'desvio',
+                        'valor' ou a primeira numérica)
+        dimensoes: Colunas categóricas para subtotais (padrão: colunas de
+                   texto com até MAX_GRUPOS_SUBTOTAL valores distintos)
+        top_k: Linhas na seção de maiores desvios
+        titulo: Nome dos dados no cabeçalho
+
+    Returns:
+        ResultadoCompactacao
+    """
+    if df is None or df.empty:
+        return compactar([], orcamento_tokens, cabecalho=f"{titulo}: sem dados.")
+
+    numericas = [c for c in df.select_dtypes('number').columns
+                 if not c.endswith('_pct') and c not in COLUNAS_DIMENSAO and c != 'id' and not c.endswith('_id')]
+    if coluna_ranking is None:
+        candidatas = [c for c in ('desvio', 'valor') if c in numericas]
+        coluna_ranking = candidatas[0] if candidatas else (numericas[0] if numericas else None)
+    if dimensoes is None:
+        dimensoes = [c for c in df.columns
+                     if (c in COLUNAS_DIMENSAO or pd.api.types.is_object_dtype(df[c])
+                         or pd.api.types.is_string_dtype(df[c]))
+                     and 1 < df[c].nunique() <= MAX_GRUPOS_SUBTOTAL]
+
+    cabecalho = f"{titulo}: {len(df)} linhas, {len(df.columns)} colunas (valores compactos: mil/mi/bi)"
+    secoes = []
+
+    if numericas:
+        totais = [f"{c}: soma {numero_compacto(df[c].sum())} | média {numero_compacto(df[c].mean())}"
+                  f" | mín {numero_compacto(df[c].min())} | máx {numero_compacto(df[c].max())}"
+                  for c in numericas]
+        secoes.append(Secao("Totais:", totais))
+
+        for dim in dimensoes:
+            sub = df.groupby(dim, dropna=False)[numericas].sum().reset_index()
+            if coluna_ranking:
+                sub = sub.sort_values(coluna_ranking, key=abs, ascending=False)
+            linhas = linhas_tabela(sub, [dim] + numericas)
+            secoes.append(Secao(f"Subtotais por {dim}:", linhas[1:], cabecalho=linhas[0]))
+
+    if coluna_ranking:
+        ordenado = df.sort_values(coluna_ranking, key=abs, ascending=False)
+    else:
+        ordenado = df
+    # Só formata as linhas que podem caber (cada célula custa ao menos ~2 tokens)
+    limite = top_k + orcamento_tokens // (2 * len(df.columns)) + 1
+    linhas = linhas_tabela(ordenado.head(limite))
+    titulo_top = f"Maiores valores de {coluna_ranking} (top {top_k}):" if coluna_ranking else "Primeiras linhas:"
+    secoes.append(Secao(titulo_top, linhas[1:top_k + 1], cabecalho=linhas[0]))
+    secoes.append(Secao("Demais linhas:", linhas[top_k + 1:], cabecalho=linhas[0],
+                        total_linhas=max(len(df) - top_k, 0)))
+
+    return compactar(secoes, orcamento_tokens, cabecalho=cabecalho)
@@ -0,0 +1,311 @@
+"""
+services/conciliacao_service.py
+===============================
+Conciliação automática em lote: provisões PENDENTE x Razão de Gastos.
+
+Etapas (todas vetorizadas; nenhum laço provisão x lançamento):
+
+1. Blocagem: hash join (pd.merge) por centro, conta e mês. Só pares do mesmo
+   bloco viram candidatos.
+2. Pontuação de cada candidato:
+   - valor: diferença relativa dos valores absolutos dentro de TOLERANCIA_VALOR
+   - documento: número de registro/contrato da provisão no registro ou na
+     descrição do lançamento
+   - texto: similaridade (cosseno de trigramas) entre a descrição da provisão
+     e fornecedor + descrição do lançamento
+3. Atribuição: cada provisão recebe no máximo um lançamento e vice-versa,
+   maximizando a pontuação total no bloco (linear_sum_assignment).
+
+As sugestões são confirmadas em lote (`confirmar`): a provisão passa a
+REALIZADA com o vínculo em Provisao.razao_realizado_id.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from database.models import Provisao, RazaoRealizado, get_session
+from services.fornecedores_service import canonicalizar
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+CHAVES_BLOCO = ['centro_gasto_codigo', 'conta_contabil_codigo', 'mes']
+
+TOLERANCIA_VALOR = 0.15   # Diferença relativa máxima para pontuar valor
+SCORE_MINIMO = 0.45       # Abaixo disso o par não é sugerido (salvo documento coincidente)
+SCORE_CONFIANTE = 0.80    # Sugestões pré-marcadas para confirmação
+
+PESOS = {'valor': 0.5, 'documento': 0.3, 'texto': 0.2}
+
+COLUNAS_SUGESTAO = [
+    'provisao_id', 'razao_id', 'score', 'score_valor', 'score_documento', 'score_texto',
+    'mes', 'centro_gasto_codigo', 'conta_contabil_codigo', 'descricao_provisao', 'valor_provisao',
+    'fornecedor', 'descricao_razao', 'valor_razao',
+]
+
+_RE_NAO_ALFANUM = re.compile(r'[^0-9A-Z]')
+_vetorizador = HashingVectorizer(n_features=2 ** 16, analyzer='char_wb', ngram_range=(3, 3),
+                                 strip_accents='unicode', lowercase=True, alternate_sign=False)
+
+
+# =============================================================================
+# NORMALIZAÇÃO
+# =============================================================================
+
+def _normalizar_codigo(serie: pd.Series) -> pd.Series:
+    """Código sem sufixo '.0' do Excel e só com o trecho numérico inicial (se houver)."""
+    texto = serie.fillna('').astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    numerico = texto.str.extract(r'^(\d+)', expand=False)
+    return numerico.fillna(texto)
+
+
+def _normalizar_centro(serie: pd.Series) -> pd.Series:
+    """Centro com 11 dígitos (zero à esquerda perdido no Excel), como no ETL."""
+    codigo = _normalizar_codigo(serie)
+    return codigo.where(codigo.str.len() != 10, '0' + codigo)
+
+
+def _normalizar_documento(serie: pd.Series) -> pd.Series:
+    """Número de registro/contrato em maiúsculas, só letras e dígitos."""
+    return serie.fillna('').astype(str).str.upper().str.replace(_RE_NAO_ALFANUM, '', regex=True)
+
+
+def _preparar_provisoes(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns={'id': 'provisao_id', 'mes_competencia': 'mes',
+                            'descricao': 'descricao_provisao', 'valor_estimado': 'valor_provisao'})
+    df['centro_gasto_codigo'] = _normalizar_centro(df['centro_gasto_codigo'])
+    df['conta_contabil_codigo'] = _normalizar_codigo(df['conta_contabil_codigo'])
+    df['mes'] = df['mes'].astype(str).str.upper().str.strip()
+    df['doc_registro'] = _normalizar_documento(df.get('numero_registro', pd.Series('', index=df.index)))
+    df['doc_contrato'] = _normalizar_documento(df.get('numero_contrato', pd.Series('', index=df.index)))
+    return df
+
+
+def _preparar_razao(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(columns={'id': 'razao_id', 'descricao': 'descricao_razao', 'valor': 'valor_razao'})
+    df['centro_gasto_codigo'] = _normalizar_centro(df['centro_gasto_codigo'])
+    df['conta_contabil_codigo'] = _normalizar_codigo(df['conta_contabil_codigo'])
+    df['mes'] = df['mes'].astype(str).str.upper().str.strip()
+    df['fornecedor'] = df['fornecedor'].fillna('').astype(str)
+    df['descricao_razao'] = df['descricao_razao'].fillna('').astype(str)
+    # Texto onde procurar o número do documento: registro + descrição
+    df['doc_texto'] = _normalizar_documento(
+        df.get('numero_registro', pd.Series('', index=df.index)).fillna('').astype(str)
+        + ' ' + df['descricao_razao']
+    )
+    return df
+
+
+# =============================================================================
+# PONTUAÇÃO E ATRIBUIÇÃO
+# =============================================================================
+
+def _similaridade_texto(textos_a: pd.Series, textos_b: pd.Series) -> np.ndarray:
+    """Cosseno de trigramas linha a linha (vetoriza cada texto distinto uma vez)."""
+    unicos_a, inv_a = np.unique(textos_a.to_numpy(dtype=str), return_inverse=True)
+    unicos_b, inv_b = np.unique(textos_b.to_numpy(dtype=str), return_inverse=True)
+    va = normalize(_vetorizador.transform(unicos_a))[inv_a]
+    vb = normalize(_vetorizador.transform(unicos_b))[inv_b]
+    return np.asarray(va.multiply(vb).sum(axis=1)).ravel()
+
+
+def _contido(agulhas: pd.Series, palheiros: pd.Series) -> np.ndarray:
+    """agulha (não vazia, 3+ caracteres) contida no palheiro, par a par."""
+    return np.fromiter(
+        (len(a) >= 3 and a in p for a, p in zip(agulhas, palheiros)),
+        dtype=bool, count=len(agulhas)
+    )
+
+
+def pontuar_candidatos(provisoes: pd.DataFrame, razao: pd.DataFrame) -> pd.DataFrame:
+    """
+    Candidatos por bloco (hash join) com as notas de cada critério.
+
+    Args:
+        provisoes: Saída de _preparar_provisoes
+        razao: Saída de _preparar_razao
+
+    Returns:
+        Um par provisão x lançamento por linha, com score_* e score
+    """
+    pares = provisoes.merge(razao, on=CHAVES_BLOCO, how='inner')
+    if pares.empty:
+        return pares
+
+    valor_p = pares['valor_provisao'].abs().to_numpy(dtype=float)
+    valor_r = pares['valor_razao'].abs().to_numpy(dtype=float)
+    dif_rel = np.abs(valor_p - valor_r) / np.maximum(valor_p, 1.0)
+    pares['score_valor'] = np.clip(1.0 - dif_rel / TOLERANCIA_VALOR, 0.0, 1.0)
+
+    documento = _contido(pares['doc_registro'], pares['doc_texto']) | \
+        _contido(pares['doc_contrato'], pares['doc_texto'])
+    pares['score_documento'] = documento.astype(float)
+
+    pares['score_texto'] = _similaridade_texto(
+        pares['descricao_provisao'].fillna('').astype(str),
+        pares['fornecedor'] + ' ' + pares['descricao_razao']
+    )
+
+    pares['score'] = (PESOS['valor'] * pares['score_valor']
+                      + PESOS['documento'] * pares['score_documento']
+                      + PESOS['texto'] * pares['score_texto'])
+    # Documento explícito sustenta o par mesmo com valor divergente (ex: aditivo, reajuste)
+    return pares[(pares['score'] >= SCORE_MINIMO) | documento].reset_index(drop=True)
+
+
+def atribuir(pares: pd.DataFrame) -> pd.DataFrame:
+    """
+    Um lançamento por provisão (e vice-versa), maximizando o score por bloco.
+
+    Componentes com um único candidato saem direto; os demais são resolvidos
+    com linear_sum_assignment na matriz provisões x lançamentos do bloco.
+    """
+    if pares.empty:
+        return pares
+
+    # Blocos 1x1 (caso mais comum) não precisam do algoritmo
+    n_prov = pares.groupby('provisao_id')['razao_id'].transform('size')
+    n_razao = pares.groupby('razao_id')['provisao_id'].transform('size')
+    unicos = (n_prov == 1) & (n_razao == 1)
+    escolhidos = [pares.index[unicos].to_numpy()]
+
+    disputados = pares[~unicos]
+    for _, bloco in disputados.groupby(CHAVES_BLOCO, sort=False):
+        linhas, ids_prov = pd.factorize(bloco['provisao_id'])
+        colunas, ids_razao = pd.factorize(bloco['razao_id'])
+        # Par inexistente = custo proibitivo; a atribuição nunca o escolhe se houver alternativa
+        custo = np.full((len(ids_prov), len(ids_razao)), 1e6)
+        custo[linhas, colunas] = -bloco['score'].to_numpy()
+        posicao = np.full(custo.shape, -1)
+        posicao[linhas, colunas] = bloco.index.to_numpy()
+        idx_l, idx_c = linear_sum_assignment(custo)
+        validos = custo[idx_l, idx_c] < 0
+        escolhidos.append(posicao[idx_l[validos], idx_c[validos]])
+
+    return pares.loc[np.concatenate(escolhidos)].sort_values('score', ascending=False).reset_index(drop=True)
+
+
+def conciliar(df_provisoes: pd.DataFrame, df_razao: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sugestões de conciliação para os DataFrames informados.
+
+    Args:
+        df_provisoes: id, descricao, valor_estimado, centro_gasto_codigo,
+                      conta_contabil_codigo, mes_competencia, numero_registro,
+                      numero_contrato
+        df_razao: id, mes, centro_gasto_codigo, conta_contabil_codigo,
+                  fornecedor, descricao, valor, numero_registro
+
+    Returns:
+        DataFrame com COLUNAS_SUGESTAO, do maior para o menor score
+    """
+    if df_provisoes.empty or df_razao.empty:
+        return pd.DataFrame(columns=COLUNAS_SUGESTAO)
+    pares = pontuar_candidatos(_preparar_provisoes(df_provisoes.copy()), _preparar_razao(df_razao.copy()))
+    if pares.empty:
+        return pd.DataFrame(columns=COLUNAS_SUGESTAO)
+    return atribuir(pares)[COLUNAS_SUGESTAO]
+
+
+# =============================================================================
+# SERVIÇO
+# =============================================================================
+
+class ConciliacaoService:
+    """Conciliação provisões x Razão sobre o banco."""
+
+    def carregar(self, ano: int, mes: str = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Provisões PENDENTE e lançamentos do Razão ainda não vinculados."""
+        session = get_session()
+        try:
+            q_prov = session.query(
+                Provisao.id, Provisao.descricao, Provisao.valor_estimado, Provisao.centro_gasto_codigo,
+                Provisao.conta_contabil_codigo, Provisao.mes_competencia, Provisao.numero_registro,
+                Provisao.numero_contrato
+            ).filter(Provisao.status == 'PENDENTE')
+            vinculados = session.query(Provisao.razao_realizado_id).filter(Provisao.razao_realizado_id.isnot(None))
+            q_razao = session.query(
+                RazaoRealizado.id, RazaoRealizado.mes, RazaoRealizado.centro_gasto_codigo,
+                RazaoRealizado.conta_contabil_codigo, RazaoRealizado.fornecedor, RazaoRealizado.descricao,
+                RazaoRealizado.valor, RazaoRealizado.numero_registro
+            ).filter(RazaoRealizado.ano == ano, RazaoRealizado.id.notin_(vinculados))
+            if mes:
+                q_prov = q_prov.filter(Provisao.mes_competencia == mes)
+                q_razao = q_razao.filter(RazaoRealizado.mes == mes)
+
+            df_prov = pd.read_sql(q_prov.statement, session.bind)
+            df_razao = pd.read_sql(q_razao.statement, session.bind)
+            # Grafias do mesmo fornecedor comparadas pelo nome canônico
+            df_razao['fornecedor'] = canonicalizar(df_razao['fornecedor'])
+            return df_prov, df_razao
+        finally:
+            session.close()
+
+    def sugerir(self, ano: int, mes: str = None) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Sugestões de conciliação do ano (ou mês).
+
+        Returns:
+            (sugestões, estatísticas: provisoes, lancamentos, sugestoes, tempo_s)
+        """
+        inicio = time.perf_counter()
+        df_prov, df_razao = self.carregar(ano, mes)
+        sugestoes = conciliar(df_prov, df_razao)
+        return sugestoes, {
+            'provisoes': len(df_prov),
+            'lancamentos': len(df_razao),
+            'sugestoes': len(sugestoes),
+            'tempo_s': time.perf_counter() - inicio,
+        }
+
+    def confirmar(self, pares: List[Tuple[int, int]]) -> Tuple[int, List[str]]:
+        """
+        Confirma sugestões em lote (uma transação).
+
+        Args:
+            pares: [(provisao_id, razao_id), ...]
+
+        Returns:
+            (confirmadas, erros)
+        """
+        if not pares:
+            return 0, []
+        session = get_session()
+        erros = []
+        try:
+            mapa = dict(pares)
+            provisoes = session.query(Provisao).filter(Provisao.id.in_(list(mapa))).all()
+            encontradas = {p.id for p in provisoes}
+            erros += [f"Provisão {pid} não encontrada" for pid in mapa if pid not in encontradas]
+
+            agora = datetime.now()
+            confirmadas = 0
+            for provisao in provisoes:
+                if provisao.status != 'PENDENTE':
+                    erros.append(f"Provisão {provisao.id} não está PENDENTE (status atual: {provisao.status})")
+                    continue
+                provisao.razao_realizado_id = int(mapa[provisao.id])
+                provisao.status = 'REALIZADA'
+                provisao.data_atualizacao = agora
+                confirmadas += 1
+
+            session.commit()
+            return confirmadas, erros
+        except Exception as e:
+            session.rollback()
+            print(f"Erro ao confirmar conciliações: {e}")
+            return 0, erros + [str(e)]
+        finally:
+            session.close()
@@ -0,0 +1,310 @@
+"""
+services/contexto_financeiro.py
+===============================
+Snapshot financeiro compacto e versionado para os prompts de IA.
+
+O contexto que vai para o LLM (totais mensais, maiores desvios, provisões
+pendentes, remanejamentos) é montado UMA vez por versão dos dados e
+reutilizado por todas as personas do AI Board, por `gerar_analise_ia` e pelos
+chats das páginas.
+
+Versão dos dados = hash de agregados baratos (contagem, maior id, últimas
+datas, soma por status) de lancamentos_realizados, provisoes e remanejamentos,
+mais a data de modificação do orçamento de referência. Mudou qualquer um, o
+snapshot é refeito; a verificação da versão é feita no máximo a cada
+INTERVALO_VERIFICACAO_S segundos.
+
+O texto passa pelo compactador de prompt (services/compactador_prompt.py):
+totais primeiro, depois desvios, provisões e remanejamentos até o orçamento
+de ORCAMENTO_TOKENS.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+import pandas as pd
+from sqlalchemy import func
+
+from database.models import LancamentoRealizado, Provisao, Remanejamento, get_session
+from services.compactador_prompt import Secao, ResultadoCompactacao, compactar, linhas_tabela, numero_compacto
+from data.referencias_manager import REFERENCIAS_DIR, MESES_ORDEM
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Mudar ao alterar o conteúdo/formato do snapshot
+VERSAO_FORMATO = 'v2'
+
+ANO_PADRAO = 2026
+N_DESVIOS = 15
+N_PROVISOES = 10
+ORCAMENTO_TOKENS = 1200
+INTERVALO_VERIFICACAO_S = 30.0
+
+ARQUIVO_ORCAMENTO = REFERENCIAS_DIR / "orcamento_v1_2026.xlsx"
+
+AVISO_SEM_REALIZADO = (
+    "[SISTEMA NOTICE]: O Total Realizado é exatamente 0.00. Isso indica ALTA PROBABILIDADE de que "
+    "os dados financeiros deste mês ainda NÃO foram carregados no sistema (Upload Pendente). NÃO "
+    "assuma que a execução foi zero por incompetência ou falha de gestão. Informe ao usuário que os "
+    "dados de realizado parecem estar pendentes de carga."
+)
+
+
+# =============================================================================
+# SNAPSHOT
+# =============================================================================
+
+class SnapshotFinanceiro:
+    """
+    Resumo financeiro de um ano em uma versão dos dados.
+
+    Atributos:
+        versao: Versão dos dados usada na montagem
+        totais_mensais: mes, orcado, realizado, provisionado, desvio
+        top_desvios: centros com maior desvio absoluto
+        provisoes_pendentes: provisões PENDENTE por centro
+        remanejamentos: quantidade e valor por status
+        compactacao: Resultado da compactação (tokens, linhas omitidas)
+        texto: Contexto pronto para o prompt
+    """
+
+    def __init__(self, ano: int, versao: str, totais_mensais: pd.DataFrame, top_desvios: pd.DataFrame,
+                 provisoes_pendentes: pd.DataFrame, remanejamentos: pd.DataFrame):
+        self.ano = ano
+        self.versao = versao
+        self.gerado_em = datetime.now()
+        self.totais_mensais = totais_mensais
+        self.top_desvios = top_desvios
+        self.provisoes_pendentes = provisoes_pendentes
+        self.remanejamentos = remanejamentos
+        self.compactacao = formatar_snapshot(self)
+        self.texto = self.compactacao.texto
+
+    @property
+    def totais(self) -> Dict[str, float]:
+        df = self.totais_mensais
+        if df.empty:
+            return {'orcado': 0.0, 'realizado': 0.0, 'provisionado': 0.0, 'desvio': 0.0}
+        return {col: float(df[col].sum()) for col in ['orcado', 'realizado', 'provisionado', 'desvio']}
+
+
+def _secao(titulo: str, df: pd.DataFrame) -> Secao:
+    linhas = linhas_tabela(df)
+    return Secao(titulo, linhas[1:], cabecalho=linhas[0])
+
+
+def formatar_snapshot(snapshot: SnapshotFinanceiro,
+                      orcamento_tokens: int = ORCAMENTO_TOKENS) -> ResultadoCompactacao:
+    """Texto do snapshot para o prompt, compactado no orçamento de tokens."""
+    totais = snapshot.totais
+    cabecalho = (f"Resumo {snapshot.ano} (valores em R$ compactos: mil/mi/bi; custos negativos)"
+                 f" - dados versão {snapshot.versao}")
+
+    secoes = []
+    if snapshot.totais_mensais.empty:
+        cabecalho += "\nDados financeiros não disponíveis."
+    else:
+        cabecalho += "\nTotais do ano: " + " | ".join(
+            f"{col} {numero_compacto(valor)}" for col, valor in totais.items()
+        )
+        secoes.append(_secao("Totais mensais:", snapshot.totais_mensais))
+
+    if not snapshot.top_desvios.empty:
+        secoes.append(_secao("Maiores desvios por centro:", snapshot.top_desvios))
+    if not snapshot.provisoes_pendentes.empty:
+        secoes.append(_secao("Provisões pendentes (maiores centros):", snapshot.provisoes_pendentes))
+    if not snapshot.remanejamentos.empty:
+        secoes.append(_secao("Remanejamentos por status:", snapshot.remanejamentos))
+
+    # Smart Diagnostics: Detecta falta de carga de dados (aviso sempre incluído)
+    rodape = ""
+    if totais['realizado'] == 0 and totais['orcado'] != 0:
+        rodape = AVISO_SEM_REALIZADO
+
+    return compactar(secoes, orcamento_tokens, cabecalho=cabecalho, rodape=rodape)
+
+
+def montar_snapshot(ano: int, versao: str, df_mensal: pd.DataFrame, df_centros: pd.DataFrame,
+                    df_provisoes: pd.DataFrame, df_remanejamentos: pd.DataFrame,
+                    n_desvios: int = N_DESVIOS, n_provisoes: int = N_PROVISOES) -> SnapshotFinanceiro:
+    """
+    Reduz os dados completos ao snapshot compacto.
+
+    Args:
+        ano: Ano de referência
+        versao: Versão dos dados
+        df_mensal: Saída de get_comparativo_mensal
+        df_centros: Saída de get_comparativo_por_centro
+        df_provisoes: Provisões PENDENTE (listar_provisoes)
+        df_remanejamentos: Remanejamentos (listar_remanejamentos)
+        n_desvios: Quantidade de centros com maior desvio
+        n_provisoes: Quantidade de centros com mais provisões pendentes
+
+    Returns:
+        SnapshotFinanceiro
+    """
+    mensal = pd.DataFrame(columns=['mes', 'orcado', 'realizado', 'provisionado', 'desvio'])
+    if not df_mensal.empty:
+        valores = ['orcado', 'realizado', 'provisionado', 'desvio']
+        mensal = df_mensal.loc[df_mensal['mes'].isin(MESES_ORDEM), ['mes'] + valores].reset_index(drop=True)
+        mensal[valores] = mensal[valores].astype(float)
+
+    desvios = pd.DataFrame()
+    if not df_centros.empty:
+        desvios = df_centros.assign(desvio_abs=df_centros['desvio'].astype(float).abs())
+        desvios = desvios.sort_values('desvio_abs', ascending=False).head(n_desvios)
+        valores = ['orcado', 'total_executado', 'desvio', 'desvio_pct']
+        desvios = desvios[['centro_gasto_codigo', 'ativo'] + valores].reset_index(drop=True)
+        desvios[valores] = desvios[valores].astype(float)
+
+    provisoes = pd.DataFrame()
+    if not df_provisoes.empty:
+        provisoes = (df_provisoes.groupby('centro_gasto_codigo')['valor_estimado']
+                     .agg(valor='sum', qtd='count').reset_index())
+        provisoes = provisoes.sort_values('valor', key=abs, ascending=False).head(n_provisoes)
+        provisoes = provisoes.reset_index(drop=True)
+
+    remanejamentos = pd.DataFrame()
+    if not df_remanejamentos.empty:
+        remanejamentos = (df_remanejamentos.groupby('status')['valor']
+                          .agg(valor='sum', qtd='count').reset_index())
+
+    return SnapshotFinanceiro(ano, versao, mensal, desvios, provisoes, remanejamentos)
+
+
+# =============================================================================
+# VERSÃO DOS DADOS
+# =============================================================================
+
+def versao_dados(ano: int = ANO_PADRAO) -> str:
+    """
+    Impressão digital barata dos dados que entram no snapshot.
+
+    Returns:
+        Hash hexadecimal (12 caracteres)
+    """
+    session = get_session()
+    try:
+        partes = [VERSAO_FORMATO, ano]
+        partes.append(session.query(
+            func.count(LancamentoRealizado.id), func.max(LancamentoRealizado.id),
+            func.max(LancamentoRealizado.data_atualizacao), func.sum(LancamentoRealizado.valor)
+        ).filter(LancamentoRealizado.ano == ano).one())
+        partes.append(session.query(
+            Provisao.status, func.count(Provisao.id), func.max(Provisao.id),
+            func.max(Provisao.data_atualizacao), func.sum(Provisao.valor_estimado)
+        ).group_by(Provisao.status).order_by(Provisao.status).all())
+        partes.append(session.query(
+            Remanejamento.status, func.count(Remanejamento.id), func.max(Remanejamento.id),
+            func.max(Remanejamento.data_aprovacao), func.sum(Remanejamento.valor)
+        ).group_by(Remanejamento.status).order_by(Remanejamento.status).all())
+    finally:
+        session.close()
+
+    if ARQUIVO_ORCAMENTO.exists():
+        partes.append(ARQUIVO_ORCAMENTO.stat().st_mtime_ns)
+
+    return hashlib.blake2b(repr(partes).encode(), digest_size=6).hexdigest()
+
+
+def construir_snapshot(ano: int = ANO_PADRAO, versao: str = None) -> SnapshotFinanceiro:
+    """Lê os dados do ano (comparador, provisões, remanejamentos) e monta o snapshot."""
+    from data.comparador import get_comparativo_mensal, get_comparativo_por_centro
+    from services.provisioning_service import ProvisioningService
+    from services.budget_control import BudgetControlService
+
+    versao = versao or versao_dados(ano)
+    return montar_snapshot(
+        ano, versao,
+        get_comparativo_mensal(ano),
+        get_comparativo_por_centro(None, ano),
+        pd.DataFrame(ProvisioningService().listar_provisoes(status='PENDENTE')),
+        pd.DataFrame(BudgetControlService().listar_remanejamentos()),
+    )
+
+
+# =============================================================================
+# CACHE DO PROCESSO
+# =============================================================================
+
+_snapshots: Dict[int, SnapshotFinanceiro] = {}
+_verificado_em: Dict[int, float] = {}
+_lock = threading.Lock()
+_contadores = {'construcoes': 0, 'reusos': 0}
+
+
+def get_snapshot(ano: int = ANO_PADRAO, forcar: bool = False) -> SnapshotFinanceiro:
+    """
+    Snapshot do ano, reaproveitado enquanto a versão dos dados não mudar.
+
+    Compartilhado por todas as sessões do processo. O lock serializa a
+    montagem: personas consultadas em paralelo esperam a mesma construção.
+
+    Args:
+        ano: Ano de referência
+        forcar: Refaz o snapshot mesmo sem mudança de versão
+    """
+    with _lock:
+        atual = _snapshots.get(ano)
+        agora = time.monotonic()
+        if atual is not None and not forcar:
+            if agora - _verificado_em.get(ano, 0.0) < INTERVALO_VERIFICACAO_S:
+                _contadores['reusos'] += 1
+                return atual
+            versao = versao_dados(ano)
+            _verificado_em[ano] = agora
+            if versao == atual.versao:
+                _contadores['reusos'] += 1
+                return atual
+        else:
+            versao = versao_dados(ano)
+
+        snapshot = construir_snapshot(ano, versao)
+        _snapshots[ano] = snapshot
+        _verificado_em[ano] = agora
+        _contadores['construcoes'] += 1
+        return snapshot
+
+
+def versao_atual(ano: int = ANO_PADRAO) -> str:
+    """
+    Versão dos dados sem consultar o banco a cada chamada.
+
+    Usa a versão do snapshot em cache se verificada há menos de
+    INTERVALO_VERIFICACAO_S; senão recalcula versao_dados.
+    """
+    with _lock:
+        atual = _snapshots.get(ano)
+        if atual is not None and time.monotonic() - _verificado_em.get(ano, 0.0) < INTERVALO_VERIFICACAO_S:
+            return atual.versao
+    return versao_dados(ano)
+
+
+def contexto_para_prompt(ano: int = ANO_PADRAO) -> str:
+    """Texto do snapshot atual (mensagem de erro se os dados não puderem ser lidos)."""
+    try:
+        return get_snapshot(ano).texto
+    except Exception as e:
+        print(f"Erro ao montar contexto financeiro: {e}")
+        return f"Erro ao ler dados: {str(e)}"
+
+
+def invalidar_snapshots() -> None:
+    """Descarta os snapshots (próxima chamada reconstrói)."""
+    with _lock:
+        _snapshots.clear()
+        _verificado_em.clear()
+
+
+def estatisticas_snapshot() -> Dict:
+    """Contadores de construção/reuso e versões em cache."""
+    with _lock:
+        return dict(_contadores, versoes={ano: s.versao for ano, s in _snapshots.items()})
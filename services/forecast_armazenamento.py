@@ -0,0 +1,114 @@
+"""
+services/forecast_armazenamento.py
+==================================
+Armazenamento colunar dos cenários de forecast.
+
+Um cenário é gravado como um único blob NPZ comprimido (uma linha em
+forecast_cenario_dados) em vez de uma linha ORM por mês × centro × conta:
+
+- colunas de texto (mes, centro, conta, método) em dicionário:
+  códigos int32 + categorias distintas
+- valor_previsto como float64
+
+Carregar ou comparar cenários vira operação vetorizada sobre arrays.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+FORMATO_LINHAS = 'linhas'  # Legado: uma linha em forecast_entries por entrada
+FORMATO_NPZ = 'npz'
+
+COLUNAS_TEXTO = ['mes', 'centro_gasto_codigo', 'conta_contabil_codigo', 'metodo_calculo']
+COLUNA_VALOR = 'valor_previsto'
+COLUNAS_CENARIO = COLUNAS_TEXTO + [COLUNA_VALOR]
+
+# Chave de uma entrada (para comparação entre cenários)
+CHAVE_ENTRADA = ['mes', 'centro_gasto_codigo', 'conta_contabil_codigo']
+
+
+# =============================================================================
+# SERIALIZAÇÃO
+# =============================================================================
+
+def serializar_cenario(df: pd.DataFrame) -> bytes:
+    """
+    Serializa as entradas de um cenário em NPZ comprimido (sem pickle).
+
+    Args:
+        df: DataFrame com COLUNAS_CENARIO (metodo_calculo é opcional)
+
+    Returns:
+        Bytes do NPZ
+    """
+    arrays = {}
+    for col in COLUNAS_TEXTO:
+        valores = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        codigos, categorias = pd.factorize(valores.astype('string'), use_na_sentinel=True)
+        arrays[f"{col}_codigos"] = codigos.astype(np.int32)
+        arrays[f"{col}_categorias"] = np.asarray(categorias, dtype=str)
+    arrays[COLUNA_VALOR] = df[COLUNA_VALOR].to_numpy(dtype=np.float64)
+
+    saida = BytesIO()
+    np.savez_compressed(saida, **arrays)
+    return saida.getvalue()
+
+
+def desserializar_cenario(dados: bytes) -> pd.DataFrame:
+    """
+    Reconstrói as entradas gravadas por serializar_cenario.
+
+    Returns:
+        DataFrame com COLUNAS_CENARIO (texto como category)
+    """
+    with np.load(BytesIO(dados), allow_pickle=False) as npz:
+        colunas = {
+            col: pd.Categorical.from_codes(npz[f"{col}_codigos"], categories=npz[f"{col}_categorias"])
+            for col in COLUNAS_TEXTO
+        }
+        colunas[COLUNA_VALOR] = npz[COLUNA_VALOR]
+    return pd.DataFrame(colunas, columns=COLUNAS_CENARIO)
+
+
+# =============================================================================
+# COMPARAÇÃO
+# =============================================================================
+
+def comparar_frames(df_a: pd.DataFrame, df_b: pd.DataFrame, chaves: list = None) -> pd.DataFrame:
+    """
+    Diferença entre dois cenários entrada a entrada (B - A).
+
+    Entradas presentes em só um dos cenários valem 0 no outro.
+
+    Args:
+        df_a: Entradas do cenário A (COLUNAS_CENARIO)
+        df_b: Entradas do cenário B
+        chaves: Colunas de agregação (padrão: mes × centro × conta)
+
+    Returns:
+        DataFrame com chaves, valor_a, valor_b, diferenca e variacao_pct
+    """
+    chaves = chaves or CHAVE_ENTRADA
+    a = df_a.groupby(chaves, observed=True)[COLUNA_VALOR].sum().rename('valor_a')
+    b = df_b.groupby(chaves, observed=True)[COLUNA_VALOR].sum().rename('valor_b')
+    if isinstance(a.index, pd.MultiIndex):
+        a.index = a.index.set_levels([lvl.astype(str) for lvl in a.index.levels])
+        b.index = b.index.set_levels([lvl.astype(str) for lvl in b.index.levels])
+    else:
+        a.index, b.index = a.index.astype(str), b.index.astype(str)
+
+    df = pd.concat([a, b], axis=1).fillna(0.0)
+    df['diferenca'] = df['valor_b'] - df['valor_a']
+    df['variacao_pct'] = np.where(
+        df['valor_a'] != 0, df['diferenca'] / df['valor_a'].abs() * 100, np.nan
+    )
+    return df.reset_index()
@@ -0,0 +1,260 @@
+"""
+services/forecast_cache.py
+==========================
+Cache de resultados de forecast por impressão digital da série.
+
+Chave = hash (blake2b) dos valores da série + método + parâmetros. A mesma
+série com o mesmo método devolve o resultado já calculado, entre reruns e
+entre usuários (o cache é do processo do servidor).
+
+Dois níveis:
+- memória: LRU limitado por número de itens
+- disco (opcional): SQLite em data/cache, sobrevive a reinícios do servidor
+
+Contadores de acertos/faltas em CacheForecast.estatisticas().
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+MAX_ITENS_MEMORIA = 50_000
+
+# Nível em disco: ativado por FORECAST_CACHE_DISCO=1 (ou caminho explícito)
+DIRETORIO_CACHE = Path(__file__).resolve().parent.parent / "data" / "cache"
+ARQUIVO_DISCO = DIRETORIO_CACHE / "forecast_cache.db"
+
+# Versão do formato das chaves: mudar ao alterar a matemática dos métodos
+VERSAO_CHAVE = 'v1'
+
+
+# =============================================================================
+# CHAVES
+# =============================================================================
+
+def chave_forecast(valores: np.ndarray, metodo: str, **params) -> str:
+    """
+    Impressão digital de uma série (ou matriz) + método + parâmetros.
+
+    Args:
+        valores: Array com o histórico (NaN = sem dado)
+        metodo: Nome do método
+        **params: Parâmetros que alteram o resultado (periods, alpha, ...)
+
+    Returns:
+        Hash hexadecimal (32 caracteres)
+    """
+    valores = np.ascontiguousarray(valores, dtype=np.float64)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{VERSAO_CHAVE}|{metodo}|{sorted(params.items())}|{valores.shape}".encode())
+    h.update(valores.tobytes())
+    return h.hexdigest()
+
+
+def chaves_por_linha(matriz: np.ndarray, metodo: str, **params) -> List[str]:
+    """Uma chave por linha da matriz [S, T] (mesmos método e parâmetros)."""
+    matriz = np.ascontiguousarray(np.atleast_2d(matriz), dtype=np.float64)
+    prefixo = f"{VERSAO_CHAVE}|{metodo}|{sorted(params.items())}|{matriz.shape[1]}".encode()
+    chaves = []
+    for linha in matriz:
+        h = hashlib.blake2b(prefixo, digest_size=16)
+        h.update(linha.tobytes())
+        chaves.append(h.hexdigest())
+    return chaves
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+def _serializar(arrays: Dict[str, np.ndarray]) -> bytes:
+    saida = BytesIO()
+    np.savez(saida, **arrays)
+    return saida.getvalue()
+
+
+def _desserializar(dados: bytes) -> Dict[str, np.ndarray]:
+    with np.load(BytesIO(dados), allow_pickle=False) as npz:
+        return {nome: npz[nome] for nome in npz.files}
+
+
+class CacheForecast:
+    """
+    LRU em memória com nível opcional em disco (SQLite).
+
+    Os valores são dicts de arrays NumPy; quem lê recebe os próprios arrays
+    guardados e não deve alterá-los.
+    """
+
+    def __init__(self, max_itens: int = MAX_ITENS_MEMORIA, arquivo_disco: Optional[Path] = None):
+        self.max_itens = max_itens
+        self.arquivo_disco = Path(arquivo_disco) if arquivo_disco else None
+        self._itens: 'OrderedDict[str, Dict[str, np.ndarray]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._zerar_contadores()
+
+        if self.arquivo_disco:
+            self.arquivo_disco.parent.mkdir(parents=True, exist_ok=True)
+            with self._conectar() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS forecast_cache (chave TEXT PRIMARY KEY, dados BLOB)")
+
+    def _zerar_contadores(self) -> None:
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.arquivo_disco, timeout=5)
+
+    # -------------------------------------------------------------------------
+    # LEITURA / ESCRITA
+    # -------------------------------------------------------------------------
+
+    def obter_varios(self, chaves: Sequence[str]) -> List[Optional[Dict[str, np.ndarray]]]:
+        """Valores das chaves (None = falta), consultando memória e depois disco."""
+        resultado: List[Optional[Dict[str, np.ndarray]]] = [None] * len(chaves)
+        faltando = []
+        with self._lock:
+            for i, chave in enumerate(chaves):
+                valor = self._itens.get(chave)
+                if valor is not None:
+                    self._itens.move_to_end(chave)
+                    self.hits_memoria += 1
+                    resultado[i] = valor
+                else:
+                    faltando.append(i)
+
+        if faltando and self.arquivo_disco:
+            do_disco = self._ler_disco([chaves[i] for i in faltando])
+            ainda_faltando = []
+            for i in faltando:
+                dados = do_disco.get(chaves[i])
+                if dados is None:
+                    ainda_faltando.append(i)
+                    continue
+                resultado[i] = _desserializar(dados)
+            with self._lock:
+                self.hits_disco += len(faltando) - len(ainda_faltando)
+            self._guardar_memoria({chaves[i]: resultado[i] for i in faltando if resultado[i] is not None})
+            faltando = ainda_faltando
+
+        with self._lock:
+            self.misses += len(faltando)
+        return resultado
+
+    def obter(self, chave: str) -> Optional[Dict[str, np.ndarray]]:
+        """Valor de uma chave (None = falta)."""
+        return self.obter_varios([chave])[0]
+
+    def guardar_varios(self, itens: Dict[str, Dict[str, np.ndarray]]) -> None:
+        """Grava vários valores (memória e, se ativo, disco)."""
+        if not itens:
+            return
+        self._guardar_memoria(itens)
+        if self.arquivo_disco:
+            try:
+                with self._conectar() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO forecast_cache (chave, dados) VALUES (?, ?)",
+                        [(chave, _serializar(valor)) for chave, valor in itens.items()]
+                    )
+            except sqlite3.Error as e:
+                print(f"Erro ao gravar cache de forecast em disco: {e}")
+
+    def guardar(self, chave: str, valor: Dict[str, np.ndarray]) -> None:
+        """Grava um valor."""
+        self.guardar_varios({chave: valor})
+
+    def _guardar_memoria(self, itens: Dict[str, Dict[str, np.ndarray]]) -> None:
+        with self._lock:
+            for chave, valor in itens.items():
+                self._itens[chave] = valor
+                self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.evictions += 1
+
+    def _ler_disco(self, chaves: List[str]) -> Dict[str, bytes]:
+        encontrados = {}
+        try:
+            with self._conectar() as conn:
+                # Limite de variáveis do SQLite: consultas em blocos
+                for inicio in range(0, len(chaves), 500):
+                    bloco = chaves[inicio:inicio + 500]
+                    marcadores = ','.join('?' * len(bloco))
+                    linhas = conn.execute(
+                        f"SELECT chave, dados FROM forecast_cache WHERE chave IN ({marcadores})", bloco
+                    ).fetchall()
+                    encontrados.update(linhas)
+        except sqlite3.Error as e:
+            print(f"Erro ao ler cache de forecast em disco: {e}")
+        return encontrados
+
+    # -------------------------------------------------------------------------
+    # MANUTENÇÃO
+    # -------------------------------------------------------------------------
+
+    def limpar(self, disco: bool = True) -> None:
+        """Esvazia o cache (e o nível em disco, se pedido) e zera os contadores."""
+        with self._lock:
+            self._itens.clear()
+            self._zerar_contadores()
+        if disco and self.arquivo_disco:
+            with self._conectar() as conn:
+                conn.execute("DELETE FROM forecast_cache")
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Contadores de acertos/faltas e ocupação."""
+        with self._lock:
+            consultas = self.hits_memoria + self.hits_disco + self.misses
+            return {
+                'hits_memoria': self.hits_memoria,
+                'hits_disco': self.hits_disco,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'itens_memoria': len(self._itens),
+                'max_itens': self.max_itens,
+                'taxa_acerto': (self.hits_memoria + self.hits_disco) / consultas if consultas else 0.0,
+                'disco': str(self.arquivo_disco) if self.arquivo_disco else None,
+            }
+
+
+# =============================================================================
+# INSTÂNCIA DO PROCESSO
+# =============================================================================
+
+_cache_global: Optional[CacheForecast] = None
+_lock_global = threading.Lock()
+
+
+def get_cache_forecast() -> CacheForecast:
+    """
+    Cache compartilhado pelo processo (todas as sessões do Streamlit).
+
+    O nível em disco é ativado com a variável de ambiente FORECAST_CACHE_DISCO
+    ('1' = data/cache/forecast_cache.db, ou um caminho de arquivo).
+    """
+    global _cache_global
+    with _lock_global:
+        if _cache_global is None:
+            disco = os.getenv("FORECAST_CACHE_DISCO", "").strip()
+            arquivo = None
+            if disco and disco.lower() not in ('0', 'false', 'nao', 'não'):
+                arquivo = ARQUIVO_DISCO if disco == '1' else Path(disco)
+            _cache_global = CacheForecast(arquivo_disco=arquivo)
+        return _cache_global
@@ -0,0 +1,478 @@
+"""
+services/forecast_engine.py
+===========================
+Motor de forecasting em lote: uma matriz (séries × meses) de uma só vez.
+
+Reproduz os métodos do `SimpleForecaster` (utils_financeiro) com operações
+NumPy fechadas sobre todas as séries simultaneamente, sem sklearn, sem
+cópia/ordenação por série e sem laços em Python por ponto:
+
+- linear:   MQO fechado (somas de t, y, t², ty) com banda ±z·σ(resíduos)
+- sma:      média dos últimos `window_size` pontos, banda ±z·σ(série)
+- ema:      EMA recursiva expressa como pesos α(1-α)^k, banda ±z·σ(série)
+- seasonal: sazonal ingênuo (mesmo mês do último ciclo), banda ±z·σ(y_t - y_{t-12})
+- hybrid:   MQO de tendência + dummies sazonais (índice centrado por posição
+            do ciclo), ciclo = min(12, n // 2) como no SimpleForecaster
+
+Valores ausentes (NaN) são permitidos: cada série usa apenas seus pontos
+válidos, mantendo o eixo de tempo do calendário (colunas da matriz).
+
+Com um CacheForecast (services/forecast_cache.py), o predict só calcula as
+séries cuja impressão digital (valores + método + parâmetros) ainda não
+está no cache.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.forecast_cache import chaves_por_linha
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+METODOS_LOTE = ['linear', 'sma', 'ema', 'seasonal', 'hybrid']
+
+# Quantil normal da banda de confiança (mesmo do SimpleForecaster)
+Z_CONFIANCA = 1.96
+
+# Período sazonal máximo (meses)
+PERIODO_SAZONAL = 12
+
+
+# =============================================================================
+# PREPARAÇÃO DOS DADOS
+# =============================================================================
+
+def montar_matriz_series(df: pd.DataFrame,
+                         chaves: List[str],
+                         date_col: str = 'data_ref',
+                         value_col: str = 'valor') -> Tuple[np.ndarray, pd.DataFrame, pd.DatetimeIndex]:
+    """
+    Converte um histórico em formato longo para a matriz séries × meses.
+
+    Args:
+        df: DataFrame com as chaves da série, data e valor
+        chaves: Colunas que identificam a série (ex: ['conta_contabil_codigo'])
+        date_col: Coluna de data (qualquer dia do mês)
+        value_col: Coluna de valor
+
+    Returns:
+        Tuple (matriz float [S, T] com NaN onde não há dado,
+               DataFrame com as chaves de cada série (linha i = série i),
+               DatetimeIndex mensal das colunas)
+    """
+    if df.empty:
+        return np.zeros((0, 0)), pd.DataFrame(columns=chaves), pd.DatetimeIndex([])
+
+    datas = pd.to_datetime(df[date_col]).dt.to_period('M').dt.to_timestamp()
+    inicio, fim = datas.min(), datas.max()
+    calendario = pd.date_range(inicio, fim, freq='MS')
+
+    col_idx = ((datas.dt.year - inicio.year) * 12 + (datas.dt.month - inicio.month)).to_numpy()
+    serie_idx, series = pd.MultiIndex.from_frame(df[chaves].astype(object)).factorize()
+
+    matriz = np.full((len(series), len(calendario)), np.nan)
+    valores = pd.to_numeric(df[value_col], errors='coerce').to_numpy(dtype=float)
+
+    # Mesmo mês repetido na série: soma (como um groupby mensal)
+    soma = np.zeros_like(matriz)
+    np.add.at(soma, (serie_idx, col_idx), np.nan_to_num(valores))
+    tem_dado = np.zeros(matriz.shape, dtype=bool)
+    tem_dado[serie_idx, col_idx] = True
+    matriz[tem_dado] = soma[tem_dado]
+
+    df_chaves = pd.DataFrame(list(series), columns=chaves)
+    return matriz, df_chaves, calendario
+
+
+# =============================================================================
+# MOTOR EM LOTE
+# =============================================================================
+
+class BatchForecaster:
+    """
+    Forecaster vetorizado sobre uma matriz de séries (S × T).
+
+    Uso:
+        bf = BatchForecaster(window_size=3, alpha=0.3)
+        bf.fit(matriz, datas, method='hybrid')
+        previsao, inferior, superior = bf.predict(periods=12)
+
+    Com cache=get_cache_forecast(), séries já previstas com os mesmos
+    valores, método e parâmetros não são recalculadas.
+    """
+
+    def __init__(self, window_size: int = 3, alpha: float = 0.3, z: float = Z_CONFIANCA, cache=None):
+        self.window_size = window_size
+        self.alpha = alpha
+        self.z = z
+        self.cache = cache
+        self.method = None
+        self.values = None
+        self.mask = None
+        self.dates = None
+
+    def fit(self, matriz: np.ndarray, datas: Sequence = None, method: str = 'hybrid') -> 'BatchForecaster':
+        """
+        Registra a matriz de histórico.
+
+        Args:
+            matriz: Array [S, T] (NaN = sem dado)
+            datas: Datas mensais das T colunas (opcional, usado no predict_frame)
+            method: 'linear', 'sma', 'ema', 'seasonal' ou 'hybrid'
+        """
+        if method not in METODOS_LOTE:
+            raise ValueError(f"Método inválido: {method}. Use um de {METODOS_LOTE}")
+
+        matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+        self.method = method
+        self.mask = ~np.isnan(matriz)
+        self.values = np.where(self.mask, matriz, 0.0)
+        self.dates = pd.DatetimeIndex(datas) if datas is not None else None
+        return self
+
+    # -------------------------------------------------------------------------
+    # ESTATÍSTICAS BÁSICAS
+    # -------------------------------------------------------------------------
+
+    @property
+    def n_obs(self) -> np.ndarray:
+        """Número de pontos válidos por série."""
+        return self.mask.sum(axis=1)
+
+    def ultima_coluna(self) -> np.ndarray:
+        """Índice da última coluna com dado por série (-1 se a série está vazia)."""
+        T = self.mask.shape[1]
+        ultima = T - 1 - np.argmax(self.mask[:, ::-1], axis=1)
+        return np.where(self.mask.any(axis=1), ultima, -1)
+
+    def _std_valores(self) -> np.ndarray:
+        """Desvio padrão populacional (np.std) dos pontos válidos."""
+        n = np.maximum(self.n_obs, 1)
+        media = self.values.sum(axis=1) / n
+        desvio = np.where(self.mask, self.values - media[:, None], 0.0)
+        return np.sqrt((desvio ** 2).sum(axis=1) / n)
+
+    def _posicao_do_fim(self) -> np.ndarray:
+        """Para cada ponto válido: 1 = último ponto, 2 = penúltimo, ... (0 = inválido)."""
+        contagem_reversa = np.cumsum(self.mask[:, ::-1], axis=1)[:, ::-1]
+        return np.where(self.mask, contagem_reversa, 0)
+
+    def _mqo(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        MQO fechado y = a + b·t para todas as séries.
+
+        Returns:
+            Tuple (intercepto, inclinação, tempo t usado [T])
+        """
+        t = np.arange(self.values.shape[1], dtype=float)
+        m = self.mask.astype(float)
+        n = m.sum(axis=1)
+        st = m @ t
+        stt = m @ (t ** 2)
+        sy = self.values.sum(axis=1)
+        sty = self.values @ t
+
+        denominador = n * stt - st ** 2
+        com_tendencia = denominador > 0
+        b = np.divide(n * sty - st * sy, denominador, out=np.zeros_like(sy), where=com_tendencia)
+        a = np.divide(sy - b * st, n, out=np.zeros_like(sy), where=n > 0)
+        return a, b, t
+
+    def _compactar(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reposiciona os pontos válidos de cada série em 0..n-1 (como o
+        SimpleForecaster, que ignora meses ausentes ao ajustar).
+
+        Returns:
+            Tuple (valores compactados [S, T] alinhados à esquerda, máscara)
+        """
+        ordem = np.argsort(~self.mask, axis=1, kind='stable')
+        valores = np.take_along_axis(self.values, ordem, axis=1)
+        mascara = np.take_along_axis(self.mask, ordem, axis=1)
+        return np.where(mascara, valores, 0.0), mascara
+
+    # -------------------------------------------------------------------------
+    # MÉTODOS
+    # -------------------------------------------------------------------------
+
+    def _linear_trend(self, periods: int):
+        valores_originais, mascara_original = self.values, self.mask
+        self.values, self.mask = self._compactar()
+        try:
+            a, b, t = self._mqo()
+            n = self.n_obs
+            futuro = n[:, None] + np.arange(periods)[None, :]
+            previsao = a[:, None] + b[:, None] * futuro
+
+            ajustado = a[:, None] + b[:, None] * t[None, :]
+            residuos = np.where(self.mask, self.values - ajustado, 0.0)
+            std_res = np.sqrt((residuos ** 2).sum(axis=1) / np.maximum(n, 1))
+        finally:
+            self.values, self.mask = valores_originais, mascara_original
+
+        return previsao, std_res
+
+    def _sma(self, periods: int):
+        janela = (self._posicao_do_fim() >= 1) & (self._posicao_do_fim() <= self.window_size)
+        n_janela = np.maximum(janela.sum(axis=1), 1)
+        media = np.where(janela, self.values, 0.0).sum(axis=1) / n_janela
+        return np.repeat(media[:, None], periods, axis=1), self._std_valores()
+
+    def _ema(self, periods: int):
+        # ema_n = Σ α(1-α)^(r-1)·y_r  (r = posição a partir do fim)
+        #       + (1-α)^(n-1)·y_primeiro  (semente da recursão)
+        posicao = self._posicao_do_fim()
+        n = self.n_obs
+        pesos = np.where(self.mask, self.alpha * (1 - self.alpha) ** np.maximum(posicao - 1, 0), 0.0)
+        primeiro = self.mask & (posicao == n[:, None])
+        pesos = np.where(primeiro, (1 - self.alpha) ** np.maximum(n[:, None] - 1, 0), pesos)
+        ema = (pesos * self.values).sum(axis=1)
+        return np.repeat(ema[:, None], periods, axis=1), self._std_valores()
+
+    def _seasonal_naive(self, periods: int):
+        T = self.values.shape[1]
+        p = PERIODO_SAZONAL
+        previsao_linear, std_linear = self._linear_trend(periods)
+        if T < p:
+            return previsao_linear, std_linear
+
+        passos = np.arange(periods)
+        colunas_ref = T - p + (passos % p)
+        previsao = self.values[:, colunas_ref]
+        valido = self.mask[:, colunas_ref]
+        previsao = np.where(valido, previsao, previsao_linear)
+
+        # Banda: dispersão das diferenças sazonais y_t - y_{t-p}
+        pares = self.mask[:, p:] & self.mask[:, :-p]
+        diferencas = np.where(pares, self.values[:, p:] - self.values[:, :-p], 0.0)
+        n_pares = pares.sum(axis=1)
+        media = diferencas.sum(axis=1) / np.maximum(n_pares, 1)
+        desvio = np.where(pares, diferencas - media[:, None], 0.0)
+        std_sazonal = np.sqrt((desvio ** 2).sum(axis=1) / np.maximum(n_pares, 1))
+        std = np.where(n_pares > 0, std_sazonal, std_linear)
+        return previsao, std
+
+    def _hybrid(self, periods: int):
+        previsao, std = self._linear_trend(periods)
+        n = self.n_obs
+        periodo = np.minimum(PERIODO_SAZONAL, n // 2)
+
+        valores_originais, mascara_original = self.values, self.mask
+        self.values, self.mask = self._compactar()
+        try:
+            T = self.values.shape[1]
+            t = np.arange(T, dtype=float)
+
+            # Um grupo por tamanho de ciclo (no máximo 11 grupos). Com n >= 2p
+            # toda posição do ciclo tem ao menos 2 pontos, então o MQO com
+            # dummies sazonais (tendência "dentro" de cada posição) é definido.
+            for p in np.unique(periodo[periodo >= 2]):
+                linhas = np.flatnonzero(periodo == p)
+                y = self.values[linhas]
+                m = self.mask[linhas].astype(float)
+                posicao = np.arange(T) % p
+                # one_hot [T, p]: coluna -> posição no ciclo
+                one_hot = (posicao[:, None] == np.arange(p)[None, :]).astype(float)
+
+                contagem = m @ one_hot
+                media_t = ((m * t) @ one_hot) / contagem
+                media_y = (y @ one_hot) / contagem
+
+                t_c = np.where(self.mask[linhas], t[None, :] - media_t[:, posicao], 0.0)
+                y_c = np.where(self.mask[linhas], y - media_y[:, posicao], 0.0)
+                b = (t_c * y_c).sum(axis=1) / (t_c ** 2).sum(axis=1)
+
+                # Nível por posição, centrado: a + s_j, com Σ s_j = 0
+                nivel = media_y - b[:, None] * media_t
+                a = nivel.mean(axis=1)
+                indice = nivel - a[:, None]
+
+                futuro = n[linhas][:, None] + np.arange(periods)[None, :]
+                previsao[linhas] = (
+                    a[:, None] + b[:, None] * futuro
+                    + np.take_along_axis(indice, futuro % p, axis=1)
+                )
+
+                ajustado = a[:, None] + b[:, None] * t[None, :] + indice[:, posicao]
+                residuos = np.where(self.mask[linhas], y - ajustado, 0.0)
+                std[linhas] = np.sqrt((residuos ** 2).sum(axis=1) / n[linhas])
+        finally:
+            self.values, self.mask = valores_originais, mascara_original
+
+        return previsao, std
+
+    # -------------------------------------------------------------------------
+    # PREVISÃO
+    # -------------------------------------------------------------------------
+
+    def predict(self, periods: int = 12) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gera previsões para todas as séries.
+
+        Args:
+            periods: Número de períodos a prever
+
+        Returns:
+            Tuple (previsao, limite_inferior, limite_superior), cada um [S, periods]
+        """
+        if self.values is None:
+            raise ValueError("Chame fit() antes de predict()")
+        if self.cache is not None:
+            return self._predict_com_cache(periods)
+        return self._predict_calculado(periods)
+
+    def _predict_calculado(self, periods: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Previsão de todas as séries, sem cache."""
+        if self.method == 'linear':
+            previsao, std = self._linear_trend(periods)
+        elif self.method == 'sma':
+            previsao, std = self._sma(periods)
+        elif self.method == 'ema':
+            previsao, std = self._ema(periods)
+        elif self.method == 'seasonal':
+            previsao, std = self._seasonal_naive(periods)
+        else:  # hybrid
+            previsao, std = self._hybrid(periods)
+
+        banda = self.z * std[:, None]
+        return previsao, previsao - banda, previsao + banda
+
+    def _predict_com_cache(self, periods: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Busca cada série no cache e calcula só as faltantes (num único lote)."""
+        matriz = np.where(self.mask, self.values, np.nan)
+        # O sazonal usa a posição no calendário: o primeiro mês entra na chave
+        inicio = self.dates[0].to_period('M').ordinal if self.dates is not None and len(self.dates) else None
+        chaves = chaves_por_linha(
+            matriz, self.method, periods=periods, window_size=self.window_size,
+            alpha=self.alpha, z=self.z, inicio=inicio
+        )
+        encontrados = self.cache.obter_varios(chaves)
+
+        S = matriz.shape[0]
+        previsao, inferior, superior = np.zeros((S, periods)), np.zeros((S, periods)), np.zeros((S, periods))
+        faltantes = [i for i, valor in enumerate(encontrados) if valor is None]
+        for i, valor in enumerate(encontrados):
+            if valor is not None:
+                previsao[i], inferior[i], superior[i] = valor['previsao'], valor['inferior'], valor['superior']
+
+        if faltantes:
+            bf = BatchForecaster(self.window_size, self.alpha, self.z)
+            p, inf, sup = bf.fit(matriz[faltantes], self.dates, self.method)._predict_calculado(periods)
+            previsao[faltantes], inferior[faltantes], superior[faltantes] = p, inf, sup
+            self.cache.guardar_varios({
+                chaves[i]: {'previsao': p[k], 'inferior': inf[k], 'superior': sup[k]}
+                for k, i in enumerate(faltantes)
+            })
+        return previsao, inferior, superior
+
+    def predict_frame(self, periods: int = 12, chaves: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Previsões em formato longo, com as colunas do SimpleForecaster.predict.
+
+        Args:
+            periods: Número de períodos a prever
+            chaves: DataFrame com as chaves de cada série (linha i = série i)
+
+        Returns:
+            DataFrame com: [chaves...], data, previsao, limite_inferior, limite_superior
+        """
+        previsao, inferior, superior = self.predict(periods)
+        S = previsao.shape[0]
+
+        if self.dates is not None and len(self.dates):
+            # Como no SimpleForecaster: a previsão começa no mês seguinte ao
+            # último ponto válido de CADA série
+            ultima_coluna = self.ultima_coluna()
+            inicio = self.dates[0].to_period('M').ordinal
+            ordinais = inicio + ultima_coluna[:, None] + 1 + np.arange(periods)[None, :]
+            datas_futuras = pd.PeriodIndex.from_ordinals(ordinais.ravel(), freq='M').to_timestamp()
+        else:
+            inicio = pd.Timestamp.now().normalize().replace(day=1)
+            datas_futuras = np.tile(pd.date_range(start=inicio, periods=periods, freq='MS'), S)
+
+        df = pd.DataFrame({
+            'data': datas_futuras,
+            'previsao': previsao.ravel(),
+            'limite_inferior': inferior.ravel(),
+            'limite_superior': superior.ravel()
+        })
+        if chaves is not None:
+            repetidas = chaves.loc[chaves.index.repeat(periods)].reset_index(drop=True)
+            df = pd.concat([repetidas, df], axis=1)
+        else:
+            df.insert(0, 'serie', np.repeat(np.arange(S), periods))
+        return df
+
+
+# =============================================================================
+# SÉRIES ESPARSAS (ROTEAMENTO POR QUANTIDADE DE DADOS)
+# =============================================================================
+
+# Mínimo de pontos para usar o método pedido (abaixo disso: média simples)
+MIN_OBS_METODO = 3
+
+
+def prever_esparso(matriz: np.ndarray,
+                   datas: Sequence = None,
+                   method='hybrid',
+                   periods: int = 12,
+                   min_obs: int = MIN_OBS_METODO,
+                   cache=None,
+                   **params) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Previsão de muitas séries esparsas, roteando cada uma para o método mais
+    barato que faz sentido para ela.
+
+    - série vazia ou só com zeros: previsão 0 (sem ajuste)
+    - menos de `min_obs` pontos: média dos pontos existentes (sma)
+    - demais: `method`
+
+    Args:
+        matriz: Array [S, T] (NaN = sem dado)
+        datas: Datas mensais das T colunas
+        method: Método para as séries com histórico suficiente (str ou um por série [S])
+        periods: Horizonte
+        min_obs: Mínimo de pontos para usar `method`
+        cache: CacheForecast opcional (services/forecast_cache.py)
+        **params: window_size / alpha / z do BatchForecaster
+
+    Returns:
+        Tuple (previsao, limite_inferior, limite_superior [S, periods],
+               método usado por série: array de str com 'zero', 'sma' ou `method`)
+    """
+    matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+    S = matriz.shape[0]
+    previsao = np.zeros((S, periods))
+    inferior = np.zeros((S, periods))
+    superior = np.zeros((S, periods))
+    metodo_usado = np.full(S, 'zero', dtype=object)
+
+    n_obs = (~np.isnan(matriz)).sum(axis=1)
+    nao_nulo = np.nan_to_num(matriz) != 0
+    ativa = nao_nulo.any(axis=1)
+
+    curtas = np.flatnonzero(ativa & (n_obs < min_obs))
+    longas = np.flatnonzero(ativa & (n_obs >= min_obs))
+
+    # `method` pode ser um método por série (ex: o melhor no backtest)
+    metodos = np.broadcast_to(np.asarray(method, dtype=object), (S,))
+    grupos = [(curtas, 'sma', {**params, 'window_size': max(min_obs, 1)})]
+    for metodo in pd.unique(metodos[longas]):
+        grupos.append((longas[metodos[longas] == metodo], metodo, params))
+
+    for linhas, metodo, kwargs in grupos:
+        if len(linhas) == 0:
+            continue
+        bf = BatchForecaster(**kwargs, cache=cache).fit(matriz[linhas], datas, method=metodo)
+        p, inf, sup = bf.predict(periods)
+        previsao[linhas], inferior[linhas], superior[linhas] = p, inf, sup
+        metodo_usado[linhas] = metodo
+
+    return previsao, inferior, superior, metodo_usado
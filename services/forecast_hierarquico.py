@@ -0,0 +1,233 @@
+"""
+services/forecast_hierarquico.py
+================================
+Forecast no grão folha (centro de gasto × conta contábil) com reconciliação
+pela hierarquia de centros (pai / classe / ativo / base).
+
+Fluxo:
+1. Histórico longo -> matriz folhas × meses (mês sem lançamento dentro do
+   período de vida da folha = 0, para que a soma das folhas seja o agregado)
+2. Previsão em lote de todas as folhas (`prever_esparso`: folhas zeradas ou
+   curtas vão direto para fallbacks baratos)
+3. Reconciliação:
+   - bottom_up: os níveis superiores são a soma das folhas
+   - top_down:  prevê as séries agregadas de um nível (nível × conta) e
+                distribui para as folhas pela participação histórica
+   Em ambos os casos o resultado final é no grão folha, então todo nível
+   (pai, classe, ativo, base, total) soma exatamente.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.forecast_engine import montar_matriz_series, prever_esparso
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+CHAVE_FOLHA = ['centro_gasto_codigo', 'conta_contabil_codigo']
+
+# Níveis da hierarquia de centros (colunas de carregar_centros_gasto)
+NIVEIS_HIERARQUIA = ['codigo_pai', 'classe', 'ativo', 'base']
+
+RECONCILIACOES = ['bottom_up', 'top_down']
+
+# Rótulo para centros sem o atributo na base de referência
+SEM_NIVEL = 'N/D'
+
+# Janela (meses) usada para as participações do top-down
+JANELA_PARTICIPACAO = 12
+
+
+# =============================================================================
+# PREPARAÇÃO
+# =============================================================================
+
+def _preencher_vida_da_serie(matriz: np.ndarray) -> np.ndarray:
+    """Meses sem dado a partir do primeiro lançamento da série viram 0."""
+    observado = ~np.isnan(matriz)
+    vivo = np.cumsum(observado, axis=1) > 0
+    return np.where(vivo, np.nan_to_num(matriz), np.nan)
+
+
+def montar_folhas(df_historico: pd.DataFrame,
+                  date_col: str = 'data_ref',
+                  value_col: str = 'valor') -> Tuple[np.ndarray, pd.DataFrame, pd.DatetimeIndex]:
+    """
+    Matriz folhas (centro × conta) × meses no calendário comum.
+
+    Args:
+        df_historico: DataFrame com centro_gasto_codigo, conta_contabil_codigo, data e valor
+
+    Returns:
+        Tuple (matriz [F, T], chaves das folhas, calendário mensal)
+    """
+    df = df_historico.dropna(subset=[date_col] + CHAVE_FOLHA)
+    matriz, folhas, calendario = montar_matriz_series(df, CHAVE_FOLHA, date_col=date_col, value_col=value_col)
+    return _preencher_vida_da_serie(matriz), folhas, calendario
+
+
+def anexar_hierarquia(folhas: pd.DataFrame, df_centros: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Acrescenta codigo_pai / classe / ativo / base a cada folha.
+
+    Args:
+        folhas: DataFrame com centro_gasto_codigo
+        df_centros: Base de centros (opcional, padrão: carregar_centros_gasto)
+
+    Returns:
+        Cópia com as colunas de NIVEIS_HIERARQUIA (SEM_NIVEL quando ausente)
+    """
+    from data.referencias_manager import enriquecer_centros_lote
+
+    resultado = enriquecer_centros_lote(folhas, df_centros=df_centros, colunas=NIVEIS_HIERARQUIA)
+    for nivel in NIVEIS_HIERARQUIA:
+        if nivel not in resultado.columns:
+            resultado[nivel] = None
+
+    # Centro fora da base: pai e classe ainda saem do próprio código
+    codigos = resultado['centro_gasto_codigo']
+    resultado['codigo_pai'] = resultado['codigo_pai'].fillna(codigos.str[:8])
+    resultado['classe'] = resultado['classe'].fillna(codigos.str[8:9])
+
+    for nivel in NIVEIS_HIERARQUIA:
+        resultado[nivel] = resultado[nivel].fillna(SEM_NIVEL).replace('', SEM_NIVEL).astype(str)
+    return resultado.drop(columns=['centro_valido', 'erro_centro'])
+
+
+# =============================================================================
+# RECONCILIAÇÃO
+# =============================================================================
+
+def _agregar_linhas(matriz: np.ndarray, grupos: np.ndarray, n_grupos: int) -> np.ndarray:
+    """Soma as linhas de `matriz` por grupo (NaN = 0; grupo sem dado algum = NaN)."""
+    soma = np.zeros((n_grupos, matriz.shape[1]))
+    np.add.at(soma, grupos, np.nan_to_num(matriz))
+    observado = np.zeros((n_grupos, matriz.shape[1]), dtype=bool)
+    np.logical_or.at(observado, grupos, ~np.isnan(matriz))
+    return np.where(observado, soma, np.nan)
+
+
+def participacoes_historicas(matriz: np.ndarray,
+                             grupos: np.ndarray,
+                             n_grupos: int,
+                             janela: int = JANELA_PARTICIPACAO) -> np.ndarray:
+    """
+    Participação de cada folha no total do seu grupo (últimos `janela` meses).
+
+    Grupos com total zero dividem igualmente entre as folhas.
+
+    Args:
+        matriz: Histórico [F, T]
+        grupos: Índice do grupo de cada folha [F]
+        n_grupos: Quantidade de grupos
+
+    Returns:
+        Array [F] com participações (somam 1 em cada grupo)
+    """
+    recente = np.nan_to_num(matriz[:, -janela:]).sum(axis=1)
+    total_grupo = np.bincount(grupos, weights=recente, minlength=n_grupos)
+    n_folhas = np.bincount(grupos, minlength=n_grupos)
+
+    total = total_grupo[grupos]
+    igual = 1.0 / n_folhas[grupos]
+    return np.divide(recente, total, out=igual.copy(), where=total != 0)
+
+
+def prever_folhas(df_historico: pd.DataFrame,
+                  metodo: str = 'hybrid',
+                  periods: int = 12,
+                  reconciliacao: str = 'bottom_up',
+                  nivel_top_down: str = 'ativo',
+                  df_centros: pd.DataFrame = None,
+                  metodos_por_folha: Dict[str, str] = None,
+                  cache=None) -> pd.DataFrame:
+    """
+    Previsão no grão centro × conta, reconciliada pela hierarquia.
+
+    Args:
+        df_historico: DataFrame com data_ref, valor, centro_gasto_codigo, conta_contabil_codigo
+        metodo: Método do BatchForecaster ('linear', 'sma', 'ema', 'seasonal', 'hybrid')
+        periods: Horizonte em meses (a partir do mês seguinte ao fim do histórico)
+        reconciliacao: 'bottom_up' ou 'top_down'
+        nivel_top_down: Nível previsto no top-down (um de NIVEIS_HIERARQUIA)
+        df_centros: Base de centros (opcional)
+        metodos_por_folha: 'centro|conta' -> método (bottom_up; folhas ausentes usam `metodo`)
+        cache: CacheForecast opcional (services/forecast_cache.py)
+
+    Returns:
+        DataFrame longo com: centro_gasto_codigo, conta_contabil_codigo,
+        codigo_pai, classe, ativo, base, data, previsao, limite_inferior,
+        limite_superior, metodo_calculo
+    """
+    if reconciliacao not in RECONCILIACOES:
+        raise ValueError(f"Reconciliação inválida: {reconciliacao}. Use um de {RECONCILIACOES}")
+    if reconciliacao == 'top_down' and nivel_top_down not in NIVEIS_HIERARQUIA:
+        raise ValueError(f"Nível inválido: {nivel_top_down}. Use um de {NIVEIS_HIERARQUIA}")
+
+    matriz, folhas, calendario = montar_folhas(df_historico)
+    if folhas.empty:
+        return pd.DataFrame(columns=CHAVE_FOLHA + NIVEIS_HIERARQUIA + [
+            'data', 'previsao', 'limite_inferior', 'limite_superior', 'metodo_calculo'
+        ])
+
+    folhas = anexar_hierarquia(folhas, df_centros)
+
+    if reconciliacao == 'bottom_up':
+        metodos = metodo
+        if metodos_por_folha:
+            chave = folhas['centro_gasto_codigo'].astype(str) + '|' + folhas['conta_contabil_codigo'].astype(str)
+            metodos = chave.map(metodos_por_folha).fillna(metodo).to_numpy(dtype=object)
+        previsao, inferior, superior, usado = prever_esparso(
+            matriz, calendario, method=metodos, periods=periods, cache=cache
+        )
+        metodo_calculo = usado.astype(object)
+    else:
+        # Série agregada = (nível, conta); folhas recebem a participação histórica
+        grupos, chaves_grupo = pd.MultiIndex.from_frame(
+            folhas[[nivel_top_down, 'conta_contabil_codigo']].astype(object)
+        ).factorize()
+        n_grupos = len(chaves_grupo)
+        agregado = _agregar_linhas(matriz, grupos, n_grupos)
+
+        prev_g, inf_g, sup_g, usado_g = prever_esparso(
+            agregado, calendario, method=metodo, periods=periods, cache=cache
+        )
+        peso = participacoes_historicas(matriz, grupos, n_grupos)[:, None]
+        previsao = prev_g[grupos] * peso
+        inferior = previsao - (prev_g[grupos] - inf_g[grupos]) * np.abs(peso)
+        superior = previsao + (sup_g[grupos] - prev_g[grupos]) * np.abs(peso)
+        metodo_calculo = np.char.add(usado_g[grupos].astype(str), f"+td:{nivel_top_down}").astype(object)
+
+    F = len(folhas)
+    inicio = calendario[-1].to_period('M').ordinal + 1
+    datas = pd.PeriodIndex.from_ordinals(np.arange(inicio, inicio + periods), freq='M').to_timestamp()
+
+    resultado = folhas.loc[folhas.index.repeat(periods)].reset_index(drop=True)
+    resultado['data'] = np.tile(datas, F)
+    resultado['previsao'] = previsao.ravel()
+    resultado['limite_inferior'] = inferior.ravel()
+    resultado['limite_superior'] = superior.ravel()
+    resultado['metodo_calculo'] = np.repeat(metodo_calculo, periods)
+    return resultado
+
+
+def totais_por_nivel(df_previsao: pd.DataFrame, nivel: str, valor: str = 'previsao') -> pd.DataFrame:
+    """
+    Soma da previsão por nível da hierarquia e mês.
+
+    Args:
+        df_previsao: Saída de prever_folhas
+        nivel: Coluna do nível (ex: 'ativo', 'base', 'codigo_pai')
+
+    Returns:
+        DataFrame pivotado: nível × data
+    """
+    return df_previsao.pivot_table(values=valor, index=nivel, columns='data', aggfunc='sum', observed=True)
+
@@ -0,0 +1,433 @@
+"""
+services/forecast_incremental.py
+================================
+Estado de forecast por série para atualização incremental (um mês por vez).
+
+Em vez de reajustar todos os modelos a cada mês fechado, guardamos por série
+apenas as estatísticas suficientes de cada método do BatchForecaster:
+
+- linear:   n, Σt, Σt², Σy, Σty, Σy²  (MQO fechado + σ dos resíduos)
+- ema:      último valor da EMA
+- sma:      últimos valores válidos (buffer)
+- seasonal: últimos 12 meses do calendário + Σd, Σd² das diferenças sazonais
+- hybrid:   as mesmas somas por posição do ciclo de 12 (t mod 12); séries com
+            menos de 24 pontos (ciclo < 12) usam o buffer, que ainda contém
+            todo o histórico
+
+Incorporar um mês custa O(séries) e a previsão a partir do estado é igual à
+do BatchForecaster sobre o histórico completo (ver verificar_consistencia).
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+from io import BytesIO
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.forecast_engine import BatchForecaster, PERIODO_SAZONAL, Z_CONFIANCA
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+# Pontos válidos guardados por série (cobre o híbrido até o ciclo completo)
+TAMANHO_BUFFER = 2 * PERIODO_SAZONAL
+
+# Arrays [S] de somas do MQO
+SOMAS = ['n', 'st', 'stt', 'sy', 'sty', 'syy']
+
+
+# =============================================================================
+# ESTADO
+# =============================================================================
+
+class EstadoForecast:
+    """
+    Estatísticas suficientes de S séries sobre um calendário mensal.
+
+    Atributos principais:
+        chaves: DataFrame com as chaves de cada série (linha i = série i)
+        ultimo_mes: ordinal mensal (Period 'M') da última coluna incorporada
+        n_meses: colunas do calendário já incorporadas
+    """
+
+    def __init__(self, chaves: pd.DataFrame, primeiro_mes: int, alpha: float = 0.3):
+        S = len(chaves)
+        self.chaves = chaves.reset_index(drop=True)
+        self.alpha = alpha
+        self.ultimo_mes = primeiro_mes - 1
+        self.n_meses = 0
+
+        for nome in SOMAS:
+            setattr(self, nome, np.zeros(S))
+        self.ema = np.full(S, np.nan)
+        self.ultima_coluna = np.full(S, -1, dtype=np.int64)  # ordinal do último ponto válido
+        self.buffer = np.full((S, TAMANHO_BUFFER), np.nan)  # últimos pontos válidos (à direita)
+        self.calendario12 = np.full((S, PERIODO_SAZONAL), np.nan)  # últimos 12 meses do calendário
+        self.n_pares = np.zeros(S)
+        self.sd = np.zeros(S)
+        self.sdd = np.zeros(S)
+        # Somas por posição do ciclo de 12 (posição = t mod 12, t = índice compacto)
+        self.pos = {nome: np.zeros((S, PERIODO_SAZONAL)) for nome in SOMAS}
+
+    @property
+    def n_series(self) -> int:
+        return len(self.chaves)
+
+    # -------------------------------------------------------------------------
+    # ATUALIZAÇÃO
+    # -------------------------------------------------------------------------
+
+    def adicionar_series(self, novas: pd.DataFrame) -> None:
+        """Acrescenta séries novas (sem histórico) ao fim do estado."""
+        if novas.empty:
+            return
+        k = len(novas)
+        self.chaves = pd.concat([self.chaves, novas], ignore_index=True)
+        for nome in SOMAS:
+            setattr(self, nome, np.concatenate([getattr(self, nome), np.zeros(k)]))
+            self.pos[nome] = np.vstack([self.pos[nome], np.zeros((k, PERIODO_SAZONAL))])
+        self.ema = np.concatenate([self.ema, np.full(k, np.nan)])
+        self.ultima_coluna = np.concatenate([self.ultima_coluna, np.full(k, -1, dtype=np.int64)])
+        self.buffer = np.vstack([self.buffer, np.full((k, TAMANHO_BUFFER), np.nan)])
+        self.calendario12 = np.vstack([self.calendario12, np.full((k, PERIODO_SAZONAL), np.nan)])
+        self.n_pares = np.concatenate([self.n_pares, np.zeros(k)])
+        self.sd = np.concatenate([self.sd, np.zeros(k)])
+        self.sdd = np.concatenate([self.sdd, np.zeros(k)])
+
+    def incorporar_mes(self, valores: np.ndarray) -> None:
+        """
+        Incorpora a próxima coluna do calendário (ultimo_mes + 1).
+
+        Args:
+            valores: Array [S] com o valor do mês por série (NaN = sem dado)
+        """
+        y = np.asarray(valores, dtype=float)
+        valido = ~np.isnan(y)
+        yv = np.where(valido, y, 0.0)
+        t = self.n.copy()  # índice compacto do novo ponto
+
+        # MQO
+        m = valido.astype(float)
+        self.n += m
+        self.st += m * t
+        self.stt += m * t ** 2
+        self.sy += yv
+        self.sty += yv * t
+        self.syy += yv ** 2
+
+        # Somas por posição do ciclo
+        linhas = np.flatnonzero(valido)
+        posicao = (t[linhas] % PERIODO_SAZONAL).astype(int)
+        tl, yl = t[linhas], yv[linhas]
+        for nome, incremento in zip(SOMAS, [1.0, tl, tl ** 2, yl, yl * tl, yl ** 2]):
+            self.pos[nome][linhas, posicao] += incremento
+
+        # EMA (semente = primeiro valor)
+        primeira = valido & np.isnan(self.ema)
+        self.ema = np.where(primeira, y, self.ema)
+        seguinte = valido & ~primeira
+        self.ema = np.where(seguinte, self.alpha * yv + (1 - self.alpha) * self.ema, self.ema)
+
+        # Buffer de pontos válidos
+        self.buffer[linhas] = np.column_stack([self.buffer[linhas, 1:], y[linhas]])
+
+        # Diferenças sazonais: novo mês pareado com o mesmo mês do ano anterior
+        if self.n_meses >= PERIODO_SAZONAL:
+            anterior = self.calendario12[:, 0]
+            par = valido & ~np.isnan(anterior)
+            d = np.where(par, y - anterior, 0.0)
+            self.n_pares += par
+            self.sd += d
+            self.sdd += d ** 2
+        self.calendario12 = np.column_stack([self.calendario12[:, 1:], y])
+
+        self.n_meses += 1
+        self.ultimo_mes += 1
+        self.ultima_coluna[valido] = self.ultimo_mes
+
+    # -------------------------------------------------------------------------
+    # PREVISÃO
+    # -------------------------------------------------------------------------
+
+    def _mqo(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Intercepto, inclinação e σ dos resíduos do MQO (todas as séries)."""
+        n, st, stt, sy, sty, syy = (getattr(self, nome) for nome in SOMAS)
+        denominador = n * stt - st ** 2
+        b = np.divide(n * sty - st * sy, denominador, out=np.zeros_like(sy), where=denominador > 0)
+        a = np.divide(sy - b * st, n, out=np.zeros_like(sy), where=n > 0)
+        n_seguro = np.maximum(n, 1)
+        ssr = (syy - sy ** 2 / n_seguro) - b * (sty - st * sy / n_seguro)
+        return a, b, np.sqrt(np.maximum(ssr, 0) / n_seguro)
+
+    def _std_valores(self) -> np.ndarray:
+        n = np.maximum(self.n, 1)
+        return np.sqrt(np.maximum(self.syy / n - (self.sy / n) ** 2, 0))
+
+    def _linear(self, periods: int):
+        a, b, std = self._mqo()
+        futuro = self.n[:, None] + np.arange(periods)[None, :]
+        return a[:, None] + b[:, None] * futuro, std
+
+    def _sma(self, periods: int, window_size: int):
+        ultimos = self.buffer[:, -window_size:]
+        validos = ~np.isnan(ultimos)
+        media = np.divide(np.nansum(ultimos, axis=1), validos.sum(axis=1),
+                          out=np.zeros(self.n_series), where=validos.any(axis=1))
+        return np.repeat(media[:, None], periods, axis=1), self._std_valores()
+
+    def _ema(self, periods: int):
+        ema = np.nan_to_num(self.ema)
+        return np.repeat(ema[:, None], periods, axis=1), self._std_valores()
+
+    def _seasonal(self, periods: int):
+        previsao, std = self._linear(periods)
+        if self.n_meses < PERIODO_SAZONAL:
+            return previsao, std
+        ref = self.calendario12[:, np.arange(periods) % PERIODO_SAZONAL]
+        previsao = np.where(np.isnan(ref), previsao, ref)
+        n = np.maximum(self.n_pares, 1)
+        std_sazonal = np.sqrt(np.maximum(self.sdd / n - (self.sd / n) ** 2, 0))
+        return previsao, np.where(self.n_pares > 0, std_sazonal, std)
+
+    def _hybrid(self, periods: int):
+        previsao, std = self._linear(periods)
+        p = PERIODO_SAZONAL
+
+        # Ciclo completo (n >= 24): MQO com dummies sazonais pelas somas por posição
+        completas = np.flatnonzero(self.n >= 2 * p)
+        if len(completas):
+            c, st, stt, sy, sty, syy = (self.pos[nome][completas] for nome in SOMAS)
+            stt_c = stt - st ** 2 / c
+            sty_c = sty - st * sy / c
+            syy_c = syy - sy ** 2 / c
+            b = sty_c.sum(axis=1) / stt_c.sum(axis=1)
+            nivel = sy / c - b[:, None] * (st / c)
+            a = nivel.mean(axis=1)
+            indice = nivel - a[:, None]
+
+            futuro = self.n[completas][:, None] + np.arange(periods)[None, :]
+            previsao[completas] = (
+                a[:, None] + b[:, None] * futuro
+                + np.take_along_axis(indice, (futuro % p).astype(int), axis=1)
+            )
+            ssr = (syy_c - 2 * b[:, None] * sty_c + b[:, None] ** 2 * stt_c).sum(axis=1)
+            std[completas] = np.sqrt(np.maximum(ssr, 0) / self.n[completas])
+
+        # Ciclo parcial (4 <= n < 24): o buffer ainda tem todo o histórico
+        parciais = np.flatnonzero((self.n >= 4) & (self.n < 2 * p))
+        if len(parciais):
+            prev, inf, _ = BatchForecaster(z=1.0).fit(self.buffer[parciais], method='hybrid').predict(periods)
+            previsao[parciais] = prev
+            std[parciais] = prev[:, 0] - inf[:, 0]
+
+        return previsao, std
+
+    def prever(self, metodo, periods: int = 12, window_size: int = 3,
+               z: float = Z_CONFIANCA) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Previsão a partir do estado (mesma saída do BatchForecaster.predict).
+
+        Args:
+            metodo: Método (str) ou um método por série (array [S])
+            periods: Horizonte
+            window_size: Janela da SMA
+
+        Returns:
+            Tuple (previsao, limite_inferior, limite_superior) [S, periods]
+        """
+        metodos = np.broadcast_to(np.asarray(metodo, dtype=object), (self.n_series,))
+        previsao = np.zeros((self.n_series, periods))
+        std = np.zeros(self.n_series)
+
+        calculos = {
+            'linear': lambda: self._linear(periods),
+            'sma': lambda: self._sma(periods, window_size),
+            'ema': lambda: self._ema(periods),
+            'seasonal': lambda: self._seasonal(periods),
+            'hybrid': lambda: self._hybrid(periods),
+        }
+        for nome in pd.unique(metodos):
+            if nome not in calculos:
+                raise ValueError(f"Método sem suporte incremental: {nome}")
+            linhas = metodos == nome
+            prev, desvio = calculos[nome]()
+            previsao[linhas], std[linhas] = prev[linhas], desvio[linhas]
+
+        banda = z * std[:, None]
+        return previsao, previsao - banda, previsao + banda
+
+    def datas_previsao(self) -> np.ndarray:
+        """Primeiro mês previsto por série (mês seguinte ao último ponto válido), como ordinal."""
+        return np.where(self.ultima_coluna >= 0, self.ultima_coluna, self.ultimo_mes) + 1
+
+    # -------------------------------------------------------------------------
+    # SERIALIZAÇÃO
+    # -------------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """Serializa o estado (NPZ comprimido, sem pickle)."""
+        arrays = {nome: getattr(self, nome) for nome in SOMAS}
+        arrays.update({f"pos_{nome}": valor for nome, valor in self.pos.items()})
+        arrays.update({
+            'ema': self.ema, 'ultima_coluna': self.ultima_coluna, 'buffer': self.buffer,
+            'calendario12': self.calendario12, 'n_pares': self.n_pares, 'sd': self.sd, 'sdd': self.sdd,
+            'meta': np.array([self.ultimo_mes, self.n_meses], dtype=np.int64),
+            'alpha': np.array([self.alpha]),
+            'colunas_chave': np.array(list(self.chaves.columns), dtype=str),
+        })
+        for i, col in enumerate(self.chaves.columns):
+            arrays[f"chave_{i}"] = self.chaves[col].astype(str).to_numpy(dtype=str)
+
+        saida = BytesIO()
+        np.savez_compressed(saida, **arrays)
+        return saida.getvalue()
+
+    @classmethod
+    def from_bytes(cls, dados: bytes) -> 'EstadoForecast':
+        """Reconstrói o estado serializado por to_bytes."""
+        with np.load(BytesIO(dados), allow_pickle=False) as npz:
+            colunas = list(npz['colunas_chave'])
+            chaves = pd.DataFrame({col: npz[f"chave_{i}"].astype(object) for i, col in enumerate(colunas)})
+            ultimo_mes, n_meses = (int(v) for v in npz['meta'])
+            estado = cls(chaves, ultimo_mes + 1, alpha=float(npz['alpha'][0]))
+            estado.ultimo_mes, estado.n_meses = ultimo_mes, n_meses
+            for nome in SOMAS:
+                setattr(estado, nome, npz[nome])
+                estado.pos[nome] = npz[f"pos_{nome}"]
+            for nome in ['ema', 'ultima_coluna', 'buffer', 'calendario12', 'n_pares', 'sd', 'sdd']:
+                setattr(estado, nome, npz[nome])
+        return estado
+
+
+# =============================================================================
+# CONSTRUÇÃO E VERIFICAÇÃO
+# =============================================================================
+
+def construir_estado(matriz: np.ndarray, chaves: pd.DataFrame, calendario: pd.DatetimeIndex,
+                     alpha: float = 0.3) -> EstadoForecast:
+    """
+    Estado a partir do histórico completo (equivale a um refit completo).
+
+    Args:
+        matriz: Array [S, T] (NaN = sem dado)
+        chaves: Chaves de cada série
+        calendario: Datas mensais das T colunas
+    """
+    primeiro = calendario[0].to_period('M').ordinal if len(calendario) else pd.Timestamp.now().to_period('M').ordinal
+    estado = EstadoForecast(chaves, primeiro, alpha=alpha)
+    for coluna in range(matriz.shape[1]):
+        estado.incorporar_mes(matriz[:, coluna])
+    return estado
+
+
+def incorporar_frame(estado: EstadoForecast,
+                     df_mes: pd.DataFrame,
+                     mes: pd.Timestamp,
+                     colunas_chave: list,
+                     value_col: str = 'valor') -> int:
+    """
+    Incorpora um mês fechado vindo em formato longo (cria as séries novas).
+
+    Meses intermediários que faltarem são incorporados vazios.
+
+    Args:
+        estado: Estado a atualizar
+        df_mes: Lançamentos do mês (colunas_chave + valor)
+        mes: Mês de referência
+        colunas_chave: Colunas que identificam a série
+
+    Returns:
+        Número de séries com valor no mês
+    """
+    ordinal = pd.Timestamp(mes).to_period('M').ordinal
+    if ordinal <= estado.ultimo_mes:
+        raise ValueError(
+            f"Mês {pd.Timestamp(mes):%m/%Y} já incorporado ao estado (último: "
+            f"{pd.Period(ordinal=estado.ultimo_mes, freq='M')}). Use o refit completo."
+        )
+
+    totais = df_mes.groupby(colunas_chave, observed=True)[value_col].sum()
+    indice_atual = pd.MultiIndex.from_frame(estado.chaves[colunas_chave].astype(str))
+    indice_mes = pd.MultiIndex.from_frame(totais.index.to_frame(index=False).astype(str))
+
+    novas = indice_mes.difference(indice_atual)
+    if len(novas):
+        estado.adicionar_series(novas.to_frame(index=False).astype(object))
+        indice_atual = pd.MultiIndex.from_frame(estado.chaves[colunas_chave].astype(str))
+
+    while estado.ultimo_mes < ordinal - 1:
+        estado.incorporar_mes(np.full(estado.n_series, np.nan))
+
+    valores = np.full(estado.n_series, np.nan)
+    valores[indice_atual.get_indexer(indice_mes)] = totais.to_numpy(dtype=float)
+    estado.incorporar_mes(valores)
+    return len(totais)
+
+
+def prever_frame(estado: EstadoForecast,
+                 metodo,
+                 periods: int = 12,
+                 min_obs: int = 3) -> pd.DataFrame:
+    """
+    Previsão do estado em formato longo (mesmas colunas do predict_frame).
+
+    Séries com menos de min_obs pontos válidos ficam de fora.
+
+    Args:
+        estado: Estado atual
+        metodo: Método (str) ou um por série
+        periods: Horizonte
+        min_obs: Mínimo de pontos válidos para prever
+
+    Returns:
+        DataFrame com as chaves + data, previsao, limite_inferior, limite_superior, metodo_calculo
+    """
+    previsao, inferior, superior = estado.prever(metodo, periods)
+    metodos = np.broadcast_to(np.asarray(metodo, dtype=object), (estado.n_series,))
+    linhas = np.flatnonzero(estado.n >= min_obs)
+
+    inicio = estado.datas_previsao()[linhas]
+    ordinais = (inicio[:, None] + np.arange(periods)[None, :]).ravel()
+    df = estado.chaves.iloc[np.repeat(linhas, periods)].reset_index(drop=True)
+    df['data'] = pd.PeriodIndex.from_ordinals(ordinais, freq='M').to_timestamp()
+    df['previsao'] = previsao[linhas].ravel()
+    df['limite_inferior'] = inferior[linhas].ravel()
+    df['limite_superior'] = superior[linhas].ravel()
+    df['metodo_calculo'] = np.repeat(np.asarray(metodos)[linhas], periods)
+    return df
+
+
+def verificar_consistencia(estado: EstadoForecast,
+                           matriz: np.ndarray,
+                           metodo,
+                           periods: int = 12,
+                           rtol: float = 1e-6) -> Dict[str, float]:
+    """
+    Compara a previsão incremental com um refit completo do BatchForecaster.
+
+    Args:
+        estado: Estado atualizado incrementalmente
+        matriz: Histórico completo [S, T] na mesma ordem de séries do estado
+        metodo: Método (str) ou um por série
+
+    Returns:
+        Dict com diferenca_max, diferenca_relativa_max e consistente (bool)
+    """
+    incremental, _, _ = estado.prever(metodo, periods)
+    metodos = np.broadcast_to(np.asarray(metodo, dtype=object), (estado.n_series,))
+    completo = np.zeros_like(incremental)
+    for nome in pd.unique(metodos):
+        linhas = metodos == nome
+        completo[linhas] = BatchForecaster(alpha=estado.alpha).fit(matriz[linhas], method=nome).predict(periods)[0]
+
+    diferenca = np.abs(incremental - completo)
+    escala = np.maximum(np.abs(completo), 1.0)
+    return {
+        'diferenca_max': float(diferenca.max()) if diferenca.size else 0.0,
+        'diferenca_relativa_max': float((diferenca / escala).max()) if diferenca.size else 0.0,
+        'consistente': bool(np.all(diferenca <= rtol * escala)),
+    }
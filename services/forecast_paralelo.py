@@ -0,0 +1,260 @@
+"""
+services/forecast_paralelo.py
+=============================
+Execução paralela do SimpleForecaster (métodos com statsmodels) em lote.
+
+`seasonal` e `hybrid` do SimpleForecaster chamam `seasonal_decompose` série a
+série e não têm forma fechada vetorizada. Este módulo distribui as séries em
+lotes (chunks) por um ProcessPoolExecutor:
+
+- lotes de `tamanho_lote` séries por tarefa (menos overhead de pickle/IPC)
+- memória dos workers limitada: cada processo é reciclado após
+  `max_tarefas_por_worker` tarefas (max_tasks_per_child)
+- timeout por série (SIGALRM no worker): série que estoura cai para a
+  tendência linear, sem derrubar o lote; fora da thread principal (ex:
+  Streamlit) o modo sequencial usa um processo para que o limite valha
+- ordem determinística: o resultado é remontado pelo índice da série, então
+  1 ou N workers produzem exatamente a mesma saída
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import os
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+TAMANHO_LOTE_PADRAO = 64
+TIMEOUT_SERIE_S = 5.0
+MAX_TAREFAS_POR_WORKER = 50
+
+# Status por série
+STATUS_OK = 'ok'
+STATUS_TIMEOUT = 'timeout'
+STATUS_ERRO = 'erro'
+STATUS_VAZIA = 'vazia'
+
+
+class _TempoEsgotado(BaseException):
+    """BaseException: atravessa os `except Exception` internos do SimpleForecaster."""
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+def _limite_suportado() -> bool:
+    """SIGALRM só existe no Unix e só é entregue à thread principal."""
+    return hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def _limite_tempo(segundos: Optional[float]):
+    """
+    Interrompe o bloco após `segundos` (SIGALRM, só Unix e thread principal).
+
+    Fora dessas condições o bloco roda sem limite: prever_paralelo só executa
+    lotes com timeout neste processo quando _limite_suportado().
+    """
+    if not (segundos and _limite_suportado()):
+        yield
+        return
+
+    def _estourou(signum, frame):
+        raise _TempoEsgotado()
+
+    anterior = signal.signal(signal.SIGALRM, _estourou)
+    signal.setitimer(signal.ITIMER_REAL, segundos)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, anterior)
+
+
+def _prever_lote(args) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    """
+    Executa o SimpleForecaster para um lote de séries (roda no worker).
+
+    Args:
+        args: (inicio, valores [B, T], datas [T], metodo, periods, timeout_s, params)
+
+    Returns:
+        Tuple (inicio, previsao [B, P], inferior, superior,
+               ordinal do 1º mês previsto [B], status por série)
+    """
+    from utils_financeiro import SimpleForecaster
+
+    inicio, valores, datas, metodo, periods, timeout_s, params = args
+    datas = pd.DatetimeIndex(datas)
+    B = valores.shape[0]
+
+    previsao = np.zeros((B, periods))
+    inferior = np.zeros((B, periods))
+    superior = np.zeros((B, periods))
+    primeiro_mes = np.zeros(B, dtype=np.int64)
+    status = []
+
+    for i in range(B):
+        valido = ~np.isnan(valores[i])
+        if not valido.any():
+            primeiro_mes[i] = datas[-1].to_period('M').ordinal + 1
+            status.append(STATUS_VAZIA)
+            continue
+
+        df_serie = pd.DataFrame({'data': datas[valido], 'valor': valores[i, valido]})
+        modelo = SimpleForecaster()
+        modelo.fit(df_serie, 'data', 'valor', method=metodo, **params)
+
+        try:
+            with _limite_tempo(timeout_s):
+                df_pred = modelo.predict(periods=periods)
+            status.append(STATUS_OK)
+        except _TempoEsgotado:
+            modelo.method = 'linear'
+            df_pred = modelo.predict(periods=periods)
+            status.append(STATUS_TIMEOUT)
+        except Exception:
+            modelo.method = 'linear'
+            df_pred = modelo.predict(periods=periods)
+            status.append(STATUS_ERRO)
+
+        previsao[i] = df_pred['previsao'].to_numpy()
+        inferior[i] = df_pred['limite_inferior'].to_numpy()
+        superior[i] = df_pred['limite_superior'].to_numpy()
+        primeiro_mes[i] = df_pred['data'].iloc[0].to_period('M').ordinal
+
+    return inicio, previsao, inferior, superior, primeiro_mes, status
+
+
+# =============================================================================
+# EXECUTOR
+# =============================================================================
+
+def _contexto_processos():
+    """forkserver no Linux (não herda threads do Streamlit), spawn nos demais."""
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+
+
+def workers_disponiveis() -> int:
+    """Núcleos disponíveis para o processo atual."""
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except AttributeError:
+        return max(os.cpu_count() or 1, 1)
+
+
+def prever_paralelo(matriz: np.ndarray,
+                    datas: Sequence,
+                    metodo: str = 'hybrid',
+                    periods: int = 12,
+                    n_workers: Optional[int] = None,
+                    tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+                    timeout_s: Optional[float] = TIMEOUT_SERIE_S,
+                    max_tarefas_por_worker: int = MAX_TAREFAS_POR_WORKER,
+                    **params) -> Dict[str, np.ndarray]:
+    """
+    SimpleForecaster em paralelo sobre as linhas de uma matriz séries × meses.
+
+    Args:
+        matriz: Array [S, T] (NaN = mês sem dado)
+        datas: Datas mensais das T colunas
+        metodo: Método do SimpleForecaster
+        periods: Horizonte
+        n_workers: Processos (None = núcleos disponíveis; 1 = sequencial, sem pool,
+            ou em um único processo se o timeout não puder valer nesta thread)
+        tamanho_lote: Séries por tarefa
+        timeout_s: Limite por série antes de cair para a tendência linear
+        max_tarefas_por_worker: Tarefas antes de reciclar o processo
+        **params: window_size / alpha do SimpleForecaster
+
+    Returns:
+        Dict com 'previsao', 'limite_inferior', 'limite_superior' [S, periods],
+        'primeiro_mes' (ordinal mensal do 1º mês previsto por série) e
+        'status' [S] (ok / timeout / erro / vazia)
+    """
+    matriz = np.atleast_2d(np.asarray(matriz, dtype=float))
+    datas = np.asarray(pd.DatetimeIndex(datas))
+    S = matriz.shape[0]
+    tamanho_lote = max(int(tamanho_lote), 1)
+
+    tarefas = [
+        (inicio, matriz[inicio:inicio + tamanho_lote], datas, metodo, periods, timeout_s, params)
+        for inicio in range(0, S, tamanho_lote)
+    ]
+
+    resultado = {
+        'previsao': np.zeros((S, periods)),
+        'limite_inferior': np.zeros((S, periods)),
+        'limite_superior': np.zeros((S, periods)),
+        'primeiro_mes': np.zeros(S, dtype=np.int64),
+        'status': np.empty(S, dtype=object),
+    }
+
+    def _guardar(saida):
+        inicio, prev, inf, sup, primeiro, status = saida
+        fim = inicio + prev.shape[0]
+        resultado['previsao'][inicio:fim] = prev
+        resultado['limite_inferior'][inicio:fim] = inf
+        resultado['limite_superior'][inicio:fim] = sup
+        resultado['primeiro_mes'][inicio:fim] = primeiro
+        resultado['status'][inicio:fim] = status
+
+    if n_workers is None:
+        n_workers = workers_disponiveis()
+    n_workers = max(min(int(n_workers), len(tarefas)), 1)
+
+    # Sequencial no próprio processo só se o timeout puder ser aplicado aqui
+    if n_workers == 1 and (not timeout_s or _limite_suportado()):
+        for tarefa in tarefas:
+            _guardar(_prever_lote(tarefa))
+        return resultado
+
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=_contexto_processos(),
+        max_tasks_per_child=max_tarefas_por_worker
+    ) as executor:
+        # map preserva a ordem das tarefas; _guardar ainda posiciona pelo índice
+        for saida in executor.map(_prever_lote, tarefas):
+            _guardar(saida)
+
+    return resultado
+
+
+def resultado_para_frame(resultado: Dict[str, np.ndarray], chaves: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Converte a saída de prever_paralelo para o formato longo do SimpleForecaster.
+
+    Args:
+        resultado: Saída de prever_paralelo
+        chaves: DataFrame com as chaves de cada série (linha i = série i)
+
+    Returns:
+        DataFrame com: [chaves...], data, previsao, limite_inferior, limite_superior, status
+    """
+    S, P = resultado['previsao'].shape
+    ordinais = resultado['primeiro_mes'][:, None] + np.arange(P)[None, :]
+    df = pd.DataFrame({
+        'data': pd.PeriodIndex.from_ordinals(ordinais.ravel(), freq='M').to_timestamp(),
+        'previsao': resultado['previsao'].ravel(),
+        'limite_inferior': resultado['limite_inferior'].ravel(),
+        'limite_superior': resultado['limite_superior'].ravel(),
+        'status': np.repeat(resultado['status'], P),
+    })
+    if chaves is not None:
+        repetidas = chaves.loc[chaves.index.repeat(P)].reset_index(drop=True)
+        df = pd.concat([repetidas, df], axis=1)
+    return df
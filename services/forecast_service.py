@@ -5,29 +5,63 @@ Serviço para geração e gerenciamento de previsões orçamentárias (Feature A
 Integra modelos matemáticos (utils_financeiro) com persistência no banco de dados.
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from database.models import ForecastCenario, ForecastEntry, get_session
+from database.models import ForecastCenario, ForecastCenarioDados, ForecastEntry, ForecastEstado, get_session
 from utils_financeiro import SimpleForecaster, MESES_ORDEM
+from services.forecast_engine import BatchForecaster, montar_matriz_series
+from services.forecast_cache import get_cache_forecast
+from services.forecast_hierarquico import prever_folhas
+from services.forecast_paralelo import prever_paralelo, resultado_para_frame
+from services.backtest_forecast import BacktestService, METODO_PADRAO
+from services.forecast_armazenamento import (
+    FORMATO_NPZ, COLUNAS_CENARIO, serializar_cenario, desserializar_cenario, comparar_frames
+)
+from services.forecast_incremental import (
+    EstadoForecast, construir_estado, incorporar_frame, prever_frame, verificar_consistencia
+)
+
+# Métodos do SimpleForecaster que dependem do statsmodels
+METODOS_STATSMODELS = ('seasonal', 'hybrid')
+
+# Método por série escolhido pelo último backtest
+METODO_AUTO = 'auto'
+
+# Agregação das séries de um cenário automático (estado incremental)
+AGREGACOES = ('conta', 'total')
+CHAVE_CONTA = ['conta_contabil_codigo']
 
 class ForecastService:
     def __init__(self):
         self.forecaster = SimpleForecaster()
+        # Cache do processo: séries já previstas (mesmos valores/método) não são recalculadas
+        self.cache = get_cache_forecast()
+        self.engine = BatchForecaster(cache=self.cache)
 
     def criar_cenario_automatico(self, 
                                df_historico: pd.DataFrame, 
                                nome: str = None, 
                                metodo: str = 'hybrid',
-                               ano: int = 2026) -> int:
+                               ano: int = 2026,
+                               decomposicao_completa: bool = False,
+                               agregacao: str = 'conta') -> int:
         """
         Gera um cenário automático baseado no histórico (Realizado + P&L Anterior).
         
         Args:
-            df_historico: DataFrame com colunas ['mes', 'valor', 'conta_contabil', 'centro_gasto']
+            df_historico: Histórico de meses fechados ['data_ref', 'valor', 'conta_contabil_codigo',
+                'centro_gasto_codigo'] (ex: get_historico_folhas; meses sem lançamento ausentes, não zerados)
             nome: Nome do cenário (opcional)
-            metodo: 'linear', 'sma', 'hybrid'
+            metodo: 'linear', 'sma', 'ema', 'seasonal', 'hybrid' ou 'auto'
+                ('auto' = melhor método de cada conta no último backtest)
+            ano: Ano de referência do cenário
+            decomposicao_completa: Para 'seasonal'/'hybrid', usa o SimpleForecaster
+                (seasonal_decompose do statsmodels) em paralelo em vez do motor em lote
+            agregacao: 'conta' ou 'total' (todas as contas somadas numa série 'TOTAL');
+                define também como os meses incorporados depois serão agregados
             
         Returns:
             ID do cenário criado
@@ -48,55 +82,59 @@ class ForecastService:
             session.commit()
             
             # 2. Processar Previsão por Conta Contábil (Mais estável que centro)
-            # Agrupar histórico por conta
-            contas = df_historico['conta_contabil_codigo'].unique()
-            
-            entries = []
-            
-            for conta in contas:
-                df_conta = df_historico[df_historico['conta_contabil_codigo'] == conta].copy()
-                
-                # Se tiver poucos dados, pular ou usar média simples
-                if len(df_conta) < 3:
-                    continue
-                    
-                # Treinar modelo
-                self.forecaster.fit(
-                    df_conta, 
-                    date_col='data_ref',  # Precisa ter data datetime
-                    value_col='valor',
-                    method=metodo
+            # Todas as contas de uma vez: matriz contas × meses + motor em lote
+            # Mesma agregação do refit e da atualização incremental (estado consistente)
+            df_hist = self._agregar_historico(df_historico, agregacao).dropna(subset=['data_ref'])
+            matriz, df_contas, calendario = montar_matriz_series(
+                df_hist, ['conta_contabil_codigo'], date_col='data_ref', value_col='valor'
+            )
+            if df_contas.empty:
+                return cenario.id
+            matriz_completa, df_contas_completo = matriz, df_contas
+
+            # Se tiver poucos dados (< 3 meses), pular
+            com_dados = (~np.isnan(matriz)).sum(axis=1) >= 3
+            matriz, df_contas = matriz[com_dados], df_contas[com_dados].reset_index(drop=True)
+            usa_motor = not (decomposicao_completa and metodo in METODOS_STATSMODELS)
+
+            if metodo == METODO_AUTO:
+                # Melhor método de cada conta no último backtest (grão conta)
+                padrao = BacktestService().get_metodos_padrao('conta')
+                metodos_conta = df_contas['conta_contabil_codigo'].astype(str).map(padrao).fillna(METODO_PADRAO)
+                partes = []
+                for metodo_conta, idx in metodos_conta.groupby(metodos_conta).groups.items():
+                    chaves = df_contas.loc[idx].reset_index(drop=True)
+                    self.engine.fit(matriz[np.asarray(idx)], calendario, method=metodo_conta)
+                    partes.append(self.engine.predict_frame(periods=12, chaves=chaves).assign(metodo_calculo=metodo_conta))
+                df_pred = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(
+                    columns=['conta_contabil_codigo', 'data', 'previsao', 'metodo_calculo']
                 )
-                
-                # Prever até o fim do ano (12 meses)
-                # O forecaster retorna 12 meses a frente
-                df_pred = self.forecaster.predict(periods=12)
-                
-                # Filtrar apenas meses de 2026
-                # Assumindo que o predict começa do mês seguinte ao último histórico
-                
-                # Converter para ForecastEntries
-                for _, row in df_pred.iterrows():
-                    mes_idx = row['data'].month - 1
-                    if 0 <= mes_idx < 12:
-                        mes_str = MESES_ORDEM[mes_idx]
-                        
-                        # Tenta manter o centro de custo se for único para a conta
-                        # Caso contrário, usa um centro "DIVERSOS" ou o principal
-                        centro = df_conta['centro_gasto_codigo'].mode().iloc[0] if not df_conta.empty else '00000000'
-                        
-                        entry = ForecastEntry(
-                            cenario_id=cenario.id,
-                            mes=mes_str,
-                            centro_gasto_codigo=centro,
-                            conta_contabil_codigo=conta,
-                            valor_previsto=float(row['previsao']),
-                            metodo_calculo=metodo
-                        )
-                        entries.append(entry)
-            
-            # Bulk Insert
-            session.add_all(entries)
+            elif not usa_motor:
+                # Decomposição do statsmodels série a série, em paralelo
+                resultado = prever_paralelo(matriz, calendario, metodo=metodo, periods=12)
+                df_pred = resultado_para_frame(resultado, chaves=df_contas).assign(metodo_calculo=metodo)
+            else:
+                self.engine.fit(matriz, calendario, method=metodo)
+                df_pred = self.engine.predict_frame(periods=12, chaves=df_contas).assign(metodo_calculo=metodo)
+
+            # Centro de custo principal (moda) de cada conta
+            centros = (
+                df_hist.groupby(['conta_contabil_codigo', 'centro_gasto_codigo'], observed=True)
+                .size().rename('n').reset_index()
+                .sort_values(['conta_contabil_codigo', 'n', 'centro_gasto_codigo'], ascending=[True, False, True])
+                .drop_duplicates('conta_contabil_codigo')
+                .set_index('conta_contabil_codigo')['centro_gasto_codigo']
+            )
+            df_pred['centro_gasto_codigo'] = df_pred['conta_contabil_codigo'].map(centros).fillna('00000000')
+            df_pred['mes'] = np.asarray(MESES_ORDEM)[df_pred['data'].dt.month.to_numpy() - 1]
+
+            # Gravar as entradas (blob colunar)
+            self._gravar_entradas(session, cenario, df_pred.rename(columns={'previsao': 'valor_previsto'}))
+            
+            # Estado incremental (só o motor em lote: a decomposição do statsmodels não é incremental)
+            if usa_motor:
+                estado = construir_estado(matriz_completa, df_contas_completo, calendario, alpha=self.engine.alpha)
+                self._salvar_estado(session, cenario.id, estado, metodo, agregacao)
             session.commit()
             return cenario.id
             
@@ -106,6 +144,326 @@ class ForecastService:
         finally:
             session.close()
 
+    def criar_cenario_granular(self,
+                               df_historico: pd.DataFrame,
+                               nome: str = None,
+                               metodo: str = 'hybrid',
+                               ano: int = 2026,
+                               reconciliacao: str = 'bottom_up',
+                               nivel_top_down: str = 'ativo') -> int:
+        """
+        Gera um cenário no grão centro × conta, reconciliado pela hierarquia
+        de centros (pai / classe / ativo / base).
+        
+        Args:
+            df_historico: DataFrame com ['data_ref', 'valor', 'conta_contabil_codigo', 'centro_gasto_codigo']
+            nome: Nome do cenário (opcional)
+            metodo: 'linear', 'sma', 'ema', 'seasonal', 'hybrid' ou 'auto'
+                ('auto' = melhor método de cada folha no backtest; top-down usa o padrão)
+            ano: Ano de referência (só os meses deste ano são gravados)
+            reconciliacao: 'bottom_up' ou 'top_down'
+            nivel_top_down: Nível previsto no top-down ('codigo_pai', 'classe', 'ativo', 'base')
+            
+        Returns:
+            ID do cenário criado
+        """
+        metodo_base, metodos_por_folha = metodo, None
+        if metodo == METODO_AUTO:
+            # Melhor método de cada folha no último backtest (grão folha)
+            metodo_base = METODO_PADRAO
+            metodos_por_folha = BacktestService().get_metodos_padrao('folha')
+        
+        df_pred = prever_folhas(
+            df_historico, metodo=metodo_base, periods=12,
+            reconciliacao=reconciliacao, nivel_top_down=nivel_top_down,
+            metodos_por_folha=metodos_por_folha, cache=self.cache
+        )
+        
+        # Somente meses do ano de referência; folhas com previsão 0 não são gravadas
+        if not df_pred.empty:
+            df_pred = df_pred[(df_pred['data'].dt.year == ano) & (df_pred['previsao'] != 0)]
+        
+        session = get_session()
+        try:
+            if not nome:
+                nome = f"Forecast Granular ({metodo.upper()}) - {datetime.now().strftime('%d/%m %H:%M')}"
+            
+            descricao = f"Centro × conta, método {metodo}, reconciliação {reconciliacao}"
+            if reconciliacao == 'top_down':
+                descricao += f" ({nivel_top_down})"
+            
+            cenario = ForecastCenario(
+                nome=nome,
+                descricao=descricao,
+                tipo='AUTOMATICO',
+                ano_referencia=ano
+            )
+            session.add(cenario)
+            session.commit()
+            
+            df_pred = df_pred.assign(
+                mes=np.asarray(MESES_ORDEM)[df_pred['data'].dt.month.to_numpy() - 1]
+            ).rename(columns={'previsao': 'valor_previsto'})
+            
+            # Um blob colunar por cenário (sem uma linha por centro × conta × mês)
+            self._gravar_entradas(session, cenario, df_pred)
+            session.commit()
+            return cenario.id
+            
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    # =========================================================================
+    # ATUALIZAÇÃO INCREMENTAL
+    # =========================================================================
+
+    def atualizar_cenario_incremental(self,
+                                      cenario_id: int,
+                                      df_mes: pd.DataFrame,
+                                      mes: pd.Timestamp) -> dict:
+        """
+        Incorpora um mês fechado ao estado do cenário e regrava a previsão,
+        sem reajustar o histórico (custo proporcional ao número de séries).
+        
+        Args:
+            cenario_id: Cenário automático com estado salvo
+            df_mes: Lançamentos do mês ['conta_contabil_codigo', 'centro_gasto_codigo', 'valor']
+            mes: Mês de referência
+            
+        Returns:
+            Dict com series_no_mes, n_series e ultimo_mes
+        """
+        session = get_session()
+        try:
+            registro, estado = self._carregar_estado(session, cenario_id)
+            df_mes = self._agregar_historico(df_mes, registro.agregacao)
+            
+            series_no_mes = incorporar_frame(estado, df_mes, mes, CHAVE_CONTA)
+            self._regravar_previsao(session, cenario_id, estado, registro.metodo, df_mes)
+            self._salvar_estado(session, cenario_id, estado, registro.metodo, registro.agregacao)
+            session.commit()
+            return {
+                'series_no_mes': series_no_mes,
+                'n_series': estado.n_series,
+                'ultimo_mes': registro.ultimo_mes
+            }
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    def refit_cenario(self, cenario_id: int, df_historico: pd.DataFrame) -> dict:
+        """
+        Refit completo: reconstrói o estado a partir de todo o histórico e
+        regrava a previsão (use após correções em meses já incorporados).
+        
+        Args:
+            cenario_id: Cenário automático com estado salvo
+            df_historico: Histórico ['data_ref', 'valor', 'conta_contabil_codigo', 'centro_gasto_codigo']
+            
+        Returns:
+            Dict com n_series e ultimo_mes
+        """
+        session = get_session()
+        try:
+            registro, _ = self._carregar_estado(session, cenario_id)
+            df_hist = self._agregar_historico(df_historico, registro.agregacao)
+            matriz, df_contas, calendario = montar_matriz_series(
+                df_hist, CHAVE_CONTA, date_col='data_ref', value_col='valor'
+            )
+            estado = construir_estado(matriz, df_contas, calendario, alpha=self.engine.alpha)
+            
+            self._regravar_previsao(session, cenario_id, estado, registro.metodo, df_hist)
+            self._salvar_estado(session, cenario_id, estado, registro.metodo, registro.agregacao)
+            session.commit()
+            return {'n_series': estado.n_series, 'ultimo_mes': registro.ultimo_mes}
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            session.close()
+
+    def verificar_consistencia_cenario(self, cenario_id: int, df_historico: pd.DataFrame) -> dict:
+        """
+        Compara a previsão do estado incremental com um refit completo do
+        motor em lote sobre o mesmo histórico (nada é gravado).
+        
+        Args:
+            cenario_id: Cenário automático com estado salvo
+            df_historico: Histórico completo usado como referência
+            
+        Returns:
+            Dict com diferenca_max, diferenca_relativa_max e consistente
+        """
+        session = get_session()
+        try:
+            registro, estado = self._carregar_estado(session, cenario_id)
+        finally:
+            session.close()
+        
+        df_hist = self._agregar_historico(df_historico, registro.agregacao)
+        n_meses = estado.n_meses
+        meses = pd.period_range(
+            pd.Period(ordinal=estado.ultimo_mes - n_meses + 1, freq='M'), periods=n_meses, freq='M'
+        )
+        matriz = (
+            df_hist.assign(periodo=pd.to_datetime(df_hist['data_ref']).dt.to_period('M'),
+                           conta=df_hist['conta_contabil_codigo'].astype(str))
+            .pivot_table(index='conta', columns='periodo', values='valor', aggfunc='sum')
+            .reindex(index=estado.chaves['conta_contabil_codigo'].astype(str), columns=meses)
+            .to_numpy(dtype=float)
+        )
+        return verificar_consistencia(estado, matriz, self._metodos_estado(registro.metodo, estado))
+
+    def get_estado(self, cenario_id: int) -> Optional[dict]:
+        """Metadados do estado incremental do cenário (None se não houver)."""
+        session = get_session()
+        try:
+            registro = session.query(ForecastEstado).filter_by(cenario_id=cenario_id).first()
+            if registro is None:
+                return None
+            return {
+                'metodo': registro.metodo,
+                'agregacao': registro.agregacao,
+                'ultimo_mes': registro.ultimo_mes,
+                'n_series': registro.n_series,
+                'data_atualizacao': registro.data_atualizacao
+            }
+        finally:
+            session.close()
+
+    def _agregar_historico(self, df: pd.DataFrame, agregacao: str) -> pd.DataFrame:
+        """Agrega lançamentos no grão do estado ('total' = uma única série)."""
+        if agregacao not in AGREGACOES:
+            raise ValueError(f"Agregação inválida: {agregacao}")
+        df = df.dropna(subset=['conta_contabil_codigo'])
+        if agregacao == 'total':
+            df = df.assign(conta_contabil_codigo='TOTAL', centro_gasto_codigo='CONSOLIDADO')
+        return df
+
+    def _metodos_estado(self, metodo: str, estado: EstadoForecast):
+        """Método do cenário ou, em 'auto', o melhor método de cada conta no último backtest."""
+        if metodo != METODO_AUTO:
+            return metodo
+        padrao = BacktestService().get_metodos_padrao('conta')
+        contas = estado.chaves['conta_contabil_codigo'].astype(str)
+        return contas.map(padrao).fillna(METODO_PADRAO).to_numpy(dtype=object)
+
+    def _carregar_estado(self, session: Session, cenario_id: int):
+        """Registro e estado incremental do cenário (ValueError se não houver)."""
+        registro = session.query(ForecastEstado).filter_by(cenario_id=cenario_id).first()
+        if registro is None:
+            raise ValueError(
+                f"Cenário {cenario_id} não tem estado incremental (granular ou decomposição "
+                "completa). Gere um novo cenário."
+            )
+        return registro, EstadoForecast.from_bytes(registro.estado)
+
+    def _salvar_estado(self, session: Session, cenario_id: int, estado: EstadoForecast,
+                       metodo: str, agregacao: str) -> None:
+        """Grava (ou substitui) o estado incremental do cenário; não faz commit."""
+        registro = session.query(ForecastEstado).filter_by(cenario_id=cenario_id).first()
+        if registro is None:
+            registro = ForecastEstado(cenario_id=cenario_id)
+            session.add(registro)
+        registro.metodo = metodo
+        registro.agregacao = agregacao
+        registro.ultimo_mes = str(pd.Period(ordinal=estado.ultimo_mes, freq='M'))
+        registro.n_series = estado.n_series
+        registro.estado = estado.to_bytes()
+
+    def _regravar_previsao(self, session: Session, cenario_id: int, estado: EstadoForecast,
+                           metodo: str, df_recente: pd.DataFrame) -> None:
+        """Substitui as entradas do cenário pela previsão do estado; não faz commit."""
+        # Centro de cada conta: o já gravado no cenário; contas novas usam a moda do período recente
+        atuais = self._ler_entradas(session, cenario_id)
+        centros = dict(zip(atuais['conta_contabil_codigo'].astype(str), atuais['centro_gasto_codigo'].astype(str)))
+        if not df_recente.empty:
+            moda = (
+                df_recente.groupby(['conta_contabil_codigo', 'centro_gasto_codigo'], observed=True)
+                .size().rename('n').reset_index()
+                .sort_values(['conta_contabil_codigo', 'n', 'centro_gasto_codigo'], ascending=[True, False, True])
+                .drop_duplicates('conta_contabil_codigo')
+            )
+            for conta, centro in zip(moda['conta_contabil_codigo'].astype(str), moda['centro_gasto_codigo']):
+                centros.setdefault(conta, centro)
+        
+        df_pred = prever_frame(estado, self._metodos_estado(metodo, estado), periods=12)
+        df_pred['mes'] = np.asarray(MESES_ORDEM)[df_pred['data'].dt.month.to_numpy() - 1]
+        df_pred['centro_gasto_codigo'] = df_pred['conta_contabil_codigo'].astype(str).map(centros).fillna('00000000')
+        
+        cenario = session.get(ForecastCenario, cenario_id)
+        self._gravar_entradas(session, cenario, df_pred.rename(columns={'previsao': 'valor_previsto'}))
+
+    # =========================================================================
+    # ARMAZENAMENTO COLUNAR
+    # =========================================================================
+
+    def _gravar_entradas(self, session: Session, cenario: ForecastCenario, df: pd.DataFrame) -> None:
+        """Grava (ou substitui) as entradas do cenário como blob NPZ; não faz commit."""
+        df = df.reindex(columns=COLUNAS_CENARIO)
+        registro = session.query(ForecastCenarioDados).filter_by(cenario_id=cenario.id).first()
+        if registro is None:
+            registro = ForecastCenarioDados(cenario_id=cenario.id)
+            session.add(registro)
+        registro.dados = serializar_cenario(df)
+        
+        # Cenário convertido do formato antigo: descarta as linhas de forecast_entries
+        if cenario.formato != FORMATO_NPZ:
+            session.query(ForecastEntry).filter_by(cenario_id=cenario.id).delete(synchronize_session=False)
+        cenario.formato = FORMATO_NPZ
+        cenario.n_linhas = len(df)
+
+    def _ler_entradas(self, session: Session, cenario_id: int) -> pd.DataFrame:
+        """Entradas do cenário (COLUNAS_CENARIO), do blob ou das linhas legadas."""
+        registro = session.query(ForecastCenarioDados.dados).filter_by(cenario_id=cenario_id).first()
+        if registro is not None:
+            return desserializar_cenario(registro.dados)
+        
+        # Formato antigo: uma linha por entrada em forecast_entries
+        linhas = session.query(
+            ForecastEntry.mes, ForecastEntry.centro_gasto_codigo, ForecastEntry.conta_contabil_codigo,
+            ForecastEntry.metodo_calculo, ForecastEntry.valor_previsto
+        ).filter_by(cenario_id=cenario_id).all()
+        return pd.DataFrame(linhas, columns=COLUNAS_CENARIO)
+
+    def get_entradas_cenario(self, cenario_id: int) -> pd.DataFrame:
+        """
+        Entradas do cenário em formato colunar.
+        
+        Returns:
+            DataFrame com mes, centro_gasto_codigo, conta_contabil_codigo, metodo_calculo, valor_previsto
+        """
+        session = get_session()
+        try:
+            return self._ler_entradas(session, cenario_id)
+        finally:
+            session.close()
+
+    def comparar_cenarios(self, cenario_a: int, cenario_b: int, chaves: list = None) -> pd.DataFrame:
+        """
+        Diferença entre dois cenários (B - A), vetorizada sobre as entradas.
+        
+        Args:
+            cenario_a: ID do cenário base
+            cenario_b: ID do cenário comparado
+            chaves: Colunas de agregação (padrão: mes × centro × conta)
+            
+        Returns:
+            DataFrame com chaves, valor_a, valor_b, diferenca e variacao_pct
+        """
+        session = get_session()
+        try:
+            df_a = self._ler_entradas(session, cenario_a)
+            df_b = self._ler_entradas(session, cenario_b)
+        finally:
+            session.close()
+        return comparar_frames(df_a, df_b, chaves)
+
     def listar_cenarios(self) -> List[dict]:
         """Lista todos os cenários disponíveis."""
         session = get_session()
@@ -116,16 +474,13 @@ class ForecastService:
             session.close()
 
     def get_dados_cenario(self, cenario_id: int) -> pd.DataFrame:
-        """Retorna os dados detalhados de um cenário."""
-        session = get_session()
-        try:
-            entries = session.query(ForecastEntry).filter_by(cenario_id=cenario_id).all()
-            data = [{
-                'mes': e.mes,
-                'conta_contabil': e.conta_contabil_codigo,
-                'centro_custo': e.centro_gasto_codigo,
-                'valor_previsto': e.valor_previsto
-            } for e in entries]
-            return pd.DataFrame(data)
-        finally:
-            session.close()
+        """Retorna os dados detalhados de um cenário (uma linha por entrada)."""
+        df = self.get_entradas_cenario(cenario_id)
+        if df.empty:
+            return pd.DataFrame()
+        return pd.DataFrame({
+            'mes': df['mes'].astype(str),
+            'conta_contabil': df['conta_contabil_codigo'].astype(str),
+            'centro_custo': df['centro_gasto_codigo'].astype(str),
+            'valor_previsto': df['valor_previsto'].astype(float)
+        })
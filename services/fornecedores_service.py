@@ -0,0 +1,329 @@
+"""
+services/fornecedores_service.py
+================================
+Canonicalização de fornecedores do Razão de Gastos.
+
+`fornecedor` chega como texto livre ("ENGIE SERVICOS LTDA", "Engie Serviços
+Ltda."), o que divide o mesmo fornecedor nos rankings e na conciliação. Cada
+grafia é ligada a um fornecedor canônico (tabelas fornecedores e
+fornecedores_alias):
+
+1. Chave normalizada: sem acentos, maiúsculas, sem pontuação e sem sufixo
+   societário (LTDA, S/A, ME, EPP, EIRELI). Grafias com a mesma chave são o
+   mesmo fornecedor.
+2. Blocagem: só são comparados nomes que compartilham um token raro ou um
+   dos 4-gramas mais raros do nome (chaves de bloco com mais de MAX_BLOCO
+   nomes são descartadas), evitando comparar todos contra todos.
+3. Similaridade: coeficiente de Dice dos trigramas de caracteres das chaves;
+   pares acima de LIMIAR_SIMILARIDADE são unidos (union-find), do mais para
+   o menos parecido.
+
+Incremental: só grafias ainda sem alias são processadas, comparadas entre si
+e com as já conhecidas. Fornecedores existentes mantêm o id; uma grafia nova
+nunca funde dois fornecedores já cadastrados. `atualizar_fornecedores()` é
+chamada após cada upload do Razão (utils_financeiro/etl.py).
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import pandas as pd
+from sqlalchemy import func, insert
+
+from database.models import Fornecedor, FornecedorAlias, RazaoRealizado, get_session
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+LIMIAR_SIMILARIDADE = 0.80   # Dice de trigramas para unir duas grafias
+MAX_BLOCO = 50               # Chave de bloco mais comum que isso não gera pares
+NGRAMAS_POR_NOME = 2         # 4-gramas mais raros de cada nome usados como bloco
+TAMANHO_NOME = 200           # Coluna fornecedor do Razão
+
+SUFIXOS_SOCIETARIOS = {'LTDA', 'LTD', 'ME', 'EPP', 'EIRELI', 'MEI', 'SA', 'SS', 'INC'}
+PALAVRAS_VAZIAS = {'DE', 'DA', 'DO', 'DOS', 'DAS', 'E', 'EM'}
+
+_TEXTOS_VAZIOS = {'', 'NAN', 'NONE', 'N/A', 'NA', '<NA>'}
+_RE_SA = re.compile(r'\bS\s*[/.]\s*A\b\.?')
+_RE_NAO_ALFANUM = re.compile(r'[^0-9A-Z]+')
+
+
+# =============================================================================
+# NORMALIZAÇÃO E SIMILARIDADE
+# =============================================================================
+
+def normalizar_nome(nome) -> str:
+    """
+    Chave do fornecedor: "Engie Serviços Ltda." -> "ENGIE SERVICOS".
+
+    Returns:
+        Chave normalizada (vazia para None / NaN / 'N/A')
+    """
+    if nome is None or (isinstance(nome, float) and nome != nome):
+        return ''
+    texto = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode().upper().strip()
+    if texto in _TEXTOS_VAZIOS:
+        return ''
+    tokens = _RE_NAO_ALFANUM.sub(' ', _RE_SA.sub(' ', texto)).split()
+    while len(tokens) > 1 and tokens[-1] in SUFIXOS_SOCIETARIOS:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def _trigramas(chave: str) -> Set[str]:
+    texto = f"  {chave} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def similaridade(a: str, b: str) -> float:
+    """Dice dos trigramas de caracteres de duas chaves (0 a 1)."""
+    ta, tb = _trigramas(a), _trigramas(b)
+    return 2 * len(ta & tb) / (len(ta) + len(tb))
+
+
+def _ngramas(chave: str) -> Set[str]:
+    compacto = chave.replace(' ', '')
+    return {compacto[i:i + 4] for i in range(len(compacto) - 3)} or {compacto}
+
+
+def _chaves_bloco(chave: str, df_ngramas: Counter) -> Set[str]:
+    tokens = {f"t:{t}" for t in chave.split() if len(t) > 1 and t not in PALAVRAS_VAZIAS}
+    ngramas = _ngramas(chave)
+    raros = sorted(ngramas, key=lambda g: (df_ngramas[g], g))[:NGRAMAS_POR_NOME]
+    return tokens | {f"g:{g}" for g in raros}
+
+
+# =============================================================================
+# AGRUPAMENTO
+# =============================================================================
+
+class _UniaoBusca:
+    """Union-find em que cada grupo carrega no máximo um fornecedor existente."""
+
+    def __init__(self):
+        self.pai: Dict[str, str] = {}
+        self.fixo: Dict[str, int] = {}  # raiz -> fornecedor_id existente
+
+    def achar(self, x: str) -> str:
+        self.pai.setdefault(x, x)
+        raiz = x
+        while self.pai[raiz] != raiz:
+            raiz = self.pai[raiz]
+        while self.pai[x] != raiz:  # compressão de caminho
+            self.pai[x], x = raiz, self.pai[x]
+        return raiz
+
+    def unir(self, a: str, b: str) -> bool:
+        ra, rb = self.achar(a), self.achar(b)
+        if ra == rb:
+            return True
+        fa, fb = self.fixo.get(ra), self.fixo.get(rb)
+        if fa is not None and fb is not None and fa != fb:
+            return False  # não funde fornecedores já cadastrados
+        self.pai[rb] = ra
+        if fa is None and fb is not None:
+            self.fixo[ra] = fb
+        return True
+
+
+def agrupar(chaves_novas: Iterable[str], existentes: Dict[str, int]) -> Dict[str, Tuple[Optional[int], str, float]]:
+    """
+    Liga chaves novas a fornecedores existentes ou a grupos novos.
+
+    Args:
+        chaves_novas: Chaves normalizadas ainda sem fornecedor
+        existentes: {chave: fornecedor_id} já cadastradas
+
+    Returns:
+        {chave_nova: (fornecedor_id ou None se grupo novo, raiz do grupo, similaridade)}
+    """
+    novas = {c for c in chaves_novas if c and c not in existentes}
+    if not novas:
+        return {}
+
+    todas = list(existentes) + sorted(novas)
+    df_ngramas = Counter(g for c in todas for g in _ngramas(c))
+    blocos = defaultdict(list)
+    for chave in todas:
+        for bloco in _chaves_bloco(chave, df_ngramas):
+            blocos[bloco].append(chave)
+
+    # Pares candidatos: mesmo bloco, pequeno, com ao menos uma chave nova
+    pares = set()
+    for membros in blocos.values():
+        if len(membros) < 2 or len(membros) > MAX_BLOCO:
+            continue
+        novos_bloco = [m for m in membros if m in novas]
+        for a in novos_bloco:
+            for b in membros:
+                if a != b and (b not in novas or a < b):
+                    pares.add((a, b))
+
+    trigramas = {c: _trigramas(c) for c in {c for par in pares for c in par}}
+    aceitos = []
+    for a, b in pares:
+        ta, tb = trigramas[a], trigramas[b]
+        score = 2 * len(ta & tb) / (len(ta) + len(tb))
+        if score >= LIMIAR_SIMILARIDADE:
+            aceitos.append((score, a, b))
+
+    uniao = _UniaoBusca()
+    for chave, fornecedor_id in existentes.items():
+        uniao.fixo[uniao.achar(chave)] = fornecedor_id
+    melhor: Dict[str, float] = {}
+    for score, a, b in sorted(aceitos, reverse=True):
+        if uniao.unir(a, b):
+            for c in (a, b):
+                if c in novas:
+                    melhor[c] = max(melhor.get(c, 0.0), score)
+
+    resultado = {}
+    for chave in novas:
+        raiz = uniao.achar(chave)
+        resultado[chave] = (uniao.fixo.get(raiz), raiz, round(melhor.get(chave, 1.0), 4))
+    return resultado
+
+
+# =============================================================================
+# BANCO
+# =============================================================================
+
+_mapa_cache: Optional[Dict[str, str]] = None
+_lock = threading.Lock()
+
+
+def registrar_nomes(contagem: Dict[str, int], session=None) -> Dict:
+    """
+    Cadastra as grafias ainda sem alias (incremental).
+
+    Args:
+        contagem: {grafia: ocorrências} (a mais frequente de um grupo novo
+                  vira o nome canônico)
+        session: Sessão do banco (padrão: get_session())
+
+    Returns:
+        Dict com nomes_novos, fornecedores_novos e tempo_s
+    """
+    inicio = time.perf_counter()
+    propria = session is None
+    session = session or get_session()
+    try:
+        aliases = session.query(FornecedorAlias.nome, FornecedorAlias.chave, FornecedorAlias.fornecedor_id).all()
+        conhecidos = {nome for nome, _, _ in aliases}
+        existentes = {}
+        for _, chave, fornecedor_id in aliases:
+            existentes.setdefault(chave, fornecedor_id)
+
+        novos = {}
+        for nome, n in contagem.items():
+            nome = str(nome).strip()[:TAMANHO_NOME]
+            chave = normalizar_nome(nome)
+            if chave and nome not in conhecidos:
+                novos.setdefault(nome, [chave, 0])[1] += n
+        if not novos:
+            return {'nomes_novos': 0, 'fornecedores_novos': 0, 'tempo_s': time.perf_counter() - inicio}
+
+        grupos = agrupar({chave for chave, _ in novos.values()}, existentes)
+
+        # Grupos novos: um fornecedor por raiz, com a grafia mais frequente
+        por_raiz = defaultdict(Counter)
+        for nome, (chave, n) in novos.items():
+            if chave not in existentes and grupos[chave][0] is None:
+                por_raiz[grupos[chave][1]][nome] += n
+        raizes = list(por_raiz)
+        canonicos = [por_raiz[r].most_common(1)[0][0] for r in raizes]
+        ids_raiz = {}
+        if raizes:
+            # Insert em lote com RETURNING na ordem dos parâmetros (ids dos fornecedores novos)
+            ids = session.scalars(
+                insert(Fornecedor).returning(Fornecedor.id, sort_by_parameter_order=True),
+                [{'nome_canonico': c, 'chave': novos[c][0], 'data_criacao': datetime.now()} for c in canonicos]
+            ).all()
+            ids_raiz = dict(zip(raizes, ids))
+
+        alias = []
+        for nome, (chave, _) in novos.items():
+            if chave in existentes:
+                fornecedor_id, score = existentes[chave], 1.0
+            else:
+                fornecedor_id, raiz, score = grupos[chave]
+                if fornecedor_id is None:
+                    fornecedor_id = ids_raiz[raiz]
+            alias.append({'nome': nome, 'chave': chave, 'fornecedor_id': fornecedor_id,
+                          'similaridade': score, 'data_criacao': datetime.now()})
+        session.bulk_insert_mappings(FornecedorAlias, alias)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"Erro ao atualizar fornecedores: {e}")
+        return {'nomes_novos': 0, 'fornecedores_novos': 0, 'tempo_s': time.perf_counter() - inicio}
+    finally:
+        if propria:
+            session.close()
+
+    global _mapa_cache
+    with _lock:
+        _mapa_cache = None
+    return {'nomes_novos': len(novos), 'fornecedores_novos': len(por_raiz),
+            'tempo_s': time.perf_counter() - inicio}
+
+
+def atualizar_fornecedores(session=None) -> Dict:
+    """Cadastra as grafias novas do Razão (chamada após cada upload)."""
+    propria = session is None
+    session = session or get_session()
+    try:
+        contagem = dict(session.query(RazaoRealizado.fornecedor, func.count(RazaoRealizado.id))
+                        .group_by(RazaoRealizado.fornecedor).all())
+        contagem.pop(None, None)
+        return registrar_nomes(contagem, session)
+    except Exception as e:
+        print(f"Erro ao ler fornecedores do Razão: {e}")
+        return {'nomes_novos': 0, 'fornecedores_novos': 0, 'tempo_s': 0.0}
+    finally:
+        if propria:
+            session.close()
+
+
+def mapa_canonico() -> Dict[str, str]:
+    """{grafia: nome canônico} de todos os aliases (cache do processo)."""
+    global _mapa_cache
+    with _lock:
+        if _mapa_cache is None:
+            session = get_session()
+            try:
+                linhas = session.query(FornecedorAlias.nome, Fornecedor.nome_canonico) \
+                    .join(Fornecedor, Fornecedor.id == FornecedorAlias.fornecedor_id).all()
+                _mapa_cache = dict(linhas)
+            except Exception as e:
+                print(f"Erro ao carregar fornecedores canônicos: {e}")
+                return {}
+            finally:
+                session.close()
+        return _mapa_cache
+
+
+def canonicalizar(fornecedores: pd.Series) -> pd.Series:
+    """
+    Nome canônico de cada fornecedor (grafias sem cadastro ficam como estão).
+
+    Args:
+        fornecedores: Coluna fornecedor (ex: Razão filtrado)
+
+    Returns:
+        Série alinhada com o nome canônico
+    """
+    mapa = mapa_canonico()
+    if not mapa:
+        return fornecedores
+    chaves = fornecedores.astype(str).str.strip().str.slice(0, TAMANHO_NOME)
+    return chaves.map(mapa).fillna(fornecedores)
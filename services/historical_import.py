@@ -2,7 +2,8 @@
 import pandas as pd
 from sqlalchemy.orm import Session
 from database.models import get_session, LancamentoRealizado
-from data.referencias_manager import carregar_centros_gasto
+from database.fingerprint import sincronizar_por_fingerprint
+from data.referencias_manager import carregar_centros_gasto, enriquecer_centros_lote
 import streamlit as st
 import os
 
@@ -60,18 +61,6 @@ def run_historical_import():
     # 1. Carregar Referências
     log("📚 Carregando referências...")
     df_ref = carregar_centros_gasto()
-    mapa_ref = {}
-    if not df_ref.empty:
-        df_ref.columns = [c.upper().strip() for c in df_ref.columns]
-        for _, row in df_ref.iterrows():
-            codigo = str(row.get('CENTRO DE GASTO', '')).strip()
-            if codigo:
-                mapa_ref[codigo] = {
-                    'regional': row.get('REGIONAL'),
-                    'base': row.get('BASE'),
-                    'descricao': row.get('DESCRIÇÃO'),
-                    'classe': row.get('CLASSE')
-                }
 
     # 2. Ler Excel
     log(f"📂 Lendo Excel: {FILE_PATH}")
@@ -84,13 +73,22 @@ def run_historical_import():
     df.rename(columns={df.columns[0]: 'codigo_centro_gasto', df.columns[2]: 'conta_contabil'}, inplace=True)
     df['codigo_centro_gasto'] = df['codigo_centro_gasto'].fillna(0)
     
+    n_colunas_excel = len(df.columns)
+    
+    # Normalização + junção com a referência em uma única passada
+    # (as colunas de referência entram no fim, preservando os índices do Excel)
+    df = enriquecer_centros_lote(df, 'codigo_centro_gasto', df_ref)
+    sem_referencia = int((~df['centro_valido']).sum())
+    if sem_referencia:
+        log(f"⚠️ {sem_referencia} linhas com centro fora da base de referência")
+    
     lancamentos = []
     
     # Iterar
     for mes, indices in MAPA_MESES_IDX.items():
         # log(f"   > Processando {mes}...")
         cols_idx = list(indices.keys())
-        valid_cols = [c for c in cols_idx if c < len(df.columns)]
+        valid_cols = [c for c in cols_idx if c < n_colunas_excel]
         
         for idx in valid_cols:
             tipo_origem = indices[idx] 
@@ -112,28 +110,22 @@ def run_historical_import():
                 val_float = clean_money(valor)
                 if val_float == 0: continue
 
-                centro_str = str(centro).replace('.0', '').strip()
-                if len(centro_str) == 10: centro_str = '0' + centro_str
-                
-                ref_data = mapa_ref.get(centro_str, {})
-                
-                lanc = LancamentoRealizado(
+                lancamentos.append(dict(
                     ano=ano_lanc,
                     mes=mes,
-                    centro_gasto_codigo=centro_str,
-                    centro_gasto_pai=centro_str[:8] if len(centro_str) >= 8 else centro_str,
-                    centro_gasto_classe=ref_data.get('classe', '0')[-1] if ref_data.get('classe') else '0',
-                    centro_gasto_classe_nome=str(ref_data.get('classe', '')),
-                    centro_gasto_descricao=str(ref_data.get('descricao', '')),
+                    centro_gasto_codigo=centro,
+                    centro_gasto_pai=centro[:8],
+                    centro_gasto_classe=str(row['classe']) if pd.notna(row['classe']) else '0',
+                    centro_gasto_classe_nome=str(row['classe_nome']) if pd.notna(row['classe_nome']) else '',
+                    centro_gasto_descricao=str(row['descricao']) if pd.notna(row['descricao']) else '',
                     ativo='BASEAL',
-                    regional=ref_data.get('regional'),
-                    base=ref_data.get('base'),
+                    regional=row['regional'] if pd.notna(row['regional']) else None,
+                    base=row['base'] if pd.notna(row['base']) else None,
                     conta_contabil_codigo=str(conta),
                     conta_contabil_descricao=str(conta),
                     valor=val_float,
                     usuario='system/import_history'
-                )
-                lancamentos.append(lanc)
+                ))
 
     log(f"📊 Total de lançamentos preparados: {len(lancamentos)}")
     
@@ -142,16 +134,14 @@ def run_historical_import():
 
     session = get_session()
     try:
-        log("🧹 Limpando dados antigos (2024/2025)...")
-        session.query(LancamentoRealizado).filter(LancamentoRealizado.ano.in_([2024, 2025])).delete(synchronize_session=False)
-        
-        log("💾 Inserindo novos registros...")
-        chunk_size = 2000
-        for i in range(0, len(lancamentos), chunk_size):
-            chunk = lancamentos[i:i + chunk_size]
-            session.add_all(chunk)
-        
+        # Upsert por fingerprint: reimportar o mesmo arquivo não regrava nada
+        log("💾 Sincronizando registros (2024/2025)...")
+        resultado = sincronizar_por_fingerprint(
+            session, LancamentoRealizado, pd.DataFrame(lancamentos), LancamentoRealizado.ano.in_([2024, 2025])
+        )
         session.commit()
+        log(f"   {resultado['inseridos']} inseridos, {resultado['removidos']} removidos, "
+            f"{resultado['mantidos']} sem alteração")
         log("✅ Importação concluída!")
         return True, "Sucesso", logs
         
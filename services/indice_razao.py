@@ -0,0 +1,292 @@
+"""
+services/indice_razao.py
+========================
+Índice de busca local (TF-IDF) sobre o texto do Razão de Gastos.
+
+`razao_realizados.descricao` e `fornecedor` explicam de fato o gasto. O índice
+permite:
+- "encontrar lançamentos parecidos com X" na interface (< 100 ms)
+- recuperar os top-k lançamentos relevantes para uma pergunta e mandar só
+  eles ao prompt da IA, em vez de tabelas inteiras
+
+Vetorização: HashingVectorizer (n-gramas de caracteres, sem acentos), que não
+precisa de vocabulário ajustado; assim novos lançamentos entram sem refazer o
+índice. O IDF vem de contagens de documento por feature mantidas
+incrementalmente. Similaridade = cosseno (produto interno de vetores
+normalizados).
+
+Atualização incremental: `atualizar()` compara os ids do banco com os
+indexados, remove os apagados e vetoriza só os novos. É chamada após cada
+upload do Razão (utils_financeiro/etl.py).
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from database.models import RazaoRealizado, get_session
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+N_FEATURES = 2 ** 18
+K_PADRAO = 10
+
+COLUNAS_METADADOS = ['id', 'ano', 'mes', 'centro_gasto_codigo', 'conta_contabil_codigo',
+                     'fornecedor', 'descricao', 'valor']
+
+# Texto vazio vindo do ETL (str(None), str(NaN))
+_TEXTOS_VAZIOS = {'', 'nan', 'none', 'n/a'}
+
+
+def _texto_documento(fornecedor, descricao) -> str:
+    """Texto indexado de um lançamento: fornecedor + descrição."""
+    partes = [str(p).strip() for p in (fornecedor, descricao)
+              if p is not None and str(p).strip().lower() not in _TEXTOS_VAZIOS]
+    return " | ".join(partes)
+
+
+# =============================================================================
+# ÍNDICE
+# =============================================================================
+
+class IndiceRazao:
+    """Índice TF-IDF em memória dos lançamentos do Razão."""
+
+    def __init__(self, n_features: int = N_FEATURES):
+        self._vetorizador = HashingVectorizer(
+            n_features=n_features, analyzer='char_wb', ngram_range=(3, 4),
+            strip_accents='unicode', lowercase=True, alternate_sign=False, norm=None,
+        )
+        self._lock = threading.Lock()
+        self._tf = sp.csr_matrix((0, n_features), dtype=np.float32)
+        self._df_features = np.zeros(n_features, dtype=np.int64)
+        self._matriz: Optional[sp.csc_matrix] = None  # TF-IDF normalizado, por coluna (refeito sob demanda)
+        self._idf: Optional[np.ndarray] = None
+        self.metadados = pd.DataFrame(columns=COLUNAS_METADADOS)
+        self.atualizado_em: Optional[float] = None
+        self.ultima_atualizacao = {'adicionados': 0, 'removidos': 0, 'tempo_s': 0.0}
+
+    def __len__(self) -> int:
+        return len(self.metadados)
+
+    # -------------------------------------------------------------------------
+    # MANUTENÇÃO
+    # -------------------------------------------------------------------------
+
+    def _vetorizar(self, textos: List[str]) -> sp.csr_matrix:
+        """TF sublinear (1 + log tf) dos textos."""
+        tf = self._vetorizador.transform(textos).astype(np.float32).tocsr()
+        tf.data = 1.0 + np.log(tf.data)
+        return tf
+
+    def adicionar(self, registros: pd.DataFrame) -> int:
+        """
+        Indexa novos lançamentos.
+
+        Args:
+            registros: DataFrame com COLUNAS_METADADOS
+
+        Returns:
+            Quantidade indexada
+        """
+        if registros.empty:
+            return 0
+        registros = registros[COLUNAS_METADADOS].reset_index(drop=True)
+        textos = [_texto_documento(f, d) for f, d in zip(registros['fornecedor'], registros['descricao'])]
+        tf = self._vetorizar(textos)
+
+        with self._lock:
+            self._tf = sp.vstack([self._tf, tf], format='csr')
+            self._df_features += np.bincount(tf.indices, minlength=self._tf.shape[1])
+            self.metadados = pd.concat([self.metadados, registros], ignore_index=True) \
+                if len(self.metadados) else registros
+            self._matriz = None
+        return len(registros)
+
+    def remover(self, ids) -> int:
+        """Remove lançamentos do índice pelo id do banco."""
+        ids = set(ids)
+        if not ids:
+            return 0
+        with self._lock:
+            manter = ~self.metadados['id'].isin(ids).to_numpy()
+            removidos = self._tf[~manter]
+            self._df_features -= np.bincount(removidos.indices, minlength=self._tf.shape[1])
+            self._tf = self._tf[manter]
+            self.metadados = self.metadados[manter].reset_index(drop=True)
+            self._matriz = None
+            return int((~manter).sum())
+
+    def atualizar(self, session=None) -> Dict[str, float]:
+        """
+        Sincroniza com razao_realizados: remove ids apagados e indexa os novos.
+
+        Returns:
+            Dict com adicionados, removidos e tempo_s
+        """
+        inicio = time.perf_counter()
+        propria = session is None
+        session = session or get_session()
+        try:
+            ids_banco = {i for (i,) in session.query(RazaoRealizado.id)}
+            ids_indice = set(self.metadados['id'].tolist())
+            removidos = self.remover(ids_indice - ids_banco)
+
+            novos = sorted(ids_banco - ids_indice)
+            adicionados = 0
+            for i in range(0, len(novos), 5000):
+                lote = novos[i:i + 5000]
+                linhas = session.query(*[getattr(RazaoRealizado, c) for c in COLUNAS_METADADOS]) \
+                    .filter(RazaoRealizado.id.in_(lote)).all()
+                adicionados += self.adicionar(pd.DataFrame(linhas, columns=COLUNAS_METADADOS))
+        finally:
+            if propria:
+                session.close()
+
+        self.atualizado_em = time.time()
+        self.ultima_atualizacao = {'adicionados': adicionados, 'removidos': removidos,
+                                   'tempo_s': time.perf_counter() - inicio}
+        return self.ultima_atualizacao
+
+    def _matriz_tfidf(self):
+        """(matriz TF-IDF normalizada, idf, metadados), refeita só após mudanças no índice."""
+        with self._lock:
+            if self._matriz is None:
+                n = self._tf.shape[0]
+                self._idf = (np.log((1 + n) / (1 + self._df_features)) + 1).astype(np.float32)
+                # CSC: a consulta lê só as colunas (n-gramas) presentes no texto buscado
+                self._matriz = normalize(self._tf @ sp.diags(self._idf), copy=False).tocsc()
+            return self._matriz, self._idf, self.metadados
+
+    # -------------------------------------------------------------------------
+    # CONSULTA
+    # -------------------------------------------------------------------------
+
+    def _top_k(self, vetor: sp.csr_matrix, k: int, filtro: Optional[np.ndarray],
+               excluir: Optional[int] = None) -> pd.DataFrame:
+        matriz, _, metadados = self._matriz_tfidf()
+        if matriz.shape[0] == 0 or vetor.nnz == 0:
+            return pd.DataFrame(columns=COLUNAS_METADADOS + ['score'])
+
+        scores = matriz[:, vetor.indices] @ vetor.data
+        if filtro is not None:
+            scores[~filtro] = 0.0
+        if excluir is not None:
+            scores[excluir] = 0.0
+
+        k = min(k, int((scores > 0).sum()))
+        if k == 0:
+            return pd.DataFrame(columns=COLUNAS_METADADOS + ['score'])
+        topo = np.argpartition(-scores, k - 1)[:k]
+        topo = topo[np.argsort(-scores[topo])]
+        resultado = metadados.iloc[topo].reset_index(drop=True)
+        return resultado.assign(score=scores[topo].round(4))
+
+    def _filtro(self, metadados: pd.DataFrame, ano: int = None, centro: str = None) -> Optional[np.ndarray]:
+        if ano is None and centro is None:
+            return None
+        mascara = np.ones(len(metadados), dtype=bool)
+        if ano is not None:
+            mascara &= (metadados['ano'] == ano).to_numpy()
+        if centro is not None:
+            mascara &= (metadados['centro_gasto_codigo'] == centro).to_numpy()
+        return mascara
+
+    def buscar(self, consulta: str, k: int = K_PADRAO, ano: int = None, centro: str = None) -> pd.DataFrame:
+        """
+        Lançamentos mais parecidos com um texto livre.
+
+        Args:
+            consulta: Texto (ex: "manutenção de válvulas")
+            k: Quantidade de resultados
+            ano: Restringe ao ano
+            centro: Restringe ao centro de gasto
+
+        Returns:
+            DataFrame com COLUNAS_METADADOS + score (cosseno), do mais parecido
+        """
+        _, idf, metadados = self._matriz_tfidf()
+        vetor = normalize(self._vetorizar([consulta]) @ sp.diags(idf)).tocsr()
+        return self._top_k(vetor, k, self._filtro(metadados, ano, centro))
+
+    def similares(self, razao_id: int, k: int = K_PADRAO, ano: int = None) -> pd.DataFrame:
+        """Lançamentos parecidos com um lançamento já indexado (exceto ele mesmo)."""
+        _, idf, metadados = self._matriz_tfidf()
+        posicoes = np.flatnonzero(metadados['id'].to_numpy() == razao_id)
+        if len(posicoes) == 0:
+            return pd.DataFrame(columns=COLUNAS_METADADOS + ['score'])
+        pos = int(posicoes[0])
+        vetor = normalize(self._tf[pos] @ sp.diags(idf)).tocsr()
+        return self._top_k(vetor, k, self._filtro(metadados, ano), excluir=pos)
+
+    def estatisticas(self) -> Dict:
+        """Tamanho do índice e última atualização."""
+        with self._lock:
+            return {
+                'documentos': self._tf.shape[0],
+                'nnz': int(self._tf.nnz),
+                'atualizado_em': self.atualizado_em,
+                **self.ultima_atualizacao,
+            }
+
+
+# =============================================================================
+# INSTÂNCIA DO PROCESSO
+# =============================================================================
+
+_indice_global: Optional[IndiceRazao] = None
+_lock_global = threading.Lock()
+
+
+def get_indice_razao() -> IndiceRazao:
+    """Índice compartilhado pelo processo; construído do banco no primeiro uso."""
+    global _indice_global
+    with _lock_global:
+        if _indice_global is None:
+            indice = IndiceRazao()
+            try:
+                indice.atualizar()
+            except Exception as e:
+                print(f"Erro ao construir índice do Razão: {e}")
+            _indice_global = indice
+        return _indice_global
+
+
+def atualizar_indice_razao() -> None:
+    """Atualização incremental após carga do Razão (não interrompe o upload em caso de erro)."""
+    try:
+        get_indice_razao().atualizar()
+    except Exception as e:
+        print(f"Erro ao atualizar índice do Razão: {e}")
+
+
+def contexto_razao(consulta: str, k: int = 8, ano: int = None) -> str:
+    """
+    Lançamentos do Razão relevantes para uma pergunta, prontos para o prompt.
+
+    Returns:
+        Linhas compactas (vazio se nada relevante ou índice indisponível)
+    """
+    from services.compactador_prompt import linhas_tabela
+
+    try:
+        resultado = get_indice_razao().buscar(consulta, k=k, ano=ano)
+    except Exception as e:
+        print(f"Erro na busca do Razão: {e}")
+        return ""
+    if resultado.empty:
+        return ""
+    colunas = ['mes', 'centro_gasto_codigo', 'fornecedor', 'descricao', 'valor']
+    resultado = resultado.assign(descricao=resultado['descricao'].astype(str).str.slice(0, 120))
+    return "Lançamentos do Razão relacionados à pergunta:\n" + "\n".join(linhas_tabela(resultado, colunas))
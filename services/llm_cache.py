@@ -0,0 +1,255 @@
+"""
+services/llm_cache.py
+=====================
+Cache persistente de respostas de LLM.
+
+Chave = hash (blake2b) de modelo + prompt normalizado + versão dos dados. A
+mesma pergunta sobre os mesmos dados devolve a resposta gravada, sem nova
+chamada ao provedor (e sem custo).
+
+Normalização do prompt: Unicode NFKC, minúsculas, espaços colapsados e
+pontuação final removida, de modo que variações de digitação/indentação
+caiam na mesma chave.
+
+Armazenamento: tabela SQLite local (data/cache/llm_cache.db) com
+- TTL por entrada (LLM_CACHE_TTL_S, padrão 24h)
+- despejo por tamanho: acima de MAX_BYTES saem as entradas menos acessadas
+  recentemente (LRU por ultimo_acesso)
+
+Contadores de acertos/faltas em CacheLLM.estatisticas() (página Gestão de Dados).
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+DIRETORIO_CACHE = Path(__file__).resolve().parent.parent / "data" / "cache"
+ARQUIVO_CACHE = DIRETORIO_CACHE / "llm_cache.db"
+
+TTL_PADRAO_S = 24 * 3600
+MAX_BYTES_PADRAO = 20 * 1024 * 1024
+
+# Versão do formato das chaves: mudar ao alterar a normalização
+VERSAO_CHAVE = 'v1'
+
+SEM_VERSAO = 'sem-versao'
+
+
+# =============================================================================
+# CHAVES
+# =============================================================================
+
+def normalizar_prompt(texto: str) -> str:
+    """
+    Forma canônica do prompt para a chave do cache.
+
+    Args:
+        texto: Prompt original
+
+    Returns:
+        Prompt em minúsculas, NFKC, espaços colapsados, sem pontuação final
+    """
+    texto = unicodedata.normalize('NFKC', texto).lower()
+    texto = re.sub(r'\s+', ' ', texto).strip()
+    return texto.rstrip(' ?!.;:')
+
+
+def chave_llm(modelo: str, messages: List[Dict], versao_dados: Optional[str] = None) -> str:
+    """
+    Chave de cache de uma consulta.
+
+    Args:
+        modelo: Nome do modelo (ex: gemini-3-pro-preview)
+        messages: Mensagens no formato [{"role": ..., "content": ...}]
+        versao_dados: Versão dos dados que embasam a resposta
+
+    Returns:
+        Hash hexadecimal (32 caracteres)
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{VERSAO_CHAVE}|{modelo}|{versao_dados or SEM_VERSAO}".encode())
+    for msg in messages:
+        h.update(f"|{msg.get('role', '')}:".encode())
+        h.update(normalizar_prompt(str(msg.get('content', ''))).encode())
+    return h.hexdigest()
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class CacheLLM:
+    """Respostas de LLM em SQLite com TTL e limite de tamanho."""
+
+    def __init__(self, arquivo: Path = ARQUIVO_CACHE, ttl_s: float = TTL_PADRAO_S,
+                 max_bytes: int = MAX_BYTES_PADRAO):
+        self.arquivo = Path(arquivo)
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._zerar_contadores()
+
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_respostas (
+                    chave TEXT PRIMARY KEY,
+                    modelo TEXT,
+                    resposta TEXT,
+                    tamanho INTEGER,
+                    criado_em REAL,
+                    ultimo_acesso REAL,
+                    acessos INTEGER DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_ultimo_acesso ON llm_respostas (ultimo_acesso)")
+
+    def _zerar_contadores(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.expirados = 0
+        self.evictions = 0
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.arquivo, timeout=5)
+
+    # -------------------------------------------------------------------------
+    # LEITURA / ESCRITA
+    # -------------------------------------------------------------------------
+
+    def obter(self, chave: str) -> Optional[str]:
+        """Resposta gravada para a chave (None = falta ou expirada)."""
+        agora = time.time()
+        try:
+            with self._conectar() as conn:
+                linha = conn.execute(
+                    "SELECT resposta, criado_em FROM llm_respostas WHERE chave = ?", (chave,)
+                ).fetchone()
+                if linha is not None and agora - linha[1] > self.ttl_s:
+                    conn.execute("DELETE FROM llm_respostas WHERE chave = ?", (chave,))
+                    with self._lock:
+                        self.expirados += 1
+                    linha = None
+                if linha is not None:
+                    conn.execute(
+                        "UPDATE llm_respostas SET ultimo_acesso = ?, acessos = acessos + 1 WHERE chave = ?",
+                        (agora, chave)
+                    )
+        except sqlite3.Error as e:
+            print(f"Erro ao ler cache de LLM: {e}")
+            linha = None
+
+        with self._lock:
+            if linha is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return linha[0]
+
+    def guardar(self, chave: str, modelo: str, resposta: str) -> None:
+        """Grava uma resposta e aplica o limite de tamanho."""
+        agora = time.time()
+        tamanho = len(resposta.encode('utf-8'))
+        try:
+            with self._conectar() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_respostas "
+                    "(chave, modelo, resposta, tamanho, criado_em, ultimo_acesso, acessos) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (chave, modelo, resposta, tamanho, agora, agora)
+                )
+                self._despejar(conn)
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar cache de LLM: {e}")
+
+    def _despejar(self, conn: sqlite3.Connection) -> None:
+        """Remove expirados e, acima de max_bytes, os menos acessados recentemente."""
+        conn.execute("DELETE FROM llm_respostas WHERE criado_em < ?", (time.time() - self.ttl_s,))
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM llm_respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        removidas = []
+        for chave, tamanho in conn.execute(
+            "SELECT chave, tamanho FROM llm_respostas ORDER BY ultimo_acesso ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            removidas.append((chave,))
+            total -= tamanho
+        conn.executemany("DELETE FROM llm_respostas WHERE chave = ?", removidas)
+        with self._lock:
+            self.evictions += len(removidas)
+
+    # -------------------------------------------------------------------------
+    # MANUTENÇÃO
+    # -------------------------------------------------------------------------
+
+    def limpar(self) -> None:
+        """Esvazia o cache e zera os contadores."""
+        with self._conectar() as conn:
+            conn.execute("DELETE FROM llm_respostas")
+        with self._lock:
+            self._zerar_contadores()
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Contadores do processo e ocupação da tabela."""
+        try:
+            with self._conectar() as conn:
+                itens, bytes_, acessos = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(tamanho), 0), COALESCE(SUM(acessos), 0) FROM llm_respostas"
+                ).fetchone()
+        except sqlite3.Error:
+            itens, bytes_, acessos = 0, 0, 0
+
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expirados': self.expirados,
+                'evictions': self.evictions,
+                'taxa_acerto': self.hits / consultas if consultas else 0.0,
+                'itens': itens,
+                'bytes': bytes_,
+                'max_bytes': self.max_bytes,
+                'acessos_gravados': acessos,
+                'ttl_s': self.ttl_s,
+                'arquivo': str(self.arquivo),
+            }
+
+
+# =============================================================================
+# INSTÂNCIA DO PROCESSO
+# =============================================================================
+
+_cache_global: Optional[CacheLLM] = None
+_lock_global = threading.Lock()
+
+
+def get_cache_llm() -> CacheLLM:
+    """
+    Cache compartilhado pelo processo (todas as sessões do Streamlit).
+
+    TTL e tamanho vêm de LLM_CACHE_TTL_S e LLM_CACHE_MAX_MB, se definidos.
+    """
+    global _cache_global
+    with _lock_global:
+        if _cache_global is None:
+            ttl = float(os.getenv("LLM_CACHE_TTL_S", TTL_PADRAO_S))
+            max_bytes = int(float(os.getenv("LLM_CACHE_MAX_MB", MAX_BYTES_PADRAO / 1024 / 1024)) * 1024 * 1024)
+            _cache_global = CacheLLM(ttl_s=ttl, max_bytes=max_bytes)
+        return _cache_global
@@ -0,0 +1,296 @@
+"""
+services/simulacao_orcamento.py
+===============================
+Simulação de Monte Carlo do fechamento do ano (execução x orçamento ajustado).
+
+Para cada série centro × conta:
+1. Previsão pontual dos meses restantes do ano (motor em lote)
+2. Resíduos históricos em torno da tendência (MQO por série)
+3. Bootstrap: cada caminho sorteia, para cada mês restante, um mês do
+   histórico e soma os resíduos desse mês. O sorteio é o mesmo para todas as
+   séries de um caminho, preservando a correlação entre centros/contas
+   (choques comuns), o que importa ao somar por base.
+
+Sobre a distribuição de cada centro somam-se as provisões pendentes e
+compara-se com o orçamento ajustado pelos remanejamentos aprovados.
+
+Convenção de sinal do sistema: custos negativos. Estouro = execução abaixo
+(mais negativa) do orçamento ajustado.
+
+Autor: Sistema Orçamentário 2026
+Data: Fevereiro/2026
+"""
+
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.forecast_engine import prever_esparso
+from services.forecast_hierarquico import montar_folhas, anexar_hierarquia
+
+# =============================================================================
+# CONSTANTES
+# =============================================================================
+
+N_CAMINHOS_PADRAO = 10_000
+
+# Caminhos por lote (limita a memória da matriz de contagens)
+TAMANHO_LOTE_CAMINHOS = 2_000
+
+QUANTIS = (0.05, 0.50, 0.95)
+
+SEM_BASE = 'Não Identificada'
+
+
+# =============================================================================
+# NÚCLEO VETORIZADO
+# =============================================================================
+
+def residuos_mqo(matriz: np.ndarray) -> np.ndarray:
+    """
+    Resíduos de uma reta (MQO sobre o índice do calendário) por série.
+
+    Args:
+        matriz: Array [S, T] (NaN = sem dado)
+
+    Returns:
+        Array [S, T] de resíduos (NaN onde não há dado; 0 em séries com < 3 pontos)
+    """
+    valido = ~np.isnan(matriz)
+    y = np.where(valido, matriz, 0.0)
+    t = np.broadcast_to(np.arange(matriz.shape[1], dtype=float), matriz.shape)
+    m = valido.astype(float)
+
+    n = m.sum(axis=1)
+    n_seguro = np.maximum(n, 1)
+    t_medio = (m * t).sum(axis=1) / n_seguro
+    y_medio = y.sum(axis=1) / n_seguro
+    dt = np.where(valido, t - t_medio[:, None], 0.0)
+    dy = np.where(valido, y - y_medio[:, None], 0.0)
+    stt = (dt ** 2).sum(axis=1)
+    b = np.divide((dt * dy).sum(axis=1), stt, out=np.zeros_like(stt), where=stt > 0)
+
+    residuos = dy - b[:, None] * dt
+    residuos[n < 3] = 0.0
+    return np.where(valido, residuos, np.nan)
+
+
+def simular_totais(base: np.ndarray,
+                   residuos_grupo: np.ndarray,
+                   n_meses: int,
+                   n_caminhos: int = N_CAMINHOS_PADRAO,
+                   seed: Optional[int] = 42,
+                   tamanho_lote: int = TAMANHO_LOTE_CAMINHOS) -> np.ndarray:
+    """
+    Caminhos do total de cada grupo: base + soma de n_meses resíduos sorteados.
+
+    O sorteio é por mês do histórico (coluna de residuos_grupo), comum a todos
+    os grupos do caminho; soma de resíduos = contagens [P, T] @ resíduos [T, G].
+
+    Args:
+        base: Array [G] com o valor determinístico de cada grupo
+        residuos_grupo: Array [G, T] de resíduos já somados por grupo
+        n_meses: Meses sorteados por caminho
+        n_caminhos: Número de caminhos
+        seed: Semente (None = aleatório)
+        tamanho_lote: Caminhos por lote
+
+    Returns:
+        Array [n_caminhos, G]
+    """
+    G, T = residuos_grupo.shape
+    caminhos = np.repeat(base[None, :].astype(float), n_caminhos, axis=0)
+    if n_meses <= 0 or T == 0:
+        return caminhos
+
+    rng = np.random.default_rng(seed)
+    residuos_t = np.nan_to_num(residuos_grupo).T  # [T, G]
+    for inicio in range(0, n_caminhos, tamanho_lote):
+        lote = min(tamanho_lote, n_caminhos - inicio)
+        sorteio = rng.integers(0, T, size=(lote, n_meses))
+        # Quantas vezes cada mês do histórico saiu em cada caminho
+        deslocado = sorteio + (np.arange(lote) * T)[:, None]
+        contagens = np.bincount(deslocado.ravel(), minlength=lote * T).reshape(lote, T)
+        caminhos[inicio:inicio + lote] += contagens @ residuos_t
+    return caminhos
+
+
+def _somar_por_grupo(valores: np.ndarray, grupos: np.ndarray, n_grupos: int) -> np.ndarray:
+    """Soma as linhas de `valores` ([S] ou [S, T]) por grupo (NaN = 0)."""
+    soma = np.zeros((n_grupos,) + valores.shape[1:])
+    np.add.at(soma, grupos, np.nan_to_num(valores))
+    return soma
+
+
+def _resumir(caminhos: np.ndarray, limite: np.ndarray) -> Dict[str, np.ndarray]:
+    """Média, quantis e probabilidade de estouro (execução < limite) por coluna."""
+    q = np.quantile(caminhos, QUANTIS, axis=0)
+    return {
+        'media': caminhos.mean(axis=0),
+        'p05': q[0], 'p50': q[1], 'p95': q[2],
+        'prob_estouro': (caminhos < limite[None, :]).mean(axis=0),
+    }
+
+
+# =============================================================================
+# SIMULAÇÃO DO FECHAMENTO
+# =============================================================================
+
+def meses_restantes(ultimo_mes: pd.Timestamp, ano: int) -> int:
+    """Meses entre o último mês fechado e dezembro do ano (0 se já fechou)."""
+    return max(ano * 12 + 12 - (ultimo_mes.year * 12 + ultimo_mes.month), 0)
+
+
+def simular_fechamento(df_historico: pd.DataFrame,
+                       df_orcado: pd.DataFrame,
+                       df_provisoes: pd.DataFrame = None,
+                       df_ajustes: pd.DataFrame = None,
+                       ano: int = 2026,
+                       metodo: str = 'hybrid',
+                       n_caminhos: int = N_CAMINHOS_PADRAO,
+                       seed: Optional[int] = 42,
+                       df_centros: pd.DataFrame = None) -> Dict:
+    """
+    Distribuição da execução do ano por centro e por base.
+
+    Args:
+        df_historico: Realizado ['data_ref', 'centro_gasto_codigo', 'conta_contabil_codigo', 'valor']
+        df_orcado: Orçamento do ano ['centro_gasto_codigo', 'valor_orcado']
+        df_provisoes: Provisões pendentes ['centro_gasto_codigo', 'valor_estimado']
+        df_ajustes: Remanejamentos aprovados ['centro_gasto_codigo', 'ajuste']
+            (positivo = aumento de orçamento)
+        ano: Ano simulado
+        metodo: Método da previsão pontual dos meses restantes
+        n_caminhos: Número de caminhos
+        seed: Semente do bootstrap
+        df_centros: Base de centros (para a base operacional); None = referência
+
+    Returns:
+        Dict com:
+            centros: DataFrame por centro (orçado, ajuste, orcado_ajustado, realizado,
+                previsao_restante, provisionado, media, p05, p50, p95, prob_estouro)
+            bases: DataFrame por base (mesmas métricas)
+            total: Dict com as métricas do total geral
+            caminhos_total: Array [n_caminhos] da execução total
+            meses_restantes, n_series, tempo_s
+    """
+    inicio = time.perf_counter()
+    matriz, folhas, calendario = montar_folhas(df_historico)
+
+    ultimo = calendario[-1] if len(calendario) else pd.Timestamp(year=ano, month=1, day=1) - pd.DateOffset(months=1)
+    h = meses_restantes(ultimo, ano)
+
+    # Previsão pontual dos meses restantes e realizado do ano, por folha
+    if h > 0 and len(folhas):
+        previsao = prever_esparso(matriz, calendario, method=metodo, periods=h)[0].sum(axis=1)
+    else:
+        previsao = np.zeros(len(folhas))
+    colunas_ano = np.asarray(calendario.year == ano) if len(calendario) else np.zeros(0, dtype=bool)
+    realizado = np.nan_to_num(matriz[:, colunas_ano]).sum(axis=1)
+
+    # Universo de centros: histórico, orçamento, provisões e remanejamentos
+    def _por_centro(df, coluna):
+        if df is None or df.empty:
+            return pd.Series(dtype=float)
+        return df.groupby(df['centro_gasto_codigo'].astype(str))[coluna].sum()
+
+    orcado = _por_centro(df_orcado, 'valor_orcado')
+    provisionado = _por_centro(df_provisoes, 'valor_estimado')
+    ajuste = _por_centro(df_ajustes, 'ajuste')
+    centros = pd.Index(
+        pd.unique(np.concatenate([
+            folhas['centro_gasto_codigo'].astype(str).to_numpy(),
+            orcado.index.to_numpy(), provisionado.index.to_numpy(), ajuste.index.to_numpy()
+        ]))
+    ).sort_values()
+    C = len(centros)
+
+    grupos = centros.get_indexer(folhas['centro_gasto_codigo'].astype(str))
+    df_c = pd.DataFrame({'centro_gasto_codigo': centros})
+    df_c['orcado'] = orcado.reindex(centros).fillna(0.0).to_numpy()
+    df_c['ajuste'] = ajuste.reindex(centros).fillna(0.0).to_numpy()
+    # Custos negativos: aumento de orçamento torna o limite mais negativo
+    df_c['orcado_ajustado'] = df_c['orcado'] - df_c['ajuste']
+    df_c['realizado'] = _somar_por_grupo(realizado, grupos, C)
+    df_c['previsao_restante'] = _somar_por_grupo(previsao, grupos, C)
+    df_c['provisionado'] = provisionado.reindex(centros).fillna(0.0).to_numpy()
+
+    # Bootstrap dos resíduos (somados por centro antes do sorteio)
+    residuos_centro = _somar_por_grupo(residuos_mqo(matriz), grupos, C)
+    base = (df_c['realizado'] + df_c['previsao_restante'] + df_c['provisionado']).to_numpy()
+    caminhos = simular_totais(base, residuos_centro, h, n_caminhos=n_caminhos, seed=seed)
+
+    resumo = _resumir(caminhos, df_c['orcado_ajustado'].to_numpy())
+    for nome, valores in resumo.items():
+        df_c[nome] = valores
+
+    # Por base operacional (soma dos caminhos dos centros)
+    df_c['base'] = anexar_hierarquia(df_c[['centro_gasto_codigo']], df_centros)['base'].to_numpy()
+    df_c['base'] = df_c['base'].replace({'N/D': SEM_BASE})
+    bases, grupo_base = np.unique(df_c['base'].astype(str), return_inverse=True)
+    pertence = np.zeros((C, len(bases)))
+    pertence[np.arange(C), grupo_base] = 1.0
+    caminhos_base = caminhos @ pertence
+
+    colunas_soma = ['orcado', 'ajuste', 'orcado_ajustado', 'realizado', 'previsao_restante', 'provisionado']
+    df_b = df_c.groupby('base', sort=True)[colunas_soma].sum().reindex(bases).reset_index()
+    df_b['qtd_centros'] = np.bincount(grupo_base, minlength=len(bases))
+    for nome, valores in _resumir(caminhos_base, df_b['orcado_ajustado'].to_numpy()).items():
+        df_b[nome] = valores
+
+    caminhos_total = caminhos.sum(axis=1)
+    limite_total = df_c['orcado_ajustado'].sum()
+    total = {nome: float(v[0]) for nome, v in _resumir(caminhos_total[:, None], np.array([limite_total])).items()}
+    total['orcado_ajustado'] = float(limite_total)
+
+    return {
+        'centros': df_c.sort_values('prob_estouro', ascending=False).reset_index(drop=True),
+        'bases': df_b.sort_values('prob_estouro', ascending=False).reset_index(drop=True),
+        'total': total,
+        'caminhos_total': caminhos_total,
+        'meses_restantes': h,
+        'n_series': len(folhas),
+        'tempo_s': time.perf_counter() - inicio,
+    }
+
+
+# =============================================================================
+# SERVIÇO
+# =============================================================================
+
+class SimulacaoOrcamentoService:
+    """Reúne realizado, orçamento, provisões e remanejamentos e roda a simulação."""
+
+    def simular(self, ano: int = 2026, metodo: str = 'hybrid',
+                n_caminhos: int = N_CAMINHOS_PADRAO, seed: Optional[int] = 42) -> Dict:
+        """
+        Simulação do fechamento com os dados do banco e do orçamento V1.
+
+        Args:
+            ano: Ano simulado (histórico = ano anterior + ano corrente)
+            metodo: Método da previsão pontual
+            n_caminhos: Número de caminhos
+            seed: Semente do bootstrap
+
+        Returns:
+            Dict de simular_fechamento
+        """
+        from data.comparador import get_historico_folhas, get_orcamento_por_centro
+        from services.provisioning_service import ProvisioningService
+        from services.budget_control import BudgetControlService
+
+        df_historico = get_historico_folhas((ano - 1, ano))
+        df_orcado = get_orcamento_por_centro()
+
+        provisoes = ProvisioningService().listar_provisoes(status='PENDENTE')
+        df_provisoes = pd.DataFrame(provisoes, columns=['centro_gasto_codigo', 'valor_estimado']) if provisoes else None
+
+        ajustes = BudgetControlService().get_ajustes_por_centro()
+        df_ajustes = pd.DataFrame({'centro_gasto_codigo': list(ajustes), 'ajuste': list(ajustes.values())})
+
+        return simular_fechamento(
+            df_historico, df_orcado, df_provisoes, df_ajustes,
+            ano=ano, metodo=metodo, n_caminhos=n_caminhos, seed=seed
+        )
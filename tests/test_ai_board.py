@@ -0,0 +1,293 @@
+"""
+tests/test_ai_board.py
+======================
+Orquestração do AI Board com o provedor local (sem rede).
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ai_board import (
+    AIBoard, MODO_SEQUENCIAL, STATUS_OK, STATUS_TIMEOUT, STATUS_ERRO,
+    EVENTO_TRECHO, EVENTO_FIM, EVENTO_RESULTADO, CHAIRMAN,
+)
+from services.ai_provedores import ProvedorIA, ProvedorLocal
+from services.contexto_financeiro import (
+    montar_snapshot, get_snapshot, estatisticas_snapshot, formatar_snapshot, invalidar_snapshots
+)
+import services.contexto_financeiro as contexto_financeiro
+from services.compactador_prompt import compactar_dataframe, estimar_tokens, numero_compacto
+from services.llm_cache import CacheLLM, chave_llm, normalizar_prompt
+import services.llm_cache as llm_cache
+
+
+def criar_board(provedor, **kwargs):
+    board = AIBoard("", "Gemini 3 Pro", provedor=provedor, **kwargs)
+    board._get_contexto_financeiro = lambda: "Resumo YTD: contexto de teste"
+    return board
+
+
+def test_board_paralelo():
+    print(">>> Board: paralelo x sequencial")
+    latencia = 0.2
+
+    board = criar_board(ProvedorLocal(latencia_s=latencia))
+    inicio = time.perf_counter()
+    resultado = board.realizar_reuniao_board("Há risco de estouro?")
+    tempo_paralelo = time.perf_counter() - inicio
+
+    board_seq = criar_board(ProvedorLocal(latencia_s=latencia), modo=MODO_SEQUENCIAL)
+    inicio = time.perf_counter()
+    resultado_seq = board_seq.realizar_reuniao_board("Há risco de estouro?")
+    tempo_sequencial = time.perf_counter() - inicio
+
+    print(f"[INFO] paralelo {tempo_paralelo:.2f}s | sequencial {tempo_sequencial:.2f}s")
+    # 3 personas + Chairman: paralelo ~ 2 latências, sequencial ~ 4
+    assert tempo_paralelo < 3 * latencia
+    assert tempo_sequencial >= 4 * latencia
+    assert resultado['opinioes'] == resultado_seq['opinioes']
+    assert all(s['status'] == STATUS_OK for s in resultado['status'].values())
+    assert resultado['sintese'].startswith('[CHAIRMAN]')
+    print("[OK] Personas consultadas em paralelo com o mesmo resultado.")
+
+
+def test_provedor_incompleto():
+    print(">>> Provedor sem responder")
+
+    class ProvedorIncompleto(ProvedorIA):
+        nome = 'incompleto'
+
+    # Falha na criação, não no meio da reunião
+    try:
+        ProvedorIncompleto()
+        assert False, "provedor sem responder deveria falhar ao ser criado"
+    except TypeError:
+        pass
+    print("[OK] Provedor incompleto rejeitado na instanciação.")
+
+
+def test_board_resultado_parcial():
+    print(">>> Board: timeout e falha de persona")
+    provedor = ProvedorLocal(latencia_s=0.05, latencia_por_persona={'Auditor': 5.0}, falhar={'Controller'})
+    board = criar_board(provedor, timeout_persona_s={'CFO': 2.0, 'Controller': 2.0, 'Auditor': 0.3})
+
+    inicio = time.perf_counter()
+    resultado = board.realizar_reuniao_board("Como está G&A?")
+    tempo = time.perf_counter() - inicio
+
+    status = resultado['status']
+    assert status['CFO']['status'] == STATUS_OK
+    assert status['Controller']['status'] == STATUS_ERRO
+    assert status['Auditor']['status'] == STATUS_TIMEOUT
+    assert tempo < 1.5, f"Timeout não respeitado: {tempo:.2f}s"
+    # Chairman sintetiza com o que chegou
+    assert resultado['sintese'].startswith('[CHAIRMAN]')
+    assert 'Falha simulada' in resultado['opinioes']['Controller']
+
+    # Nenhuma persona respondeu: sem chamada ao Chairman
+    provedor = ProvedorLocal(falhar={'CFO', 'Controller', 'Auditor'})
+    resultado = criar_board(provedor).realizar_reuniao_board("?")
+    assert provedor.chamadas == 3
+    assert 'Nenhum membro' in resultado['sintese']
+    print("[OK] Timeout cancelado e resultado parcial sintetizado.")
+
+
+def test_board_streaming():
+    print(">>> Board: streaming por persona")
+    latencia = 0.2
+    board = criar_board(ProvedorLocal(latencia_s=latencia, intervalo_trecho_s=0.01))
+
+    inicio = time.perf_counter()
+    primeiro_trecho = None
+    ordem, textos, resultado = [], {}, None
+    for evento, persona, dado in board.transmitir_reuniao("Há risco de estouro?"):
+        if evento == EVENTO_TRECHO:
+            if primeiro_trecho is None:
+                primeiro_trecho = time.perf_counter() - inicio
+            ordem.append(persona)
+            textos[persona] = textos.get(persona, '') + dado
+        elif evento == EVENTO_RESULTADO:
+            resultado = dado
+    total = time.perf_counter() - inicio
+
+    print(f"[INFO] primeiro trecho {primeiro_trecho:.2f}s | total {total:.2f}s")
+    # Latência percebida = tempo até o primeiro trecho, não a reunião inteira
+    assert primeiro_trecho < 1.5 * latencia < total
+    # Personas transmitem ao mesmo tempo: trechos intercalados antes do Chairman
+    personas = ordem[:ordem.index(CHAIRMAN)]
+    trocas = sum(1 for a, b in zip(personas, personas[1:]) if a != b)
+    assert trocas > len(set(personas)), f"Trechos não intercalados: {personas}"
+
+    # Mesmo conteúdo da reunião sem streaming
+    esperado = criar_board(ProvedorLocal(latencia_s=0.0)).realizar_reuniao_board("Há risco de estouro?")
+    assert resultado['opinioes'] == esperado['opinioes']
+    assert resultado['sintese'] == textos[CHAIRMAN] == esperado['sintese']
+    assert all(s['status'] == STATUS_OK and s['ttft_s'] is not None for s in resultado['status'].values())
+
+    # Timeout/falha: persona lenta é cancelada e o resultado segue parcial
+    provedor = ProvedorLocal(latencia_s=0.05, latencia_por_persona={'Auditor': 5.0}, falhar={'Controller'})
+    board = criar_board(provedor, timeout_persona_s={'CFO': 2.0, 'Controller': 2.0, 'Auditor': 0.3})
+    inicio = time.perf_counter()
+    eventos = list(board.transmitir_reuniao("Como está G&A?"))
+    assert time.perf_counter() - inicio < 1.5
+    fins = {p: d['status'] for e, p, d in eventos if e == EVENTO_FIM}
+    assert fins == {'CFO': STATUS_OK, 'Controller': STATUS_ERRO, 'Auditor': STATUS_TIMEOUT}
+    assert eventos[-1][0] == EVENTO_RESULTADO and eventos[-1][2]['sintese'].startswith('[CHAIRMAN]')
+    print("[OK] Trechos das personas chegam intercalados, com o mesmo texto final.")
+
+
+def test_snapshot_contexto():
+    print(">>> Snapshot financeiro compartilhado")
+    df_mensal = pd.DataFrame({
+        'mes': ['JAN', 'FEV'], 'orcado': [-1000.0, -2000.0], 'realizado': [-900.0, 0.0],
+        'provisionado': [-50.0, 0.0], 'desvio': [50.0, 2000.0],
+    })
+    df_centros = pd.DataFrame({
+        'centro_gasto_codigo': ['A', 'B', 'C'], 'ativo': ['X', 'X', 'Y'],
+        'orcado': [-100.0, -5000.0, -300.0], 'total_executado': [-400.0, 0.0, -300.0],
+        'desvio': pd.Series([-300.0, 5000.0, 0.0], dtype=object), 'desvio_pct': [300.0, -100.0, 0.0],
+    })
+    df_prov = pd.DataFrame({'centro_gasto_codigo': ['A', 'A', 'B'], 'valor_estimado': [-10.0, -20.0, -5.0]})
+    df_rem = pd.DataFrame({'status': ['APROVADO', 'SOLICITADO', 'APROVADO'], 'valor': [100.0, 50.0, 25.0]})
+
+    snapshot = montar_snapshot(2026, 'abc', df_mensal, df_centros, df_prov, df_rem, n_desvios=2)
+    assert list(snapshot.top_desvios['centro_gasto_codigo']) == ['B', 'A']
+    assert snapshot.provisoes_pendentes.iloc[0]['qtd'] == 2
+    assert snapshot.remanejamentos.set_index('status').loc['APROVADO', 'valor'] == 125.0
+    assert snapshot.totais['desvio'] == 2050.0
+    assert 'versão abc' in snapshot.texto and 'SISTEMA NOTICE' not in snapshot.texto
+
+    vazio = montar_snapshot(2026, 'v', pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+    assert 'não disponíveis' in vazio.texto
+
+    # Cache do processo sobre dados controlados (sem ler o banco nem o orçamento)
+    versao = {'atual': 'v1'}
+    construidas = []
+
+    def construir(ano, versao_snapshot=None):
+        construidas.append(versao_snapshot)
+        return montar_snapshot(ano, versao_snapshot, df_mensal, df_centros, df_prov, df_rem)
+
+    originais = (contexto_financeiro.versao_dados, contexto_financeiro.construir_snapshot,
+                 contexto_financeiro.INTERVALO_VERIFICACAO_S)
+    contexto_financeiro.versao_dados = lambda ano=2026: versao['atual']
+    contexto_financeiro.construir_snapshot = construir
+    contexto_financeiro.INTERVALO_VERIFICACAO_S = 0.0  # confere a versão a cada chamada
+    invalidar_snapshots()
+    try:
+        antes = estatisticas_snapshot()
+        s1, s2 = get_snapshot(2026), get_snapshot(2026)
+        assert s1 is s2 and construidas == ['v1']
+
+        # Versão nova: reconstrói uma vez
+        versao['atual'] = 'v2'
+        s3 = get_snapshot(2026)
+        assert s3 is not s1 and s3.versao == 'v2' and construidas == ['v1', 'v2']
+        depois = estatisticas_snapshot()
+        assert depois['construcoes'] - antes['construcoes'] == 2
+        assert depois['reusos'] - antes['reusos'] == 1
+    finally:
+        (contexto_financeiro.versao_dados, contexto_financeiro.construir_snapshot,
+         contexto_financeiro.INTERVALO_VERIFICACAO_S) = originais
+        invalidar_snapshots()
+    print("[OK] Snapshot montado uma vez por versão e reaproveitado.")
+
+
+def test_compactador_prompt():
+    print(">>> Compactação de prompt com orçamento de tokens")
+    assert numero_compacto(-1_234_567) == '-1,2 mi'
+    assert numero_compacto(350_000) == '350 mil'
+    assert numero_compacto(12.345, percentual=True) == '12,3%'
+    assert numero_compacto(None) == '-'
+
+    rng = np.random.default_rng(0)
+    n = 50_000
+    df = pd.DataFrame({
+        'ano': rng.integers(2023, 2027, n), 'ativo': rng.choice(['ALTO', 'BAIXO', 'SEDE'], n),
+        'centro': [f"C{i % 900:04d}" for i in range(n)], 'orcado': rng.normal(-1e5, 5e4, n),
+    })
+    df['desvio'] = rng.normal(0, 1e4, n)
+    df.loc[123, 'desvio'] = -9_876_543.0
+
+    inicio = time.perf_counter()
+    resultado = compactar_dataframe(df, orcamento_tokens=800)
+    tempo = time.perf_counter() - inicio
+    print(f"[INFO] {n} linhas -> {resultado.descricao()} em {tempo * 1e3:.0f} ms")
+    assert resultado.tokens <= 800 and estimar_tokens(resultado.texto) == resultado.tokens
+    assert resultado.truncado and resultado.linhas_omitidas > n - 100
+    # Hierarquia: totais e subtotais antes do detalhe; maior desvio no topo
+    texto = resultado.texto
+    assert texto.index('Totais:') < texto.index('Subtotais por ativo:') < texto.index('Maiores valores de desvio')
+    assert 'Subtotais por ano:' in texto and '2026 |' in texto
+    assert '-9,9 mi' in texto and 'linhas de detalhe omitidas' in texto
+    assert tempo < 1.0
+
+    # Dados pequenos cabem inteiros
+    pequeno = compactar_dataframe(df.head(5), orcamento_tokens=2000)
+    assert not pequeno.truncado and 'omitidas' not in pequeno.texto
+
+    # Snapshot: orçamento mínimo ainda mantém cabeçalho e aviso obrigatório
+    df_mensal = pd.DataFrame({'mes': ['JAN', 'FEV'], 'orcado': [-1000.0, -2000.0], 'realizado': [0.0, 0.0],
+                              'provisionado': [0.0, 0.0], 'desvio': [1000.0, 2000.0]})
+    snapshot = montar_snapshot(2026, 'abc', df_mensal, pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+    apertado = formatar_snapshot(snapshot, orcamento_tokens=10)
+    assert 'versão abc' in apertado.texto and 'SISTEMA NOTICE' in apertado.texto
+    assert apertado.linhas_omitidas == 2 and apertado.secoes_omitidas == ['Totais mensais:']
+    print("[OK] Prompt limitado ao orçamento, com totais primeiro e truncamento informado.")
+
+
+def test_cache_llm():
+    import tempfile
+    from utils_financeiro import get_ai_chat_response
+    print(">>> Cache persistente de respostas de LLM")
+
+    # Variações de digitação caem na mesma chave; versão dos dados separa
+    assert normalizar_prompt("  Como está   o G&A?\n") == normalizar_prompt("como está o g&a")
+    msgs = [{"role": "user", "content": "Como está o G&A?"}]
+    msgs_var = [{"role": "user", "content": "como   está o G&A"}]
+    assert chave_llm('m', msgs, 'v1') == chave_llm('m', msgs_var, 'v1')
+    assert chave_llm('m', msgs, 'v1') != chave_llm('m', msgs, 'v2')
+    assert chave_llm('m', msgs, 'v1') != chave_llm('outro', msgs, 'v1')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheLLM(os.path.join(tmp, 'llm.db'), ttl_s=3600, max_bytes=25)
+        cache.guardar('a', 'm', 'x' * 10)
+        cache.guardar('b', 'm', 'y' * 10)
+        assert cache.obter('a') == 'x' * 10  # 'a' passa a ser o mais recente
+        cache.guardar('c', 'm', 'z' * 10)    # 30 bytes > 25: sai o LRU ('b')
+        assert cache.obter('b') is None and cache.obter('c') == 'z' * 10
+        stats = cache.estatisticas()
+        assert stats['evictions'] == 1 and stats['hits'] == 2 and stats['misses'] == 1
+
+        cache.ttl_s = 0
+        time.sleep(0.01)
+        assert cache.obter('a') is None and cache.estatisticas()['expirados'] == 1
+
+        # get_ai_chat_response responde do cache sem chamar o provedor
+        original = llm_cache._cache_global
+        llm_cache._cache_global = CacheLLM(os.path.join(tmp, 'global.db'))
+        try:
+            chave = chave_llm('gemini-3-flash-preview', msgs, 'teste')
+            llm_cache._cache_global.guardar(chave, 'gemini-3-flash-preview', 'Resposta em cache')
+            resposta = get_ai_chat_response(msgs_var, '', 'Gemini 3 Flash', versao_dados='teste')
+            assert resposta == 'Resposta em cache'
+        finally:
+            llm_cache._cache_global = original
+    print("[OK] Cache com TTL, despejo LRU e chave normalizada.")
+
+
+if __name__ == "__main__":
+    test_board_paralelo()
+    test_provedor_incompleto()
+    test_board_resultado_parcial()
+    test_board_streaming()
+    test_snapshot_contexto()
+    test_compactador_prompt()
+    test_cache_llm()
@@ -152,5 +152,99 @@ def test_processamento():
         else:
             print(f"[FALHA] Total do Razão incorreto: {total_zao} (Esperado 1500)")
 
+def test_fachada_import_preguicoso():
+    """Importar utils_financeiro não carrega pandera/plotly.express/matplotlib."""
+    import subprocess
+    print(">>> Verificando fachada preguiçosa de utils_financeiro")
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    codigo = (
+        "import sys, utils_financeiro as u\n"
+        "pesados = ('pandera', 'plotly.express', 'matplotlib.pyplot', 'statsmodels', 'sklearn')\n"
+        "print(','.join(m for m in pesados if m in sys.modules))\n"
+        "assert u.MESES_ORDEM[0] == 'JAN'\n"
+        "assert set(u.__all__) <= set(dir(u))\n"
+        "from utils_financeiro import SimpleForecaster, ValidadorDados\n"
+        "assert SimpleForecaster.__module__ == 'utils_financeiro.forecasting'\n"
+        "assert 'pandera' in sys.modules\n"
+    )
+    proc = subprocess.run([sys.executable, '-c', codigo], cwd=raiz, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    carregados = proc.stdout.strip()
+    assert carregados == '', f"Dependências pesadas no import da fachada: {carregados}"
+    print("[OK] Fachada carrega submódulos sob demanda.")
+
+def test_invalidacao_referencias():
+    """Só o carregador do arquivo alterado e os resultados do comparador que dependem dele são limpos."""
+    import tempfile
+    import time
+    from pathlib import Path
+    import data.referencias_manager  # noqa: F401 (alvos resolvidos via sys.modules)
+    import data.comparador  # noqa: F401
+    from data import referencias_watcher as watcher
+    print(">>> Verificando invalidação seletiva das referências")
+
+    class Espiao:
+        def __init__(self):
+            self.limpezas = 0
+
+        def clear(self):
+            self.limpezas += 1
+
+    # Todos os alvos mapeados viram espiões (originais restaurados no fim)
+    alvos = sorted({a for lista in watcher.DEPENDENCIAS_REFERENCIAS.values() for a in lista})
+    originais, espioes = {}, {}
+    for alvo in alvos:
+        nome_modulo, nome_funcao = alvo.split(':', 1)
+        modulo = sys.modules.get(nome_modulo) or __import__(nome_modulo, fromlist=[nome_funcao])
+        originais[alvo] = (modulo, getattr(modulo, nome_funcao))
+        espioes[alvo] = Espiao()
+        setattr(modulo, nome_funcao, espioes[alvo])
+    try:
+        invalidados = watcher.invalidar_referencia('orcamento_v1_2026.xlsx')
+        esperados = watcher.DEPENDENCIAS_REFERENCIAS['orcamento_v1_2026.xlsx']
+        assert invalidados == esperados
+        assert 'data.referencias_manager:carregar_orcamento_v1_2026' in invalidados
+        assert sum(a.startswith('data.comparador:') for a in invalidados) == 3
+        for alvo, espiao in espioes.items():
+            assert espiao.limpezas == (1 if alvo in esperados else 0), alvo
+        assert watcher.invalidar_referencia('arquivo_sem_dependencia.xlsx') == []
+    finally:
+        for alvo, (modulo, funcao) in originais.items():
+            setattr(modulo, alvo.split(':', 1)[1], funcao)
+        for nome in ('orcamento_v1_2026.xlsx', 'arquivo_sem_dependencia.xlsx'):
+            watcher._ULTIMAS_INVALIDACOES.pop(nome, None)
+
+    # Diretório registrado com o monitor já em execução também é observado
+    # (observador próprio do teste no lugar do global do processo, restaurado no fim)
+    from watchdog.observers import Observer
+    arquivo = 'referencia_tardia.csv'
+    observer = Observer()
+    observer.daemon = True
+    observer.start()
+    anteriores = (watcher._OBSERVADOR, watcher._HANDLER)
+    watcher._OBSERVADOR, watcher._HANDLER = observer, watcher._HandlerReferencias()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                watcher.registrar_dependencia(arquivo, 'modulo_inexistente:funcao', diretorio=Path(tmp))
+                Path(tmp, arquivo).write_text('a;b\n1;2\n', encoding='utf-8')
+                limite = time.monotonic() + watcher.JANELA_DEBOUNCE_S + 5
+                while arquivo not in watcher._ULTIMAS_INVALIDACOES and time.monotonic() < limite:
+                    time.sleep(0.1)
+                assert arquivo in watcher._ULTIMAS_INVALIDACOES
+            finally:
+                observer.unschedule_all()
+                watcher.DEPENDENCIAS_REFERENCIAS.pop(arquivo, None)
+                watcher._ULTIMAS_INVALIDACOES.pop(arquivo, None)
+                if Path(tmp) in watcher._DIRETORIOS_MONITORADOS:
+                    watcher._DIRETORIOS_MONITORADOS.remove(Path(tmp))
+    finally:
+        watcher._OBSERVADOR, watcher._HANDLER = anteriores
+        observer.stop()
+        observer.join()
+    print(f"[OK] {len(esperados)} caches invalidados; diretório registrado depois do início monitorado.")
+
 if __name__ == "__main__":
     test_processamento()
+    test_fachada_import_preguicoso()
+    test_invalidacao_referencias()
@@ -0,0 +1,411 @@
+"""
+tests/test_forecast_engine.py
+=============================
+Paridade entre o BatchForecaster (matriz de séries) e o SimpleForecaster.
+"""
+
+import sys
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.forecast_engine import BatchForecaster, montar_matriz_series, prever_esparso
+from services.forecast_hierarquico import prever_folhas, montar_folhas, totais_por_nivel
+from services.backtest_forecast import backtest_matriz, executar_backtest
+from services.forecast_paralelo import prever_paralelo, STATUS_OK, STATUS_TIMEOUT
+from services.forecast_armazenamento import serializar_cenario, desserializar_cenario, comparar_frames
+from services.forecast_cache import CacheForecast
+from services.simulacao_orcamento import simular_fechamento, simular_totais, residuos_mqo
+from services.forecast_incremental import (
+    EstadoForecast, construir_estado, incorporar_frame, verificar_consistencia
+)
+from utils_financeiro import SimpleForecaster
+
+
+def criar_historico():
+    """Histórico sintético: 15 contas com tamanhos, inícios e lacunas diferentes."""
+    rng = np.random.default_rng(7)
+    datas = pd.date_range('2023-01-01', periods=30, freq='MS')
+    registros = []
+    for s in range(15):
+        n = int(rng.integers(4, 30))
+        inicio = int(rng.integers(0, 30 - n + 1))
+        for d in datas[inicio:inicio + n]:
+            if rng.random() < 0.15:
+                continue  # mês sem lançamento
+            valor = -1000 - 50 * s + 200 * np.sin(d.month) + rng.normal(0, 80)
+            registros.append((f"4101{s:04d}", d, valor))
+    return pd.DataFrame(registros, columns=['conta_contabil_codigo', 'data_ref', 'valor'])
+
+
+def test_paridade_simple_forecaster():
+    """linear/sma/ema: mesmas previsões, bandas e datas do SimpleForecaster."""
+    print("\n>>> Test: BatchForecaster x SimpleForecaster")
+
+    df = criar_historico()
+    matriz, chaves, calendario = montar_matriz_series(df, ['conta_contabil_codigo'])
+    assert matriz.shape == (chaves.shape[0], len(calendario))
+
+    for metodo in ['linear', 'sma', 'ema']:
+        lote = BatchForecaster().fit(matriz, calendario, method=metodo).predict_frame(12, chaves)
+
+        for conta in chaves['conta_contabil_codigo']:
+            df_conta = df[df['conta_contabil_codigo'] == conta]
+            sf = SimpleForecaster()
+            sf.fit(df_conta, 'data_ref', 'valor', method=metodo)
+            esperado = sf.predict(periods=12)
+            obtido = lote[lote['conta_contabil_codigo'] == conta]
+
+            assert (esperado['data'].values == obtido['data'].values).all()
+            for col in ['previsao', 'limite_inferior', 'limite_superior']:
+                assert np.allclose(esperado[col].values, obtido[col].values), (metodo, conta, col)
+        print(f"  {metodo}: {len(chaves)} séries conferidas")
+
+
+def test_sazonal_e_hibrido():
+    """seasonal repete o último ciclo; hybrid recupera um padrão sazonal exato."""
+    print("\n>>> Test: BatchForecaster sazonal/híbrido")
+
+    datas = pd.date_range('2023-01-01', periods=24, freq='MS')
+    padrao = np.array([5, -3, 2, 0, 1, -4, 6, -2, 3, -1, -5, -2], dtype=float)
+    serie = 100 + 2 * np.arange(24) + np.tile(padrao, 2)
+    matriz = np.vstack([serie, np.full(24, 50.0)])
+
+    previsao, inferior, superior = BatchForecaster().fit(matriz, datas, method='seasonal').predict(12)
+    assert np.allclose(previsao[0], serie[12:])
+    assert np.allclose(previsao[1], 50.0)
+    assert np.all(inferior <= previsao) and np.all(superior >= previsao)
+
+    previsao, inferior, superior = BatchForecaster().fit(matriz, datas, method='hybrid').predict(12)
+    esperado = 100 + 2 * np.arange(24, 36) + padrao
+    print(f"  Erro máximo híbrido: {np.abs(previsao[0] - esperado).max():.2e}")
+    assert np.allclose(previsao[0], esperado)
+    assert np.allclose(superior[0], previsao[0])
+
+
+def criar_historico_folhas():
+    """Folhas centro × conta esparsas em 2 ativos, com base de centros sintética."""
+    rng = np.random.default_rng(3)
+    centros = pd.DataFrame({
+        'codigo': ['01020504001', '01020504101', '01020504202', '01030101001', '01030101301'],
+        'ativo': ['GASCOM', 'GASCOM', 'GASCOM', 'GASCAC', 'GASCAC'],
+        'base': ['B1', 'B1', 'B2', 'B3', 'B3'],
+    })
+    centros['codigo_pai'] = centros['codigo'].str[:8]
+    centros['classe'] = centros['codigo'].str[8]
+
+    datas = pd.date_range('2025-01-01', periods=14, freq='MS')
+    registros = []
+    for centro in centros['codigo']:
+        for conta in ['41010001', '41010002', '41020003']:
+            n = int(rng.integers(0, 15))
+            for d in datas[14 - n:]:
+                if rng.random() < 0.3:
+                    continue
+                registros.append((d, centro, conta, -abs(rng.normal(500, 100))))
+    df = pd.DataFrame(registros, columns=['data_ref', 'centro_gasto_codigo', 'conta_contabil_codigo', 'valor'])
+    return df, centros
+
+
+def test_reconciliacao_hierarquica():
+    """Bottom-up e top-down no grão folha somam corretamente em cada nível."""
+    print("\n>>> Test: forecast hierárquico")
+
+    df, centros = criar_historico_folhas()
+    matriz, folhas, calendario = montar_folhas(df)
+
+    # Roteamento: folhas curtas -> sma, demais -> método pedido
+    _, _, _, usado = prever_esparso(matriz, method='hybrid', periods=3)
+    n_obs = (~np.isnan(matriz)).sum(axis=1)
+    assert set(usado[n_obs < 3]) <= {'sma', 'zero'}
+    assert set(usado[n_obs >= 3]) == {'hybrid'}
+
+    bu = prever_folhas(df, metodo='linear', reconciliacao='bottom_up', df_centros=centros)
+    assert len(bu) == len(folhas) * 12
+    assert (bu['data'].min() == pd.Timestamp('2026-03-01'))
+
+    td = prever_folhas(df, metodo='linear', reconciliacao='top_down', nivel_top_down='ativo', df_centros=centros)
+
+    # Top-down: folhas de cada (ativo, conta) somam a previsão da série agregada
+    agregado = df.merge(centros[['codigo', 'ativo']], left_on='centro_gasto_codigo', right_on='codigo')
+    for (ativo, conta), df_grupo in agregado.groupby(['ativo', 'conta_contabil_codigo']):
+        serie = df_grupo.groupby('data_ref')['valor'].sum().reindex(calendario).to_numpy()[None, :]
+        serie = np.where(np.cumsum(~np.isnan(serie), axis=1) > 0, np.nan_to_num(serie), np.nan)
+        esperado = prever_esparso(serie, method='linear', periods=12)[0][0]
+        obtido = td[(td['ativo'] == ativo) & (td['conta_contabil_codigo'] == conta)].groupby('data')['previsao'].sum()
+        assert np.allclose(obtido.values, esperado), (ativo, conta)
+
+    # Todo nível soma o total das folhas
+    for nivel in ['codigo_pai', 'classe', 'ativo', 'base']:
+        assert np.allclose(totais_por_nivel(td, nivel).sum(axis=0).values, td.groupby('data')['previsao'].sum().values)
+    print(f"  {len(folhas)} folhas, {td['ativo'].nunique()} ativos reconciliados")
+
+
+def test_paralelo_deterministico():
+    """1 ou N workers: mesma saída; timeout estourado cai para a tendência linear."""
+    print("\n>>> Test: forecast paralelo")
+
+    df = criar_historico()
+    matriz, _, calendario = montar_matriz_series(df, ['conta_contabil_codigo'])
+    matriz = matriz[:6]
+
+    sequencial = prever_paralelo(matriz, calendario, metodo='hybrid', n_workers=1, tamanho_lote=2)
+    paralelo = prever_paralelo(matriz, calendario, metodo='hybrid', n_workers=2, tamanho_lote=2)
+    assert np.array_equal(sequencial['previsao'], paralelo['previsao'])
+    assert np.array_equal(sequencial['primeiro_mes'], paralelo['primeiro_mes'])
+    assert list(paralelo['status']) == [STATUS_OK] * 6
+
+    estourado = prever_paralelo(matriz, calendario, metodo='hybrid', n_workers=1, timeout_s=1e-6)
+    linear = prever_paralelo(matriz, calendario, metodo='linear', n_workers=1)
+    assert list(estourado['status']) == [STATUS_TIMEOUT] * 6
+    assert np.allclose(estourado['previsao'], linear['previsao'])
+
+    # Fora da thread principal (thread do Streamlit) o timeout sequencial continua valendo
+    saida = {}
+    thread = threading.Thread(target=lambda: saida.update(prever_paralelo(
+        matriz, calendario, metodo='hybrid', n_workers=1, timeout_s=1e-6
+    )))
+    thread.start()
+    thread.join()
+    assert list(saida['status']) == [STATUS_TIMEOUT] * 6
+    assert np.allclose(saida['previsao'], linear['previsao'])
+    print("  1 x 2 workers idênticos; timeout -> linear (também fora da thread principal)")
+
+
+def test_backtest_origem_movel():
+    """Série linear exata: linear tem WAPE 0 e é escolhido; constante: sma/ema exatos."""
+    print("\n>>> Test: backtest origem móvel")
+
+    datas = pd.date_range('2024-01-01', periods=24, freq='MS')
+    registros = [(d, 'LINEAR', -100.0 - 10 * i) for i, d in enumerate(datas)]
+    registros += [(d, 'CONSTANTE', -50.0) for d in datas]
+    df = pd.DataFrame(registros, columns=['data_ref', 'conta_contabil_codigo', 'valor'])
+
+    detalhe, resumo = executar_backtest(df, grao='conta', horizonte=3, n_origens=6)
+    melhor = detalhe[detalhe['melhor']].set_index('chave_serie')['metodo']
+    assert melhor['LINEAR'] == 'linear'
+    linear = detalhe[(detalhe['chave_serie'] == 'LINEAR') & (detalhe['metodo'] == 'linear')].iloc[0]
+    assert np.isclose(linear['wape'], 0) and np.isclose(linear['vies'], 0)
+    constante = detalhe[detalhe['chave_serie'] == 'CONSTANTE'].set_index('metodo')['wape']
+    assert np.allclose(constante[['linear', 'sma', 'ema']], 0)
+
+    # SMA numa rampa de custo: previsão fica "atrás" (menos negativa) -> viés positivo
+    sma = detalhe[(detalhe['chave_serie'] == 'LINEAR') & (detalhe['metodo'] == 'sma')].iloc[0]
+    assert sma['vies'] > 0
+    assert set(resumo['metodo']) == {'linear', 'sma', 'ema', 'seasonal', 'hybrid'}
+
+    # 6 origens x 3 meses, truncado no fim: 3+3+3+3+2+1 pontos
+    metricas, _ = backtest_matriz(np.array([-100.0 - 10 * np.arange(24)]), ['linear'], horizonte=3, n_origens=6)
+    assert metricas['linear']['n_pontos'][0] == 15
+    print(f"  Resumo:\n{resumo[['metodo', 'wape', 'vies']].to_string(index=False)}")
+
+
+def test_estado_incremental():
+    """Mês a mês pelo estado == refit completo do BatchForecaster, para todos os métodos."""
+    print("\n>>> Test: estado incremental")
+
+    df = criar_historico()
+    matriz, chaves, calendario = montar_matriz_series(df, ['conta_contabil_codigo'])
+    metodos = ['linear', 'sma', 'ema', 'seasonal', 'hybrid']
+
+    # Começa com 6 meses e incorpora o resto um mês por vez (séries novas surgem no caminho)
+    corte = 6
+    inicial = df[df['data_ref'] < calendario[corte]]
+    m0, c0, cal0 = montar_matriz_series(inicial, ['conta_contabil_codigo'])
+    estado = construir_estado(m0, c0, cal0)
+    for mes in calendario[corte:]:
+        incorporar_frame(estado, df[df['data_ref'] == mes], mes, ['conta_contabil_codigo'])
+
+    # Mesma ordem de séries do estado para comparar
+    ordem = pd.Index(chaves['conta_contabil_codigo']).get_indexer(estado.chaves['conta_contabil_codigo'])
+    matriz_estado = matriz[ordem]
+    completo = construir_estado(matriz_estado, estado.chaves, calendario)
+    for metodo in metodos:
+        resultado = verificar_consistencia(estado, matriz_estado, metodo)
+        assert resultado['consistente'], (metodo, resultado)
+        assert np.allclose(estado.prever(metodo)[0], completo.prever(metodo)[0])
+
+    # Um método por série (modo 'auto')
+    por_serie = np.array([metodos[i % len(metodos)] for i in range(estado.n_series)], dtype=object)
+    assert verificar_consistencia(estado, matriz_estado, por_serie)['consistente']
+
+    # Serialização sem pickle
+    restaurado = EstadoForecast.from_bytes(estado.to_bytes())
+    assert restaurado.ultimo_mes == estado.ultimo_mes
+    assert list(restaurado.chaves['conta_contabil_codigo']) == list(estado.chaves['conta_contabil_codigo'])
+    assert np.allclose(restaurado.prever('hybrid')[1], estado.prever('hybrid')[1])
+
+    # Mês repetido exige refit completo
+    try:
+        incorporar_frame(estado, df[df['data_ref'] == calendario[-1]], calendario[-1], ['conta_contabil_codigo'])
+        assert False, "mês repetido deveria falhar"
+    except ValueError:
+        pass
+    print(f"  {estado.n_series} séries, {estado.n_meses} meses: incremental == refit")
+
+
+def test_armazenamento_colunar():
+    """Blob NPZ: ida e volta sem perda; comparação B - A com entradas exclusivas valendo 0."""
+    print("\n>>> Test: armazenamento colunar")
+
+    rng = np.random.default_rng(3)
+    n = 5000
+    df = pd.DataFrame({
+        'mes': rng.choice(['JAN', 'FEV', 'MAR'], n),
+        'centro_gasto_codigo': np.char.add('C', rng.integers(0, 300, n).astype(str)),
+        'conta_contabil_codigo': np.char.add('4101', rng.integers(0, 50, n).astype(str)),
+        'metodo_calculo': rng.choice(['linear', 'hybrid+td:ativo'], n),
+        'valor_previsto': rng.normal(-1000, 100, n),
+    })
+    blob = serializar_cenario(df)
+    volta = desserializar_cenario(blob)
+    pd.testing.assert_frame_equal(volta.astype({c: str for c in volta.columns[:4]}), df.astype({c: str for c in df.columns[:4]}))
+    assert len(blob) < df.memory_usage(deep=True).sum() / 4
+
+    a = pd.DataFrame({'mes': ['JAN', 'FEV'], 'centro_gasto_codigo': ['C1', 'C1'],
+                      'conta_contabil_codigo': ['X', 'X'], 'metodo_calculo': 'linear', 'valor_previsto': [-10.0, -20.0]})
+    b = pd.DataFrame({'mes': ['FEV', 'MAR'], 'centro_gasto_codigo': ['C1', 'C1'],
+                      'conta_contabil_codigo': ['X', 'X'], 'metodo_calculo': 'ema', 'valor_previsto': [-25.0, -5.0]})
+    diff = comparar_frames(desserializar_cenario(serializar_cenario(a)), b).set_index('mes')
+    assert diff.loc['JAN', 'diferenca'] == 10.0 and diff.loc['FEV', 'diferenca'] == -5.0
+    assert diff.loc['MAR', 'valor_a'] == 0.0 and np.isnan(diff.loc['MAR', 'variacao_pct'])
+    print(f"  {n} entradas -> {len(blob):,} bytes")
+
+
+def test_simulacao_fechamento():
+    """Séries exatas: distribuição degenerada; provisões e remanejamentos no limite; bootstrap sem viés."""
+    print("\n>>> Test: simulação de Monte Carlo do fechamento")
+
+    datas = pd.date_range('2025-01-01', '2026-03-01', freq='MS')
+    registros = [(d, 'C1', 'X', -100.0 - i) for i, d in enumerate(datas)]
+    registros += [(d, 'C2', 'X', -50.0) for d in datas]
+    df = pd.DataFrame(registros, columns=['data_ref', 'centro_gasto_codigo', 'conta_contabil_codigo', 'valor'])
+    assert np.allclose(np.nan_to_num(residuos_mqo(np.array([[1.0, 3.0, np.nan, 7.0]]))), 0)
+
+    orcado = pd.DataFrame({'centro_gasto_codigo': ['C1', 'C2'], 'valor_orcado': [-1500.0, -600.0]})
+    provisoes = pd.DataFrame({'centro_gasto_codigo': ['C2'], 'valor_estimado': [-10.0]})
+    ajustes = pd.DataFrame({'centro_gasto_codigo': ['C1'], 'ajuste': [200.0]})
+    centros = pd.DataFrame({'codigo': ['C1', 'C2'], 'base': ['B', 'B']})
+    r = simular_fechamento(df, orcado, provisoes, ajustes, ano=2026, metodo='linear',
+                           n_caminhos=500, df_centros=centros)
+
+    c = r['centros'].set_index('centro_gasto_codigo')
+    assert r['meses_restantes'] == 9
+    # C1: -112..-114 realizados + reta até dez (-115..-123); limite -1500 - 200
+    assert np.isclose(c.loc['C1', 'p05'], c.loc['C1', 'p95'])
+    assert np.isclose(c.loc['C1', 'media'], -np.arange(112, 124).sum())
+    assert c.loc['C1', 'orcado_ajustado'] == -1700.0 and c.loc['C1', 'prob_estouro'] == 0.0
+    # C2: 12 × -50 + provisão -10 = -610 < -600
+    assert np.isclose(c.loc['C2', 'media'], -610.0) and c.loc['C2', 'prob_estouro'] == 1.0
+    assert r['bases'].loc[0, 'qtd_centros'] == 2 and np.isclose(r['total']['media'], c['media'].sum())
+
+    # Bootstrap: choque de +1 em 1 de 10 meses -> média de n_meses/10 por caminho
+    residuos = np.zeros((1, 10))
+    residuos[0, 3] = 1.0
+    caminhos = simular_totais(np.zeros(1), residuos, n_meses=12, n_caminhos=20_000, seed=1)
+    assert abs(caminhos.mean() - 1.2) < 0.05
+    print(f"  C1 P50 {c.loc['C1', 'p50']:,.0f} | C2 estouro {c.loc['C2', 'prob_estouro']:.0%}")
+
+
+def test_cache_forecast():
+    """Cache por série: mesmo resultado, só séries novas recalculadas, LRU e nível em disco."""
+    print("\n>>> Test: cache de forecast")
+    import tempfile
+
+    df = criar_historico()
+    matriz, _, calendario = montar_matriz_series(df, ['conta_contabil_codigo'])
+    esperado = BatchForecaster().fit(matriz, calendario, method='hybrid').predict(12)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheForecast(max_itens=100, arquivo_disco=os.path.join(tmp, 'cache.db'))
+        bf = BatchForecaster(cache=cache)
+        for _ in range(2):
+            obtido = bf.fit(matriz, calendario, method='hybrid').predict(12)
+            assert all(np.allclose(a, b) for a, b in zip(obtido, esperado))
+        S = matriz.shape[0]
+        assert cache.misses == S and cache.hits_memoria == S
+
+        # Uma série alterada: só ela é recalculada; outro método = outras chaves
+        alterada = matriz.copy()
+        alterada[0, ~np.isnan(alterada[0])] *= 2
+        bf.fit(alterada, calendario, method='hybrid').predict(12)
+        assert cache.misses == S + 1
+        bf.fit(matriz, calendario, method='linear').predict(12)
+        assert cache.misses == 2 * S + 1
+
+        # Novo processo (memória vazia) lê do disco; LRU respeita o limite
+        novo = CacheForecast(max_itens=5, arquivo_disco=os.path.join(tmp, 'cache.db'))
+        obtido = BatchForecaster(cache=novo).fit(matriz, calendario, method='hybrid').predict(12)
+        assert np.allclose(obtido[0], esperado[0])
+        stats = novo.estatisticas()
+        assert stats['hits_disco'] == S and stats['misses'] == 0 and stats['itens_memoria'] == 5
+    print(f"  {S} séries: 2ª chamada 100% em cache; disco: {stats['hits_disco']} acertos")
+
+
+def test_cenario_incremental_ponta_a_ponta():
+    """Cenário Consolidado criado do histórico fechado; o mês seguinte é incorporado e bate com o refit."""
+    print("\n>>> Test: cenário incremental de ponta a ponta")
+    import tempfile
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database.models import ForecastCenario, ForecastCenarioDados, ForecastEntry, ForecastEstado
+    import services.forecast_service as forecast_service
+
+    # Histórico de folhas até mar/2026 (meses ainda não fechados ausentes, não zerados)
+    datas = pd.date_range('2025-01-01', '2026-04-01', freq='MS')
+    registros = [(d, centro, conta, -100.0 * (i + 1) - 10 * j)
+                 for i, d in enumerate(datas)
+                 for j, (centro, conta) in enumerate([('C1', '4101'), ('C1', '4102'), ('C2', '4101')])]
+    df = pd.DataFrame(registros, columns=['data_ref', 'centro_gasto_codigo', 'conta_contabil_codigo', 'valor'])
+    abril = pd.Timestamp('2026-04-01')
+
+    # Banco temporário: o serviço abre as sessões por get_session (substituído durante o teste)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/forecast.db")
+        for modelo in (ForecastCenario, ForecastCenarioDados, ForecastEntry, ForecastEstado):
+            modelo.__table__.create(engine)
+        original = forecast_service.get_session
+        forecast_service.get_session = sessionmaker(bind=engine)
+        try:
+            service = forecast_service.ForecastService()
+            cenario_id = service.criar_cenario_automatico(
+                df[df['data_ref'] < abril], nome='pytest incremental', metodo='linear', agregacao='total'
+            )
+            estado = service.get_estado(cenario_id)
+            assert estado['ultimo_mes'] == '2026-03' and estado['n_series'] == 1
+
+            r = service.atualizar_cenario_incremental(cenario_id, df[df['data_ref'] == abril], abril)
+            assert r['ultimo_mes'] == '2026-04' and r['series_no_mes'] == 1
+            assert service.get_estado(cenario_id)['ultimo_mes'] == '2026-04'
+
+            consistencia = service.verificar_consistencia_cenario(cenario_id, df)
+            assert consistencia['consistente'], consistencia
+
+            # Previsão regravada a partir de mai/2026 (série linear exata: -5130 em maio)
+            entradas = service.get_entradas_cenario(cenario_id)
+            assert len(entradas) == 12 and set(entradas['conta_contabil_codigo']) == {'TOTAL'}
+            maio = entradas.loc[entradas['mes'] == 'MAI', 'valor_previsto'].iloc[0]
+            assert np.isclose(maio, -3 * 100.0 * (len(datas) + 1) - 30)
+        finally:
+            forecast_service.get_session = original
+            engine.dispose()
+    print(f"  cenário {cenario_id}: 03/2026 -> 04/2026 incorporado, consistente com o refit")
+
+
+if __name__ == "__main__":
+    test_paridade_simple_forecaster()
+    test_sazonal_e_hibrido()
+    test_reconciliacao_hierarquica()
+    test_paralelo_deterministico()
+    test_backtest_origem_movel()
+    test_estado_incremental()
+    test_armazenamento_colunar()
+    test_simulacao_fechamento()
+    test_cache_forecast()
+    test_cenario_incremental_ponta_a_ponta()
+    print("\n✅ Todos os testes passaram")
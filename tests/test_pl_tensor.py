@@ -0,0 +1,97 @@
+"""
+tests/test_pl_tensor.py
+=======================
+Paridade entre o PLTensor e as operações equivalentes em pandas sobre o pl_df.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.pl_tensor import PLTensor
+from data.dimensoes import codificar_dimensoes
+from data.referencias_manager import MESES_ORDEM
+
+
+def criar_pl_df():
+    """pl_df sintético: 2 anos, 3 centros de custo + linha financeira '0'."""
+    rng = np.random.default_rng(42)
+    registros = []
+    for ano in [2024, 2025]:
+        for centro in ['01020504001', '01020504101', '01020504202', '0']:
+            contas = ['Net Revenue', 'Gross profit'] if centro == '0' else ['Travels', 'Personnel cost']
+            for conta in contas:
+                for i, mes in enumerate(MESES_ORDEM):
+                    for tipo in ['Realizado', 'Budget V3']:
+                        # 2025 realizado só até MAI
+                        valor = 0.0 if (ano == 2025 and tipo == 'Realizado' and i > 4) else -abs(rng.normal(1000, 200))
+                        registros.append((centro, f"Centro {centro[-3:]}", conta, mes, tipo, ano, valor))
+    df = pd.DataFrame(registros, columns=[
+        'codigo_centro_gasto', 'centro_gasto_nome', 'conta_contabil', 'mes', 'tipo_valor', 'ano', 'valor'
+    ])
+    # Registro duplicado: o último deve prevalecer
+    duplicado = df.iloc[[0]].assign(valor=-1.0)
+    return codificar_dimensoes(pd.concat([df, duplicado], ignore_index=True))
+
+
+def test_totais_e_ultimo_mes():
+    """Totais, último mês realizado e deduplicação batem com pandas."""
+    print("\n>>> Test: PLTensor totais")
+
+    df = criar_pl_df()
+    tensor = PLTensor.from_long(df)
+
+    chave = ['codigo_centro_gasto', 'conta_contabil', 'mes', 'tipo_valor', 'ano']
+    dedup = df.drop_duplicates(subset=chave, keep='last')
+    custos = dedup[dedup['codigo_centro_gasto'] != '0']
+    mask_custos = ~tensor.mascara_linhas(codigo_centro_gasto='0')
+
+    esperado = custos[(custos['ano'] == 2025) & (custos['tipo_valor'] == 'Realizado')]['valor'].sum()
+    obtido = tensor.total(tipos='Realizado', anos=2025, linhas=mask_custos)
+    print(f"  Total 2025: pandas={esperado:.2f} tensor={obtido:.2f}")
+    assert np.isclose(esperado, obtido)
+
+    assert tensor.ultimo_mes_com_valor('Realizado', anos=[2025], linhas=mask_custos) == 'MAI'
+    assert tensor.ultimo_mes_com_valor('Realizado', linhas=mask_custos) == 'DEZ'
+
+    longo = tensor.to_long()
+    assert len(longo) == len(dedup)
+    assert np.isclose(longo['valor'].sum(), dedup['valor'].sum())
+
+
+def test_pivot_e_agregacao():
+    """pivot_mensal e agregar equivalem a pivot_table/groupby."""
+    print("\n>>> Test: PLTensor pivots")
+
+    df = criar_pl_df()
+    df = df.drop_duplicates(subset=['codigo_centro_gasto', 'conta_contabil', 'mes', 'tipo_valor', 'ano'], keep='last')
+    tensor = PLTensor.from_long(df)
+    mask_custos = ~tensor.mascara_linhas(codigo_centro_gasto='0')
+    custos = df[(df['codigo_centro_gasto'] != '0') & (df['ano'] == 2024)]
+
+    esperado = custos.pivot_table(
+        values='valor', index='conta_contabil', columns='mes', aggfunc='sum', observed=True
+    ).reindex(columns=MESES_ORDEM)
+    esperado.index = esperado.index.astype(object)
+    obtido = tensor.pivot_mensal('conta_contabil', anos=2024, linhas=mask_custos, todos_meses=True)
+    assert np.allclose(esperado.loc[obtido.index].values, obtido.values)
+
+    esperado_abs = custos.assign(valor_abs=custos['valor'].abs()).groupby(
+        'centro_gasto_nome', observed=True
+    )['valor_abs'].sum()
+    obtido_abs = tensor.agregar(['centro_gasto_nome'], anos=2024, linhas=mask_custos, absoluto=True)
+    obtido_abs = obtido_abs.set_index('centro_gasto_nome')['valor']
+    esperado_abs.index = esperado_abs.index.astype(object)
+    assert np.allclose(esperado_abs.loc[obtido_abs.index].values, obtido_abs.values)
+    print(f"  {len(obtido)} contas, {len(obtido_abs)} centros conferidos")
+
+
+if __name__ == "__main__":
+    test_totais_e_ultimo_mes()
+    test_pivot_e_agregacao()
+    print("\n✅ Todos os testes passaram")
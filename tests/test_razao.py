@@ -0,0 +1,386 @@
+"""
+tests/test_razao.py
+===================
+Razão de Gastos: índice de similaridade, busca full-text (bancos SQLite
+temporários), conciliação com provisões, carga incremental (fingerprint e
+checksum por mês) e fornecedores canônicos.
+"""
+
+import sys
+import os
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import ChecksumParticao, Fornecedor, FornecedorAlias, RazaoRealizado, LancamentoRealizado
+from database.busca_textual import buscar, criar_indices_textuais
+from database.fingerprint import calcular_fingerprints, sincronizar_por_fingerprint
+from database.particoes import sincronizar_por_particao
+from services.indice_razao import IndiceRazao
+from services.conciliacao_service import conciliar
+from services.fornecedores_service import registrar_nomes
+
+
+def criar_sessao_razao():
+    engine = create_engine("sqlite:///:memory:")
+    RazaoRealizado.__table__.create(engine)
+    ChecksumParticao.__table__.create(engine)
+    return sessionmaker(bind=engine)()
+
+
+def lancamento(ano, fornecedor, descricao, valor=-1000.0, centro='01021617402'):
+    return RazaoRealizado(ano=ano, mes='JAN', centro_gasto_codigo=centro, conta_contabil_codigo='3010101',
+                          fornecedor=fornecedor, descricao=descricao, valor=valor)
+
+
+def test_indice_razao():
+    print(">>> Índice TF-IDF do Razão")
+    session = criar_sessao_razao()
+    session.add_all([
+        lancamento(2026, 'MANUTENÇÃO INDUSTRIAL LTDA', 'Manutenção preventiva de válvulas'),
+        lancamento(2026, 'LOCALIZA RENT A CAR', 'Aluguel de veículos da frota'),
+        lancamento(2026, 'CLARO S.A.', 'Serviço de telefonia móvel'),
+        lancamento(2025, 'MANUTENÇÃO INDUSTRIAL LTDA', 'Manutenção corretiva de válvula esfera'),
+        lancamento(2025, 'nan', 'nan'),
+    ])
+    session.commit()
+
+    indice = IndiceRazao()
+    assert indice.atualizar(session)['adicionados'] == 5
+
+    # Sem acento / singular ainda encontra, e o mais parecido vem primeiro
+    resultado = indice.buscar("manutencao valvula", k=3)
+    assert set(resultado['ano'][:2]) == {2025, 2026}
+    assert resultado['fornecedor'].iloc[0] == 'MANUTENÇÃO INDUSTRIAL LTDA'
+    assert resultado['score'].is_monotonic_decreasing
+    assert list(indice.buscar("manutencao valvula", ano=2025)['ano']) == [2025]
+    assert indice.buscar("xyzw qqqq").empty
+
+    id_valvula = int(resultado['id'].iloc[0])
+    similares = indice.similares(id_valvula, k=2)
+    assert id_valvula not in similares['id'].tolist()
+    assert similares['descricao'].iloc[0].startswith('Manutenção')
+
+    # Incremental: recarga do ano apaga e insere; só a diferença é processada
+    session.query(RazaoRealizado).filter(RazaoRealizado.ano == 2026).delete()
+    session.add(lancamento(2026, 'LOCALIZA RENT A CAR', 'Aluguel de caminhonete'))
+    session.commit()
+    atualizacao = indice.atualizar(session)
+    assert (atualizacao['adicionados'], atualizacao['removidos']) == (1, 3)
+    assert len(indice) == 3
+    assert indice.buscar("aluguel veiculo")['descricao'].iloc[0] == 'Aluguel de caminhonete'
+    assert indice.buscar("telefonia").empty
+
+    # Consulta rápida em volume maior
+    n = 50_000
+    indice.adicionar(pd.DataFrame({
+        'id': range(1000, 1000 + n), 'ano': 2026, 'mes': 'FEV', 'centro_gasto_codigo': '01022107501',
+        'conta_contabil_codigo': '3010101', 'fornecedor': [f"FORNECEDOR {i % 500}" for i in range(n)],
+        'descricao': [f"Serviço {i % 37} contrato {i}" for i in range(n)], 'valor': -10.0,
+    }))
+    indice.buscar("aquecimento")  # monta a matriz TF-IDF
+    inicio = time.perf_counter()
+    indice.buscar("manutenção de válvulas", k=10, ano=2026)
+    tempo_ms = (time.perf_counter() - inicio) * 1000
+    print(f"[INFO] busca em {len(indice)} lançamentos: {tempo_ms:.1f} ms")
+    assert tempo_ms < 100
+    session.close()
+    print("[OK] Busca por similaridade, filtros e atualização incremental.")
+
+
+def test_busca_textual():
+    import tempfile
+    print(">>> Busca full-text (FTS5)")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'busca.db')}")
+        RazaoRealizado.__table__.create(engine)
+        LancamentoRealizado.__table__.create(engine)
+        ChecksumParticao.__table__.create(engine)
+        session = sessionmaker(bind=engine)()
+
+        # Linhas anteriores ao índice entram no 'rebuild'
+        session.add_all([lancamento(2026, 'LOCALIZA RENT A CAR', f'Aluguel de veículos NF {i}') for i in range(120)])
+        session.add(lancamento(2025, 'MANUTENÇÃO INDUSTRIAL LTDA', 'Manutenção de válvulas'))
+        session.commit()
+        with engine.begin() as conn:
+            criar_indices_textuais(conn)
+            criar_indices_textuais(conn)  # idempotente
+
+        df, total = buscar('razao_realizados', 'manutencao valv', engine=engine)
+        assert total == 1 and df['fornecedor'].iloc[0] == 'MANUTENÇÃO INDUSTRIAL LTDA'
+        assert buscar('razao_realizados', 'manutencao', ano=2026, engine=engine)[1] == 0
+
+        # Paginação ordenada por relevância
+        pag1, total = buscar('razao_realizados', 'localiza', pagina=1, por_pagina=50, engine=engine)
+        pag3, _ = buscar('razao_realizados', 'localiza', pagina=3, por_pagina=50, engine=engine)
+        assert total == 120 and len(pag1) == 50 and len(pag3) == 20
+        assert not set(pag1['id']) & set(pag3['id'])
+        assert pag1['relevancia'].is_monotonic_decreasing
+
+        # Triggers mantêm o índice em insert / update / delete
+        reg = lancamento(2026, 'CLARO S.A.', 'Telefonia móvel')
+        reg.numero_registro = 'SE0004567'
+        session.add(reg)
+        session.commit()
+        assert buscar('razao_realizados', 'SE0004567', engine=engine)[1] == 1
+        reg.descricao = 'Internet dedicada'
+        session.commit()
+        assert buscar('razao_realizados', 'telefonia', engine=engine)[1] == 0
+        assert buscar('razao_realizados', 'internet', engine=engine)[1] == 1
+        session.query(RazaoRealizado).filter(RazaoRealizado.fornecedor == 'LOCALIZA RENT A CAR').delete()
+        session.commit()
+        assert buscar('razao_realizados', 'localiza', engine=engine)[1] == 0
+
+        # Lançamentos: observações também indexadas; entrada sem termos não consulta
+        session.add(LancamentoRealizado(ano=2026, mes='JAN', centro_gasto_codigo='01021617402',
+                                        centro_gasto_pai='01021617', centro_gasto_classe='4',
+                                        conta_contabil_codigo='3010101', valor=-10.0,
+                                        observacoes='Reclassificado do contrato 4400123'))
+        session.commit()
+        assert buscar('lancamentos_realizados', 'contrato 4400123', engine=engine)[1] == 1
+        assert buscar('lancamentos_realizados', ' "*( ', engine=engine)[1] == 0
+        session.close()
+        engine.dispose()
+    print("[OK] Busca por prefixo sem acentos, paginada e sincronizada por triggers.")
+
+
+def test_conciliacao():
+    print(">>> Conciliação provisões x Razão")
+    provisoes = pd.DataFrame([
+        # Centro sem o zero à esquerda (Excel) ainda cai no mesmo bloco
+        {'id': 1, 'descricao': 'Aluguel de veículos', 'valor_estimado': -10000.0, 'centro_gasto_codigo': '1021617402',
+         'conta_contabil_codigo': '3010101', 'mes_competencia': 'JAN', 'numero_registro': None, 'numero_contrato': None},
+        # Disputa no mesmo bloco: a atribuição ótima troca o par "guloso"
+        {'id': 2, 'descricao': 'Manutenção de válvulas', 'valor_estimado': -5000.0, 'centro_gasto_codigo': '01022107501',
+         'conta_contabil_codigo': '3010201', 'mes_competencia': 'FEV', 'numero_registro': None, 'numero_contrato': None},
+        {'id': 3, 'descricao': 'Manutenção de válvulas', 'valor_estimado': -5300.0, 'centro_gasto_codigo': '01022107501',
+         'conta_contabil_codigo': '3010201', 'mes_competencia': 'FEV', 'numero_registro': None, 'numero_contrato': None},
+        # Valor diferente, mas o número de registro aparece no lançamento
+        {'id': 4, 'descricao': 'Consultoria ambiental', 'valor_estimado': -20000.0, 'centro_gasto_codigo': '01022107501',
+         'conta_contabil_codigo': '3010301', 'mes_competencia': 'MAR', 'numero_registro': 'SE-0004567', 'numero_contrato': None},
+        # Sem lançamento compatível
+        {'id': 5, 'descricao': 'Treinamento', 'valor_estimado': -800.0, 'centro_gasto_codigo': '01022107501',
+         'conta_contabil_codigo': '3010401', 'mes_competencia': 'MAR', 'numero_registro': None, 'numero_contrato': None},
+    ])
+    razao = pd.DataFrame([
+        {'id': 101, 'mes': 'JAN', 'centro_gasto_codigo': '01021617402', 'conta_contabil_codigo': '3010101.0',
+         'fornecedor': 'LOCALIZA RENT A CAR', 'descricao': 'Aluguel de veículos', 'valor': -10100.0, 'numero_registro': None},
+        {'id': 102, 'mes': 'FEV', 'centro_gasto_codigo': '01022107501', 'conta_contabil_codigo': '3010201',
+         'fornecedor': '', 'descricao': 'Manutenção de válvulas', 'valor': -5050.0, 'numero_registro': None},
+        {'id': 103, 'mes': 'FEV', 'centro_gasto_codigo': '01022107501', 'conta_contabil_codigo': '3010201',
+         'fornecedor': '', 'descricao': 'Manutenção de válvulas', 'valor': -4750.0, 'numero_registro': None},
+        {'id': 104, 'mes': 'MAR', 'centro_gasto_codigo': '01022107501', 'conta_contabil_codigo': '3010301',
+         'fornecedor': 'ECO CONSULTORIA', 'descricao': 'Serviço ref. SE0004567', 'valor': -26000.0, 'numero_registro': None},
+        {'id': 105, 'mes': 'MAR', 'centro_gasto_codigo': '01022107501', 'conta_contabil_codigo': '3010401',
+         'fornecedor': 'ESCOLA X', 'descricao': 'Curso', 'valor': -3000.0, 'numero_registro': None},
+    ])
+
+    sugestoes = conciliar(provisoes, razao)
+    pares = dict(zip(sugestoes['provisao_id'], sugestoes['razao_id']))
+    assert pares[1] == 101
+    # Guloso daria 2->102 (melhor par) e deixaria 3 sem par; o ótimo é 3->102, 2->103
+    assert pares[3] == 102 and pares[2] == 103
+    assert pares[4] == 104
+    assert 5 not in pares
+    assert len(set(pares.values())) == len(pares)
+
+    # Volume: milhares de provisões x dezenas de milhares de lançamentos
+    n_prov, n_razao = 5_000, 50_000
+    centros = [f"0102210{i:04d}" for i in range(400)]
+    provisoes = pd.DataFrame({
+        'id': range(n_prov), 'descricao': [f"Serviço {i % 50}" for i in range(n_prov)],
+        'valor_estimado': [-1000.0 - (i % 997) * 10 for i in range(n_prov)],
+        'centro_gasto_codigo': [centros[i % 400] for i in range(n_prov)], 'conta_contabil_codigo': '3010101',
+        'mes_competencia': [MESES[i % 12] for i in range(n_prov)], 'numero_registro': None, 'numero_contrato': None,
+    })
+    razao = pd.DataFrame({
+        'id': range(n_razao), 'mes': [MESES[i % 12] for i in range(n_razao)],
+        'centro_gasto_codigo': [centros[(i // 12) % 400] for i in range(n_razao)], 'conta_contabil_codigo': '3010101',
+        'fornecedor': [f"FORNECEDOR {i % 300}" for i in range(n_razao)],
+        'descricao': [f"Serviço {i % 50}" for i in range(n_razao)],
+        'valor': [-1000.0 - (i % 991) * 10 for i in range(n_razao)], 'numero_registro': None,
+    })
+    inicio = time.perf_counter()
+    sugestoes = conciliar(provisoes, razao)
+    tempo_s = time.perf_counter() - inicio
+    print(f"[INFO] {n_prov} provisões x {n_razao} lançamentos: {len(sugestoes)} sugestões em {tempo_s:.2f} s")
+    assert sugestoes['provisao_id'].is_unique and sugestoes['razao_id'].is_unique
+    assert len(sugestoes) > 0 and tempo_s < 10
+    print("[OK] Blocagem, pontuação, atribuição ótima e volume.")
+
+
+def test_fingerprint():
+    print(">>> Deduplicação por fingerprint na carga")
+    session = criar_sessao_razao()
+    carga = pd.DataFrame({
+        'ano': 2026, 'mes': ['JAN', 'JAN', 'JAN', 'FEV'],
+        'centro_gasto_codigo': '01021617402', 'conta_contabil_codigo': '3010101',
+        'fornecedor': ['LOCALIZA', 'CLARO', 'CLARO', 'LOCALIZA'],
+        # Duas parcelas idênticas da CLARO: linhas legítimas, não duplicata
+        'descricao': ['Aluguel', 'Telefonia', 'Telefonia', 'Aluguel'],
+        'valor': [-1000.0, -250.0, -250.0, -1000.0],
+        'data_lancamento': pd.to_datetime(['2026-01-10', '2026-01-15', '2026-01-15', '2026-02-10']),
+    })
+    escopo = RazaoRealizado.ano == 2026
+
+    assert sincronizar_por_fingerprint(session, RazaoRealizado, carga, escopo)['inseridos'] == 4
+    session.commit()
+    ids = sorted(i for (i,) in session.query(RazaoRealizado.id))
+
+    # Recarga idêntica (códigos como vêm do Excel, texto com outra caixa): nada muda
+    recarga = carga.assign(centro_gasto_codigo='1021617402', conta_contabil_codigo='3010101.0',
+                           fornecedor=carga['fornecedor'].str.lower())
+    resultado = sincronizar_por_fingerprint(session, RazaoRealizado, recarga, escopo)
+    session.commit()
+    assert resultado == {'inseridos': 0, 'removidos': 0, 'mantidos': 4}
+    assert sorted(i for (i,) in session.query(RazaoRealizado.id)) == ids
+
+    # Um valor corrigido em FEV: só essa linha é trocada
+    corrigida = carga.copy()
+    corrigida.loc[3, 'valor'] = -1100.0
+    resultado = sincronizar_por_fingerprint(session, RazaoRealizado, corrigida, escopo)
+    session.commit()
+    assert (resultado['inseridos'], resultado['removidos'], resultado['mantidos']) == (1, 1, 3)
+    assert session.query(RazaoRealizado).count() == 4
+    assert set(ids[:3]) <= {i for (i,) in session.query(RazaoRealizado.id)}
+
+    # Inserção avulsa pelo ORM recebe o mesmo fingerprint da carga
+    avulso = lancamento(2025, 'LOCALIZA', 'Aluguel')
+    session.add(avulso)
+    session.commit()
+    esperado = calcular_fingerprints(pd.DataFrame([{
+        'ano': 2025, 'mes': 'JAN', 'centro_gasto_codigo': '01021617402', 'conta_contabil_codigo': '3010101',
+        'fornecedor': 'LOCALIZA', 'descricao': 'Aluguel', 'valor': -1000.0,
+    }]), 'razao_realizados').iloc[0]
+    assert avulso.fingerprint == esperado
+    # Escopo: a carga de 2026 não toca 2025
+    assert sincronizar_por_fingerprint(session, RazaoRealizado, carga, escopo)['removidos'] == 1
+    session.commit()
+    assert session.query(RazaoRealizado).filter(RazaoRealizado.ano == 2025).count() == 1
+    session.close()
+    print("[OK] Recarga idempotente, repetições legítimas preservadas e troca só do que mudou.")
+
+
+def test_particoes():
+    print(">>> Carga do Razão por partição (ano, mês)")
+    session = criar_sessao_razao()
+    n_mes = 2000
+    ano = pd.DataFrame({
+        'ano': 2026, 'mes': [m for m in MESES for _ in range(n_mes)],
+        'centro_gasto_codigo': '01021617402', 'conta_contabil_codigo': '3010101',
+        'fornecedor': [f"FORNECEDOR {i % 300}" for i in range(12 * n_mes)],
+        'descricao': [f"Lançamento {i}" for i in range(12 * n_mes)],
+        'valor': [-100.0 - i % 977 for i in range(12 * n_mes)],
+    })
+
+    resultado = sincronizar_por_particao(session, RazaoRealizado, ano, 2026)
+    session.commit()
+    assert len(resultado['meses_alterados']) == 12 and resultado['inseridos'] == 12 * n_mes
+    assert session.query(ChecksumParticao).count() == 12
+
+    # Recarga idêntica: nenhum mês reescrito
+    resultado = sincronizar_por_particao(session, RazaoRealizado, ano, 2026)
+    session.commit()
+    assert resultado['meses_alterados'] == [] and len(resultado['meses_inalterados']) == 12
+    assert (resultado['inseridos'], resultado['removidos']) == (0, 0)
+
+    # Fechamento de DEZ: um valor corrigido e um lançamento novo; só DEZ é tocado
+    fechamento = ano.copy()
+    fechamento.loc[fechamento.index[-1], 'valor'] = -999999.0
+    fechamento = pd.concat([fechamento, fechamento.tail(1).assign(descricao='Lançamento extra')],
+                           ignore_index=True)
+    ids_jan = {i for (i,) in session.query(RazaoRealizado.id).filter(RazaoRealizado.mes == 'JAN')}
+    inicio = time.perf_counter()
+    resultado = sincronizar_por_particao(session, RazaoRealizado, fechamento, 2026)
+    session.commit()
+    print(f"[INFO] recarga com 1 mês alterado: {time.perf_counter() - inicio:.2f} s")
+    assert resultado['meses_alterados'] == ['DEZ']
+    assert (resultado['inseridos'], resultado['removidos']) == (2, 1)
+    assert ids_jan == {i for (i,) in session.query(RazaoRealizado.id).filter(RazaoRealizado.mes == 'JAN')}
+    assert session.query(RazaoRealizado).count() == 12 * n_mes + 1
+
+    # Edição fora da carga invalida o checksum do ano: a recarga volta a comparar as linhas
+    linha = session.query(RazaoRealizado).filter(RazaoRealizado.mes == 'MAR').first()
+    linha.valor = 0.0
+    session.commit()
+    resultado = sincronizar_por_particao(session, RazaoRealizado, fechamento, 2026)
+    session.commit()
+    assert len(resultado['meses_alterados']) == 12
+    assert (resultado['inseridos'], resultado['removidos']) == (1, 1)
+
+    # Mês que saiu do arquivo é removido, com o checksum
+    resultado = sincronizar_por_particao(session, RazaoRealizado, fechamento[fechamento['mes'] != 'DEZ'], 2026)
+    session.commit()
+    assert resultado['meses_removidos'] == ['DEZ'] and resultado['meses_alterados'] == []
+    assert session.query(RazaoRealizado).filter(RazaoRealizado.mes == 'DEZ').count() == 0
+    assert session.query(ChecksumParticao).count() == 11
+    session.close()
+    print("[OK] Só os meses com checksum diferente são reescritos.")
+
+
+def test_fornecedores():
+    import random
+    print(">>> Fornecedores canônicos")
+    engine = create_engine("sqlite:///:memory:")
+    Fornecedor.__table__.create(engine)
+    FornecedorAlias.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+
+    def grupos():
+        linhas = session.query(FornecedorAlias.nome, FornecedorAlias.fornecedor_id).all()
+        return dict(linhas)
+
+    resultado = registrar_nomes({
+        'ENGIE SERVICOS LTDA': 10, 'Engie Serviços Ltda.': 3, 'ENGIE SERVICO LTDA': 1,
+        'ENGIE SOLUCOES LTDA': 5, 'CLARO S.A.': 4, 'Claro S/A': 2, 'nan': 7, 'N/A': 1,
+    }, session)
+    assert resultado['nomes_novos'] == 6 and resultado['fornecedores_novos'] == 3
+    ids = grupos()
+    assert ids['ENGIE SERVICOS LTDA'] == ids['Engie Serviços Ltda.'] == ids['ENGIE SERVICO LTDA']
+    assert ids['ENGIE SOLUCOES LTDA'] != ids['ENGIE SERVICOS LTDA']
+    assert ids['CLARO S.A.'] == ids['Claro S/A']
+    canonico = session.query(Fornecedor.nome_canonico).filter(Fornecedor.id == ids['Engie Serviços Ltda.']).scalar()
+    assert canonico == 'ENGIE SERVICOS LTDA'  # grafia mais frequente
+
+    # Incremental: grafia nova entra no grupo existente, sem mudar ids; repetir não faz nada
+    assert registrar_nomes({'engie servicos': 1, 'CLARO S.A.': 9}, session)['nomes_novos'] == 1
+    assert grupos()['engie servicos'] == ids['ENGIE SERVICOS LTDA']
+    assert registrar_nomes({'engie servicos': 1}, session)['nomes_novos'] == 0
+
+    # Volume: milhares de grafias cadastradas, um upload com grafias novas processado em segundos
+    rnd = random.Random(42)
+    silabas = ['BRA', 'SIL', 'TEC', 'NOR', 'VALE', 'GAS', 'LUZ', 'MAR', 'SUL', 'PAR', 'TRAN', 'LOG', 'ENG', 'MEC',
+               'FER', 'QUI', 'MIN', 'AGRO', 'CON', 'SEG', 'TEL', 'ALFA', 'OMEGA', 'RIO', 'SER', 'PRO', 'INFO', 'DATA']
+    def nome_aleatorio():
+        return " ".join("".join(rnd.choice(silabas) for _ in range(3)) for _ in range(2))
+    base = {f"{nome_aleatorio()} {i} LTDA": 1 for i in range(20_000)}
+    registrar_nomes(base, session)
+    amostra = rnd.sample(sorted(base), 300)
+    novos = {n.replace(' LTDA', ' Ltda.').lower(): 1 for n in amostra}
+    novos.update({f"{nome_aleatorio()} X{i}": 1 for i in range(700)})
+    inicio = time.perf_counter()
+    resultado = registrar_nomes(novos, session)
+    tempo_s = time.perf_counter() - inicio
+    print(f"[INFO] {resultado['nomes_novos']} grafias novas contra {len(base)} cadastradas: {tempo_s:.2f} s")
+    ids = grupos()
+    assert all(ids[n.replace(' LTDA', ' Ltda.').lower()] == ids[n] for n in amostra)
+    assert tempo_s < 10
+    session.close()
+    print("[OK] Grafias agrupadas por chave e similaridade, incremental e sem O(n²).")
+
+
+MESES = ['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN', 'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ']
+
+
+if __name__ == "__main__":
+    test_indice_razao()
+    test_busca_textual()
+    test_conciliacao()
+    test_fingerprint()
+    test_particoes()
+    test_fornecedores()
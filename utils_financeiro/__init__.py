@@ -0,0 +1,95 @@
+"""
+utils_financeiro
+================
+Utilitários focados em análise financeira: ETL, validação, forecasting e IA.
+
+Fachada preguiçosa (PEP 562) sobre os submódulos:
+
+- etl:         upload/processamento do P&L e Razão, status da sessão, carga do banco
+- validacao:   schemas Pandera e ValidadorDados
+- forecasting: SimpleForecaster e interface de forecasting
+- ia:          chat e análise com IA generativa
+- graficos:    visualizações Plotly
+
+`from utils_financeiro import X` continua funcionando para todos os nomes
+públicos, mas cada submódulo (e suas dependências pesadas: pandera, plotly,
+statsmodels, sklearn...) só é importado no primeiro acesso a um nome dele.
+Assim a Home não paga o import de bibliotecas que só outras páginas usam.
+O custo de import por página é medido em scripts/benchmark_importtime.py.
+
+Autor: Sistema de Análise Financeira
+Versão: 2.1.0 (Standalone)
+"""
+
+import importlib
+import warnings
+
+# Constantes são leves: importadas já na fachada
+from utils_financeiro.constantes import ABAS_PROCESSAR, MESES_ORDEM, MESES_NUM_MAP
+
+warnings.filterwarnings('ignore')
+
+# =============================================================================
+# MAPA NOME -> SUBMÓDULO
+# =============================================================================
+
+_SUBMODULOS = {
+    'etl': [
+        'processar_upload_completo',
+        'processar_aba_orcamento',
+        'processar_razao_gastos',
+        'gerar_estatisticas_orcamento',
+        'exportar_orcamento_csv',
+        'verificar_status_dados',
+        'processar_upload_pl',
+        'contas_sem_mapeamento',
+        'get_resumo_importacao',
+        'carregar_historico_realizado_db',
+        'garantir_dados_sessao',
+    ],
+    'validacao': [
+        'SCHEMA_PL',
+        'SCHEMA_ORCAMENTO',
+        'ValidadorDados',
+    ],
+    'forecasting': [
+        'SimpleForecaster',
+        'criar_interface_forecasting_simples',
+    ],
+    'ia': [
+        'get_ai_chat_response',
+        'stream_ai_chat_response',
+        'gerar_analise_ia',
+    ],
+    'graficos': [
+        'plot_heatmap_desvios',
+        'plot_robust_forecast',
+    ],
+}
+
+# Privados mantidos acessíveis por compatibilidade (fora de __all__)
+_PRIVADOS = {
+    '_standardize_string': 'etl',
+    '_standardize_columns': 'etl',
+}
+
+_NOME_PARA_SUBMODULO = {nome: sub for sub, nomes in _SUBMODULOS.items() for nome in nomes}
+_NOME_PARA_SUBMODULO.update(_PRIVADOS)
+
+__all__ = ['ABAS_PROCESSAR', 'MESES_ORDEM', 'MESES_NUM_MAP'] + list(
+    nome for nomes in _SUBMODULOS.values() for nome in nomes
+)
+
+
+def __getattr__(nome: str):
+    """Resolve um nome público importando seu submódulo sob demanda."""
+    submodulo = _NOME_PARA_SUBMODULO.get(nome)
+    if submodulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f"{__name__}.{submodulo}"), nome)
+    globals()[nome] = valor  # Próximos acessos não passam por aqui
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,16 @@
+"""
+utils_financeiro/constantes.py
+==============================
+Configurações globais compartilhadas pelos submódulos (sem dependências).
+
+Autor: Sistema de Análise Financeira
+"""
+
+ABAS_PROCESSAR = [
+    'ITABUNA', 'CAMAÇARI', 'CATU', 'ECOMP CATU', 'ATALAIA', 'PILAR'
+]
+
+MESES_ORDEM = ['JAN', 'FEV', 'MAR', 'ABR', 'MAI', 'JUN',
+               'JUL', 'AGO', 'SET', 'OUT', 'NOV', 'DEZ']
+
+MESES_NUM_MAP = {mes: i+1 for i, mes in enumerate(MESES_ORDEM)}
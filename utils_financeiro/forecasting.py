@@ -0,0 +1,429 @@
+"""
+utils_financeiro/forecasting.py
+===============================
+Forecasting matemático (SimpleForecaster) e a interface Streamlit associada.
+
+Autor: Sistema de Análise Financeira
+"""
+
+from typing import Tuple
+from datetime import datetime
+
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+
+# =============================================================================
+# 1. FORECASTING MATEMÁTICO (STREAMLIT CLOUD COMPATIBLE)
+# =============================================================================
+
+class SimpleForecaster:
+    """Modelo de forecasting matemático usando extrapolação linear e médias móveis."""
+    
+    def __init__(self):
+        self.model = None
+        self.forecast = None
+        self.method = None
+        self.historical_data = None
+        self.confidence_intervals = None
+        
+    def fit(self, df: pd.DataFrame, date_col: str, value_col: str, method='hybrid', **kwargs):
+        """
+        Treina o modelo de forecasting.
+        
+        Args:
+            df: DataFrame com dados históricos
+            date_col: Nome da coluna de data
+            value_col: Nome da coluna de valores
+            method: Método de forecasting ('linear', 'sma', 'ema', 'seasonal', 'hybrid')
+            **kwargs: Parâmetros adicionais (window_size para médias móveis, etc.)
+        """
+        self.method = method
+        self.date_col = date_col
+        self.value_col = value_col
+        
+        # Ordenar por data
+        df_sorted = df.sort_values(date_col).copy()
+        self.historical_data = df_sorted
+        
+        # Armazenar série temporal
+        self.dates = df_sorted[date_col].values
+        self.values = df_sorted[value_col].values
+        
+        # Parâmetros do modelo
+        self.window_size = kwargs.get('window_size', 3)
+        self.alpha = kwargs.get('alpha', 0.3)  # Para EMA
+        
+    def _linear_trend(self, periods: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Calcula tendência linear usando regressão."""
+        from sklearn.linear_model import LinearRegression
+
+        X = np.arange(len(self.values)).reshape(-1, 1)
+        y = self.values
+        
+        # Regressão linear
+        model = LinearRegression()
+        model.fit(X, y)
+        
+        # Previsões futuras
+        future_X = np.arange(len(self.values), len(self.values) + periods).reshape(-1, 1)
+        predictions = model.predict(future_X)
+        
+        # Intervalo de confiança baseado em desvio padrão dos resíduos
+        residuals = y - model.predict(X)
+        std_residuals = np.std(residuals)
+        lower = predictions - 1.96 * std_residuals
+        upper = predictions + 1.96 * std_residuals
+        
+        return predictions, lower, upper
+    
+    def _moving_average(self, periods: int, ma_type='sma') -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Calcula médias móveis (Simple ou Exponential)."""
+        if ma_type == 'sma':
+            # Simple Moving Average
+            last_values = self.values[-self.window_size:]
+            prediction = np.mean(last_values)
+            predictions = np.full(periods, prediction)
+        else:
+            # Exponential Moving Average
+            ema = self.values[0]
+            for val in self.values[1:]:
+                ema = self.alpha * val + (1 - self.alpha) * ema
+            predictions = np.full(periods, ema)
+        
+        # Intervalo de confiança baseado em desvio padrão
+        std_values = np.std(self.values)
+        lower = predictions - 1.96 * std_values
+        upper = predictions + 1.96 * std_values
+        
+        return predictions, lower, upper
+    
+    def _seasonal_decompose(self, periods: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Decomposição sazonal + extrapolação de tendência."""
+        from sklearn.linear_model import LinearRegression
+        from statsmodels.tsa.seasonal import seasonal_decompose
+
+        # Preparar série temporal
+        df_ts = self.historical_data.set_index(self.date_col)[self.value_col]
+        
+ # Decomposição
+        try:
+            decomposition = seasonal_decompose(df_ts, model='additive', period=min(12, len(df_ts)//2), extrapolate_trend='freq')
+            
+            # Extrair componentes
+            trend = decomposition.trend.dropna()
+            seasonal = decomposition.seasonal.dropna()
+            
+            # Extrapolar tendência linearmente
+            X_trend = np.arange(len(trend)).reshape(-1, 1)
+            model = LinearRegression()
+            model.fit(X_trend, trend.values)
+            
+            future_X = np.arange(len(trend), len(trend) + periods).reshape(-1, 1)
+            future_trend = model.predict(future_X)
+            
+            # Repetir padrão sazonal
+            seasonal_pattern = seasonal.values[-12:] if len(seasonal) >= 12 else seasonal.values
+            future_seasonal = np.tile(seasonal_pattern, (periods // len(seasonal_pattern) + 1))[:periods]
+            
+            # Combinar
+            predictions = future_trend + future_seasonal
+            
+            # Intervalo de confiança
+            residuals = decomposition.resid.dropna()
+            std_residuals = np.std(residuals)
+            lower = predictions - 1.96 * std_residuals
+            upper = predictions + 1.96 * std_residuals
+            
+        except Exception as e:
+            # Fallback para tendência linear simples
+            predictions, lower, upper = self._linear_trend(periods)
+        
+        return predictions, lower, upper
+    
+    def _hybrid_forecast(self, periods: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Combina tendência linear com sazonalidade."""
+        # Tendência linear
+        linear_pred, _, _ = self._linear_trend(periods)
+        
+        # Componente sazonal
+        try:
+            from statsmodels.tsa.seasonal import seasonal_decompose
+
+            df_ts = self.historical_data.set_index(self.date_col)[self.value_col]
+            decomposition = seasonal_decompose(df_ts, model='additive', period=min(12, len(df_ts)//2), extrapolate_trend='freq')
+            seasonal = decomposition.seasonal.dropna()
+            
+            # Repetir padrão sazonal
+            seasonal_pattern = seasonal.values[-12:] if len(seasonal) >= 12 else seasonal.values
+            future_seasonal = np.tile(seasonal_pattern, (periods // len(seasonal_pattern) + 1))[:periods]
+            
+            # Combinar
+            predictions = linear_pred + future_seasonal
+            
+            # Intervalo de confiança
+            residuals = decomposition.resid.dropna()
+            std_residuals = np.std(residuals)
+            lower = predictions - 1.96 * std_residuals
+            upper = predictions + 1.96 * std_residuals
+            
+        except Exception:
+            # Fallback para tendência linear
+            predictions, lower, upper = self._linear_trend(periods)
+        
+        return predictions, lower, upper
+    
+    def predict(self, periods: int = 12) -> pd.DataFrame:
+        """
+        Gera previsões futuras.
+        
+        Args:
+            periods: Número de períodos a prever
+            
+        Returns:
+            DataFrame com previsões e intervalos de confiança
+        """
+        if self.method == 'linear':
+            predictions, lower, upper = self._linear_trend(periods)
+        elif self.method == 'sma':
+            predictions, lower, upper = self._moving_average(periods, ma_type='sma')
+        elif self.method == 'ema':
+            predictions, lower, upper = self._moving_average(periods, ma_type='ema')
+        elif self.method == 'seasonal':
+            predictions, lower, upper = self._seasonal_decompose(periods)
+        else:  # hybrid
+            predictions, lower, upper = self._hybrid_forecast(periods)
+        
+        # Criar datas futuras
+        last_date = pd.to_datetime(self.dates[-1])
+        future_dates = pd.date_range(start=last_date + pd.DateOffset(months=1), periods=periods, freq='MS')
+        
+        # DataFrame de resultados
+        self.forecast = pd.DataFrame({
+            'data': future_dates,
+            'previsao': predictions,
+            'limite_inferior': lower,
+            'limite_superior': upper
+        })
+        
+        return self.forecast
+    
+    def plot(self, df_hist: pd.DataFrame, date_col: str, value_col: str) -> 'go.Figure':
+        """Plota histórico e previsões."""
+        # Lazy import - Plotly só é carregado quando há gráfico
+        import plotly.graph_objects as go
+        
+        fig = go.Figure()
+        
+        # Histórico
+        fig.add_trace(go.Scatter(
+            x=df_hist[date_col],
+            y=df_hist[value_col],
+            mode='lines+markers',
+            name='Histórico',
+            line=dict(color='#1f77b4', width=2),
+            marker=dict(size=4)
+        ))
+        
+        if self.forecast is not None:
+            # Previsão
+            fig.add_trace(go.Scatter(
+                x=self.forecast['data'],
+                y=self.forecast['previsao'],
+                mode='lines+markers',
+                name='Previsão',
+                line=dict(color='#d62728', width=2, dash='dash'),
+                marker=dict(size=6)
+            ))
+            
+            # Intervalo de confiança
+            fig.add_trace(go.Scatter(
+                x=self.forecast['data'],
+                y=self.forecast['limite_superior'],
+                mode='lines',
+                name='IC Superior',
+                line=dict(color='rgba(214, 39, 40, 0.3)', width=0),
+                showlegend=False
+            ))
+            
+            fig.add_trace(go.Scatter(
+                x=self.forecast['data'],
+                y=self.forecast['limite_inferior'],
+                mode='lines',
+                name='IC Inferior',
+                line=dict(color='rgba(214, 39, 40, 0.3)', width=0),
+                fill='tonexty',
+                fillcolor='rgba(214, 39, 40, 0.2)',
+                showlegend=True
+            ))
+        
+        # Layout
+        method_names = {
+            'linear': 'Tendência Linear',
+            'sma': 'Média Móvel Simples',
+            'ema': 'Média Móvel Exponencial',
+            'seasonal': 'Decomposição Sazonal',
+            'hybrid': 'Modelo Híbrido (Linear + Sazonal)'
+        }
+        
+        fig.update_layout(
+            title=f"Previsão Financeira - {method_names.get(self.method, 'Matemático')}",
+            xaxis_title="Data",
+            yaxis_title="Valor (R$)",
+            hovermode='x unified',
+            height=500,
+            template='plotly_white'
+        )
+        
+        return fig
+
+
+# =============================================================================
+# 2. INTERFACE DE FORECASTING (COMPONENTIZADA)
+# =============================================================================
+
+def criar_interface_forecasting_simples():
+    """Interface Streamlit para Forecasting Matemático."""
+    st.subheader("📈 Previsão Financeira (Modelo Matemático)")
+    
+    st.info("💡 **Modelo otimizado para Streamlit Cloud**: Utiliza extrapolação linear e médias móveis para previsões rápidas e interpretáveis.")
+    
+    if 'pl_df' not in st.session_state or st.session_state.pl_df is None:
+        st.warning("⚠️ Carregue os dados de P&L primeiro.")
+        return
+    
+    df = st.session_state.pl_df
+    df_custos = df[df['codigo_centro_gasto'] != 0].copy()
+    df_realizado = df_custos[df_custos['tipo_valor'] == 'Realizado'].groupby('data')['valor'].sum().reset_index()
+    
+    if len(df_realizado) < 3:
+        st.error("❌ Dados insuficientes para previsão. Necessário pelo menos 3 períodos.")
+        return
+    
+    # Configurações de previsão
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        method = st.selectbox(
+            "Método de Previsão",
+            options=['hybrid', 'linear', 'sma', 'ema', 'seasonal'],
+            format_func=lambda x: {
+                'linear': '📈 Tendência Linear',
+                'sma': '📊 Média Móvel Simples',
+                'ema': '📉 Média Móvel Exponencial',
+                'seasonal': '🌊 Decomposição Sazonal',
+                'hybrid': '🔮 Híbrido (Recomendado)'
+            }[x],
+            index=0
+        )
+    
+    with col2:
+        periods = st.number_input(
+            "Períodos a Prever (meses)",
+            min_value=1,
+            max_value=24,
+            value=12,
+            help="Número de meses futuros para prever"
+        )
+    
+    with col3:
+        if method in ['sma', 'ema']:
+            if method == 'sma':
+                window_size = st.number_input(
+                    "Janela da Média Móvel",
+                    min_value=2,
+                    max_value=12,
+                    value=3,
+                    help="Número de períodos para calcular a média"
+                )
+            else:
+                alpha = st.slider(
+                    "Alpha (EMA)",
+                    min_value=0.1,
+                    max_value=0.9,
+                    value=0.3,
+                    step=0.1,
+                    help="Peso dos valores mais recentes"
+                )
+    
+    # Botão de treinar
+    if st.button("🚀 Gerar Previsão", type="primary"):
+        with st.spinner("Gerando previsão..."):
+            try:
+                forecaster = SimpleForecaster()
+                
+                # Parâmetros
+                kwargs = {}
+                if method == 'sma':
+                    kwargs['window_size'] = window_size
+                elif method == 'ema':
+                    kwargs['alpha'] = alpha
+                
+                # Treinar
+                forecaster.fit(df_realizado, 'data', 'valor', method=method, **kwargs)
+                forecast_df = forecaster.predict(periods=periods)
+                
+                # Salvar no session state
+                st.session_state.simple_forecaster = forecaster
+                st.session_state.simple_forecast = forecast_df
+                
+                st.success("✅ Previsão gerada com sucesso!")
+                
+            except Exception as e:
+                st.error(f"❌ Erro ao gerar previsão: {e}")
+                return
+    
+    # Exibir resultados
+    if 'simple_forecast' in st.session_state:
+        st.divider()
+        st.subheader("📊 Resultados da Previsão")
+        
+        # Gráfico
+        fig = st.session_state.simple_forecaster.plot(df_realizado, 'data', 'valor')
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Tabela de previsões
+        st.subheader("📋 Valores Previstos")
+        
+        df_display = st.session_state.simple_forecast.copy()
+        df_display['data'] = df_display['data'].dt.strftime('%Y-%m')
+        df_display['previsao'] = df_display['previsao'].apply(lambda x: f"R$ {x:,.2f}")
+        df_display['limite_inferior'] = df_display['limite_inferior'].apply(lambda x: f"R$ {x:,.2f}")
+        df_display['limite_superior'] = df_display['limite_superior'].apply(lambda x: f"R$ {x:,.2f}")
+        
+        df_display.columns = ['Mês', 'Previsão', 'Limite Inferior (95%)', 'Limite Superior (95%)']
+        
+        st.dataframe(df_display, use_container_width=True, hide_index=True)
+        
+        # Estatísticas
+        st.subheader("📈 Estatísticas")
+        col_stat1, col_stat2, col_stat3 = st.columns(3)
+        
+        previsao_media = st.session_state.simple_forecast['previsao'].mean()
+        historico_media = df_realizado['valor'].mean()
+        variacao = ((previsao_media - historico_media) / historico_media * 100) if historico_media != 0 else 0
+        
+        col_stat1.metric(
+            "Média Prevista",
+            f"R$ {previsao_media:,.2f}",
+            delta=f"{variacao:+.1f}%"
+        )
+        col_stat2.metric(
+            "Média Histórica",
+            f"R$ {historico_media:,.2f}"
+        )
+        col_stat3.metric(
+            "Total Previsto ({} meses)".format(periods),
+            f"R$ {st.session_state.simple_forecast['previsao'].sum():,.2f}"
+        )
+        
+        # Download
+        st.divider()
+        csv = st.session_state.simple_forecast.to_csv(index=False).encode('utf-8')
+        st.download_button(
+            label="📥 Download Previsões (CSV)",
+            data=csv,
+            file_name=f"previsoes_{method}_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv"
+        )
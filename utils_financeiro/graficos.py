@@ -0,0 +1,152 @@
+"""
+utils_financeiro/graficos.py
+============================
+Visualizações (Plotly) de desvios e projeção de tendência.
+
+Autor: Sistema de Análise Financeira
+"""
+
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+
+from utils_financeiro.constantes import MESES_ORDEM
+
+
+# =============================================================================
+# 1. VISUALIZAÇÕES AVANÇADAS
+# =============================================================================
+
+def plot_heatmap_desvios(df: pd.DataFrame) -> go.Figure:
+    """Gera heatmap de desvios orçamentários."""
+    df_heatmap = df.pivot_table(
+        values='diferenca',
+        index='base_operacional',
+        columns='mes',
+        aggfunc='sum'
+    )
+    df_heatmap = df_heatmap.reindex(columns=MESES_ORDEM)
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=df_heatmap.values,
+        x=df_heatmap.columns,
+        y=df_heatmap.index,
+        colorscale='RdYlGn',
+        zmid=0,
+        text=df_heatmap.values,
+        texttemplate='R$ %{text:.2f}',
+        textfont={"size": 10},
+        colorbar=dict(title="Desvio (R$)")
+    ))
+    
+    fig.update_layout(
+        title="Heatmap de Desvios Orçamentários por Base e Mês",
+        xaxis_title="Mês",
+        yaxis_title="Base Operacional",
+        height=400
+    )
+    
+    return fig
+
+
+def plot_robust_forecast(df, date_col, value_col, periods=3):
+    """
+    Gera um gráfico de previsão robusto para séries curtas (< 24 meses) ou longas.
+    Usa Holt-Winters se possível, ou Regressão Linear Simples se dados insuficientes.
+    """
+    try:
+        df_proc = df.copy()
+        df_proc[date_col] = pd.to_datetime(df_proc[date_col])
+        df_proc = df_proc.sort_values(date_col).set_index(date_col)
+        
+        # Agrupar mensalmente para garantir regularidade
+        ts = df_proc[value_col].resample('MS').sum().fillna(0)
+        
+        # Trabalhar com valores absolutos para evitar erros de log/multiplicativo com negativos
+        ts_abs = ts.abs()
+        was_negative = (ts.mean() < 0)
+        
+        df_plot = pd.DataFrame({'Realizado': ts_abs})
+        
+        # Previsão Simples (Média Móvel Exponencial + Tendência Linear)
+        # Se tivermos poucos dados (< 12), usamos apenas uma média simples projetada
+        if len(ts) < 4:
+            return None # Muito poucos dados
+            
+        # Projeção em cache: a mesma série não é reajustada a cada rerun
+        from services.forecast_cache import get_cache_forecast, chave_forecast
+        
+        y = ts_abs.values
+        cache = get_cache_forecast()
+        chave = chave_forecast(y, 'plot_robust_linear', periods=periods)
+        em_cache = cache.obter(chave)
+        if em_cache is not None:
+            future_y = em_cache['previsao']
+        else:
+            # Lazy import - carregado apenas quando necessário
+            from sklearn.linear_model import LinearRegression
+            
+            X = np.arange(len(ts)).reshape(-1, 1)
+            model = LinearRegression()
+            model.fit(X, y)
+            
+            # Projetar futuro
+            last_idx = len(ts)
+            future_X = np.arange(last_idx, last_idx + periods).reshape(-1, 1)
+            future_y = model.predict(future_X)
+            cache.guardar(chave, {'previsao': future_y})
+        
+        # Criar datas futuras
+        last_date = ts.index[-1]
+        future_dates = [last_date + pd.DateOffset(months=i+1) for i in range(periods)]
+        
+        df_forecast = pd.DataFrame({'Previsão': future_y}, index=future_dates)
+        
+        # Unir para plot
+        df_final = pd.concat([df_plot, df_forecast])
+        
+        # Reverter sinal se era despesa (negativo)
+        if was_negative:
+            df_final = df_final * -1
+            
+        fig = go.Figure()
+        
+        # Série Realizada
+        fig.add_trace(go.Scatter(
+            x=df_final.index[:-periods], 
+            y=df_final['Realizado'].iloc[:-periods],
+            mode='lines+markers',
+            name='Realizado',
+            line=dict(color='#3b82f6', width=3)
+        ))
+        
+        # Série Previsão (Linha tracejada)
+        fig.add_trace(go.Scatter(
+            x=df_final.index[-periods-1:], # Conectar com último ponto real
+            y=df_final['Realizado'].iloc[-periods-1:].fillna(0) + df_final['Previsão'].iloc[-periods-1:].fillna(0), # Truque para pegar ponta
+            mode='lines+markers',
+            name='Tendência Projetada',
+            line=dict(color='#10b981', dash='dash', width=3)
+        ))
+        
+        # Adicionar Previsão puramente (caso overlap falhe)
+        fig.add_trace(go.Scatter(
+             x=df_forecast.index,
+             y=df_final['Previsão'].dropna(),
+             mode='markers',
+             name='Previsão',
+             marker=dict(color='#10b981', size=8)
+        ))
+
+        fig.update_layout(
+            title="Projeção de Tendência (Linear)",
+            xaxis_title="Mês",
+            yaxis_title="Valor (R$)",
+            template="plotly_dark",
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        return fig
+        
+    except Exception as e:
+        print(f"Erro na previsão: {e}")
+        return None
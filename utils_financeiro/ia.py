@@ -0,0 +1,200 @@
+"""
+utils_financeiro/ia.py
+======================
+Integração com IA generativa (Gemini) para análises e chat.
+
+Autor: Sistema de Análise Financeira
+"""
+
+import threading
+from typing import Iterator, List, Dict, Optional
+
+import pandas as pd
+
+
+# =============================================================================
+# 1. INTEGRAÇÃO COM IA
+# =============================================================================
+
+# Cliente configurado reaproveitado entre chamadas (por chave de API e modelo)
+_cliente_lock = threading.Lock()
+_cliente_api_key: Optional[str] = None
+_modelos: Dict[str, object] = {}
+
+
+def _nome_modelo(provider: str) -> str:
+    """Mapeamento de Modelos (Gemini 3)."""
+    # Nomes de API confirmados: gemini-3-pro-preview, gemini-3-flash-preview
+    if 'Flash' in provider:
+        return 'gemini-3-flash-preview'
+    return 'gemini-3-pro-preview' # Default para 'Pro'
+
+
+def _get_modelo(api_key: str, model_name: str):
+    """GenerativeModel já configurado; reconfigura o SDK só se a chave mudar."""
+    global _cliente_api_key
+    # Lazy import - carregado apenas quando necessário
+    import google.generativeai as genai
+    
+    with _cliente_lock:
+        if api_key != _cliente_api_key:
+            genai.configure(api_key=api_key)
+            _cliente_api_key = api_key
+            _modelos.clear()
+        if model_name not in _modelos:
+            _modelos[model_name] = genai.GenerativeModel(model_name)
+        return _modelos[model_name]
+
+
+def _versao_dados_atual() -> Optional[str]:
+    try:
+        from services.contexto_financeiro import versao_atual
+        return versao_atual()
+    except Exception as e:
+        print(f"Erro ao obter versão dos dados para o cache de IA: {e}")
+        return None
+
+
+def _preparar_cache(model_name: str, mensagens_usuario: List[Dict], usar_cache: bool,
+                    versao_dados: Optional[str]):
+    """(cache, chave) da consulta, ou (None, None) sem cache."""
+    if not usar_cache:
+        return None, None
+    from services.llm_cache import get_cache_llm, chave_llm
+    return get_cache_llm(), chave_llm(model_name, mensagens_usuario, versao_dados or _versao_dados_atual())
+
+
+def get_ai_chat_response(messages: List[Dict], api_key: str, provider: str,
+                         usar_cache: bool = True, versao_dados: str = None) -> str:
+    """
+    Envia prompt para IA e retorna resposta.
+    
+    Respostas ficam no cache persistente (services/llm_cache.py), chaveado
+    por modelo + prompt normalizado + versão dos dados.
+    
+    Args:
+        messages: Lista de mensagens no formato [{"role": "user", "content": "..."}]
+        api_key: Chave de API
+        provider: "Gemini (Google)" ou "Copilot (OpenAI GPT-4)"
+        usar_cache: Consulta/grava o cache de respostas
+        versao_dados: Versão dos dados (padrão: versão atual do banco)
+        
+    Returns:
+        Resposta da IA como string
+    """
+    model_name = _nome_modelo(provider)
+    mensagens_usuario = [msg for msg in messages if msg["role"] == "user"]
+    
+    cache, chave = _preparar_cache(model_name, mensagens_usuario, usar_cache, versao_dados)
+    if cache is not None:
+        em_cache = cache.obter(chave)
+        if em_cache is not None:
+            return em_cache
+    
+    try:
+        model = _get_modelo(api_key, model_name)
+        
+        # Concatenar mensagens
+        prompt = "\n".join([msg["content"] for msg in mensagens_usuario])
+        
+        # Gerar resposta
+        response = model.generate_content(prompt)
+        texto = response.text
+    
+    except Exception as e:
+        return f"Erro ao consultar Gemini AI ({model_name}): {e}"
+    
+    # Erros não são gravados: só respostas completas
+    if cache is not None:
+        cache.guardar(chave, model_name, texto)
+    return texto
+
+
+def stream_ai_chat_response(messages: List[Dict], api_key: str, provider: str,
+                            usar_cache: bool = True, versao_dados: str = None) -> Iterator[str]:
+    """
+    Variante em streaming de get_ai_chat_response: produz os trechos à medida
+    que o provedor os envia (uso: st.write_stream).
+    
+    Resposta em cache sai de uma vez; resposta nova só é gravada no cache
+    quando o streaming termina sem erro.
+    
+    Yields:
+        Trechos de texto da resposta (ou a mensagem de erro)
+    """
+    model_name = _nome_modelo(provider)
+    mensagens_usuario = [msg for msg in messages if msg["role"] == "user"]
+    
+    cache, chave = _preparar_cache(model_name, mensagens_usuario, usar_cache, versao_dados)
+    if cache is not None:
+        em_cache = cache.obter(chave)
+        if em_cache is not None:
+            yield em_cache
+            return
+    
+    partes = []
+    try:
+        model = _get_modelo(api_key, model_name)
+        prompt = "\n".join([msg["content"] for msg in mensagens_usuario])
+        
+        for chunk in model.generate_content(prompt, stream=True):
+            texto = chunk.text
+            if texto:
+                partes.append(texto)
+                yield texto
+    
+    except Exception as e:
+        separador = "\n\n" if partes else ""
+        yield f"{separador}Erro ao consultar Gemini AI ({model_name}): {e}"
+        return
+    
+    if cache is not None and partes:
+        cache.guardar(chave, model_name, "".join(partes))
+
+
+def gerar_analise_ia(df: pd.DataFrame, api_key: str, provider: str, contexto: str = "",
+                     orcamento_tokens: int = None) -> str:
+    """
+    Gera análise financeira usando IA.
+    
+    Os dados vão para o prompt compactados (totais, subtotais, maiores
+    desvios e detalhe até o orçamento de tokens), não a tabela inteira.
+    """
+    from services.compactador_prompt import compactar_dataframe, ORCAMENTO_PADRAO_TOKENS
+    
+    # Sem contexto explícito: snapshot financeiro compartilhado (montado uma vez por versão dos dados)
+    if not contexto:
+        from services.contexto_financeiro import contexto_para_prompt
+        contexto = contexto_para_prompt()
+    
+    # Preparar resumo dos dados (tamanho limitado qualquer que seja o volume)
+    compactacao = compactar_dataframe(df, orcamento_tokens or ORCAMENTO_PADRAO_TOKENS)
+    if compactacao.truncado:
+        print(f"Análise IA: dados compactados ({compactacao.descricao()})")
+    resumo = compactacao.texto
+    
+    prompt = f"""
+    Você é um analista financeiro sênior especializado em gestão de O&M de gasodutos.
+    
+    Contexto: {contexto}
+    
+    Analise os dados financeiros abaixo e forneça:
+    1. **Resumo Executivo** da performance financeira
+    2. **Principais Insights** (top 3)
+    3. **Recomendações Estratégicas** (top 3)
+    4. **Alertas e Riscos** identificados
+    
+    Dados:
+    ```
+    {resumo}
+    ```
+    
+    Formate sua resposta em Markdown com emojis para melhor visualização.
+    """
+    
+    messages = [
+        {"role": "system", "content": "Você é um analista financeiro especialista em O&M de gasodutos."},
+        {"role": "user", "content": prompt}
+    ]
+    
+    return get_ai_chat_response(messages, api_key, provider)
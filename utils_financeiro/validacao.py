@@ -0,0 +1,168 @@
+"""
+utils_financeiro/validacao.py
+=============================
+Validação de dados financeiros com Pandera (schemas de P&L e orçamento).
+
+Autor: Sistema de Análise Financeira
+"""
+
+from typing import List, Tuple, Dict, Optional
+from datetime import datetime
+
+import pandas as pd
+import pandera as pa
+from pandera import Column, Check, DataFrameSchema
+
+from utils_financeiro.constantes import ABAS_PROCESSAR, MESES_ORDEM, MESES_NUM_MAP
+
+
+# =============================================================================
+# 1. VALIDAÇÃO DE DADOS (PANDERA)
+# =============================================================================
+
+# Schema para P&L
+SCHEMA_PL = DataFrameSchema(
+    columns={
+        'codigo_centro_gasto': Column(str, nullable=True, coerce=True),
+        'centro_gasto_nome': Column(str, nullable=True, coerce=True),
+        'conta_contabil': Column(str, nullable=False, coerce=True),
+        'mes': Column(str, checks=[Check.isin(MESES_ORDEM)], nullable=False, coerce=True),
+        'tipo_valor': Column(
+            str, 
+            checks=[Check.isin(['Realizado', 'Budget V1', 'Budget V3', 'LY - Actual'])], 
+            nullable=False, 
+            coerce=True
+        ),
+        'valor': Column(float, checks=[Check.greater_than_or_equal_to(0)], nullable=False, coerce=True),
+        'ano': Column(int, checks=[Check.in_range(2000, datetime.now().year + 5)], nullable=False, coerce=True),
+        'data': Column(pa.DateTime, nullable=False, coerce=True)
+    },
+    strict=False,
+    coerce=True
+)
+
+# Schema para Orçamento
+SCHEMA_ORCAMENTO = DataFrameSchema(
+    columns={
+        'base_operacional': Column(str, checks=[Check.isin(ABAS_PROCESSAR)], nullable=False, coerce=True),
+        'fornecedor': Column(str, nullable=False, coerce=True),
+        'servico_consumo': Column(str, nullable=False, coerce=True),
+        'mes': Column(str, checks=[Check.isin(MESES_ORDEM)], nullable=False, coerce=True),
+        'ano': Column(int, checks=[Check.in_range(2020, 2030)], nullable=False, coerce=True),
+        'previsto': Column(float, checks=[Check.greater_than_or_equal_to(0)], nullable=False, coerce=True),
+        'realizado': Column(float, checks=[Check.greater_than_or_equal_to(0)], nullable=False, coerce=True),
+        'diferenca': Column(float, nullable=False, coerce=True),
+        'data': Column(pa.DateTime, nullable=False, coerce=True)
+    },
+    strict=False,
+    coerce=True
+)
+
+
+class ValidadorDados:
+    """Validador de dados financeiros usando Pandera."""
+    
+    def __init__(self):
+        self.schemas = {
+            'pl': SCHEMA_PL,
+            'orcamento': SCHEMA_ORCAMENTO
+        }
+    
+    def _formatar_erros(self, schema_errors: pa.errors.SchemaErrors) -> List[Dict]:
+        """Formata erros do Pandera para exibição."""
+        erros_detalhados = []
+        if schema_errors.failure_cases is not None and not schema_errors.failure_cases.empty:
+            for erro in schema_errors.failure_cases.itertuples():
+                erros_detalhados.append({
+                    'coluna': getattr(erro, 'column', 'DataFrame'),
+                    'check': getattr(erro, 'check', 'N/A'),
+                    'index': getattr(erro, 'index', 'N/A'),
+                    'valor_falha': getattr(erro, 'failure_case', 'N/A')
+                })
+        return erros_detalhados
+    
+    def validar_pl(self, df: pd.DataFrame, lazy: bool = True) -> Tuple[bool, Optional[pd.DataFrame], Dict]:
+        """Valida DataFrame de P&L."""
+        try:
+            df_validado = self.schemas['pl'].validate(df, lazy=lazy)
+            relatorio = {
+                'status': 'SUCESSO',
+                'total_linhas': len(df),
+                'linhas_validas': len(df_validado),
+                'erros': []
+            }
+            return True, df_validado, relatorio
+        except pa.errors.SchemaErrors as e:
+            erros_fmt = self._formatar_erros(e)
+            relatorio = {
+                'status': 'FALHA',
+                'total_linhas': len(df),
+                'linhas_com_erro': len(e.failure_cases) if e.failure_cases is not None else 1,
+                'erros': erros_fmt
+            }
+            return False, None, relatorio
+    
+    def validar_orcamento(self, df: pd.DataFrame, lazy: bool = True) -> Tuple[bool, Optional[pd.DataFrame], Dict]:
+        """Valida DataFrame de Orçamento."""
+        try:
+            if 'data' not in df.columns:
+                if all(col in df.columns for col in ['ano', 'mes']):
+                    df['mes_num'] = df['mes'].map(MESES_NUM_MAP)
+                    df['data'] = pd.to_datetime(
+                        dict(year=df['ano'], month=df['mes_num'], day=1),
+                        errors='coerce'
+                    )
+                else:
+                    raise ValueError("Colunas 'ano' e 'mes' necessárias para criar 'data'.")
+            
+            df_validado = self.schemas['orcamento'].validate(df, lazy=lazy)
+            relatorio = {
+                'status': 'SUCESSO',
+                'total_linhas': len(df),
+                'linhas_validas': len(df_validado),
+                'erros': []
+            }
+            return True, df_validado, relatorio
+        except (pa.errors.SchemaErrors, ValueError) as e:
+            erros_fmt = self._formatar_erros(e) if isinstance(e, pa.errors.SchemaErrors) else [{'erro': str(e)}]
+            relatorio = {
+                'status': 'FALHA',
+                'total_linhas': len(df),
+                'linhas_com_erro': len(df),
+                'erros': erros_fmt
+            }
+            return False, None, relatorio
+    
+    def gerar_relatorio_qualidade(self, df: pd.DataFrame) -> Dict:
+        """Gera relatório de qualidade dos dados."""
+        if df is None or df.empty:
+            return {'colunas': {}}
+        
+        relatorio = {
+            'timestamp': datetime.now().isoformat(),
+            'total_linhas': len(df),
+            'total_colunas': len(df.columns),
+            'colunas': {}
+        }
+        
+        for col in df.columns:
+            stats_col = {
+                'tipo': str(df[col].dtype),
+                'valores_nulos': int(df[col].isna().sum()),
+                'percentual_nulos': float(df[col].isna().sum() / len(df) * 100 if len(df) > 0 else 0),
+                'valores_unicos': int(df[col].nunique())
+            }
+            
+            if pd.api.types.is_numeric_dtype(df[col]):
+                series_no_nan = df[col].dropna()
+                stats_col.update({
+                    'min': float(series_no_nan.min()) if not series_no_nan.empty else None,
+                    'max': float(series_no_nan.max()) if not series_no_nan.empty else None,
+                    'media': float(series_no_nan.mean()) if not series_no_nan.empty else None,
+                    'mediana': float(series_no_nan.median()) if not series_no_nan.empty else None,
+                    'desvio_padrao': float(series_no_nan.std()) if not series_no_nan.empty else None
+                })
+            
+            relatorio['colunas'][col] = stats_col
+        
+        return relatorio
@@ -233,7 +233,14 @@ def setup_page(title: str, icon: str = "📊", layout: str = "wide"):
         AuthService.create_initial_admin()
     except Exception as e:
         st.error(f"Erro Crítico ao conectar no Banco de Dados: {e}")
-        
+
+    # Monitor das bases de referência (invalida apenas os caches afetados)
+    try:
+        from data.referencias_watcher import iniciar_monitor_referencias
+        iniciar_monitor_referencias()
+    except Exception as e:
+        print(f"⚠️ Monitor de referências não iniciado: {e}")
+
     aplicar_estilo_premium()
     
     # -------------------------------------------------------------------------
@@ -344,3 +351,42 @@ def aplicar_tema_plotly(fig):
         paper_bgcolor="rgba(0,0,0,0)",
         font={'color': "white"}
     )
+
+
+def exibir_busca_textual(tabela: str, key: str, ano: int = None, por_pagina: int = 50):
+    """
+    Caixa de busca textual paginada (database/busca_textual.py).
+
+    Args:
+        tabela: 'razao_realizados' ou 'lancamentos_realizados'
+        key: Prefixo das chaves dos widgets (único por página)
+        ano: Restringe ao ano
+        por_pagina: Resultados por página
+    """
+    from database.busca_textual import buscar, LIMITE_CONTAGEM
+
+    col_termo, col_pagina = st.columns([4, 1])
+    with col_termo:
+        termo = st.text_input(
+            "🔍 Buscar (descrição, fornecedor, nº de registro, observações)",
+            placeholder="Ex: localiza aluguel, NF 12345", key=f"{key}_termo"
+        )
+    if not termo:
+        return
+
+    with col_pagina:
+        pagina = st.number_input("Página", min_value=1, value=1, step=1, key=f"{key}_pagina")
+
+    inicio = time.perf_counter()
+    try:
+        df, total = buscar(tabela, termo, ano=ano, pagina=int(pagina), por_pagina=por_pagina)
+    except Exception as e:
+        st.error(f"Erro na busca: {e}")
+        return
+    tempo_ms = (time.perf_counter() - inicio) * 1000
+
+    total_txt = f"{LIMITE_CONTAGEM}+" if total >= LIMITE_CONTAGEM else str(total)
+    paginas = max(1, -(-total // por_pagina))
+    st.caption(f"{total_txt} resultados em {tempo_ms:.0f} ms | página {int(pagina)} de {paginas}")
+    if not df.empty:
+        st.dataframe(df.drop(columns=['relevancia']), use_container_width=True, hide_index=True)